@@ -63,4 +63,22 @@ Create the name of the service account to use
 
 {{- define "q-controller.name" -}}
 {{- default .Release.Name .Values.qcontrollerName | trunc 63 | trimSuffix "-" -}}
-{{- end -}}
\ No newline at end of file
+{{- end -}}
+
+{{/*
+Container probes from a `probes` map ({startup, readiness, liveness}); empty entries are skipped.
+*/}}
+{{- define "q-controller.probes" -}}
+{{- with .startup }}
+startupProbe:
+{{ toYaml . | indent 2 }}
+{{- end }}
+{{- with .readiness }}
+readinessProbe:
+{{ toYaml . | indent 2 }}
+{{- end }}
+{{- with .liveness }}
+livenessProbe:
+{{ toYaml . | indent 2 }}
+{{- end }}
+{{- end }}
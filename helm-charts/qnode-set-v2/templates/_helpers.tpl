@@ -0,0 +1,53 @@
+{{/*
+Create chart name and version as used by the chart label.
+*/}}
+{{- define "qnode-set-v2.chart" -}}
+{{- printf "%s-%s" .Chart.Name .Chart.Version | replace "+" "_" | trunc 63 | trimSuffix "-" }}
+{{- end }}
+
+{{/*
+Effective values of one qnode: the entry deep-merged over .Values.defaults.
+A null in the entry removes that key from the defaults, as it would for
+top-level values (e.g. `probes: {startup: null}`).
+Usage: include "qnode-set-v2.qnode" (dict "root" $ "qnode" $entry) | fromYaml
+*/}}
+{{- define "qnode-set-v2.qnode" -}}
+{{- $merged := mergeOverwrite (deepCopy .root.Values.defaults) (deepCopy .qnode) -}}
+{{- include "qnode-set-v2.dropNulls" (dict "dst" $merged "src" .qnode) -}}
+{{- if not $merged.name }}
+{{- fail "every entry in .Values.qnodes needs a name" }}
+{{- end }}
+{{- toYaml $merged -}}
+{{- end -}}
+
+{{/*
+Delete from .dst every key that is null in .src, recursing into maps present in both.
+*/}}
+{{- define "qnode-set-v2.dropNulls" -}}
+{{- $dst := .dst -}}
+{{- range $k, $v := .src -}}
+{{- if kindIs "invalid" $v -}}
+{{- $_ := unset $dst $k -}}
+{{- else if and (kindIs "map" $v) (kindIs "map" (get $dst $k)) -}}
+{{- include "qnode-set-v2.dropNulls" (dict "dst" (get $dst $k) "src" $v) -}}
+{{- end -}}
+{{- end -}}
+{{- end -}}
+
+{{/*
+Container probes from a `probes` map ({startup, readiness, liveness}); empty entries are skipped.
+*/}}
+{{- define "qnode-set-v2.probes" -}}
+{{- with .startup }}
+startupProbe:
+{{ toYaml . | indent 2 }}
+{{- end }}
+{{- with .readiness }}
+readinessProbe:
+{{ toYaml . | indent 2 }}
+{{- end }}
+{{- with .liveness }}
+livenessProbe:
+{{ toYaml . | indent 2 }}
+{{- end }}
+{{- end }}
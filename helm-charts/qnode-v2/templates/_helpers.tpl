@@ -65,3 +65,21 @@ Create the name of the service account to use
 {{- define "q-node.name" -}}
 {{- default .Release.Name .Values.qnodeName | trunc 63 | trimSuffix "-" -}}
 {{- end -}}
+
+{{/*
+Container probes from a `probes` map ({startup, readiness, liveness}); empty entries are skipped.
+*/}}
+{{- define "q-node.probes" -}}
+{{- with .startup }}
+startupProbe:
+{{ toYaml . | indent 2 }}
+{{- end }}
+{{- with .readiness }}
+readinessProbe:
+{{ toYaml . | indent 2 }}
+{{- end }}
+{{- with .liveness }}
+livenessProbe:
+{{ toYaml . | indent 2 }}
+{{- end }}
+{{- end }}
@@ -61,4 +61,20 @@ Create the name of the service account to use
 {{- end }}
 {{- end }}
 
-
+{{/*
+Container probes from a `probes` map ({startup, readiness, liveness}); empty entries are skipped.
+*/}}
+{{- define "qorchestrator-v2.probes" -}}
+{{- with .startup }}
+startupProbe:
+{{ toYaml . | indent 2 }}
+{{- end }}
+{{- with .readiness }}
+readinessProbe:
+{{ toYaml . | indent 2 }}
+{{- end }}
+{{- with .liveness }}
+livenessProbe:
+{{ toYaml . | indent 2 }}
+{{- end }}
+{{- end }}
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""L2SM address allocation for large qnode fleets.
+
+Allocates addresses for N qnodes attached to one shared network (a few with
+hand-written addresses), then re-runs the allocation against the persisted
+index as a re-deploy would. Reports wall time for both passes.
+
+Usage:
+  python benchmarks/bench_ipam.py --qnodes 1000 10000 --subnet 10.0.0.0/16
+"""
+from __future__ import annotations
+
+import argparse
+import time
+from typing import List
+
+from qd2_bootstrap.models.quditto_deploy_spec import QudittoDeploySpec
+from qd2_bootstrap.utils.ipam import IpamIndex, assign_addresses
+
+
+def _spec(n: int, subnet: str, static_every: int) -> QudittoDeploySpec:
+    qnodes = []
+    for i in range(n):
+        net = {"name": "qnet"}
+        if static_every and i % static_every == 0:
+            net["ip"] = f"{subnet.split('/')[0].rsplit('.', 2)[0]}.{200 + i // 250 % 50}.{i % 250 + 1}"
+        qnodes.append({
+            "name": f"qnode-{i:05d}",
+            "nodek8s": f"worker-{i % 50 + 1}",
+            "chart": "qnode-v2",
+            "values": {"l2sm": {"enabled": True, "networks": [net]}},
+        })
+    return QudittoDeploySpec.model_validate({
+        "charts": {"repo": "https://example.invalid/"},
+        "l2sm": {"networks": {"qnet": {"subnet": subnet}}},
+        "qudittoSetup": {"qnodes": qnodes},
+    })
+
+
+def main(argv: List[str] | None = None) -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--qnodes", type=int, nargs="+", default=[1000, 10000])
+    ap.add_argument("--subnet", default="10.0.0.0/16")
+    ap.add_argument("--static-every", type=int, default=100, help="Every Nth qnode has a hand-written ip (0 = none)")
+    args = ap.parse_args(argv)
+
+    print(f"{'qnodes':>7} {'first ms':>9} {'redeploy ms':>12}")
+    for n in args.qnodes:
+        spec = _spec(n, args.subnet, args.static_every)
+        index = IpamIndex(spec.l2sm.networks)
+        t0 = time.perf_counter()
+        assign_addresses(spec, index)
+        first = (time.perf_counter() - t0) * 1000
+
+        state = index.to_dict()
+        t0 = time.perf_counter()
+        assign_addresses(spec, IpamIndex.from_dict(spec.l2sm.networks, state))
+        again = (time.perf_counter() - t0) * 1000
+        print(f"{n:>7} {first:>9.1f} {again:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""Automatic qnode placement on a synthetic node inventory.
+
+Builds N nodes with mixed allocatable sizes and some background load, then
+places Q qnodes (mixed resource profiles, optional anti-affinity groups) with
+both strategies. Reports wall time, nodes used and the load spread.
+
+Usage:
+  python benchmarks/bench_placement.py --nodes 50 200 --qnodes 1000 5000
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import statistics
+import time
+from typing import List
+
+from qd2_bootstrap.utils.placement import NodeSlot, PlacementError, PlacementRequest, place
+
+_SIZES = [(4000, 8 * 2**30), (8000, 16 * 2**30), (16000, 64 * 2**30)]
+_PROFILES = [(100, 128 * 2**20), (250, 256 * 2**20), (500, 1 * 2**30)]
+
+
+def _nodes(n: int, rng: random.Random) -> List[NodeSlot]:
+    slots = []
+    for i in range(n):
+        cpu, mem = _SIZES[i % len(_SIZES)]
+        slots.append(NodeSlot(
+            f"worker-{i + 1:04d}", cpu, mem,
+            used_cpu_m=int(cpu * rng.uniform(0, 0.3)),
+            used_mem_b=int(mem * rng.uniform(0, 0.3)),
+        ))
+    return slots
+
+
+def _requests(q: int, groups: int, rng: random.Random) -> List[PlacementRequest]:
+    reqs = []
+    for i in range(q):
+        cpu, mem = _PROFILES[rng.randrange(len(_PROFILES))]
+        group = f"g{i % groups}" if groups else None
+        reqs.append(PlacementRequest(f"qnode-{i:05d}", cpu, mem, anti_affinity=group))
+    return reqs
+
+
+def main(argv: List[str] | None = None) -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--nodes", type=int, nargs="+", default=[50, 200])
+    ap.add_argument("--qnodes", type=int, nargs="+", default=[1000, 5000])
+    ap.add_argument("--groups", type=int, default=0, help="Anti-affinity groups (0 = none)")
+    ap.add_argument("--seed", type=int, default=7)
+    args = ap.parse_args(argv)
+
+    print(f"{'nodes':>6} {'qnodes':>7} {'strategy':>9} {'ms':>8} {'used':>5} {'load min':>9} {'load max':>9} {'stdev':>6}")
+    for n in args.nodes:
+        for q in args.qnodes:
+            for strategy in ("spread", "binpack"):
+                rng = random.Random(args.seed)
+                slots = _nodes(n, rng)
+                reqs = _requests(q, args.groups, rng)
+                t0 = time.perf_counter()
+                try:
+                    place(reqs, slots, strategy=strategy)
+                except PlacementError as e:
+                    print(f"{n:>6} {q:>7} {strategy:>9}  {e}")
+                    continue
+                ms = (time.perf_counter() - t0) * 1000
+                loads = [s.load() for s in slots]
+                used = sum(1 for s in slots if s.placed)
+                print(f"{n:>6} {q:>7} {strategy:>9} {ms:>8.1f} {used:>5} {min(loads):>9.2f} "
+                      f"{max(loads):>9.2f} {statistics.pstdev(loads):>6.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""Compare one Helm release per qnode against a single qnode-set release.
+
+For N synthetic qnodes it measures, for both layouts:
+  - CLI-side planning (grouping + value mapping),
+  - the number of helm processes and release secrets a deploy creates,
+  - wall time of `helm template` over the real charts (if `helm` is on PATH).
+
+Usage:
+  python benchmarks/bench_qnode_set.py --qnodes 10 100 500 --charts ../helm-charts
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+from pathlib import Path
+from typing import List
+
+import yaml
+
+from qd2_bootstrap.models.quditto_deploy_spec import QudittoDeploySpec
+from qd2_bootstrap.utils.helm_set import dict_to_set_list
+from qd2_bootstrap.utils.releases import QNODE_SET_CHART, build_release_units
+
+
+def _spec(n: int, workers: int = 8) -> QudittoDeploySpec:
+    return QudittoDeploySpec.model_validate({
+        "charts": {"repo": "https://example.invalid/"},
+        "qudittoSetup": {
+            "qnodes": [
+                {
+                    "name": f"qnode-{i:04d}",
+                    "nodek8s": f"worker-{i % workers + 1}",
+                    "chart": "qnode-v2",
+                    "values": {"typeNode": "hybrid", "l2sm": {"enabled": False}},
+                }
+                for i in range(n)
+            ],
+        },
+    })
+
+
+def _grouped(spec: QudittoDeploySpec):
+    return {("bench", Path("kubeconfig")): [(qn.name, qn) for qn in spec.qudittoSetup.qnodes]}
+
+
+def _helm_template(chart_dir: Path, units) -> float:
+    t0 = time.perf_counter()
+    for unit in units:
+        cmd = ["helm", "template", unit.name, str(chart_dir / unit.chart), "--namespace", unit.namespace]
+        vf = None
+        if unit.chart == QNODE_SET_CHART:
+            fd, vf = tempfile.mkstemp(suffix=".yaml")
+            with os.fdopen(fd, "w") as f:
+                yaml.safe_dump(unit.values, f)
+            cmd += ["-f", vf]
+        else:
+            for expr in dict_to_set_list(unit.values):
+                cmd += ["--set", expr]
+        subprocess.run(cmd, check=True, stdout=subprocess.DEVNULL)
+        if vf:
+            os.unlink(vf)
+    return time.perf_counter() - t0
+
+
+def main(argv: List[str] | None = None) -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--qnodes", type=int, nargs="+", default=[10, 100, 500])
+    ap.add_argument("--charts", type=Path, default=Path(__file__).resolve().parents[2] / "helm-charts")
+    args = ap.parse_args(argv)
+    have_helm = shutil.which("helm") is not None
+
+    print(f"{'qnodes':>7} {'mode':>8} {'releases':>9} {'helm procs':>11} {'plan ms':>9} {'template s':>11}")
+    for n in args.qnodes:
+        spec = _spec(n)
+        for mode in ("release", "set"):
+            t0 = time.perf_counter()
+            units = build_release_units(_grouped(spec), "default", qnode_mode=mode)
+            plan_ms = (time.perf_counter() - t0) * 1000
+            releases = units[("bench", Path("kubeconfig"))]
+            tpl = f"{_helm_template(args.charts, releases):.2f}" if have_helm else "n/a"
+            # One helm process and one release secret (per revision) per release
+            print(f"{n:>7} {mode:>8} {len(releases):>9} {len(releases):>11} {plan_ms:>9.1f} {tpl:>11}")
+    if not have_helm:
+        print("\n'helm' not found on PATH: template timings skipped.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+# qd2_bootstrap/api/__init__.py
+"""Importable entry points: the CLI commands are thin wrappers around these.
+
+Functions take parsed spec models and return typed results with per-step
+timings, so a pipeline can run many operations in one interpreter without
+scraping terminal output. Usage errors and failed preconditions raise
+`ApiError` (carrying the exit code the CLI uses); tool failures are reported
+in the result's `rc`. Tool output goes through `utils.output`, so wrapping a
+call in `capture_to(path)` sends it to a file instead of the terminal.
+"""
+from qd2_bootstrap.api.common import ApiError, Grouped, M, StepTiming, Units, load_spec
+from qd2_bootstrap.api.infra import InfraResult, infra_down, infra_up
+from qd2_bootstrap.api.cluster import (
+    ClusterResult,
+    HostLabels,
+    NodeStatus,
+    PodStatus,
+    StatusResult,
+    cluster_down,
+    cluster_up,
+    status,
+)
+from qd2_bootstrap.api.plan import (
+    DeployPlan,
+    PROBE_MAX_AGE_S,
+    PlacementReport,
+    apply_auto_placement,
+    assign_l2sm,
+    chart_cache_for,
+    chart_cache_stats,
+    collect_components,
+    plan_deploy,
+    resolve_charts,
+    subset_plan,
+)
+from qd2_bootstrap.api.rollout import ReleaseResult, RolloutResult, deploy, teardown
+from qd2_bootstrap.api.drift import DriftResult, drift, plan_drift
+from qd2_bootstrap.api.bundle import BundleResult, debug_bundle
+from qd2_bootstrap.api.startup import StartupResult, startup_report
+from qd2_bootstrap.api.capacity import CapacityResult, plan_capacity, write_capacity_infra
+from qd2_bootstrap.api.up import UpResult, up, wait_api
+
+__all__ = [
+    "ApiError",
+    "Grouped",
+    "M",
+    "StepTiming",
+    "Units",
+    "load_spec",
+    "InfraResult",
+    "infra_down",
+    "infra_up",
+    "ClusterResult",
+    "HostLabels",
+    "NodeStatus",
+    "PodStatus",
+    "StatusResult",
+    "cluster_down",
+    "cluster_up",
+    "status",
+    "DeployPlan",
+    "PROBE_MAX_AGE_S",
+    "PlacementReport",
+    "apply_auto_placement",
+    "assign_l2sm",
+    "chart_cache_for",
+    "chart_cache_stats",
+    "collect_components",
+    "plan_deploy",
+    "resolve_charts",
+    "subset_plan",
+    "ReleaseResult",
+    "RolloutResult",
+    "deploy",
+    "teardown",
+    "DriftResult",
+    "drift",
+    "plan_drift",
+    "BundleResult",
+    "debug_bundle",
+    "StartupResult",
+    "startup_report",
+    "CapacityResult",
+    "plan_capacity",
+    "write_capacity_infra",
+    "UpResult",
+    "up",
+    "wait_api",
+]
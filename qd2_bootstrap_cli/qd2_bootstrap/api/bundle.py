@@ -0,0 +1,189 @@
+# qd2_bootstrap/api/bundle.py
+"""Quditto debug bundle: `debug_bundle`."""
+from __future__ import annotations
+
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from functools import partial
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import yaml
+from rich.markup import escape
+
+from qd2_bootstrap.api.common import ApiError, StepTiming, timed
+from qd2_bootstrap.api.plan import plan_deploy
+from qd2_bootstrap.models.quditto_deploy_spec import QudittoDeploySpec
+from qd2_bootstrap.utils.debug_bundle import (
+    BundleWriter,
+    Producer,
+    node_conditions,
+    pod_logs,
+    related_events,
+    release_record,
+    stream_entries,
+)
+from qd2_bootstrap.utils.drift import latest_releases
+from qd2_bootstrap.utils.kubectl import Kubectl
+from qd2_bootstrap.utils.output import current_log, emit, log_to
+from qd2_bootstrap.utils.releases import ReleaseUnit, TargetKey
+
+
+@dataclass
+class BundleResult:
+    """A written debug bundle; `errors` lists entries (or clusters) that could not be fully collected."""
+    path: Path
+    entries: int = 0
+    bytes: int = 0
+    errors: Dict[str, str] = field(default_factory=dict)
+    steps: List[StepTiming] = field(default_factory=list)
+
+
+def _bundle_dir(cluster_name: str) -> str:
+    return "default" if cluster_name == "__single__" else cluster_name
+
+
+def _bundle_cluster(
+    cluster_name: str,
+    kc_path: Path,
+    items: List[ReleaseUnit],
+    tail: Optional[int],
+    since: Optional[str],
+    previous: bool,
+    timeout_s: float,
+) -> Tuple[List[Tuple[str, object]], List[Tuple[str, Producer]]]:
+    """Bulk reads for one cluster (nodes, Helm secrets, pods and events per namespace).
+
+    Returns the small documents to add as they are, and the jobs that stream
+    each pod's description and container logs.
+    """
+    kube = Kubectl(kubeconfig=kc_path)
+    base = _bundle_dir(cluster_name)
+    docs: List[Tuple[str, object]] = []
+    docs.append((f"{base}/nodes.json", node_conditions(kube.get_json(["nodes"]).get("items", []))))
+    releases = latest_releases(kube.get_json(["secrets"], selector="owner=helm").get("items", []))
+
+    jobs: List[Tuple[str, Producer]] = []
+    for ns in sorted({u.namespace for u in items}):
+        ns_units = [u for u in items if u.namespace == ns]
+        pods = kube.get_json(["pods"], namespace=ns).get("items", [])
+        events = kube.get_json(["events"], namespace=ns).get("items", [])
+        docs.append((f"{base}/{ns}/events.json", related_events(events, [a for u in ns_units for a in u.workloads])))
+        by_app: Dict[str, List[dict]] = defaultdict(list)
+        for pod in pods:
+            by_app[(pod.get("metadata", {}).get("labels") or {}).get("app", "")].append(pod)
+
+        for unit in ns_units:
+            rdir = f"{base}/{ns}/{unit.name}"
+            docs.append((f"{rdir}/release.yaml", release_record(releases.get((ns, unit.name)))))
+            for app in unit.workloads:
+                for pod in by_app.get(app, []):
+                    logs = pod_logs(pod)
+                    pdir = f"{rdir}/{logs.pod}"
+                    ns_args = ["-n", ns]
+                    jobs.append((f"{pdir}/describe.txt", partial(kube.run_to, ["describe", "pod", logs.pod, *ns_args], timeout=timeout_s)))
+                    log_args = ["--timestamps"]
+                    if tail is not None:
+                        log_args += ["--tail", str(tail)]
+                    if since:
+                        log_args += ["--since", since]
+                    for container, restarted in logs.containers:
+                        cmd = ["logs", logs.pod, "-c", container, *ns_args, *log_args]
+                        jobs.append((f"{pdir}/{container}.log", partial(kube.run_to, cmd, timeout=timeout_s)))
+                        if previous and restarted:
+                            jobs.append((f"{pdir}/{container}.previous.log",
+                                         partial(kube.run_to, [*cmd, "--previous"], timeout=timeout_s)))
+    return docs, jobs
+
+
+def debug_bundle(
+    spec: QudittoDeploySpec,
+    out: Path,
+    kubeconfig: Optional[Path] = None,
+    namespace: Optional[str] = None,
+    multi_cluster: bool = False,
+    qnode_mode: str = "release",
+    set_group: str = "cluster",
+    spec_file: Optional[Path] = None,
+    workers: int = 16,
+    tail: Optional[int] = None,
+    since: Optional[str] = None,
+    previous: bool = True,
+    timeout_s: float = 60,
+) -> BundleResult:
+    """Collect everything needed to debug the spec's releases into one .tar.gz.
+
+    Per cluster: node conditions, plus per namespace the events of our
+    workloads; per release, what Helm has (revision, status, values); per pod,
+    `kubectl describe` and the logs of every container (init containers and
+    the PQC sidecars included, `--previous` too after a restart). Clusters are
+    read in parallel with bulk calls; describes and logs then run on a pool of
+    `workers` and are streamed through temporary files into the archive, so
+    memory use does not grow with log size. Unreadable pieces are listed in
+    `errors` (and in the bundle's summary.json) rather than aborting the bundle.
+    """
+    if workers < 1:
+        raise ApiError("workers must be >= 1", code=2)
+    plan = plan_deploy(
+        spec, kubeconfig, namespace, multi_cluster, qnode_mode, set_group,
+        spec_file=spec_file, placement=False, addressing=False,
+    )
+    out = Path(out)
+    result = BundleResult(path=out, steps=plan.steps)
+    if not plan.units:
+        raise ApiError("No releases in the spec: nothing to collect", code=2)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    stamp = time.strftime("%Y%m%d-%H%M%S")
+    writer = BundleWriter(out, root=f"quditto-debug-{stamp}")
+    parent_log = current_log()
+    try:
+        if spec_file is not None:
+            writer.add_bytes("spec.yaml", Path(spec_file).read_bytes())
+
+        docs: List[Tuple[str, object]] = []
+        jobs: List[Tuple[str, Producer]] = []
+
+        def _read(target: TargetKey, items: List[ReleaseUnit]) -> Tuple[List[Tuple[str, object]], List[Tuple[str, Producer]]]:
+            with log_to(parent_log):
+                emit(f"  [dim]reading {escape(_bundle_dir(target[0]))}: {len(items)} release(s)[/]")
+                return _bundle_cluster(target[0], target[1], items, tail, since, previous, timeout_s)
+
+        with timed(result.steps, "read"), ThreadPoolExecutor(max_workers=max(1, len(plan.units))) as pool:
+            futures = {pool.submit(_read, target, items): target[0] for target, items in plan.units.items()}
+            for fut, cluster_name in futures.items():
+                try:
+                    queued, cluster_jobs = fut.result()
+                except (RuntimeError, ValueError) as e:
+                    result.errors[_bundle_dir(cluster_name)] = str(e)
+                    continue
+                docs.extend(queued)
+                jobs.extend(cluster_jobs)
+
+        for name, obj in docs:
+            if name.endswith(".yaml"):
+                writer.add_bytes(name, yaml.safe_dump(obj, sort_keys=False).encode())
+            else:
+                writer.add_json(name, obj)
+
+        with timed(result.steps, "logs"):
+            emit(f"  [dim]collecting {len(jobs)} describe/log file(s) with {workers} worker(s)[/]")
+            stream_entries(writer, jobs, workers=workers)
+
+        for entry in writer.entries:
+            if entry.error:
+                result.errors[entry.path] = entry.error
+        writer.add_json("summary.json", {
+            "created": stamp,
+            "namespace": plan.namespace,
+            "clusters": sorted(_bundle_dir(t[0]) for t in plan.units),
+            "releases": plan.release_count,
+            "entries": len(writer.entries),
+            "errors": result.errors,
+        })
+    finally:
+        writer.close()
+    result.entries = len(writer.entries)
+    result.bytes = out.stat().st_size
+    return result
@@ -0,0 +1,105 @@
+# qd2_bootstrap/api/capacity.py
+"""Capacity planning: `plan_capacity` / `write_capacity_infra`."""
+from __future__ import annotations
+
+from collections import defaultdict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import yaml
+
+from qd2_bootstrap.api.common import ApiError, StepTiming, timed, load_spec
+from qd2_bootstrap.models.infra_spec import InfraSpec
+from qd2_bootstrap.models.quditto_deploy_spec import ComponentRef, QudittoDeploySpec, ResourceProfile
+from qd2_bootstrap.utils.capacity import (
+    CapacityOption,
+    CapacityPlan,
+    Flavor,
+    infra_setup_update,
+    size_workers,
+    worker_demand,
+)
+from qd2_bootstrap.utils.locks import atomic_write_text
+from qd2_bootstrap.utils.placement import cpu_millis, mem_bytes
+from qd2_bootstrap.utils.sizing import expand_sizing
+
+# infraSetup fields to fill in when no base InfraSpec is given
+_INFRA_SKELETON = {
+    "countCp": 1,
+    "imageName": "<image-name>",
+    "flavorName": "<flavor-name>",
+    "keypairName": "<openstack-keypair-name>",
+    "networkUuid": "<openstack-network-uuid>",
+    "openstack": {
+        "authUrl": "<openstack-auth-url>",
+        "region": "<openstack-region>",
+        "userName": "<openstack-username>",
+        "tenantId": "<openstack-tenant-id>",
+        "domainName": "<openstack-domain-name>",
+    },
+}
+
+
+@dataclass
+class CapacityResult:
+    plans: Dict[str, CapacityPlan]  # per target cluster ("default" for single-cluster specs)
+    infra_file: Optional[Path] = None
+    steps: List[StepTiming] = field(default_factory=list)
+
+
+def plan_capacity(
+    spec: QudittoDeploySpec,
+    flavors: List[Flavor],
+    profiles: Optional[Dict[str, ResourceProfile]] = None,
+    headroom: float = 1.2,
+    reserved_cpu: str = "300m",
+    reserved_memory: str = "1Gi",
+    cluster: Optional[str] = None,
+    min_workers: int = 1,
+    mix: bool = True,
+) -> CapacityResult:
+    """Size the workers of each target cluster for the spec's components (see `utils.capacity`)."""
+    try:
+        reserved = (cpu_millis(reserved_cpu), mem_bytes(reserved_memory))
+    except ValueError as e:
+        raise ApiError(str(e), code=2)
+    expand_sizing(spec)
+    per_cluster: Dict[str, List[Tuple[str, ComponentRef]]] = defaultdict(list)
+    for release, comp in spec.iter_components():
+        try:
+            target = spec.resolve_target_cluster(comp) if spec.clusters else "default"
+        except ValueError as e:
+            raise ApiError(f"{release}: {e}", code=2)
+        per_cluster[target].append((release, comp))
+    if cluster is not None:
+        if cluster not in per_cluster:
+            raise ApiError(f"no components target cluster {cluster!r}", code=2,
+                           details=[f"clusters in the spec: {', '.join(sorted(per_cluster)) or 'none'}"])
+        per_cluster = {cluster: per_cluster[cluster]}
+
+    result = CapacityResult({})
+    with timed(result.steps, "plan"):
+        for name, comps in sorted(per_cluster.items()):
+            requests = worker_demand(comps, spec.placement, profiles, headroom)
+            result.plans[name] = size_workers(requests, flavors, *reserved, min_workers=min_workers, mix=mix)
+    return result
+
+
+def write_capacity_infra(
+    option: CapacityOption, out: Path, base: Optional[Path] = None, cluster_name: str = "quditto",
+) -> Path:
+    """Write an InfraSpec sized by `option`: `base` with its workers replaced, or a
+    skeleton with placeholders for the OpenStack fields."""
+    if base is not None:
+        load_spec(base, InfraSpec)  # refuse to build on an invalid spec
+        doc = yaml.safe_load(Path(base).read_text())
+    else:
+        doc = {"infraSetup": {"clusterName": cluster_name, **_INFRA_SKELETON}}
+    doc["infraSetup"] = infra_setup_update(option, doc["infraSetup"])
+    try:
+        InfraSpec.model_validate(doc)
+    except Exception as e:
+        raise ApiError(f"Generated InfraSpec is invalid: {e}", code=2)
+    atomic_write_text(Path(out), yaml.safe_dump(doc, sort_keys=False))
+    return Path(out)
@@ -0,0 +1,355 @@
+# qd2_bootstrap/api/cluster.py
+"""Cluster (KubeOne): `cluster_up` / `cluster_down`, and `status`."""
+from __future__ import annotations
+
+import shutil
+import tempfile
+from contextlib import nullcontext
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from qd2_bootstrap.api.common import ApiError, StepTiming, timed
+from qd2_bootstrap.api.infra import InfraResult, infra_up
+from qd2_bootstrap.models.cluster_spec import ClusterSpec
+from qd2_bootstrap.models.infra_spec import InfraSpec
+from qd2_bootstrap.utils.kubectl import Kubectl
+from qd2_bootstrap.utils.kubeone import KubeOneClient
+from qd2_bootstrap.utils.kubeone_templates import render_manifest
+from qd2_bootstrap.utils.locks import atomic_copy, atomic_write_text, cluster_lock, workdir_lock
+from qd2_bootstrap.utils.output import emit
+from qd2_bootstrap.utils.terraform import TerraformClient, created_instance, state_instance_ips
+from qd2_bootstrap.utils.wait_ssh import SshWaiter
+
+
+@dataclass
+class ClusterResult:
+    name: str
+    action: str  # "apply" or "reset"
+    rc: int = 0
+    kubeconfig: Optional[Path] = None
+    run_dir: Optional[Path] = None  # kept for inspection when KubeOne fails
+    infra: Optional[InfraResult] = None
+    warnings: List[str] = field(default_factory=list)
+    steps: List[StepTiming] = field(default_factory=list)
+
+    @property
+    def ok(self) -> bool:
+        return self.rc == 0
+
+
+def _run_dir(cluster_name: str) -> Path:
+    """Private working directory for one KubeOne run (manifest + generated kubeconfig).
+
+    KubeOne writes its outputs to its CWD; giving each run its own directory keeps
+    parallel invocations (and the caller's CWD) from seeing each other's files.
+    """
+    return Path(tempfile.mkdtemp(prefix=f"qd2-k1-{cluster_name}-"))
+
+
+def _write_manifest(run_dir: Path, content: str) -> Path:
+    """Write the KubeOne manifest into the run directory and return its path."""
+    p = run_dir / "kubeone.yaml"
+    atomic_write_text(p, content, mode=0o600)
+    return p
+
+
+def _expected_kubeone_kubeconfig(cluster_name: str, base_dir: Path) -> Path:
+    """KubeOne drops '<cluster_name>-kubeconfig' in its working directory."""
+    return base_dir / f"{cluster_name}-kubeconfig"
+
+
+def _save_kubeconfig(cluster_name: str, src_dir: Path, outdir: Path) -> Path:
+    """Copy kubeone-produced kubeconfig to a stable path ./clusters/<name>/kubeconfig."""
+    src = _expected_kubeone_kubeconfig(cluster_name, src_dir)
+    if not src.exists():
+        raise FileNotFoundError(f"KubeOne kubeconfig not found: {src}")
+    dst = outdir / "kubeconfig"
+    # Atomic replace: concurrent readers (quditto deploy, fleet) never see a partial file
+    atomic_copy(src, dst, mode=0o600)
+    return dst
+
+
+def _helm_releases(spec: ClusterSpec) -> List[dict]:
+    """Normalize helmReleases to dicts used by the template renderer."""
+    return [
+        {"chart": r.chart, "repoURL": r.repoURL, "namespace": r.namespace, "version": r.version, "values": r.values}
+        for r in spec.clusterSetup.helmReleases
+    ]
+
+
+HostLabels = Dict[str, Dict[str, str]]
+
+
+def _derive_hosts_from_infra(workdir: Path) -> Tuple[List[str], List[str], HostLabels]:
+    """Read Terraform outputs (control_plane_ip, worker_ips, worker_pools) to build host lists and node labels."""
+    outputs = TerraformClient(workdir=workdir).output_json()
+    cp = outputs.get("control_plane_ip", {}).get("value")
+    workers = outputs.get("worker_ips", {}).get("value", [])
+    if not cp or not isinstance(workers, list):
+        raise ApiError("Terraform outputs missing 'control_plane_ip' or 'worker_ips'")
+    labels: HostLabels = {}
+    # Absent in workdirs created before worker pools: no labels then
+    for pool in (outputs.get("worker_pools", {}).get("value") or {}).values():
+        for h in pool.get("hosts", []):
+            labels[h["ip"]] = dict(pool.get("labels") or {})
+    return [cp], workers, labels
+
+
+def _cluster_hosts(spec: ClusterSpec, infra_workdir: Optional[Path]) -> Tuple[List[str], List[str], HostLabels]:
+    """Control-plane and worker addresses, plus the node labels of hosts that declare any."""
+    s = spec.clusterSetup
+    if infra_workdir:
+        with workdir_lock(infra_workdir):
+            return _derive_hosts_from_infra(infra_workdir)
+    hosts = s.existingHosts.controlPlane + s.existingHosts.workers  # type: ignore
+    cp = [h.privateAddress for h in s.existingHosts.controlPlane]  # type: ignore
+    workers = [h.privateAddress for h in s.existingHosts.workers]  # type: ignore
+    return cp, workers, {h.privateAddress: dict(h.labels) for h in hosts if h.labels}
+
+
+def _probe_created(waiter: SshWaiter, workdir: Path) -> Callable[[dict], None]:
+    """`apply -json` event handler that hands each created instance's IP to `waiter`.
+
+    The events carry no attributes, so the IP is read from the local state,
+    which may lag the event: unresolved instances are retried on later events.
+    Hosts never resolved here are added from the outputs after the apply.
+    """
+    pending: Set[str] = set()
+
+    def on_event(event: dict) -> None:
+        addr = created_instance(event)
+        if addr:
+            pending.add(addr)
+        if not pending:
+            return
+        ips = state_instance_ips(workdir)
+        for a in [a for a in pending if a in ips]:
+            pending.discard(a)
+            waiter.add(ips[a])
+    return on_event
+
+
+def _cluster_manifest(
+    spec: ClusterSpec, cp_addrs: List[str], worker_addrs: List[str], host_labels: Optional[HostLabels] = None
+) -> str:
+    # Absolute key path: KubeOne runs in its own directory
+    s = spec.clusterSetup
+    return render_manifest(
+        name=s.name,
+        k8s_version=s.kubernetesVersion,
+        ssh_user=s.ssh.user,
+        ssh_key=str(Path(s.ssh.privateKeyFile).expanduser().resolve()),
+        cp_addrs=cp_addrs,
+        worker_addrs=worker_addrs,
+        api_host=s.apiEndpoint.host or cp_addrs[0],
+        api_port=s.apiEndpoint.port,
+        pod_subnet=s.networking.podSubnet,
+        svc_subnet=s.networking.serviceSubnet,
+        external_cni=bool(s.cni.get("external", False)),
+        helm_releases=_helm_releases(spec),
+        host_labels=host_labels,
+    )
+
+
+def cluster_up(
+    spec: ClusterSpec,
+    infra: Optional[InfraSpec] = None,
+    use_infra_tfstate: bool = False,
+    auto_approve: bool = True,
+    kubeconfig_outdir: Optional[Path] = None,
+    wait_ssh: bool = True,
+    ssh_timeout: int = 300,
+) -> ClusterResult:
+    """Apply the cluster with KubeOne, provisioning `infra` with Terraform first if given.
+
+    The kubeconfig is saved to `kubeconfig_outdir` (default ./clusters/<name>).
+    """
+    s = spec.clusterSetup
+    result = ClusterResult(s.name, "apply")
+    tfstate_path: Optional[Path] = None
+    infra_workdir = Path(s.fromInfra.workdir).expanduser().resolve() if s.fromInfra else None
+
+    waiter = SshWaiter(s.ssh.user, Path(s.ssh.privateKeyFile).expanduser().resolve(),
+                       timeout_s=ssh_timeout, every_s=5) if wait_ssh else None
+    # One bootstrap per cluster at a time; other invocations wait for the lock
+    with cluster_lock(s.name), (waiter or nullcontext()):
+        if infra is not None:
+            emit("[bold cyan]Provisioning infra (Terraform)...[/]")
+            on_event = None
+            if waiter is not None:
+                # Probe each VM as soon as Terraform has created it
+                on_event = _probe_created(waiter, Path(infra.infraSetup.workdir).expanduser().resolve())
+            with timed(result.steps, "infra"):
+                result.infra = infra_up(infra, auto_approve=True, on_event=on_event)
+            if not result.infra.ok:
+                result.rc = result.infra.rc
+                return result
+            emit("[green]Infra apply complete.[/]")
+            # Use this workdir as if the spec had fromInfra
+            infra_workdir = result.infra.workdir
+
+        if infra_workdir:
+            tfstate_path = infra_workdir / "terraform.tfstate"
+        with timed(result.steps, "hosts"):
+            cp_addrs, worker_addrs, host_labels = _cluster_hosts(spec, infra_workdir)
+
+        if waiter is not None:
+            early = len(waiter.added())
+            for addr in cp_addrs + worker_addrs:
+                waiter.add(addr)
+            if early:
+                emit(f"[dim]{early} host(s) were probed during the Terraform apply[/]")
+            with timed(result.steps, "wait-ssh"):
+                if not waiter.wait():
+                    result.rc = 3
+                    return result
+
+        run_dir = _run_dir(s.name)
+        man_path = _write_manifest(run_dir, _cluster_manifest(spec, cp_addrs, worker_addrs, host_labels))
+        emit(f"[cyan]KubeOne manifest:[/] {man_path}")
+
+        with timed(result.steps, "kubeone-apply"):
+            result.rc = KubeOneClient(workdir=run_dir).apply(
+                manifest_path=man_path,
+                tfstate_path=(tfstate_path if (tfstate_path and use_infra_tfstate) else None),
+                auto_approve=auto_approve,
+            )
+        if result.rc != 0:
+            result.run_dir = run_dir
+            emit(f"[dim]KubeOne run directory kept for inspection: {run_dir}[/]")
+            return result
+        emit("[green]KubeOne apply complete.[/]")
+
+        outdir = kubeconfig_outdir or (Path("./clusters") / s.name)
+        try:
+            result.kubeconfig = _save_kubeconfig(cluster_name=s.name, src_dir=run_dir, outdir=outdir)
+            emit(f"[green]Kubeconfig saved:[/] {result.kubeconfig}")
+            emit(f"  export KUBECONFIG={result.kubeconfig}")
+            shutil.rmtree(run_dir, ignore_errors=True)
+        except FileNotFoundError as e:
+            result.run_dir = run_dir
+            result.warnings.append(str(e))
+            emit(f"[yellow]Warning:[/] {e}")
+            emit(f"[red]No kubeconfig found after KubeOne apply.[/] Run directory: {run_dir}")
+        except OSError as e:
+            # Fallback: use the kubeconfig KubeOne left in this run's directory
+            result.run_dir = run_dir
+            result.kubeconfig = _expected_kubeone_kubeconfig(s.name, run_dir)
+            result.warnings.append(f"could not save kubeconfig to {outdir}: {e}")
+            emit(f"[yellow]Warning:[/] could not save kubeconfig to {outdir}: {e}")
+            emit(f"[yellow]Using kubeconfig from KubeOne run directory:[/] {result.kubeconfig}")
+    return result
+
+
+def cluster_down(spec: ClusterSpec, auto_approve: bool = True, destroy_infra: bool = False) -> ClusterResult:
+    """`kubeone reset`, then (with `destroy_infra`) `terraform destroy` of a fromInfra workdir."""
+    s = spec.clusterSetup
+    result = ClusterResult(s.name, "reset")
+    tf_workdir = Path(s.fromInfra.workdir).expanduser().resolve() if s.fromInfra else None
+    with timed(result.steps, "hosts"):
+        cp_addrs, worker_addrs, _ = _cluster_hosts(spec, tf_workdir)
+    manifest = _cluster_manifest(spec, cp_addrs, worker_addrs)
+
+    with cluster_lock(s.name):
+        run_dir = _run_dir(s.name)
+        man_path = _write_manifest(run_dir, manifest)
+        with timed(result.steps, "kubeone-reset"):
+            result.rc = KubeOneClient(workdir=run_dir).reset(manifest_path=man_path, auto_approve=auto_approve)
+        if result.rc != 0:
+            result.run_dir = run_dir
+            emit(f"[dim]KubeOne run directory kept for inspection: {run_dir}[/]")
+            return result
+        shutil.rmtree(run_dir, ignore_errors=True)
+        emit("[green]Cluster successfully reset (Kubernetes uninstalled).[/]")
+
+        if destroy_infra and tf_workdir:
+            emit("[yellow]Destroying Terraform infrastructure...[/]")
+            result.infra = InfraResult(tf_workdir, "destroy")
+            with workdir_lock(tf_workdir), timed(result.steps, "infra-destroy"):
+                result.infra.rc = TerraformClient(workdir=tf_workdir).destroy(auto_approve=auto_approve)
+            result.rc = result.infra.rc
+            if result.rc == 0:
+                emit("[green]Terraform infra destroyed.[/]")
+    return result
+
+
+# -----------------------------------------------------------------------------
+# Cluster status
+# -----------------------------------------------------------------------------
+@dataclass
+class NodeStatus:
+    name: str
+    ready: bool
+    unschedulable: bool
+    roles: List[str]
+    version: str
+    internal_ip: str
+
+
+@dataclass
+class PodStatus:
+    name: str
+    namespace: str
+    phase: str
+    ready: str  # "ready/total" containers
+    restarts: int
+    node: str
+
+
+@dataclass
+class StatusResult:
+    kubeconfig: Path
+    nodes: List[NodeStatus] = field(default_factory=list)
+    system_pods: List[PodStatus] = field(default_factory=list)
+    steps: List[StepTiming] = field(default_factory=list)
+
+    @property
+    def ready(self) -> bool:
+        return bool(self.nodes) and all(n.ready for n in self.nodes)
+
+
+def _node_status(obj: dict) -> NodeStatus:
+    meta, status = obj.get("metadata", {}), obj.get("status", {})
+    labels = meta.get("labels") or {}
+    prefix = "node-role.kubernetes.io/"
+    return NodeStatus(
+        name=meta.get("name", ""),
+        ready=any(c.get("type") == "Ready" and c.get("status") == "True" for c in status.get("conditions") or []),
+        unschedulable=bool(obj.get("spec", {}).get("unschedulable", False)),
+        roles=sorted(k[len(prefix):] for k in labels if k.startswith(prefix)),
+        version=status.get("nodeInfo", {}).get("kubeletVersion", ""),
+        internal_ip=next((a.get("address", "") for a in status.get("addresses") or [] if a.get("type") == "InternalIP"), ""),
+    )
+
+
+def _pod_status(obj: dict) -> PodStatus:
+    meta, status = obj.get("metadata", {}), obj.get("status", {})
+    containers = status.get("containerStatuses") or []
+    return PodStatus(
+        name=meta.get("name", ""),
+        namespace=meta.get("namespace", ""),
+        phase=status.get("phase", ""),
+        ready=f"{sum(1 for c in containers if c.get('ready'))}/{len(containers)}",
+        restarts=sum(int(c.get("restartCount", 0)) for c in containers),
+        node=obj.get("spec", {}).get("nodeName", ""),
+    )
+
+
+def status(kubeconfig: Path, system_pods: bool = True) -> StatusResult:
+    """Nodes and (optionally) kube-system pods of the cluster behind `kubeconfig`."""
+    kc = Path(kubeconfig)
+    if not kc.exists():
+        raise ApiError(f"kubeconfig not found at: {kc}", code=2)
+    result = StatusResult(kc)
+    kube = Kubectl(kubeconfig=kc)
+    try:
+        with timed(result.steps, "nodes"):
+            result.nodes = [_node_status(n) for n in kube.get_json(["nodes"]).get("items", [])]
+        if system_pods:
+            with timed(result.steps, "system-pods"):
+                items = kube.get_json(["pods"], namespace="kube-system").get("items", [])
+                result.system_pods = [_pod_status(p) for p in items]
+    except (RuntimeError, ValueError) as e:
+        raise ApiError(f"Cluster read failed: {e}")
+    return result
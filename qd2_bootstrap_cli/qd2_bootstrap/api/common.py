@@ -0,0 +1,58 @@
+# qd2_bootstrap/api/common.py
+"""Shared by every API module: errors, step timings and spec loading."""
+from __future__ import annotations
+
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple, Type, TypeVar
+
+from pydantic import BaseModel
+
+from qd2_bootstrap.models.quditto_deploy_spec import ComponentRef
+from qd2_bootstrap.utils.releases import ReleaseUnit, TargetKey
+from qd2_bootstrap.utils.spec_loader import shared_spec_cache
+from qd2_bootstrap.utils.validation import Issue
+
+M = TypeVar("M", bound=BaseModel)
+
+Grouped = Dict[TargetKey, List[Tuple[str, ComponentRef]]]
+Units = Dict[TargetKey, List[ReleaseUnit]]
+
+
+class ApiError(Exception):
+    """An operation could not run; `code` is the exit code the CLI uses for it."""
+
+    def __init__(self, message: str, code: int = 1, details: Optional[List[str]] = None,
+                 issues: Optional[List[Issue]] = None):
+        super().__init__(message)
+        self.code = code
+        self.details = list(details or [])
+        self.issues = list(issues or [])
+
+
+@dataclass
+class StepTiming:
+    name: str
+    seconds: float
+
+
+@contextmanager
+def timed(steps: List[StepTiming], name: str) -> Iterator[None]:
+    t0 = time.monotonic()
+    try:
+        yield
+    finally:
+        steps.append(StepTiming(name, time.monotonic() - t0))
+
+
+def load_spec(path: Path, model: Type[M]) -> M:
+    """Parse and validate one spec file (raises ApiError with code 2).
+
+    Repeat loads of unchanged content come from the on-disk spec cache.
+    """
+    try:
+        return shared_spec_cache().load(Path(path), model)
+    except Exception as e:
+        raise ApiError(f"Spec validation error: {e}", code=2)
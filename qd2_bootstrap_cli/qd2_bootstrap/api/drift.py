@@ -0,0 +1,73 @@
+# qd2_bootstrap/api/drift.py
+"""Quditto drift: `drift` / `plan_drift`."""
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import List, Optional
+
+from qd2_bootstrap.api.common import StepTiming, timed
+from qd2_bootstrap.api.plan import DeployPlan, plan_deploy
+from qd2_bootstrap.models.quditto_deploy_spec import QudittoDeploySpec
+from qd2_bootstrap.utils.drift import DriftFinding, detect_drift, latest_releases
+from qd2_bootstrap.utils.kubectl import Kubectl
+from qd2_bootstrap.utils.releases import ReleaseUnit
+
+
+@dataclass
+class DriftResult:
+    """Findings across every target cluster; `errors` lists clusters that could not be read."""
+    findings: List[DriftFinding] = field(default_factory=list)
+    errors: List[str] = field(default_factory=list)
+    steps: List[StepTiming] = field(default_factory=list)
+
+    @property
+    def drift(self) -> bool:
+        return bool(self.findings)
+
+
+def _cluster_drift(cluster_name: str, kc_path: Path, items: List[ReleaseUnit]) -> List[DriftFinding]:
+    """Two bulk reads per cluster: every Helm release secret and the relevant pods."""
+    kube = Kubectl(kubeconfig=kc_path)
+    secrets = kube.get_json(["secrets"], selector="owner=helm").get("items", [])
+    namespaces = {u.namespace for u in items}
+    pods_ns = next(iter(namespaces)) if len(namespaces) == 1 else None
+    pods = [
+        p for p in kube.get_json(["pods"], namespace=pods_ns).get("items", [])
+        if p.get("metadata", {}).get("namespace") in namespaces
+    ]
+    return detect_drift(cluster_name, items, latest_releases(secrets), pods)
+
+
+def plan_drift(plan: DeployPlan) -> DriftResult:
+    """Drift of an already built plan: two bulk reads per cluster, clusters in parallel."""
+    result = DriftResult()
+    with timed(result.steps, "drift"), ThreadPoolExecutor(max_workers=max(1, len(plan.units))) as pool:
+        futures = {
+            pool.submit(_cluster_drift, cluster_name, kc_path, items): cluster_name
+            for (cluster_name, kc_path), items in plan.units.items()
+        }
+        for fut, cluster_name in futures.items():
+            try:
+                result.findings.extend(fut.result())
+            except (RuntimeError, ValueError) as e:
+                result.errors.append(f"{cluster_name}: {e}")
+    return result
+
+
+def drift(
+    spec: QudittoDeploySpec,
+    kubeconfig: Optional[Path] = None,
+    namespace: Optional[str] = None,
+    multi_cluster: bool = False,
+    qnode_mode: str = "release",
+    set_group: str = "cluster",
+    spec_file: Optional[Path] = None,
+) -> DriftResult:
+    """Compare the spec with the releases and qnode pods installed, clusters in parallel."""
+    # Sticky auto placement resolves running components to their current node
+    plan = plan_deploy(spec, kubeconfig, namespace, multi_cluster, qnode_mode, set_group, spec_file=spec_file)
+    result = plan_drift(plan)
+    result.steps[:0] = plan.steps
+    return result
@@ -0,0 +1,84 @@
+# qd2_bootstrap/api/infra.py
+"""Infra (Terraform): `infra_up` / `infra_down`."""
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from qd2_bootstrap.api.common import ApiError, StepTiming, timed
+from qd2_bootstrap.models.infra_spec import InfraSpec
+from qd2_bootstrap.utils.infra_writer import env_for_openstack, prepare_tf_workdir
+from qd2_bootstrap.utils.locks import workdir_lock
+from qd2_bootstrap.utils.output import emit
+from qd2_bootstrap.utils.terraform import TerraformClient
+
+
+@dataclass
+class InfraResult:
+    workdir: Path
+    action: str  # "apply", "plan", "destroy" or "skipped"
+    rc: int = 0
+    steps: List[StepTiming] = field(default_factory=list)
+
+    @property
+    def ok(self) -> bool:
+        return self.rc == 0
+
+
+def _openstack_env(spec: InfraSpec) -> Dict[str, str]:
+    try:
+        return env_for_openstack(spec)
+    except ValueError as e:
+        raise ApiError(str(e), code=2)
+
+
+def infra_up(
+    spec: InfraSpec,
+    force_main: bool = False,
+    dry_run: bool = False,
+    auto_approve: bool = True,
+    on_event: Optional[Callable[[dict], None]] = None,
+) -> InfraResult:
+    """Write the Terraform workdir for `spec` and run init + plan (dry run) or apply.
+
+    With `on_event`, apply runs with `-json` and each event is passed to it as it arrives.
+    """
+    env = _openstack_env(spec)
+    workdir = Path(spec.infraSetup.workdir).expanduser().resolve()
+    result = InfraResult(workdir, "plan" if dry_run else "apply")
+    workdir.mkdir(parents=True, exist_ok=True)
+    # One Terraform run per workdir: parallel invocations wait for the lock
+    with workdir_lock(workdir):
+        with timed(result.steps, "prepare"):
+            try:
+                prepare_tf_workdir(spec, force_main=force_main)
+            except ValueError as e:
+                raise ApiError(str(e), code=2)
+        tf = TerraformClient(workdir=workdir, extra_env=env)
+        emit(f"[bold cyan]Terraform up[/]  workdir: {workdir}")
+        with timed(result.steps, "init"):
+            result.rc = tf.init()
+        if result.rc != 0:
+            return result
+        with timed(result.steps, result.action):
+            if dry_run:
+                result.rc = tf.plan()
+            elif on_event is not None:
+                result.rc = tf.apply_stream(on_event, auto_approve=auto_approve)
+            else:
+                result.rc = tf.apply(auto_approve=auto_approve)
+    return result
+
+
+def infra_down(spec: InfraSpec, auto_approve: bool = True) -> InfraResult:
+    """`terraform destroy` in the spec's workdir ("skipped" if it does not exist)."""
+    workdir = Path(spec.infraSetup.workdir).expanduser().resolve()
+    if not workdir.exists():
+        return InfraResult(workdir, "skipped")
+    result = InfraResult(workdir, "destroy")
+    tf = TerraformClient(workdir=workdir, extra_env=_openstack_env(spec))
+    emit(f"[bold cyan]Terraform down[/]  workdir: {workdir}")
+    with workdir_lock(workdir), timed(result.steps, "destroy"):
+        result.rc = tf.destroy(auto_approve=auto_approve)
+    return result
@@ -0,0 +1,225 @@
+# qd2_bootstrap/api/plan.py
+"""Quditto planning: components per cluster, auto placement, L2SM addresses,
+release layout and chart resolution (`plan_deploy`, `subset_plan`).
+"""
+from __future__ import annotations
+
+import threading
+from collections import defaultdict
+from dataclasses import dataclass, field, replace
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from qd2_bootstrap.api.common import ApiError, Grouped, StepTiming, Units, timed
+from qd2_bootstrap.models.quditto_deploy_spec import QudittoDeploySpec
+from qd2_bootstrap.utils.chart_cache import ChartCache, ChartCacheError
+from qd2_bootstrap.utils.inventory import shared_inventory
+from qd2_bootstrap.utils.ipam import Addresses, IpamError, allocate_for_spec
+from qd2_bootstrap.utils.kubectl import Kubectl
+from qd2_bootstrap.utils.locks import LockTimeout
+from qd2_bootstrap.utils.netprobe import RttMatrix, load_matrix
+from qd2_bootstrap.utils.placement import LinkLatency, NodeSlot, PlacementError, auto_place, link_latencies
+from qd2_bootstrap.utils.releases import build_release_units
+from qd2_bootstrap.utils.sizing import expand_sizing
+
+# RTT matrices older than this still drive placement, with a warning
+PROBE_MAX_AGE_S = 7 * 24 * 3600
+
+
+@dataclass
+class PlacementReport:
+    """Outcome of `placement: auto` on one cluster."""
+    cluster: str
+    assignment: Dict[str, str]
+    slots: List[NodeSlot]
+    links: List[LinkLatency] = field(default_factory=list)
+
+
+@dataclass
+class DeployPlan:
+    """Releases per target cluster, after sizing, auto placement and L2SM addressing."""
+    namespace: str
+    repo_url: str
+    grouped: Grouped
+    units: Units
+    addresses: Addresses = field(default_factory=dict)
+    placements: List[PlacementReport] = field(default_factory=list)
+    warnings: List[str] = field(default_factory=list)
+    steps: List[StepTiming] = field(default_factory=list)
+
+    @property
+    def release_count(self) -> int:
+        return sum(len(items) for items in self.units.values())
+
+
+def collect_components(spec: QudittoDeploySpec, multi_cluster: bool, kubeconfig: Optional[Path]) -> Grouped:
+    """Build a mapping: (cluster_name, kubeconfig) -> [(release_name, component), ...].
+
+    - In multi-cluster mode, resolve `targetCluster` (or `defaultCluster`) from the spec.
+    - In single-cluster mode, require `kubeconfig`.
+    - Sizing profiles are expanded into each component's values first.
+    """
+    if not multi_cluster and not kubeconfig:
+        raise ApiError("--kubeconfig is required in single-cluster mode", code=2)
+    expand_sizing(spec)
+    per_cluster: Grouped = defaultdict(list)
+    for release_name, comp in spec.iter_components():
+        if multi_cluster:
+            target_cluster = spec.resolve_target_cluster(comp)
+            per_cluster[(target_cluster, spec.kubeconfig_for(target_cluster))].append((release_name, comp))
+        else:
+            per_cluster[("__single__", kubeconfig)].append((release_name, comp))  # type: ignore[index]
+    return per_cluster
+
+
+def _topology_matrix(cluster_name: str, kc_path: Path, warnings: List[str]) -> Optional[RttMatrix]:
+    """Cached `cluster netprobe` matrix for topology-aware placement, if any."""
+    matrix = load_matrix(kc_path)
+    if matrix is None:
+        warnings.append(f"{cluster_name}: no RTT matrix cached (run 'cluster netprobe'); placing without topology.")
+    elif matrix.age_s() > PROBE_MAX_AGE_S:
+        warnings.append(f"{cluster_name}: RTT matrix is {matrix.age_s() / 86400:.0f} days old; consider re-running 'cluster netprobe'.")
+    return matrix
+
+
+def apply_auto_placement(spec: QudittoDeploySpec, grouped: Grouped, ns: str, warnings: List[str]) -> List[PlacementReport]:
+    """Fill in `nodek8s` for components left to `placement: auto` (mutates them).
+
+    Uses the TTL-cached node list plus one pod listing per cluster for load,
+    and with `placement.topology` the cached RTT matrix of the cluster.
+    """
+    reports: List[PlacementReport] = []
+    if spec.placement.mode != "auto":
+        return reports
+    for (cluster_name, kc_path), comps in grouped.items():
+        if all(comp.nodek8s for _, comp in comps):
+            continue
+        matrix = _topology_matrix(cluster_name, kc_path, warnings) if spec.placement.topology else None
+        try:
+            nodes = shared_inventory().nodes(kc_path)
+            pods = Kubectl(kubeconfig=kc_path).get_json(["pods"]).get("items", [])
+            assignment, slots = auto_place(comps, ns, spec.placement, nodes, pods, rtt=matrix)
+        except (PlacementError, RuntimeError, OSError, ValueError) as e:
+            raise ApiError(f"Automatic placement failed on {cluster_name}: {e}", code=2)
+        for release, comp in comps:
+            if release in assignment:
+                comp.nodek8s = assignment[release]
+        links = link_latencies(comps, matrix) if matrix is not None else []
+        reports.append(PlacementReport(cluster_name, assignment, slots, links))
+    return reports
+
+
+def assign_l2sm(
+    spec: QudittoDeploySpec, spec_file: Optional[Path], persist: bool, expect: Optional[Addresses] = None,
+) -> Addresses:
+    """L2SM addresses for every component (see `l2sm.networks`); persisted if asked.
+
+    Without `spec_file` the state file is resolved against ./quditto.yaml.
+    With `expect`, state that no longer yields those addresses is an error.
+    """
+    try:
+        return allocate_for_spec(spec, spec_file or Path("quditto.yaml"), persist=persist, expect=expect)
+    except IpamError as e:
+        raise ApiError("L2SM address allocation failed", code=2, details=e.problems)
+    except (OSError, ValueError, LockTimeout) as e:
+        raise ApiError(f"L2SM address state unreadable: {e}", code=2)
+
+
+def plan_deploy(
+    spec: QudittoDeploySpec,
+    kubeconfig: Optional[Path] = None,
+    namespace: Optional[str] = None,
+    multi_cluster: bool = False,
+    qnode_mode: str = "release",
+    set_group: str = "cluster",
+    spec_file: Optional[Path] = None,
+    persist_addresses: bool = False,
+    placement: bool = True,
+    addressing: bool = True,
+) -> DeployPlan:
+    """Group components by target cluster and fold them into Helm releases.
+
+    Auto placement mutates the spec's components. L2SM allocations are only
+    written to the state file with `persist_addresses`; `deploy` records them
+    itself right before installing, so callers normally leave it off.
+    """
+    ns = (namespace or spec.namespace or "default").strip()
+    steps: List[StepTiming] = []
+    warnings: List[str] = []
+    with timed(steps, "collect"):
+        grouped = collect_components(spec, multi_cluster=multi_cluster, kubeconfig=kubeconfig)
+    plan = DeployPlan(ns, spec.charts.repo, grouped, {}, warnings=warnings, steps=steps)
+    if not grouped:
+        return plan
+    if placement:
+        with timed(steps, "placement"):
+            plan.placements = apply_auto_placement(spec, grouped, ns, warnings)
+    if addressing:
+        with timed(steps, "l2sm"):
+            plan.addresses = assign_l2sm(spec, spec_file, persist=persist_addresses)
+    with timed(steps, "releases"):
+        try:
+            plan.units = build_release_units(
+                grouped, ns, qnode_mode=qnode_mode, set_group=set_group,
+                set_version=spec.charts.qnodeSetVersion, addresses=plan.addresses,
+            )
+        except ValueError as e:
+            raise ApiError(f"Invalid release layout: {e}", code=2)
+    return plan
+
+
+def subset_plan(plan: DeployPlan, releases: Iterable[Tuple[str, str]]) -> DeployPlan:
+    """Copy of `plan` keeping only the given (cluster, release) pairs, e.g. drifted ones."""
+    keep = set(releases)
+    units: Units = {}
+    for target, items in plan.units.items():
+        picked = [u for u in items if (target[0], u.name) in keep]
+        if picked:
+            units[target] = picked
+    # Components rendered by the kept releases (several per release in qnode-set mode)
+    grouped: Grouped = {}
+    for target, items in units.items():
+        members = {m for u in items for m in (u.members or [u.name])}
+        grouped[target] = [(name, comp) for name, comp in plan.grouped[target] if name in members]
+    return replace(plan, grouped=grouped, units=units, steps=[])
+
+
+_chart_caches: Dict[Tuple[Tuple[Path, ...], bool], ChartCache] = {}
+_chart_caches_lock = threading.Lock()
+
+
+def chart_cache_for(spec: QudittoDeploySpec, chart_dir: Optional[List[Path]], offline: bool) -> ChartCache:
+    """Chart cache whose local sources are `charts.localDir` plus any `chart_dir`.
+
+    One instance per (sources, offline) in the process, so repeated calls
+    (e.g. from `serve`) reuse its repo indexes and source catalog.
+    """
+    sources = list(chart_dir or [])
+    if spec.charts.localDir:
+        sources.insert(0, Path(spec.charts.localDir))
+    key = (tuple(Path(s).expanduser().resolve() for s in sources), offline)
+    with _chart_caches_lock:
+        if key not in _chart_caches:
+            _chart_caches[key] = ChartCache(sources=key[0], offline=offline)
+        return _chart_caches[key]
+
+
+def chart_cache_stats() -> List[Dict[str, object]]:
+    """`ChartCache.stats()` of every cache handed out by `chart_cache_for`."""
+    with _chart_caches_lock:
+        caches = list(_chart_caches.values())
+    return [c.stats() for c in caches]
+
+
+def resolve_charts(cache: ChartCache, repo_url: str, units: Units) -> Dict[Tuple[str, Optional[str]], Path]:
+    """Resolve every distinct (chart, version) once to a local archive path."""
+    resolved: Dict[Tuple[str, Optional[str]], Path] = {}
+    try:
+        for items in units.values():
+            for unit in items:
+                key = (unit.chart, unit.version)
+                if key not in resolved:
+                    resolved[key] = cache.resolve(key[0], key[1], repo_url=repo_url)
+    except (ChartCacheError, OSError) as e:
+        raise ApiError(f"Chart resolution failed: {e}")
+    return resolved
@@ -0,0 +1,359 @@
+# qd2_bootstrap/api/rollout.py
+"""Quditto rollouts: `deploy` / `teardown` over the per-cluster AIMD executor."""
+from __future__ import annotations
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from rich.markup import escape
+
+from qd2_bootstrap.api.common import ApiError, StepTiming, Units, timed
+from qd2_bootstrap.api.plan import DeployPlan, assign_l2sm, chart_cache_for, plan_deploy, resolve_charts
+from qd2_bootstrap.models.quditto_deploy_spec import QudittoDeploySpec
+from qd2_bootstrap.utils.concurrency import AIMDLimiter, OpOutcome, is_throttle_output, run_adaptive
+from qd2_bootstrap.utils.helm import HelmClient
+from qd2_bootstrap.utils.inventory import shared_inventory
+from qd2_bootstrap.utils.ipam import IpamError, release_for_spec
+from qd2_bootstrap.utils.locks import LockTimeout
+from qd2_bootstrap.utils.output import current_log, emit, log_to
+from qd2_bootstrap.utils.progress import RolloutProgress
+from qd2_bootstrap.utils.readiness import rollout_tiers, wait_ready as wait_ready_units
+from qd2_bootstrap.utils.releases import ReleaseUnit, TargetKey, release_value_args
+from qd2_bootstrap.utils.validation import Issue, check_live_placement, has_errors
+
+
+@dataclass
+class ReleaseResult:
+    cluster: str
+    name: str
+    namespace: str
+    chart: str
+    version: Optional[str]
+    rc: int = 0
+    seconds: float = 0.0
+    attempts: int = 0
+    log: Optional[Path] = None  # per-release log file in progress mode
+
+
+@dataclass
+class RolloutResult:
+    """Result of `deploy` or `teardown`: every release that ran, in completion order."""
+    plan: DeployPlan
+    rc: int = 0
+    releases: List[ReleaseResult] = field(default_factory=list)
+    failed: Optional[ReleaseResult] = None
+    issues: List[Issue] = field(default_factory=list)
+    logs_dir: Optional[Path] = None
+    freed_addresses: int = 0
+    unready: Dict[str, str] = field(default_factory=dict)  # "<cluster>/<release>/<workload>" -> reason
+    steps: List[StepTiming] = field(default_factory=list)
+
+    @property
+    def ok(self) -> bool:
+        return self.rc == 0
+
+
+def _execute_per_cluster(
+    units: Units,
+    prepare: Callable[[str, Path], HelmClient],
+    op: Callable[[HelmClient, ReleaseUnit], OpOutcome],
+    concurrency: int,
+    max_concurrency: int,
+    progress: Optional[RolloutProgress],
+    result: RolloutResult,
+) -> None:
+    """Run `op` for every release, clusters in parallel, AIMD-limited per cluster.
+
+    Every attempt is timed into `result.releases`; the first failure of the
+    run (in completion order) becomes `result.failed`.
+    """
+    lock = threading.Lock()
+    records: Dict[Tuple[str, str], ReleaseResult] = {}
+    parent_log = current_log()
+
+    def _cluster(target: TargetKey, items: List[ReleaseUnit]) -> None:
+        with log_to(parent_log):
+            _run_cluster(target, items)
+
+    def _run_cluster(target: TargetKey, items: List[ReleaseUnit]) -> None:
+        cluster_name, kc_path = target
+        helm = prepare(cluster_name, kc_path)
+
+        def _timed(unit: ReleaseUnit) -> OpOutcome:
+            t0 = time.monotonic()
+            outcome = OpOutcome(rc=1)
+            try:
+                outcome = op(helm, unit)
+                return outcome
+            finally:
+                with lock:
+                    rec = records.get((cluster_name, unit.name))
+                    if rec is None:
+                        rec = records[(cluster_name, unit.name)] = ReleaseResult(
+                            cluster_name, unit.name, unit.namespace, unit.chart, unit.version,
+                        )
+                        result.releases.append(rec)
+                    rec.rc, rec.attempts = outcome.rc, rec.attempts + 1
+                    rec.seconds += time.monotonic() - t0
+
+        run_one: Callable[[ReleaseUnit], OpOutcome] = _timed
+        if progress:
+            run_one = progress.wrap(cluster_name, lambda u: u.name, run_one)
+        limiter = AIMDLimiter(
+            initial=min(concurrency, max_concurrency),
+            max_limit=max_concurrency,
+            name=cluster_name,
+            announce=progress is None,
+        )
+        res = run_adaptive(items, run_one, limiter)
+        emit(f"[dim]{escape(f'concurrency timeline [{cluster_name}]: {limiter.timeline()}')}[/]")
+        if res.failed is not None:
+            with lock:
+                rec = records[(cluster_name, res.failed.name)]
+                if result.failed is None:
+                    result.failed, result.rc = rec, res.rc
+
+    if len(units) == 1:
+        (target, items), = units.items()
+        _cluster(target, items)
+    else:
+        with ThreadPoolExecutor(max_workers=len(units)) as pool:
+            for f in [pool.submit(_cluster, target, items) for target, items in units.items()]:
+                f.result()
+
+    if progress:
+        logs = {(it.cluster, it.name): it.log for it in progress.items.values()}
+        for rec in result.releases:
+            rec.log = logs.get((rec.cluster, rec.name))
+
+
+def _rollout_progress(command: str, units: Units, logs_dir: Path) -> RolloutProgress:
+    """Progress tracker logging to <logs-dir>/<command>-<timestamp>/<cluster>/<release>.log."""
+    run_dir = logs_dir.resolve() / f"{command}-{time.strftime('%Y%m%d-%H%M%S')}"
+    releases = {cluster_name: [u.name for u in items] for (cluster_name, _), items in units.items()}
+    emit(f"[dim]Per-release logs: {run_dir}[/]")
+    return RolloutProgress(f"quditto {command}", releases, run_dir)
+
+
+def _rollout(
+    command: str,
+    result: RolloutResult,
+    prepare: Callable[[str, Path], HelmClient],
+    op: Callable[[HelmClient, ReleaseUnit], OpOutcome],
+    concurrency: int,
+    max_concurrency: int,
+    progress: bool,
+    logs_dir: Path,
+    waves: Optional[List[Units]] = None,
+    gate: Optional[Callable[[int, Units], bool]] = None,
+) -> None:
+    """Run `op` over the plan, wave by wave (default: one wave).
+
+    After each wave `gate(wave, units)` may hold the next one back (e.g. until
+    the wave's pods are Ready); returning False stops the rollout.
+    """
+    waves = waves or [result.plan.units]
+    tracker = _rollout_progress(command, result.plan.units, logs_dir) if progress else None
+    if tracker:
+        result.logs_dir = tracker.log_dir
+    helms: Dict[str, HelmClient] = {}
+
+    def _prepared(cluster_name: str, kc_path: Path) -> HelmClient:
+        # Once per cluster, not per wave
+        if cluster_name not in helms:
+            helms[cluster_name] = prepare(cluster_name, kc_path)
+        return helms[cluster_name]
+
+    with (tracker.live() if tracker else nullcontext()):
+        for wave, units in enumerate(waves, 1):
+            if len(waves) > 1:
+                emit(f"[bold cyan]{command.capitalize()} wave {wave}/{len(waves)}:[/] "
+                     f"{sum(len(items) for items in units.values())} release(s)")
+            with timed(result.steps, command if len(waves) == 1 else f"{command}-{wave}"):
+                _execute_per_cluster(units, _prepared, op, concurrency, max_concurrency, tracker, result)
+            if result.failed is not None or (gate is not None and not gate(wave, units)):
+                break
+
+
+def deploy(
+    spec: QudittoDeploySpec,
+    kubeconfig: Optional[Path] = None,
+    namespace: Optional[str] = None,
+    multi_cluster: bool = False,
+    spec_file: Optional[Path] = None,
+    plan: Optional[DeployPlan] = None,
+    dry_run: bool = False,
+    show_values: bool = False,
+    chart_cache: bool = True,
+    chart_dir: Optional[List[Path]] = None,
+    offline: bool = False,
+    qnode_mode: str = "release",
+    set_group: str = "cluster",
+    concurrency: int = 4,
+    max_concurrency: int = 16,
+    validate: bool = True,
+    progress: bool = False,
+    logs_dir: Path = Path("./quditto-logs"),
+    wait_ready: bool = True,
+    ready_timeout: float = 600,
+) -> RolloutResult:
+    """Install or upgrade every Quditto release of `spec` with Helm.
+
+    Pass a `plan` from `plan_deploy` to reuse it (the CLI prints it first);
+    otherwise one is built here. Charts are resolved once into the local
+    chart cache unless `chart_cache=False`. The plan's L2SM addresses are
+    written to the state file only after validation, right before the first
+    install (not on dry runs), so an aborted deploy records nothing.
+
+    With `wait_ready` releases go out in waves (controller and qnodes, then
+    the orchestrator), and each wave waits up to `ready_timeout` seconds for
+    its Deployments to pass their readiness probes; workloads still not ready
+    end the rollout with rc=3 and are listed in `unready`.
+    """
+    if offline and not chart_cache:
+        raise ApiError("offline mode requires the chart cache", code=2)
+    if plan is None:
+        plan = plan_deploy(
+            spec, kubeconfig, namespace, multi_cluster, qnode_mode, set_group, spec_file=spec_file,
+        )
+    result = RolloutResult(plan)
+    if not plan.units:
+        return result
+
+    # Placement against the live nodes (TTL-cached, shared with `validate`)
+    if validate:
+        with timed(result.steps, "validate"):
+            result.issues = check_live_placement(plan.grouped, shared_inventory())
+        if has_errors(result.issues):
+            raise ApiError("Validation failed; nothing was installed", code=2, issues=result.issues)
+
+    local_charts: Dict[Tuple[str, Optional[str]], Path] = {}
+    if chart_cache:
+        with timed(result.steps, "charts"):
+            local_charts = resolve_charts(chart_cache_for(spec, chart_dir, offline), plan.repo_url, plan.units)
+
+    def _prepare(cluster_name: str, kc_path: Path) -> HelmClient:
+        emit(f"\n[bold cyan]Target cluster:[/] {cluster_name}  [dim]({kc_path})[/]")
+        helm = HelmClient(kubeconfig=kc_path)
+        # Idempotent repo add/update (only needed when installing from the repo)
+        if not chart_cache:
+            if helm.repo_add("quditto", plan.repo_url) != 0:
+                raise ApiError(f"helm repo add failed on {cluster_name}")
+            helm.repo_update()
+        return helm
+
+    def _install(helm: HelmClient, unit: ReleaseUnit) -> OpOutcome:
+        # Placement (nodeName) + user values were already mapped per component
+        # by `map_component_values`.
+        set_inline, values_files = release_value_args(unit)
+
+        # Cached archive path (already pins the version) or repo reference
+        local = local_charts.get((unit.chart, unit.version))
+        chart_ref = str(local) if local else unit.chart_ref
+
+        if show_values:
+            emit(f"[dim]values for {unit.name}:[/]\n{unit.values}")
+
+        emit(f"  • Installing/Upgrading [magenta]{unit.name}[/] -> {chart_ref}  (ns: {unit.namespace})")
+        output: List[str] = []
+        try:
+            rc = helm.install_or_upgrade(
+                release=unit.name,
+                chart=chart_ref,
+                namespace=unit.namespace,
+                version=None if local else unit.version,
+                set_inline=set_inline,
+                values_files=values_files,
+                dry_run=dry_run,
+                create_namespace=True,
+                output=output,
+            )
+        finally:
+            for vf in values_files:
+                vf.unlink(missing_ok=True)
+        return OpOutcome(rc=rc, throttled=rc != 0 and is_throttle_output("".join(output)))
+
+    def _gate(wave: int, units: Units) -> bool:
+        with timed(result.steps, f"ready-{wave}"):
+            result.unready = wait_ready_units(units, timeout_s=ready_timeout)
+        if result.unready:
+            emit(f"[red]{len(result.unready)} workload(s) not ready after {ready_timeout:.0f}s; stopping the rollout.[/]")
+            result.rc = 3
+            return False
+        return True
+
+    if not dry_run:
+        with timed(result.steps, "l2sm"):
+            assign_l2sm(spec, spec_file, persist=True, expect=plan.addresses)
+
+    gated = wait_ready and not dry_run
+    _rollout(
+        "deploy", result, _prepare, _install, concurrency, max_concurrency, progress, logs_dir,
+        waves=rollout_tiers(plan.units) if gated else None, gate=_gate if gated else None,
+    )
+    return result
+
+
+def teardown(
+    spec: QudittoDeploySpec,
+    kubeconfig: Optional[Path] = None,
+    namespace: Optional[str] = None,
+    multi_cluster: bool = False,
+    spec_file: Optional[Path] = None,
+    plan: Optional[DeployPlan] = None,
+    dry_run: bool = False,
+    keep_history: bool = False,
+    qnode_mode: str = "release",
+    set_group: str = "cluster",
+    concurrency: int = 4,
+    max_concurrency: int = 16,
+    progress: bool = False,
+    logs_dir: Path = Path("./quditto-logs"),
+) -> RolloutResult:
+    """Uninstall every Quditto release of `spec`, then free its L2SM addresses.
+
+    Only release names and targets matter, so the plan skips placement and addressing.
+    """
+    if plan is None:
+        plan = plan_deploy(
+            spec, kubeconfig, namespace, multi_cluster, qnode_mode, set_group,
+            spec_file=spec_file, placement=False, addressing=False,
+        )
+    result = RolloutResult(plan)
+    if not plan.units:
+        return result
+
+    def _prepare(cluster_name: str, kc_path: Path) -> HelmClient:
+        emit(f"\n[bold cyan]Target cluster:[/] {cluster_name}  [dim]({kc_path})[/]")
+        return HelmClient(kubeconfig=kc_path)
+
+    def _uninstall(helm: HelmClient, unit: ReleaseUnit) -> OpOutcome:
+        emit(f"  • Uninstalling [magenta]{unit.name}[/] (ns: {unit.namespace})")
+        output: List[str] = []
+        rc = helm.uninstall(
+            release=unit.name,
+            namespace=unit.namespace,
+            keep_history=keep_history,
+            dry_run=dry_run,
+            output=output,
+        )
+        return OpOutcome(rc=rc, throttled=rc != 0 and is_throttle_output("".join(output)))
+
+    _rollout("teardown", result, _prepare, _uninstall, concurrency, max_concurrency, progress, logs_dir)
+
+    if result.ok and not dry_run:
+        releases = [release for comps in plan.grouped.values() for release, _ in comps]
+        try:
+            with timed(result.steps, "l2sm-release"):
+                result.freed_addresses = release_for_spec(spec, spec_file or Path("quditto.yaml"), releases)
+        except (IpamError, OSError, ValueError, LockTimeout) as e:
+            emit(f"[yellow]L2SM addresses not released:[/] {e}")
+        else:
+            if result.freed_addresses:
+                emit(f"[dim]Released {result.freed_addresses} L2SM address(es).[/]")
+    return result
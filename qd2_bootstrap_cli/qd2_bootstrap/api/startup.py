@@ -0,0 +1,105 @@
+# qd2_bootstrap/api/startup.py
+"""Quditto startup report: `startup_report`."""
+from __future__ import annotations
+
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from qd2_bootstrap.api.common import StepTiming, timed
+from qd2_bootstrap.api.plan import plan_deploy
+from qd2_bootstrap.models.quditto_deploy_spec import QudittoDeploySpec
+from qd2_bootstrap.utils.drift import latest_releases
+from qd2_bootstrap.utils.kubectl import Kubectl
+from qd2_bootstrap.utils.releases import ReleaseUnit
+from qd2_bootstrap.utils.startup import (
+    NodeStat,
+    PhaseStat,
+    PodStartup,
+    node_pressure,
+    node_stats,
+    parse_time,
+    phase_stats,
+    pod_events,
+    pod_startup,
+)
+
+
+@dataclass
+class StartupResult:
+    """Time-to-ready per pod, split into phases, with fleet percentiles and per-node stats."""
+    pods: List[PodStartup] = field(default_factory=list)
+    phases: List[PhaseStat] = field(default_factory=list)
+    nodes: List[NodeStat] = field(default_factory=list)
+    errors: List[str] = field(default_factory=list)
+    steps: List[StepTiming] = field(default_factory=list)
+
+
+def _cluster_startup(
+    cluster_name: str, kc_path: Path, items: List[ReleaseUnit],
+) -> Tuple[List[PodStartup], Dict[Tuple[str, str], List[str]]]:
+    """Bulk reads for one cluster: Helm release secrets, nodes, and pods and events per namespace."""
+    kube = Kubectl(kubeconfig=kc_path)
+    releases = latest_releases(kube.get_json(["secrets"], selector="owner=helm").get("items", []))
+    pressure = {
+        (cluster_name, node): bad
+        for node, bad in node_pressure(kube.get_json(["nodes"]).get("items", [])).items()
+    }
+    rows: List[PodStartup] = []
+    for ns in sorted({u.namespace for u in items}):
+        pods = kube.get_json(["pods"], namespace=ns).get("items", [])
+        events = pod_events(kube.get_json(["events"], namespace=ns).get("items", []))
+        by_app: Dict[str, List[dict]] = defaultdict(list)
+        for pod in pods:
+            by_app[(pod.get("metadata", {}).get("labels") or {}).get("app", "")].append(pod)
+        for unit in (u for u in items if u.namespace == ns):
+            info = (releases.get((ns, unit.name)) or {}).get("info") or {}
+            submitted = parse_time(info.get("last_deployed"))
+            for app in unit.workloads:
+                for pod in by_app.get(app, []):
+                    name = pod.get("metadata", {}).get("name", "")
+                    rows.append(pod_startup(cluster_name, unit.name, app, pod, events.get(name, []), submitted))
+                if not by_app.get(app):
+                    rows.append(PodStartup(cluster_name, ns, unit.name, app, "", "", problem="no pod"))
+    return rows, pressure
+
+
+def startup_report(
+    spec: QudittoDeploySpec,
+    kubeconfig: Optional[Path] = None,
+    namespace: Optional[str] = None,
+    multi_cluster: bool = False,
+    qnode_mode: str = "release",
+    set_group: str = "cluster",
+    spec_file: Optional[Path] = None,
+) -> StartupResult:
+    """Break each release's time-to-ready into Helm submit, scheduling, image pull, container start and readiness.
+
+    Four bulk reads per cluster (Helm release secrets, nodes, pods and events
+    per namespace), clusters in parallel. Events expire (one hour by default),
+    so run it soon after the deploy; phases whose events are gone are None.
+    """
+    plan = plan_deploy(
+        spec, kubeconfig, namespace, multi_cluster, qnode_mode, set_group,
+        spec_file=spec_file, placement=False, addressing=False,
+    )
+    result = StartupResult(steps=plan.steps)
+    pressure: Dict[Tuple[str, str], List[str]] = {}
+    with timed(result.steps, "read"), ThreadPoolExecutor(max_workers=max(1, len(plan.units))) as pool:
+        futures = {
+            pool.submit(_cluster_startup, cluster_name, kc_path, items): cluster_name
+            for (cluster_name, kc_path), items in plan.units.items()
+        }
+        for fut, cluster_name in futures.items():
+            try:
+                rows, cluster_pressure = fut.result()
+            except (RuntimeError, ValueError) as e:
+                result.errors.append(f"{cluster_name}: {e}")
+                continue
+            result.pods.extend(rows)
+            pressure.update(cluster_pressure)
+    result.phases = phase_stats(result.pods)
+    result.nodes = node_stats(result.pods, pressure)
+    return result
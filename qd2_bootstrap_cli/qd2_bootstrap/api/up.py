@@ -0,0 +1,189 @@
+# qd2_bootstrap/api/up.py
+"""End to end: infra + cluster + Quditto (`up`)."""
+from __future__ import annotations
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from qd2_bootstrap.api.cluster import ClusterResult, cluster_up
+from qd2_bootstrap.api.common import ApiError
+from qd2_bootstrap.api.plan import DeployPlan, chart_cache_for, plan_deploy, resolve_charts, subset_plan
+from qd2_bootstrap.api.rollout import ReleaseResult, RolloutResult, deploy
+from qd2_bootstrap.models.cluster_spec import ClusterSpec
+from qd2_bootstrap.models.infra_spec import InfraSpec
+from qd2_bootstrap.models.quditto_deploy_spec import QudittoDeploySpec
+from qd2_bootstrap.utils.critical_path import Stage, StageClock
+from qd2_bootstrap.utils.inventory import shared_inventory
+from qd2_bootstrap.utils.kubectl import Kubectl
+from qd2_bootstrap.utils.output import current_log, emit, log_to
+from qd2_bootstrap.utils.readiness import chart_tier
+
+
+@dataclass
+class UpResult:
+    cluster: Optional[ClusterResult] = None
+    plan: Optional[DeployPlan] = None
+    waves: List[RolloutResult] = field(default_factory=list)  # one deploy per batch of releases
+    pending: Dict[str, List[str]] = field(default_factory=dict)  # release -> nodes never Ready
+    stages: List[Stage] = field(default_factory=list)
+    rc: int = 0
+
+    @property
+    def ok(self) -> bool:
+        return self.rc == 0
+
+    @property
+    def releases(self) -> List[ReleaseResult]:
+        return [r for w in self.waves for r in w.releases]
+
+
+def wait_api(kubeconfig: Path, timeout_s: float, every_s: float = 3) -> bool:
+    """Poll the API server's /readyz until it answers or `timeout_s` passes."""
+    deadline = time.monotonic() + timeout_s
+    kubectl = Kubectl(kubeconfig=kubeconfig)
+    while True:
+        try:
+            kubectl.capture(["get", "--raw", "/readyz"], timeout=10)
+            return True
+        except RuntimeError:
+            if time.monotonic() + every_s >= deadline:
+                return False
+            time.sleep(every_s)
+
+
+def up(
+    cluster: ClusterSpec,
+    quditto: QudittoDeploySpec,
+    infra: Optional[InfraSpec] = None,
+    spec_file: Optional[Path] = None,
+    namespace: Optional[str] = None,
+    kubeconfig_outdir: Optional[Path] = None,
+    use_infra_tfstate: bool = False,
+    ssh_timeout: int = 300,
+    api_timeout: float = 600,
+    node_timeout: float = 600,
+    chart_dir: Optional[List[Path]] = None,
+    offline: bool = False,
+    qnode_mode: str = "release",
+    set_group: str = "cluster",
+    concurrency: int = 4,
+    max_concurrency: int = 16,
+    progress: bool = False,
+    logs_dir: Path = Path("./quditto-logs"),
+    ready_timeout: float = 600,
+) -> UpResult:
+    """Provision (optional), bootstrap and deploy Quditto, overlapping what can overlap.
+
+    The release plan, L2SM addresses and chart archives are prepared in the
+    background while Terraform and KubeOne run. Once the API server answers,
+    releases whose nodes are all Ready are deployed at once, in waves as
+    more nodes turn Ready (up to `node_timeout`); the orchestrator waits
+    until the controller and every qnode are out, and each wave waits for
+    readiness probes (`ready_timeout`). Auto placement has to see the live
+    nodes, so it runs after the API is up. Every stage lands in `stages` for
+    a critical-path report.
+    """
+    if quditto.clusters:
+        raise ApiError("up deploys to the cluster it creates: use a single-cluster Quditto spec", code=2)
+    s = cluster.clusterSetup
+    result = UpResult()
+    clock = StageClock()
+    result.stages = clock.stages
+    outdir = kubeconfig_outdir or (Path("./clusters") / s.name)
+    kc = outdir / "kubeconfig"
+    auto = quditto.placement.mode == "auto"
+    parent_log = current_log()
+
+    def _plan(kubeconfig: Path, placement: bool) -> DeployPlan:
+        return plan_deploy(
+            quditto, kubeconfig, namespace, qnode_mode=qnode_mode, set_group=set_group,
+            spec_file=spec_file, placement=placement,
+        )
+
+    def _prepare() -> DeployPlan:
+        with log_to(parent_log):
+            with clock.stage("plan"):
+                plan = _plan(kc, placement=False)
+            # Warm the chart cache; the deploy waves resolve from it without fetching
+            with clock.stage("charts", after=["plan"]):
+                resolve_charts(chart_cache_for(quditto, chart_dir, offline), plan.repo_url, plan.units)
+            return plan
+
+    with ThreadPoolExecutor(max_workers=1, thread_name_prefix="up-prepare") as prep:
+        prepared = prep.submit(_prepare)
+
+        start = clock.now()
+        result.cluster = cluster_up(
+            cluster, infra=infra, use_infra_tfstate=use_infra_tfstate, auto_approve=True,
+            kubeconfig_outdir=outdir, wait_ssh=True, ssh_timeout=ssh_timeout,
+        )
+        prev: Optional[str] = None
+        for step in result.cluster.steps:
+            clock.add(step.name, start, start + step.seconds, [prev] if prev else [])
+            start, prev = start + step.seconds, step.name
+        if not result.cluster.ok:
+            result.rc = result.cluster.rc
+            return result
+        if result.cluster.kubeconfig is None:
+            raise ApiError("KubeOne produced no kubeconfig; nothing deployed", details=result.cluster.warnings)
+
+        actual_kc = result.cluster.kubeconfig
+        with clock.stage("api", after=[prev] if prev else []):
+            reachable = wait_api(actual_kc, api_timeout)
+        if not reachable:
+            emit(f"[red]API server not reachable after {api_timeout:.0f}s[/] ({actual_kc})")
+            result.rc = 3
+            return result
+        plan = prepared.result()
+
+    ready_for_deploy = ["api", "charts", "plan"]
+    # Auto placement needs live nodes; a fallback kubeconfig changes the targets
+    if auto or Path(actual_kc).resolve() != kc.resolve():
+        with clock.stage("placement", after=["api", "plan"]):
+            plan = _plan(actual_kc, placement=True)
+        ready_for_deploy.append("placement")
+    result.plan = plan
+
+    remaining = [(target, u) for target, items in plan.units.items() for u in items]
+    deadline = time.monotonic() + node_timeout
+    wave = 0
+    waiting_since: Optional[float] = None
+    after = list(ready_for_deploy)
+    while remaining:
+        nodes = shared_inventory().nodes(actual_kc, refresh=True)
+        ready = {name for name, n in nodes.items() if n.ready}
+        tier = min(chart_tier(u.chart) for _, u in remaining)
+        batch = [(t, u) for t, u in remaining
+                 if chart_tier(u.chart) == tier and all(n in ready for n in u.nodes if n)]
+        if not batch:
+            if time.monotonic() >= deadline:
+                result.pending = {u.name: sorted({n for n in u.nodes if n and n not in ready}) for _, u in remaining}
+                emit(f"[red]{len(remaining)} release(s) still wait for NotReady nodes after {node_timeout:.0f}s[/]")
+                result.rc = 3
+                break
+            if waiting_since is None:
+                waiting_since = clock.now()
+            time.sleep(5)
+            continue
+        wave += 1
+        if waiting_since is not None:
+            clock.add(f"nodes-ready-{wave}", waiting_since, clock.now(), after)
+            after, waiting_since = [f"nodes-ready-{wave}"], None
+        names = {(t[0], u.name) for t, u in batch}
+        emit(f"[bold cyan]Wave {wave}:[/] {len(batch)} release(s) on Ready nodes, {len(remaining) - len(batch)} waiting")
+        with clock.stage(f"wave-{wave}", after=after):
+            rollout = deploy(
+                quditto, spec_file=spec_file, plan=subset_plan(plan, names), chart_dir=chart_dir, offline=offline,
+                concurrency=concurrency, max_concurrency=max_concurrency, validate=False,
+                progress=progress, logs_dir=logs_dir, ready_timeout=ready_timeout,
+            )
+        result.waves.append(rollout)
+        after = [f"wave-{wave}"]
+        remaining = [(t, u) for t, u in remaining if (t[0], u.name) not in names]
+        if not rollout.ok:
+            result.rc = rollout.rc
+            break
+    return result
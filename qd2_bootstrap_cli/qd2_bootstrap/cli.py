@@ -1,11 +1,16 @@
 import typer
 from qd2_bootstrap.utils.logging import setup_logging
-from qd2_bootstrap.commands import infra, cluster, quditto
+from qd2_bootstrap.commands import infra, cluster, quditto, fleet, validate, serve, capacity, up
 
 app = typer.Typer(no_args_is_help=True, add_completion=False)
 app.add_typer(infra.app, name="infra")
 app.add_typer(cluster.app, name="cluster")
 app.add_typer(quditto.app, name="quditto")
+app.add_typer(fleet.app, name="fleet")
+app.command("validate")(validate.validate)
+app.command("serve")(serve.serve)
+app.command("plan-capacity")(capacity.plan_capacity)
+app.command("up")(up.up)
 
 @app.callback()
 def main(verbose: int = typer.Option(0, "--verbose", "-v", count=True)):
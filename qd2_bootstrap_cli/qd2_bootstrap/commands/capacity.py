@@ -0,0 +1,103 @@
+# qd2_bootstrap/commands/capacity.py
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from typing import Optional
+
+import typer
+from rich import box
+from rich import print as rprint
+from rich.markup import escape
+from rich.table import Table
+
+from qd2_bootstrap import api
+from qd2_bootstrap.commands.common import api_errors, print_timings
+from qd2_bootstrap.models.quditto_deploy_spec import QudittoDeploySpec
+from qd2_bootstrap.utils.capacity import CapacityPlan, load_flavors, load_profiles, option_dict
+
+
+def _print_plan(cluster: str, plan: CapacityPlan) -> None:
+    rprint(f"[bold]{escape(cluster)}[/]: {plan.components} component(s), "
+           f"requests with headroom: cpu {plan.cpu_m / 1000:.1f}, memory {plan.mem_b / 2**30:.1f}Gi")
+    table = Table(box=box.SIMPLE, show_header=True, header_style="bold")
+    for col in ("Workers", "Cost", "CPU used", "Memory used", ""):
+        table.add_column(col)
+    options = list(plan.single)
+    if plan.best is not None and plan.best not in options:
+        options.insert(0, plan.best)
+    for o in options:
+        mark = "[green]best[/]" if o is plan.best else ""
+        table.add_row(escape(o.label()), f"{o.cost:g}", f"{o.cpu_util:.0%}", f"{o.mem_util:.0%}", mark)
+    rprint(table)
+    for flavor, why in sorted(plan.unusable.items()):
+        rprint(f"  [yellow]{escape(flavor)}[/]: {escape(why)}")
+
+
+def plan_capacity(
+    file: Path = typer.Option(..., "--file", "-f", exists=True, readable=True, help="Quditto deploy spec YAML"),
+    flavors: Path = typer.Option(..., "--flavors", exists=True, readable=True, help="Flavor catalog: [{name, vcpus, ram (MiB), cost?}] or `openstack flavor list -f json` output"),
+    profiles: Optional[Path] = typer.Option(None, "--profiles", exists=True, readable=True, help="Requests per typeNode (and qcontroller/qorchestrator): {hybrid: {cpu, memory}, ...}"),
+    headroom: float = typer.Option(1.2, "--headroom", min=1.0, help="Multiply every request by this factor"),
+    reserved_cpu: str = typer.Option("300m", "--reserved-cpu", help="CPU per worker kept for kubelet, system pods and the CNI"),
+    reserved_memory: str = typer.Option("1Gi", "--reserved-memory", help="Memory per worker kept for kubelet, system pods and the CNI"),
+    min_workers: int = typer.Option(1, "--min-workers", min=1, help="Never plan fewer workers"),
+    mix: bool = typer.Option(True, "--mix/--single-flavor", help="Allow a second, cheaper flavor for the remainder"),
+    cluster: Optional[str] = typer.Option(None, "--cluster", help="Plan only this target cluster (multi-cluster specs)"),
+    write_infra: Optional[Path] = typer.Option(None, "--write-infra", help="Write an InfraSpec sized by the best plan"),
+    base_infra: Optional[Path] = typer.Option(None, "--base-infra", exists=True, readable=True, help="InfraSpec to copy into --write-infra (default: a skeleton with placeholders)"),
+    output: str = typer.Option("table", "-o", "--output", help="'table' or 'json'"),
+):
+    """
+    Compute the workers (count and flavor mix) a Quditto spec needs.
+
+    Every component is sized like automatic placement sizes it (resources,
+    then --profiles for its typeNode, then sizing profiles, then
+    placement.defaultRequests), times --headroom. Each flavor gets the fewest
+    workers where binpack placement succeeds with anti-affinity honoured;
+    the cheapest answer is the plan. --write-infra turns it into workerPools
+    (one per flavor); the control-plane flavorName is kept.
+    """
+    with api_errors():
+        spec = api.load_spec(file, QudittoDeploySpec)
+        try:
+            catalog = load_flavors(flavors)
+            kinds = load_profiles(profiles) if profiles else None
+        except (OSError, ValueError) as e:
+            raise api.ApiError(str(e), code=2)
+        result = api.plan_capacity(
+            spec, catalog, profiles=kinds, headroom=headroom, reserved_cpu=reserved_cpu,
+            reserved_memory=reserved_memory, cluster=cluster, min_workers=min_workers, mix=mix,
+        )
+        if write_infra is not None:
+            if len(result.plans) != 1:
+                raise api.ApiError("--write-infra needs a single target cluster: use --cluster", code=2,
+                                   details=sorted(result.plans))
+            (name, plan), = result.plans.items()
+            if plan.best is None:
+                raise api.ApiError(f"{name}: no flavor can hold the components; nothing written")
+            result.infra_file = api.write_capacity_infra(
+                plan.best, write_infra, base=base_infra, cluster_name=name if name != "default" else "quditto",
+            )
+
+    if output == "json":
+        print(json.dumps({
+            name: {
+                "components": p.components,
+                "cpuMillis": p.cpu_m,
+                "memoryBytes": p.mem_b,
+                "best": option_dict(p.best),
+                "singleFlavor": [option_dict(o) for o in p.single],
+                "unusable": p.unusable,
+            }
+            for name, p in result.plans.items()
+        }, indent=2))
+    else:
+        for name, plan in result.plans.items():
+            _print_plan(name, plan)
+        print_timings(result.steps)
+        if result.infra_file:
+            placeholders = " (fill in the <placeholders>)" if base_infra is None else ""
+            rprint(f"[green]InfraSpec written:[/] {result.infra_file}{placeholders}")
+    if any(p.best is None for p in result.plans.values()):
+        raise typer.Exit(code=1)
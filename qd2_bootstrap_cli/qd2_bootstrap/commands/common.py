@@ -0,0 +1,42 @@
+# qd2_bootstrap/commands/common.py
+from __future__ import annotations
+
+import signal
+from contextlib import contextmanager
+from typing import Iterator, List
+
+import typer
+from rich import print as rprint
+from rich.markup import escape
+
+from qd2_bootstrap.api import ApiError, StepTiming
+from qd2_bootstrap.commands.validate import print_issues
+
+
+@contextmanager
+def api_errors() -> Iterator[None]:
+    """Print an `ApiError` (details, validation issues) and exit with its code."""
+    try:
+        yield
+    except ApiError as e:
+        if e.issues:
+            print_issues(e.issues)
+        rprint(f"[bold red]{escape(str(e))}[/]")
+        for detail in e.details:
+            rprint(f"  - {escape(detail)}")
+        raise typer.Exit(code=e.code)
+
+
+def print_timings(steps: List[StepTiming]) -> None:
+    """One dim line with the duration of each step."""
+    if steps:
+        rprint(f"[dim]timings: {', '.join(f'{s.name} {s.seconds:.1f}s' for s in steps)}[/]")
+
+
+def _interrupt(signum, frame) -> None:
+    raise KeyboardInterrupt
+
+
+def stop_on_sigterm() -> None:
+    """Make SIGTERM (systemd, docker stop) unwind like Ctrl-C in long-running commands."""
+    signal.signal(signal.SIGTERM, _interrupt)
@@ -0,0 +1,282 @@
+# qd2_bootstrap/commands/fleet.py
+from __future__ import annotations
+
+import os
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import typer
+from rich import box
+from rich import print as rprint
+from rich.live import Live
+from rich.table import Table
+
+from qd2_bootstrap.models.cluster_spec import ClusterSpec
+from qd2_bootstrap.models.infra_spec import InfraSpec
+from qd2_bootstrap.models.quditto_deploy_spec import QudittoDeploySpec
+from qd2_bootstrap.utils.spec_loader import shared_spec_cache
+
+app = typer.Typer(no_args_is_help=True)
+
+
+# -----------------------------------------------------------------------------
+# Spec discovery and pairing
+# -----------------------------------------------------------------------------
+@dataclass
+class FleetMember:
+    """Everything the fleet knows about one cluster: its specs and live progress."""
+    name: str
+    infra: Optional[Path] = None
+    cluster: Optional[Path] = None
+    quditto: Optional[Path] = None
+    infra_workdir: Optional[Path] = None
+    phase: str = "pending"
+    status: str = "waiting"
+    started: Optional[float] = None
+    finished: Optional[float] = None
+    log: Optional[Path] = None
+    timings: Dict[str, float] = field(default_factory=dict)
+
+
+def _spec_files(paths: List[Path]) -> List[Path]:
+    files: List[Path] = []
+    for p in paths:
+        if p.is_dir():
+            files += sorted(x for x in p.iterdir() if x.suffix in (".yaml", ".yml"))
+        else:
+            files.append(p)
+    return [f.resolve() for f in files]
+
+
+def _discover(paths: List[Path]) -> Dict[str, FleetMember]:
+    """Classify spec files by their top-level key and pair them per cluster name.
+
+    - InfraSpec pairs on `infraSetup.clusterName`, ClusterSpec on `clusterSetup.name`.
+    - A QudittoDeploySpec pairs with the cluster named by its `defaultCluster`.
+    """
+    members: Dict[str, FleetMember] = {}
+    workdirs: Dict[Path, str] = {}
+
+    def _member(name: str) -> FleetMember:
+        return members.setdefault(name, FleetMember(name=name))
+
+    for f in _spec_files(paths):
+        try:
+            spec = shared_spec_cache().load(f)
+            if isinstance(spec, InfraSpec):
+                m = _member(spec.infraSetup.clusterName)
+                if m.infra:
+                    raise ValueError(f"two infra specs for cluster {m.name}: {m.infra}, {f}")
+                m.infra = f
+                m.infra_workdir = Path(spec.infraSetup.workdir).expanduser().resolve()
+                if m.infra_workdir in workdirs:
+                    raise ValueError(
+                        f"clusters {workdirs[m.infra_workdir]} and {m.name} share workdir {m.infra_workdir}"
+                    )
+                workdirs[m.infra_workdir] = m.name
+            elif isinstance(spec, ClusterSpec):
+                cspec = spec
+                m = _member(cspec.clusterSetup.name)
+                if m.cluster:
+                    raise ValueError(f"two cluster specs for cluster {m.name}: {m.cluster}, {f}")
+                m.cluster = f
+            elif isinstance(spec, QudittoDeploySpec):
+                qspec = spec
+                if not qspec.defaultCluster:
+                    raise ValueError(f"{f}: fleet Quditto specs must set defaultCluster to pick their cluster")
+                _member(qspec.defaultCluster).quditto = f
+            else:
+                rprint(f"[yellow]Skipping {f}: not an infra, cluster or Quditto spec[/]")
+        except Exception as e:
+            rprint(f"[bold red]Spec error in {f}:[/] {e}")
+            raise typer.Exit(code=2)
+    return members
+
+
+# -----------------------------------------------------------------------------
+# Pipeline execution
+# -----------------------------------------------------------------------------
+class _Fleet:
+    """Runs per-cluster pipelines with global caps on Terraform/KubeOne processes."""
+
+    def __init__(self, members: Dict[str, FleetMember], logs_dir: Path, max_terraform: int, max_kubeone: int):
+        self.members = members
+        self.logs_dir = logs_dir
+        self.tf_slots = threading.BoundedSemaphore(max_terraform)
+        self.k1_slots = threading.BoundedSemaphore(max_kubeone)
+        self.lock = threading.Lock()
+
+    def set_state(self, m: FleetMember, phase: str, status: str) -> None:
+        with self.lock:
+            m.phase, m.status = phase, status
+
+    def run_phase(self, m: FleetMember, phase: str, args: List[str], slots: Optional[threading.BoundedSemaphore]) -> bool:
+        """Run one `qd2_bootstrap` sub-command for a cluster, output to its own log file."""
+        log_dir = self.logs_dir / m.name
+        log_dir.mkdir(parents=True, exist_ok=True)
+        m.log = log_dir / f"{phase}.log"
+        self.set_state(m, phase, "queued" if slots else "running")
+        with (slots or nullcontext()):
+            self.set_state(m, phase, "running")
+            t0 = time.monotonic()
+            with open(m.log, "w") as out:
+                out.write(f"$ qd2_bootstrap {' '.join(args)}\n")
+                out.flush()
+                rc = subprocess.call(
+                    [sys.executable, "-m", "qd2_bootstrap", *args],
+                    stdout=out,
+                    stderr=subprocess.STDOUT,
+                    env=_child_env(),
+                )
+            m.timings[phase] = time.monotonic() - t0
+        if rc != 0:
+            self.set_state(m, phase, f"failed (rc={rc})")
+            return False
+        self.set_state(m, phase, "done")
+        return True
+
+    def summary(self) -> Table:
+        table = Table(title="Quditto fleet", box=box.SIMPLE, show_header=True, header_style="bold")
+        for col in ("Cluster", "Phase", "Status", "Elapsed", "Log"):
+            table.add_column(col)
+        now = time.monotonic()
+        with self.lock:
+            for m in self.members.values():
+                elapsed = ""
+                if m.started:
+                    elapsed = f"{(m.finished or now) - m.started:.0f}s"
+                style = "green" if m.status == "done" else ("red" if m.status.startswith("failed") else "")
+                table.add_row(
+                    m.name, m.phase, f"[{style}]{m.status}[/]" if style else m.status,
+                    elapsed, str(m.log or ""),
+                )
+        return table
+
+
+def _child_env() -> Dict[str, str]:
+    env = os.environ.copy()
+    # Children write to log files: no terminal colors or width-based wrapping
+    env.setdefault("NO_COLOR", "1")
+    env.setdefault("COLUMNS", "200")
+    return env
+
+
+def _run_fleet(
+    members: Dict[str, FleetMember],
+    fleet: _Fleet,
+    pipeline: Callable[[FleetMember], bool],
+    max_parallel: int,
+) -> int:
+    """Run `pipeline(member)` for every member concurrently with a live summary."""
+    def _one(m: FleetMember) -> bool:
+        m.started = time.monotonic()
+        try:
+            return pipeline(m)
+        finally:
+            m.finished = time.monotonic()
+
+    with Live(fleet.summary(), refresh_per_second=2) as live:
+        with ThreadPoolExecutor(max_workers=max_parallel) as pool:
+            futures = [pool.submit(_one, m) for m in members.values()]
+            while not all(f.done() for f in futures):
+                live.update(fleet.summary())
+                time.sleep(0.5)
+            live.update(fleet.summary())
+        results = [f.result() for f in futures]
+
+    failed = [m.name for m, ok in zip(members.values(), results) if not ok]
+    if failed:
+        rprint(f"[bold red]Failed clusters:[/] {', '.join(failed)}  (see logs under {fleet.logs_dir})")
+        return 1
+    return 0
+
+
+# -----------------------------------------------------------------------------
+# fleet up / fleet down
+# -----------------------------------------------------------------------------
+@app.command()
+def up(
+    paths: List[Path] = typer.Argument(..., exists=True, help="Spec files and/or directories of InfraSpec/ClusterSpec/QudittoDeploySpec YAMLs"),
+    max_parallel: int = typer.Option(8, "--max-parallel", min=1, help="Clusters processed at the same time"),
+    max_terraform: int = typer.Option(2, "--max-terraform", min=1, help="Global cap on concurrent Terraform runs"),
+    max_kubeone: int = typer.Option(2, "--max-kubeone", min=1, help="Global cap on concurrent KubeOne runs"),
+    logs_dir: Path = typer.Option(Path("./fleet-logs"), "--logs-dir", help="Per-cluster logs go to <logs-dir>/<cluster>/<phase>.log"),
+    deploy: bool = typer.Option(True, "--deploy/--no-deploy", help="Also deploy Quditto where a spec names the cluster as defaultCluster"),
+    ssh_timeout: int = typer.Option(600, "--ssh-timeout", help="Max seconds to wait for SSH readiness on new VMs"),
+):
+    """
+    Bring up many clusters concurrently: infra up -> cluster up -> quditto deploy.
+
+    Each cluster runs its own pipeline with its own Terraform workdir
+    (./.tf-build/<cluster>), kubeconfig (./clusters/<cluster>) and log files.
+    Terraform and KubeOne processes are capped globally across the fleet.
+    """
+    members = _discover(paths)
+    if not members:
+        rprint("[yellow]No specs found.[/]")
+        raise typer.Exit(code=0)
+    for m in members.values():
+        if m.quditto and not m.cluster:
+            rprint(f"[bold red]{m.name}: Quditto spec without a cluster spec (no kubeconfig to deploy with).[/]")
+            raise typer.Exit(code=2)
+    fleet = _Fleet(members, logs_dir.resolve(), max_terraform, max_kubeone)
+
+    def pipeline(m: FleetMember) -> bool:
+        if m.infra and not fleet.run_phase(m, "infra", ["infra", "up", "-f", str(m.infra)], fleet.tf_slots):
+            return False
+        if m.cluster:
+            args = ["cluster", "up", "-f", str(m.cluster), "--ssh-timeout", str(ssh_timeout), "--no-post-status"]
+            if not fleet.run_phase(m, "cluster", args, fleet.k1_slots):
+                return False
+        if deploy and m.quditto:
+            kc = (Path("./clusters") / m.name / "kubeconfig").resolve()
+            args = ["quditto", "deploy", "-f", str(m.quditto), "--kubeconfig", str(kc)]
+            if not fleet.run_phase(m, "deploy", args, None):
+                return False
+        fleet.set_state(m, "complete", "done")
+        return True
+
+    raise typer.Exit(code=_run_fleet(members, fleet, pipeline, max_parallel))
+
+
+@app.command()
+def down(
+    paths: List[Path] = typer.Argument(..., exists=True, help="Spec files and/or directories (same set used for 'fleet up')"),
+    max_parallel: int = typer.Option(8, "--max-parallel", min=1, help="Clusters processed at the same time"),
+    max_terraform: int = typer.Option(2, "--max-terraform", min=1, help="Global cap on concurrent Terraform runs"),
+    max_kubeone: int = typer.Option(2, "--max-kubeone", min=1, help="Global cap on concurrent KubeOne runs"),
+    logs_dir: Path = typer.Option(Path("./fleet-logs"), "--logs-dir", help="Per-cluster logs go to <logs-dir>/<cluster>/<phase>.log"),
+    teardown: bool = typer.Option(True, "--teardown/--no-teardown", help="Uninstall Quditto releases before resetting the cluster"),
+    reset: bool = typer.Option(True, "--reset/--no-reset", help="Run 'kubeone reset' on each cluster"),
+):
+    """
+    Tear down many clusters concurrently: quditto teardown -> cluster down -> infra down.
+    """
+    members = _discover(paths)
+    if not members:
+        rprint("[yellow]No specs found.[/]")
+        raise typer.Exit(code=0)
+    fleet = _Fleet(members, logs_dir.resolve(), max_terraform, max_kubeone)
+
+    def pipeline(m: FleetMember) -> bool:
+        kc = (Path("./clusters") / m.name / "kubeconfig").resolve()
+        if teardown and m.quditto and kc.exists():
+            args = ["quditto", "teardown", "-f", str(m.quditto), "--kubeconfig", str(kc)]
+            if not fleet.run_phase(m, "teardown", args, None):
+                return False
+        if reset and m.cluster:
+            if not fleet.run_phase(m, "cluster", ["cluster", "down", "-f", str(m.cluster)], fleet.k1_slots):
+                return False
+        if m.infra and not fleet.run_phase(m, "infra", ["infra", "down", "-f", str(m.infra)], fleet.tf_slots):
+            return False
+        fleet.set_state(m, "complete", "done")
+        return True
+
+    raise typer.Exit(code=_run_fleet(members, fleet, pipeline, max_parallel))
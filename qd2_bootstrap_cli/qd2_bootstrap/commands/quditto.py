@@ -1,88 +1,79 @@
 # qd2_bootstrap/commands/quditto.py
 from __future__ import annotations
 
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, List, Optional
 from collections import defaultdict
+from dataclasses import asdict
 
 import typer
-import yaml
 from rich import print as rprint
 from rich.table import Table
 from rich import box
-
-# Models & utils
-from qd2_bootstrap.models.quditto_deploy_spec import (
-    QudittoDeploySpec,
-    ComponentRef,
-    QNodeRef,
+from rich.markup import escape
+
+from qd2_bootstrap import api
+from qd2_bootstrap.commands.common import api_errors, print_timings, stop_on_sigterm
+from qd2_bootstrap.models.quditto_deploy_spec import QudittoDeploySpec
+from qd2_bootstrap.reconcile import PassResult, ReconcileOptions, Reconciler
+from qd2_bootstrap.utils.kubectl import Kubectl
+from qd2_bootstrap.utils.manifest_diff import (
+    ADDED,
+    CHANGED,
+    REMOVED,
+    UNCHANGED,
+    ObjKey,
+    diff_release,
+    obj_key,
 )
-
-from qd2_bootstrap.utils.helm import HelmClient
-from qd2_bootstrap.utils.mapping import map_component_values
-
-# IMPORTANT: use your actual helper for turning dict values into --set expressions.
-# If your helper is named differently, adapt the import accordingly.
-from qd2_bootstrap.utils.helm_set import dict_to_set_list  # <-- ensure this exists
+from qd2_bootstrap.utils.render import RenderCache, RenderError, render_release, split_manifest
+from qd2_bootstrap.utils.releases import ReleaseUnit
+from qd2_bootstrap.utils.startup import PHASE_HINTS, bottleneck, percentile, worst
+from qd2_bootstrap.commands.validate import print_issues
 
 
 app = typer.Typer(no_args_is_help=True)
 
+# Plans with more releases than this (or any plan in --progress mode) are summarized
+PLAN_ROWS_MAX = 50
+
 
 # -----------------------------------------------------------------------------
-# Helpers: grouping and planning
+# Helpers: printing plans and results
 # -----------------------------------------------------------------------------
-def _target_key(cluster_name: str, kubeconfig: Path) -> Tuple[str, Path]:
-    """Key used to aggregate work per target cluster."""
-    return (cluster_name, kubeconfig)
+def _plan_summary(title: str, units: api.Units) -> None:
+    """One row per cluster: release count, charts, namespaces and nodes."""
+    table = Table(title=title, box=box.SIMPLE, show_header=True, header_style="bold")
+    for col in ("Cluster", "Releases", "Charts", "Namespaces", "Nodes"):
+        table.add_column(col)
+    for (cluster_name, _), items in units.items():
+        charts: Dict[str, int] = defaultdict(int)
+        for unit in items:
+            charts[f"{unit.chart}@{unit.version or 'latest'}"] += 1
+        table.add_row(
+            cluster_name,
+            str(len(items)),
+            ", ".join(f"{c} x{n}" for c, n in sorted(charts.items())),
+            str(len({u.namespace for u in items})),
+            str(len({n for u in items for n in u.nodes})),
+        )
+    rprint(table)
 
 
-def _collect_components(
-    spec: QudittoDeploySpec,
-    multi_cluster: bool,
-    kubeconfig: Optional[Path],
-) -> Dict[Tuple[str, Path], List[Tuple[str, ComponentRef]]]:
-    """Build a mapping: (cluster_name, kubeconfig) -> [(release_name, component), ...].
+def _summarize_plan(plan: api.DeployPlan, progress: bool) -> bool:
+    return progress or plan.release_count > PLAN_ROWS_MAX
 
-    - In multi-cluster mode, resolve `targetCluster` (or `defaultCluster`) from the spec.
-    - In single-cluster mode, require `--kubeconfig`.
-    """
-    per_cluster: Dict[Tuple[str, Path], List[Tuple[str, ComponentRef]]] = defaultdict(list)
-
-    def _add(release_name: str, comp: ComponentRef) -> None:
-        if multi_cluster:
-            # Resolve logical cluster name and its kubeconfig from the spec
-            target_cluster = spec.resolve_target_cluster(comp)
-            kc = spec.kubeconfig_for(target_cluster)
-            per_cluster[_target_key(target_cluster, kc)].append((release_name, comp))
-        else:
-            # Single cluster: require CLI --kubeconfig
-            if not kubeconfig:
-                raise typer.BadParameter("--kubeconfig is required in single-cluster mode")
-            per_cluster[_target_key("__single__", kubeconfig)].append((release_name, comp))
-
-    # Controller (optional in your latest spec, deploy only if present)
-    if spec.qudittoSetup.qcontroller:
-        _add("qcontroller", spec.qudittoSetup.qcontroller)  # type: ignore
-
-    # Orchestrator (optional)
-    if spec.qudittoSetup.qorchestrator:
-        _add("qorchestrator", spec.qudittoSetup.qorchestrator)  # type: ignore
-
-    # QNodes
-    for qn in spec.qudittoSetup.qnodes:
-        _add(qn.name, qn)
-
-    return per_cluster
-
-
-def _print_plan(
-    ns: str,
-    repo_url: str,
-    grouped: Dict[Tuple[str, Path], List[Tuple[str, ComponentRef]]],
-) -> None:
-    """Pretty-print a deployment plan table per cluster."""
-    for (cluster_name, kc_path), items in grouped.items():
+
+def _print_plan(repo_url: str, units: api.Units, summarize: bool = False) -> None:
+    """Pretty-print a deployment plan table per cluster (one row per cluster if `summarize`)."""
+    if summarize:
+        _plan_summary("Quditto deploy plan (summary)", units)
+        rprint(f"[dim]Using repo:[/] {repo_url}\n")
+        return
+    for (cluster_name, kc_path), items in units.items():
         table = Table(
             title=f"Quditto deploy plan → cluster: {cluster_name}  (kubeconfig: {kc_path})",
             box=box.SIMPLE,
@@ -94,13 +85,65 @@ def _print_plan(
         table.add_column("Version")
         table.add_column("Namespace")
         table.add_column("Node (nodeName)")
-        for release, comp in items:
-            chart_ref = comp.chart if comp.chart.startswith("quditto/") else f"quditto/{comp.chart}"
-            table.add_row(release, chart_ref, comp.version or "-", ns, comp.nodek8s)
+        for unit in items:
+            nodes = unit.nodes[0] if len(unit.nodes) == 1 else f"{len(unit.members)} qnodes on {len(set(unit.nodes))} nodes"
+            table.add_row(unit.name, unit.chart_ref, unit.version or "-", unit.namespace, nodes)
         rprint(table)
         rprint(f"[dim]Using repo:[/] {repo_url}\n")
 
 
+def _print_placement(report: api.PlacementReport) -> None:
+    """Per-node result of automatic placement: how many components went where, and load."""
+    placed: Dict[str, int] = defaultdict(int)
+    for node in report.assignment.values():
+        placed[node] += 1
+    table = Table(
+        title=f"Automatic placement → cluster: {report.cluster}  ({len(report.assignment)} component(s))",
+        box=box.SIMPLE,
+        show_header=True,
+        header_style="bold",
+    )
+    for col in ("Node", "Auto-placed", "CPU requested", "Memory requested"):
+        table.add_column(col)
+    for slot in report.slots:
+        table.add_row(
+            slot.name,
+            str(placed.get(slot.name, 0)),
+            f"{slot.used_cpu_m}m / {slot.cpu_m}m",
+            f"{slot.used_mem_b // 2**20}Mi / {slot.mem_b // 2**20}Mi",
+        )
+    rprint(table)
+    if report.links:
+        _print_link_latencies(report)
+
+
+def _print_link_latencies(report: api.PlacementReport) -> None:
+    table = Table(title=f"Expected link latency → cluster: {report.cluster}", box=box.SIMPLE, show_header=True, header_style="bold")
+    for col in ("Link", "Members", "Nodes", "Avg RTT", "Max RTT"):
+        table.add_column(col)
+    fmt = lambda v: "?" if v is None else f"{v:.2f} ms"
+    for r in report.links:
+        table.add_row(escape(r.link), str(r.members), str(r.nodes), fmt(r.avg_ms), fmt(r.max_ms))
+    rprint(table)
+
+
+def _print_warnings(plan: api.DeployPlan) -> None:
+    for w in plan.warnings:
+        rprint(f"[yellow]{escape(w)}[/]")
+
+
+def print_unready(unready: Dict[str, str]) -> None:
+    rprint(f"[bold red]{len(unready)} workload(s) not Ready:[/]")
+    for name, reason in sorted(unready.items()):
+        rprint(f"  [yellow]{escape(name)}[/]: {escape(reason)}")
+
+
+def _print_failed(result: api.RolloutResult) -> None:
+    for r in result.releases:
+        if r.rc != 0:
+            rprint(f"[red]  {r.cluster}/{r.name} failed[/]  [dim]log: {r.log}[/]")
+
+
 # -----------------------------------------------------------------------------
 # quditto deploy
 # -----------------------------------------------------------------------------
@@ -110,79 +153,96 @@ def deploy(
     kubeconfig: Optional[Path] = typer.Option(None, "--kubeconfig", help="(single-cluster) kubeconfig path"),
     namespace: Optional[str] = typer.Option(None, "--namespace", help="Override namespace (spec.namespace default)"),
     dry_run: bool = typer.Option(False, "--dry-run/--no-dry-run", help="Helm dry-run"),
-    show_values: bool = typer.Option(False, "--show-values/--no-show-values", help="Print final --set values for each release"),
+    show_values: bool = typer.Option(False, "--show-values/--no-show-values", help="Print final Helm values for each release"),
     multi_cluster: bool = typer.Option(False, "--multi-cluster/--no-multi-cluster", help="Enable multi-cluster mode"),
     plan_only: bool = typer.Option(False, "--plan/--apply", help="Only print the plan and exit"),
+    chart_cache: bool = typer.Option(True, "--chart-cache/--no-chart-cache", help="Install from the local content-addressed chart cache instead of 'helm repo add'"),
+    chart_dir: Optional[List[Path]] = typer.Option(None, "--chart-dir", help="Extra local chart source (dir with index.yaml/*.tgz, a .tgz, or chart dirs); repeatable"),
+    offline: bool = typer.Option(False, "--offline", help="Never touch the network: charts must come from the cache or local sources"),
+    qnode_mode: str = typer.Option("release", "--qnode-mode", help="'release': one Helm release per qnode; 'set': all qnodes in one qnode-set-v2 release"),
+    set_group: str = typer.Option("cluster", "--qnode-set-group", help="(set mode) one qnode-set release per 'cluster' or per 'namespace'"),
+    concurrency: int = typer.Option(4, "--concurrency", min=1, help="Initial parallel helm operations per cluster (adapted with AIMD)"),
+    max_concurrency: int = typer.Option(16, "--max-concurrency", min=1, help="Upper bound for parallel helm operations per cluster"),
+    validate_first: bool = typer.Option(True, "--validate/--no-validate", help="Check every nodek8s against the live node list before installing"),
+    progress: bool = typer.Option(False, "--progress/--no-progress", help="Live progress view; helm output goes to per-release log files"),
+    logs_dir: Path = typer.Option(Path("./quditto-logs"), "--logs-dir", help="(--progress) logs go to <logs-dir>/<command>-<timestamp>/<cluster>/<release>.log"),
+    wait_ready: bool = typer.Option(True, "--wait-ready/--no-wait-ready", help="Deploy in waves and wait for readiness probes after each"),
+    ready_timeout: int = typer.Option(600, "--ready-timeout", min=1, help="Max seconds each wave waits for its workloads to turn Ready"),
 ):
     """Deploy Quditto components with Helm.
 
     Behavior:
       - Single-cluster: pass `--kubeconfig` and omit `--multi-cluster`.
       - Multi-cluster: pass `--multi-cluster` and declare `clusters` + `targetCluster`/`defaultCluster` in the spec.
+      - Charts are resolved once into the local chart cache (from `charts.localDir`,
+        `--chart-dir` or the repo) and installed from the archive path, so many
+        clusters cost a single fetch. `--offline` forbids any network access.
+      - `--qnode-mode set` renders every qnode-v2 qnode from one `qnode-set-v2`
+        release, instead of one release (and one helm process) per qnode.
+      - Clusters are handled in parallel; within a cluster, releases run under an
+        AIMD limiter that grows while the API server keeps up and halves on
+        throttling (429s, timeouts) or latency spikes. Use `--concurrency 1
+        --max-concurrency 1` for strictly serial installs.
+      - Unless `--no-validate`, placement is checked first (node exists, Ready,
+        not cordoned) so a bad nodek8s fails before any release is installed.
+      - `--progress` replaces the per-line helm output with a live view (counts,
+        throughput, ETA, slowest releases); each release logs to its own file.
+        Plans with more than 50 releases are always summarized per cluster.
+      - Unless `--no-wait-ready`, the controller and qnodes go first and the
+        orchestrator after them; each wave waits until its pods pass their
+        readiness probes (sshd accepting connections). Workloads still not
+        Ready after `--ready-timeout` stop the rollout with exit code 3.
     """
-    # 1) Load and validate spec
-    try:
-        data = yaml.safe_load(file.read_text())
-        spec = QudittoDeploySpec.model_validate(data)
-    except Exception as e:
-        rprint(f"[bold red]Spec validation error:[/] {e}")
+    if offline and not chart_cache:
+        rprint("[bold red]--offline requires the chart cache (drop --no-chart-cache).[/]")
         raise typer.Exit(code=2)
-
-    ns = (namespace or spec.namespace or "default").strip()
-    repo_url = spec.charts.repo
-
-    # 2) Group components by target cluster
-    grouped = _collect_components(spec, multi_cluster=multi_cluster, kubeconfig=kubeconfig)
-
-    if not grouped:
+    with api_errors():
+        spec = api.load_spec(file, QudittoDeploySpec)
+        # Allocations are recorded by api.deploy right before installing, so
+        # plans, dry-runs and aborted deploys leave no trace
+        plan = api.plan_deploy(spec, kubeconfig, namespace, multi_cluster, qnode_mode, set_group, spec_file=file)
+    if not plan.units:
         rprint("[yellow]Nothing to deploy: no components present in spec.[/]")
         raise typer.Exit(code=0)
 
-    # 3) Show plan
-    _print_plan(ns, repo_url, grouped)
+    _print_warnings(plan)
+    for report in plan.placements:
+        _print_placement(report)
+    _print_plan(plan.repo_url, plan.units, summarize=_summarize_plan(plan, progress))
     if plan_only:
         rprint("[cyan]Plan complete (no changes applied).[/]")
         raise typer.Exit(code=0)
 
-    # 4) Execute per cluster
-    for (cluster_name, kc_path), items in grouped.items():
-        rprint(f"\n[bold cyan]Target cluster:[/] {cluster_name}  [dim]({kc_path})[/]")
-        helm = HelmClient(kubeconfig=kc_path)
-
-        # Idempotent repo add/update
-        if helm.repo_add("quditto", repo_url) != 0:
-            raise typer.Exit(code=1)
-        helm.repo_update()
-
-        for release_name, comp in items:
-            # Map placement (nodeName) + user values -> final values dict
-            # Your `map_component_values` should inject:
-            #   placement.useNodeName=true, placement.nodeName=<nodek8s>, and merge extra comp.values.
-            final_values = map_component_values(comp.values, node_name=comp.nodek8s)
-
-            # Convert dict -> ["a.b=c", "x.y=1", ...] for `helm --set`
-            set_inline = dict_to_set_list(final_values)
-
-            # Full chart reference (allow plain "qcontroller-v2" or "quditto/qcontroller-v2")
-            chart_ref = comp.chart if comp.chart.startswith("quditto/") else f"quditto/{comp.chart}"
-
-            if show_values:
-                rprint(f"[dim]--set for {release_name}:[/]\n{final_values}")
-
-            rprint(f"  • Installing/Upgrading [magenta]{release_name}[/] -> {chart_ref}  (ns: {ns})")
-            rc = helm.install_or_upgrade(
-                release=release_name,
-                chart=chart_ref,
-                namespace=ns,
-                version=comp.version,
-                set_inline=set_inline,
-                dry_run=dry_run,
-                create_namespace=True,
-            )
-            if rc != 0:
-                rprint(f"[red]Helm install/upgrade failed for '{release_name}'.[/]")
-                raise typer.Exit(code=rc)
-
+    with api_errors():
+        result = api.deploy(
+            spec,
+            spec_file=file,
+            plan=plan,
+            dry_run=dry_run,
+            show_values=show_values,
+            chart_cache=chart_cache,
+            chart_dir=chart_dir,
+            offline=offline,
+            concurrency=concurrency,
+            max_concurrency=max_concurrency,
+            validate=validate_first,
+            progress=progress,
+            logs_dir=logs_dir,
+            wait_ready=wait_ready,
+            ready_timeout=ready_timeout,
+        )
+    if result.issues:
+        print_issues(result.issues, title="Pre-deploy validation")
+    if progress:
+        _print_failed(result)
+    if result.failed:
+        rprint(f"[red]Helm install/upgrade failed for '{result.failed.name}'.[/]")
+        raise typer.Exit(code=result.rc)
+    if result.unready:
+        print_unready(result.unready)
+        raise typer.Exit(code=result.rc)
+
+    print_timings(plan.steps + result.steps)
     rprint("\n[green]Quditto deployment completed.[/]")
 
 
@@ -198,62 +258,466 @@ def teardown(
     dry_run: bool = typer.Option(False, "--dry-run/--no-dry-run", help="Helm uninstall dry-run"),
     keep_history: bool = typer.Option(False, "--keep-history/--no-keep-history", help="Helm uninstall --keep-history"),
     plan_only: bool = typer.Option(False, "--plan/--apply", help="Only print the plan and exit"),
+    qnode_mode: str = typer.Option("release", "--qnode-mode", help="Release layout used at deploy time ('release' or 'set')"),
+    set_group: str = typer.Option("cluster", "--qnode-set-group", help="(set mode) grouping used at deploy time ('cluster' or 'namespace')"),
+    concurrency: int = typer.Option(4, "--concurrency", min=1, help="Initial parallel helm operations per cluster (adapted with AIMD)"),
+    max_concurrency: int = typer.Option(16, "--max-concurrency", min=1, help="Upper bound for parallel helm operations per cluster"),
+    progress: bool = typer.Option(False, "--progress/--no-progress", help="Live progress view; helm output goes to per-release log files"),
+    logs_dir: Path = typer.Option(Path("./quditto-logs"), "--logs-dir", help="(--progress) logs go to <logs-dir>/<command>-<timestamp>/<cluster>/<release>.log"),
 ):
     """Uninstall Quditto releases previously installed by the deploy.
 
     Strategy:
       - Read the same spec and determine which releases should exist.
-      - Group them per cluster and uninstall those releases from the target namespace.
+      - Group them per cluster and uninstall those releases from their namespace.
     """
-    # 1) Load and validate spec
-    try:
-        data = yaml.safe_load(file.read_text())
-        spec = QudittoDeploySpec.model_validate(data)
-    except Exception as e:
-        rprint(f"[bold red]Spec validation error:[/] {e}")
-        raise typer.Exit(code=2)
+    with api_errors():
+        spec = api.load_spec(file, QudittoDeploySpec)
+        # Only release names and targets matter here
+        plan = api.plan_deploy(
+            spec, kubeconfig, namespace, multi_cluster, qnode_mode, set_group,
+            spec_file=file, placement=False, addressing=False,
+        )
+    if not plan.units:
+        rprint("[yellow]Nothing to tear down: no components present in spec.[/]")
+        raise typer.Exit(code=0)
 
-    ns = (namespace or spec.namespace or "default").strip()
+    # Show plan (what will be uninstalled)
+    if _summarize_plan(plan, progress):
+        _plan_summary("Quditto teardown plan (summary)", plan.units)
+    else:
+        for (cluster_name, kc_path), items in plan.units.items():
+            table = Table(
+                title=f"Quditto teardown plan → cluster: {cluster_name}  (kubeconfig: {kc_path})",
+                box=box.SIMPLE,
+                show_header=True,
+                header_style="bold",
+            )
+            table.add_column("Release")
+            table.add_column("Namespace")
+            for unit in items:
+                table.add_row(unit.name, unit.namespace)
+            rprint(table)
 
-    # 2) Group components (we only need release names and targets)
-    grouped = _collect_components(spec, multi_cluster=multi_cluster, kubeconfig=kubeconfig)
-    if not grouped:
-        rprint("[yellow]Nothing to tear down: no components present in spec.[/]")
+    if plan_only:
+        rprint("[cyan]Plan complete (no changes applied).[/]")
         raise typer.Exit(code=0)
 
-    # 3) Show plan (what will be uninstalled)
-    for (cluster_name, kc_path), items in grouped.items():
+    with api_errors():
+        result = api.teardown(
+            spec,
+            spec_file=file,
+            plan=plan,
+            dry_run=dry_run,
+            keep_history=keep_history,
+            concurrency=concurrency,
+            max_concurrency=max_concurrency,
+            progress=progress,
+            logs_dir=logs_dir,
+        )
+    if progress:
+        _print_failed(result)
+    if result.failed:
+        rprint(f"[red]Helm uninstall failed for '{result.failed.name}'.[/]")
+        raise typer.Exit(code=result.rc)
+
+    print_timings(plan.steps + result.steps)
+    rprint("\n[green]Quditto teardown completed.[/]")
+
+
+# -----------------------------------------------------------------------------
+# quditto plan
+# -----------------------------------------------------------------------------
+def _live_index(kc_path: Path, namespaces: List[str], kinds: List[str]) -> Dict[ObjKey, Dict]:
+    """One batched `kubectl get <kinds> -o json` per namespace, indexed by object key."""
+    kube = Kubectl(kubeconfig=kc_path)
+    index: Dict[ObjKey, Dict] = {}
+    for ns in namespaces:
+        for item in kube.get_json(kinds, namespace=ns).get("items", []):
+            index[obj_key(item)] = item
+    return index
+
+
+@app.command()
+def plan(
+    file: Path = typer.Option(..., "-f", "--file", exists=True, readable=True, help="Quditto multi/single cluster spec YAML"),
+    kubeconfig: Optional[Path] = typer.Option(None, "--kubeconfig", help="(single-cluster) kubeconfig path"),
+    namespace: Optional[str] = typer.Option(None, "--namespace", help="Override namespace (spec.namespace default)"),
+    multi_cluster: bool = typer.Option(False, "--multi-cluster/--no-multi-cluster", help="Enable multi-cluster mode"),
+    chart_dir: Optional[List[Path]] = typer.Option(None, "--chart-dir", help="Extra local chart source (dir with index.yaml/*.tgz, a .tgz, or chart dirs); repeatable"),
+    offline: bool = typer.Option(False, "--offline", help="Never touch the network for charts"),
+    qnode_mode: str = typer.Option("release", "--qnode-mode", help="'release' or 'set' (see deploy)"),
+    set_group: str = typer.Option("cluster", "--qnode-set-group", help="(set mode) 'cluster' or 'namespace'"),
+    live: bool = typer.Option(True, "--live/--no-live", help="Compare against live objects (one read per namespace); --no-live only renders"),
+    details: bool = typer.Option(False, "--details/--no-details", help="List every added/changed/removed object and changed field paths"),
+    jobs: int = typer.Option(8, "--jobs", min=1, help="Parallel local renders on render-cache misses"),
+):
+    """Render every release locally and diff it against the cluster.
+
+    Renders use `helm template` on the cached chart archive and are cached by
+    chart digest + values hash, so re-planning an unchanged spec costs no helm
+    process at all. The render cache keeps the most recently used renders
+    (up to 20000 files / 256 MiB). Live objects are fetched with one batched read per
+    namespace. Exit code is 0 whether or not changes are pending.
+    """
+    with api_errors():
+        spec = api.load_spec(file, QudittoDeploySpec)
+    if not live and spec.placement.mode == "auto":
+        rprint("[bold red]'placement: auto' reads node capacity from the cluster; drop --no-live.[/]")
+        raise typer.Exit(code=2)
+    with api_errors():
+        deploy_plan = api.plan_deploy(spec, kubeconfig, namespace, multi_cluster, qnode_mode, set_group, spec_file=file)
+        if not deploy_plan.units:
+            rprint("[yellow]Nothing to plan: no components present in spec.[/]")
+            raise typer.Exit(code=0)
+        _print_warnings(deploy_plan)
+        for report in deploy_plan.placements:
+            _print_placement(report)
+        units = deploy_plan.units
+        local_charts = api.resolve_charts(api.chart_cache_for(spec, chart_dir, offline), spec.charts.repo, units)
+    renders = RenderCache()
+
+    t0 = time.monotonic()
+    totals = {ADDED: 0, CHANGED: 0, UNCHANGED: 0, REMOVED: 0}
+    for (cluster_name, kc_path), items in units.items():
+        # Render (parallel on cache misses; the cache itself is file-per-key)
+        def _render(unit: ReleaseUnit) -> List[Dict]:
+            archive = local_charts[(unit.chart, unit.version)]
+            # Cache blobs are named by their sha256 digest
+            text = render_release(renders, unit.name, archive, archive.stem, unit.namespace, unit.values)
+            return split_manifest(text, unit.namespace)
+
+        try:
+            with ThreadPoolExecutor(max_workers=jobs) as pool:
+                rendered = list(pool.map(_render, items))
+        except RenderError as e:
+            rprint(f"[bold red]Render failed:[/] {e}")
+            raise typer.Exit(code=1)
+
+        live_index: Optional[Dict[ObjKey, Dict]] = None
+        if live:
+            kinds = sorted({o["kind"].lower() for objs in rendered for o in objs})
+            namespaces = sorted({u.namespace for u in items})
+            try:
+                live_index = _live_index(kc_path, namespaces, kinds or ["deployments"])
+            except (RuntimeError, ValueError) as e:
+                rprint(f"[yellow]Live read failed for {cluster_name}, showing render only:[/] {e}")
+
+        diffs = [diff_release(u.name, u.namespace, objs, live_index) for u, objs in zip(items, rendered)]
+
         table = Table(
-            title=f"Quditto teardown plan → cluster: {cluster_name}  (kubeconfig: {kc_path})",
+            title=f"Quditto plan → cluster: {cluster_name}  (kubeconfig: {kc_path})",
             box=box.SIMPLE,
             show_header=True,
             header_style="bold",
         )
-        table.add_column("Release")
-        table.add_column("Namespace")
-        for release, _comp in items:
-            table.add_row(release, ns)
+        for col in ("Release", "Namespace", "Objects", "Added", "Changed", "Unchanged", "Removed"):
+            table.add_column(col)
+        for d in diffs:
+            counts = {st: d.count(st) for st in totals}
+            for st, n in counts.items():
+                totals[st] += n
+            table.add_row(
+                d.release, d.namespace, str(len(d.objects)),
+                str(counts[ADDED]), str(counts[CHANGED]), str(counts[UNCHANGED]), str(counts[REMOVED]),
+            )
         rprint(table)
 
-    if plan_only:
-        rprint("[cyan]Plan complete (no changes applied).[/]")
-        raise typer.Exit(code=0)
+        if details:
+            for d in diffs:
+                for o in d.objects:
+                    if o.status == UNCHANGED:
+                        continue
+                    kind, obj_ns, name = o.key
+                    extra = f"  [dim]{', '.join(o.paths[:5])}{' …' if len(o.paths) > 5 else ''}[/]" if o.paths else ""
+                    rprint(f"  {o.status:>9}  {kind}/{name} (ns: {obj_ns}){extra}")
 
-    # 4) Execute per cluster
-    for (cluster_name, kc_path), items in grouped.items():
-        rprint(f"\n[bold cyan]Target cluster:[/] {cluster_name}  [dim]({kc_path})[/]")
-        helm = HelmClient(kubeconfig=kc_path)
-
-        for release_name, _comp in items:
-            rprint(f"  • Uninstalling [magenta]{release_name}[/] (ns: {ns})")
-            rc = helm.uninstall(
-                release=release_name,
-                namespace=ns,
-                keep_history=keep_history,
-                dry_run=dry_run,
-            )
-            if rc != 0:
-                rprint(f"[red]Helm uninstall failed for '{release_name}'.[/]")
-                raise typer.Exit(code=rc)
+    renders.prune()
+    rprint(
+        f"[cyan]Plan:[/] {totals[ADDED]} to add, {totals[CHANGED]} to change, "
+        f"{totals[UNCHANGED]} unchanged, {totals[REMOVED]} to remove  "
+        f"[dim](renders cached: {renders.hits}, rendered: {renders.misses}, {time.monotonic() - t0:.1f}s)[/]"
+    )
 
-    rprint("\n[green]Quditto teardown completed.[/]")
+
+# -----------------------------------------------------------------------------
+# quditto drift
+# -----------------------------------------------------------------------------
+@app.command()
+def drift(
+    file: Path = typer.Option(..., "-f", "--file", exists=True, readable=True, help="Quditto multi/single cluster spec YAML"),
+    kubeconfig: Optional[Path] = typer.Option(None, "--kubeconfig", help="(single-cluster) kubeconfig path"),
+    namespace: Optional[str] = typer.Option(None, "--namespace", help="Override namespace (spec.namespace default)"),
+    multi_cluster: bool = typer.Option(False, "--multi-cluster/--no-multi-cluster", help="Enable multi-cluster mode"),
+    qnode_mode: str = typer.Option("release", "--qnode-mode", help="Release layout used at deploy time ('release' or 'set')"),
+    set_group: str = typer.Option("cluster", "--qnode-set-group", help="(set mode) grouping used at deploy time"),
+    output: str = typer.Option("table", "--output", "-o", help="'table' or 'json' (one JSON document with all findings)"),
+):
+    """Compare the spec with what is installed and exit non-zero on drift.
+
+    Flags missing and orphaned releases (Quditto charts only), releases not in
+    'deployed' state, chart name/version mismatches, values drift, and qnode
+    pods that are missing or running on a node other than `nodek8s`.
+
+    Uses one bulk listing of Helm release secrets and one pod listing per
+    cluster, clusters in parallel, so it is cheap enough for a cron job.
+    Exit codes: 0 no drift, 1 drift found, 2 spec/usage error, 3 cluster read error.
+    """
+    if output not in ("table", "json"):
+        rprint("[bold red]--output must be 'table' or 'json'[/]")
+        raise typer.Exit(code=2)
+    with api_errors():
+        spec = api.load_spec(file, QudittoDeploySpec)
+        result = api.drift(spec, kubeconfig, namespace, multi_cluster, qnode_mode, set_group, spec_file=file)
+    findings, errors = result.findings, result.errors
+
+    if output == "json":
+        print(json.dumps({
+            "drift": bool(findings),
+            "errors": errors,
+            "findings": [f.as_dict() for f in findings],
+        }, indent=2))
+    else:
+        for err in errors:
+            rprint(f"[bold red]Cluster read failed:[/] {err}")
+        if findings:
+            table = Table(title="Quditto drift", box=box.SIMPLE, show_header=True, header_style="bold")
+            for col in ("Cluster", "Kind", "Namespace", "Release", "Detail"):
+                table.add_column(col)
+            for f in findings:
+                table.add_row(f.cluster, f.kind, f.namespace, f.release, f.detail)
+            rprint(table)
+        elif not errors:
+            rprint("[green]No drift: live releases match the spec.[/]")
+
+    if errors:
+        raise typer.Exit(code=3)
+    if findings:
+        raise typer.Exit(code=1)
+
+
+# -----------------------------------------------------------------------------
+# quditto debug-bundle
+# -----------------------------------------------------------------------------
+@app.command("debug-bundle")
+def debug_bundle(
+    file: Path = typer.Option(..., "-f", "--file", exists=True, readable=True, help="Quditto multi/single cluster spec YAML"),
+    kubeconfig: Optional[Path] = typer.Option(None, "--kubeconfig", help="(single-cluster) kubeconfig path"),
+    namespace: Optional[str] = typer.Option(None, "--namespace", help="Override namespace (spec.namespace default)"),
+    multi_cluster: bool = typer.Option(False, "--multi-cluster/--no-multi-cluster", help="Enable multi-cluster mode"),
+    qnode_mode: str = typer.Option("release", "--qnode-mode", help="Release layout used at deploy time ('release' or 'set')"),
+    set_group: str = typer.Option("cluster", "--qnode-set-group", help="(set mode) grouping used at deploy time"),
+    output: Optional[Path] = typer.Option(None, "-o", "--output", help="Archive path (default: ./quditto-debug-<timestamp>.tar.gz)"),
+    workers: int = typer.Option(16, "--workers", min=1, help="Parallel kubectl describe/logs calls"),
+    tail: Optional[int] = typer.Option(None, "--tail", min=0, help="Keep only the last N lines of each log"),
+    since: Optional[str] = typer.Option(None, "--since", help="Only logs newer than this duration (e.g. 1h)"),
+    previous: bool = typer.Option(True, "--previous/--no-previous", help="Also fetch the previous run's logs of restarted containers"),
+    timeout: float = typer.Option(60, "--timeout", help="Max seconds per kubectl call"),
+):
+    """Write one .tar.gz with everything needed to debug a Quditto deployment.
+
+    For every release in the spec, across all clusters: Helm revision, status
+    and values; `kubectl describe` and the logs of every container of its pods
+    (init containers and PQC sidecars included); the workloads' events; and
+    the node conditions of each cluster. Calls run on a bounded worker pool
+    and are streamed into the archive as they finish.
+
+    Exit codes: 0 complete, 1 written with missing pieces (see summary.json), 2 spec/usage error.
+    """
+    out = output or Path(f"quditto-debug-{time.strftime('%Y%m%d-%H%M%S')}.tar.gz")
+    with api_errors():
+        spec = api.load_spec(file, QudittoDeploySpec)
+        result = api.debug_bundle(
+            spec, out, kubeconfig, namespace, multi_cluster, qnode_mode, set_group, spec_file=file,
+            workers=workers, tail=tail, since=since, previous=previous, timeout_s=timeout,
+        )
+    print_timings(result.steps)
+    for name, err in sorted(result.errors.items()):
+        rprint(f"  [yellow]{escape(name)}[/]: {escape(err.splitlines()[0] if err else err)}")
+    rprint(f"[green]Debug bundle:[/] {escape(str(result.path))} "
+           f"({result.entries} file(s), {result.bytes / 1024:.1f} KiB)")
+    if result.errors:
+        rprint(f"[yellow]{len(result.errors)} item(s) could not be collected.[/]")
+        raise typer.Exit(code=1)
+
+
+# -----------------------------------------------------------------------------
+# quditto startup-report
+# -----------------------------------------------------------------------------
+def _secs(value: Optional[float]) -> str:
+    return "-" if value is None else f"{value:.0f}s"
+
+
+def _print_startup(result: api.StartupResult, top: int) -> None:
+    table = Table(title="Time to ready, per phase", box=box.SIMPLE, show_header=True, header_style="bold")
+    for col in ("Phase", "Pods", "p50", "p90", "p99", "Max", "Share"):
+        table.add_column(col)
+    for s in result.phases:
+        table.add_row(s.phase, str(s.count), _secs(s.p50), _secs(s.p90), _secs(s.p99), _secs(s.max), f"{s.share:.0%}")
+    totals = [r.total for r in result.pods if r.total is not None]
+    if totals:
+        table.add_row(
+            "[bold]total[/]", str(len(totals)), _secs(percentile(totals, 50)), _secs(percentile(totals, 90)),
+            _secs(percentile(totals, 99)), _secs(max(totals)), "",
+        )
+    rprint(table)
+
+    table = Table(title=f"Slowest {top} pods", box=box.SIMPLE, show_header=True, header_style="bold")
+    for col in ("Cluster", "Release", "Pod", "Node", "Total", "Slowest phase", "Notes"):
+        table.add_column(col)
+    for r in worst(result.pods, top):
+        dominant = r.dominant
+        notes = [f"images: {r.pulled} pulled, {r.cached} cached"] if r.pulled or r.cached else []
+        if r.restarts:
+            notes.append(f"{r.restarts} restart(s)")
+        if r.problem:
+            notes.append(f"[yellow]not ready: {escape(r.problem)}[/]")
+        table.add_row(
+            escape(r.cluster), escape(r.release), escape(r.pod or r.workload), escape(r.node or "-"),
+            _secs(r.total) if r.total is not None else "[yellow]not ready[/]",
+            f"{dominant[0]} ({_secs(dominant[1])})" if dominant else "-", "; ".join(notes),
+        )
+    rprint(table)
+
+    table = Table(title="By node", box=box.SIMPLE, show_header=True, header_style="bold")
+    for col in ("Cluster", "Node", "Pods", "Not ready", "p50", "p90", "Slowest phase", "Conditions"):
+        table.add_column(col)
+    for n in result.nodes:
+        table.add_row(
+            escape(n.cluster), escape(n.node or "(unscheduled)"), str(n.pods), str(n.not_ready or ""),
+            _secs(n.p50), _secs(n.p90), n.worst_phase,
+            f"[red]{', '.join(n.pressure)}[/]" if n.pressure else "ok",
+        )
+    rprint(table)
+
+    top_phase = bottleneck(result.phases)
+    if top_phase:
+        rprint(f"[bold]Bottleneck:[/] {top_phase.phase} ({top_phase.share:.0%} of measured time) - {PHASE_HINTS[top_phase.phase]}")
+
+
+@app.command("startup-report")
+def startup_report(
+    file: Path = typer.Option(..., "-f", "--file", exists=True, readable=True, help="Quditto multi/single cluster spec YAML"),
+    kubeconfig: Optional[Path] = typer.Option(None, "--kubeconfig", help="(single-cluster) kubeconfig path"),
+    namespace: Optional[str] = typer.Option(None, "--namespace", help="Override namespace (spec.namespace default)"),
+    multi_cluster: bool = typer.Option(False, "--multi-cluster/--no-multi-cluster", help="Enable multi-cluster mode"),
+    qnode_mode: str = typer.Option("release", "--qnode-mode", help="Release layout used at deploy time ('release' or 'set')"),
+    set_group: str = typer.Option("cluster", "--qnode-set-group", help="(set mode) grouping used at deploy time"),
+    top: int = typer.Option(10, "--top", min=1, help="How many of the slowest pods to list"),
+    output: str = typer.Option("table", "--output", "-o", help="'table' or 'json' (every pod's phases)"),
+):
+    """Explain where each release's time-to-ready went after a deploy.
+
+    From pod conditions, events and Helm release records (bulk reads,
+    clusters in parallel), each pod's startup is split into Helm submit,
+    scheduling, image pull, container start and readiness. Prints
+    percentiles per phase across the fleet, the slowest pods, and per-node
+    stats with any pressure conditions, so registry pulls, node pressure and
+    slow charts can be told apart. Events expire after about an hour.
+
+    Exit codes: 0 ok, 2 spec/usage error, 3 cluster read error.
+    """
+    if output not in ("table", "json"):
+        rprint("[bold red]--output must be 'table' or 'json'[/]")
+        raise typer.Exit(code=2)
+    with api_errors():
+        spec = api.load_spec(file, QudittoDeploySpec)
+        result = api.startup_report(spec, kubeconfig, namespace, multi_cluster, qnode_mode, set_group, spec_file=file)
+
+    if output == "json":
+        print(json.dumps({
+            "errors": result.errors,
+            "phases": [asdict(s) for s in result.phases],
+            "nodes": [asdict(n) for n in result.nodes],
+            "pods": [r.as_dict() for r in result.pods],
+        }, indent=2))
+    else:
+        for err in result.errors:
+            rprint(f"[bold red]Cluster read failed:[/] {escape(err)}")
+        if result.pods:
+            _print_startup(result, top)
+        elif not result.errors:
+            rprint("[yellow]No pods found for the releases in the spec.[/]")
+    if result.errors:
+        raise typer.Exit(code=3)
+
+
+# -----------------------------------------------------------------------------
+# quditto reconcile
+# -----------------------------------------------------------------------------
+def _print_pass(result: PassResult) -> None:
+    stamp = time.strftime("%H:%M:%S")
+    for err in result.errors:
+        rprint(f"[bold red]{escape(err)}[/]")
+    if not result.findings and not result.errors:
+        rprint(f"[dim]{stamp}[/] [green]in sync[/] [dim]({escape(result.reason)}, {result.seconds:.1f}s)[/]")
+        return
+    parts = [f"{len(result.findings)} finding(s)", f"applied {len(result.applied)}"]
+    if result.deferred:
+        parts.append(f"deferred {len(result.deferred)}")
+    if result.pruned:
+        parts.append(f"pruned {len(result.pruned)}")
+    color = "red" if result.rc else "yellow"
+    rprint(
+        f"[dim]{stamp}[/] [{color}]{', '.join(parts)}[/] "
+        f"[dim]({escape(result.reason)}, {result.seconds:.1f}s)[/]"
+    )
+
+
+@app.command()
+def reconcile(
+    file: Path = typer.Option(..., "-f", "--file", exists=True, readable=True, help="Quditto multi/single cluster spec YAML"),
+    kubeconfig: Optional[Path] = typer.Option(None, "--kubeconfig", help="(single-cluster) kubeconfig path"),
+    namespace: Optional[str] = typer.Option(None, "--namespace", help="Override namespace (spec.namespace default)"),
+    multi_cluster: bool = typer.Option(False, "--multi-cluster/--no-multi-cluster", help="Enable multi-cluster mode"),
+    qnode_mode: str = typer.Option("release", "--qnode-mode", help="'release' or 'set' (as used at deploy time)"),
+    set_group: str = typer.Option("cluster", "--qnode-set-group", help="(set mode) grouping used at deploy time"),
+    watch: bool = typer.Option(False, "--watch", help="Keep running and react to spec and cluster changes"),
+    prune: bool = typer.Option(False, "--prune/--no-prune", help="Uninstall Quditto releases that are no longer in the spec"),
+    dry_run: bool = typer.Option(False, "--dry-run/--no-dry-run", help="Helm dry-run for every change"),
+    chart_dir: Optional[List[Path]] = typer.Option(None, "--chart-dir", help="Extra local chart source; repeatable"),
+    offline: bool = typer.Option(False, "--offline", help="Charts must come from the cache or local sources"),
+    concurrency: int = typer.Option(4, "--concurrency", min=1, help="Initial parallel helm operations per cluster"),
+    max_concurrency: int = typer.Option(16, "--max-concurrency", min=1, help="Upper bound for parallel helm operations per cluster"),
+    validate_first: bool = typer.Option(True, "--validate/--no-validate", help="Check placement against the live nodes before applying"),
+    debounce: float = typer.Option(2.0, "--debounce", min=0, help="(watch) Seconds of quiet before a pass runs"),
+    resync: float = typer.Option(60.0, "--resync", min=1, help="(watch) Full pass at least this often, even without events"),
+    cooldown: float = typer.Option(10.0, "--cooldown", min=0, help="Seconds before re-applying the same release; doubles while it keeps drifting"),
+    rate: float = typer.Option(60.0, "--max-applies-per-minute", min=1, help="Cap on release applies across all clusters"),
+    ready_timeout: float = typer.Option(0.0, "--ready-timeout", min=0, help="Seconds each wave of re-applied releases waits for readiness (0: do not wait)"),
+):
+    """Re-apply only the releases that drifted from the spec.
+
+    One pass plans the spec, reads drift (see `quditto drift`) and installs or
+    upgrades just the releases with findings: missing or failed releases,
+    chart or values changes, qnodes without a pod or on the wrong node.
+    `--prune` also uninstalls orphaned Quditto releases.
+
+    With `--watch` it keeps running. It reacts to edits of the spec file and to
+    pod and Helm release changes in every target namespace
+    (`kubectl --watch-only`), so a deleted or drifted qnode heals within
+    seconds. Events are debounced. A healed release has a cooldown, and
+    applies are capped per minute.
+    Without `--watch` the exit code is that of the pass:
+    0 in sync or healed, 1 a helm failure, 2 spec/usage error, 3 cluster read error.
+    """
+    opts = ReconcileOptions(
+        kubeconfig=kubeconfig, namespace=namespace, multi_cluster=multi_cluster,
+        qnode_mode=qnode_mode, set_group=set_group, dry_run=dry_run, prune=prune,
+        chart_dir=chart_dir, offline=offline, concurrency=concurrency,
+        max_concurrency=max_concurrency, validate=validate_first, debounce_s=debounce,
+        resync_s=resync, cooldown_s=cooldown, applies_per_min=rate,
+        ready_timeout_s=ready_timeout,
+    )
+    reconciler = Reconciler(file, opts)
+    if not watch:
+        result = reconciler.run_pass("once")
+        _print_pass(result)
+        raise typer.Exit(code=result.rc)
+
+    rprint(f"[cyan]Reconciling {escape(str(file))}[/] [dim](Ctrl-C to stop)[/]")
+    stop_on_sigterm()
+    try:
+        reconciler.watch(on_pass=_print_pass)
+    except KeyboardInterrupt:
+        rprint("[yellow]Stopped.[/]")
@@ -0,0 +1,48 @@
+# qd2_bootstrap/commands/serve.py
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Optional
+
+import typer
+from rich import print as rprint
+
+from qd2_bootstrap.commands.common import stop_on_sigterm
+from qd2_bootstrap.server import Daemon, make_server
+from qd2_bootstrap.utils.inventory import shared_inventory
+
+
+def serve(
+    socket_path: Optional[Path] = typer.Option(None, "--socket", help="Listen on this Unix socket (mode 0600) instead of TCP"),
+    host: str = typer.Option("127.0.0.1", "--host", help="TCP address (keep it local: there is no authentication)"),
+    port: int = typer.Option(8742, "--port", help="TCP port"),
+    workers: int = typer.Option(8, "--workers", min=1, help="Jobs running at once (same-cluster jobs always queue)"),
+    inventory_ttl: Optional[float] = typer.Option(None, "--inventory-ttl", min=0, help="Node inventory TTL in seconds (default QD2_INVENTORY_TTL or 30)"),
+):
+    """Run a daemon that accepts deploy, status and drift jobs over HTTP.
+
+    Parsed specs, chart indexes and node inventories stay warm between jobs.
+    Jobs on the same cluster run one at a time; progress is streamed as NDJSON
+    (`POST /v1/jobs?stream=1` or `GET /v1/jobs/<id>/events`). Paths in job
+    arguments and specs resolve against the daemon's working directory.
+    """
+    if inventory_ttl is not None:
+        shared_inventory().ttl_s = inventory_ttl
+    daemon = Daemon(workers=workers)
+    try:
+        server = make_server(daemon, socket_path=socket_path, host=host, port=port)
+    except OSError as e:
+        rprint(f"[bold red]Cannot listen:[/] {e}")
+        raise typer.Exit(code=2)
+    where = f"unix:{socket_path}" if socket_path else f"http://{host}:{port}"
+    rprint(f"[green]qd2_bootstrap serving on {where}[/] [dim](workers: {workers}, Ctrl-C to stop)[/]")
+    stop_on_sigterm()
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        rprint("[yellow]Stopping: waiting for running jobs...[/]")
+    finally:
+        server.server_close()
+        daemon.close()
+        if socket_path:
+            socket_path.expanduser().resolve().unlink(missing_ok=True)
@@ -0,0 +1,104 @@
+# qd2_bootstrap/commands/up.py
+from __future__ import annotations
+
+from pathlib import Path
+from typing import List, Optional
+
+import typer
+from rich import box
+from rich import print as rprint
+from rich.markup import escape
+from rich.table import Table
+
+from qd2_bootstrap import api
+from qd2_bootstrap.commands.common import api_errors
+from qd2_bootstrap.commands.quditto import print_unready
+from qd2_bootstrap.models.cluster_spec import ClusterSpec
+from qd2_bootstrap.models.infra_spec import InfraSpec
+from qd2_bootstrap.models.quditto_deploy_spec import QudittoDeploySpec
+from qd2_bootstrap.utils.critical_path import Stage, critical_path, slack
+
+
+def print_critical_path(stages: List[Stage]) -> None:
+    """Stage timeline, with the chain that bounded the total time highlighted."""
+    if not stages:
+        return
+    path = {s.name for s in critical_path(stages)}
+    spare = slack(stages)
+    table = Table(title="Stages", box=box.SIMPLE, show_header=True, header_style="bold")
+    for col in ("Stage", "Start", "End", "Duration", "Slack", "Waited for"):
+        table.add_column(col)
+    for s in sorted(stages, key=lambda s: (s.start, s.end)):
+        name = f"[bold red]{escape(s.name)}[/]" if s.name in path else escape(s.name)
+        table.add_row(
+            name, f"{s.start:.1f}s", f"{s.end:.1f}s", f"{s.seconds:.1f}s",
+            "-" if s.name in path else f"{spare[s.name]:.1f}s", escape(", ".join(s.after)),
+        )
+    rprint(table)
+    chain = critical_path(stages)
+    total = chain[-1].end
+    top = max(chain, key=lambda s: s.seconds)
+    rprint(f"[bold]Critical path[/] ({total:.1f}s): {' -> '.join(escape(s.name) for s in chain)}")
+    rprint(f"  longest stage on it: [bold]{escape(top.name)}[/] ({top.seconds:.1f}s, {top.seconds / total:.0%} of total)"
+           if total else "")
+
+
+def up(
+    cluster_file: Path = typer.Option(..., "--cluster", exists=True, readable=True, help="Cluster spec YAML"),
+    quditto_file: Path = typer.Option(..., "--quditto", exists=True, readable=True, help="Quditto deploy spec YAML (single cluster)"),
+    infra_file: Optional[Path] = typer.Option(None, "--infra", exists=True, readable=True, help="Infra spec YAML: provision VMs with Terraform first"),
+    namespace: Optional[str] = typer.Option(None, "--namespace", help="Override namespace (spec.namespace default)"),
+    kubeconfig_outdir: Optional[Path] = typer.Option(None, "--kubeconfig-outdir", help="Where to store kubeconfig (default: ./clusters/<name>)"),
+    use_infra_tfstate: bool = typer.Option(False, "--use-infra-tfstate", help="Pass -t <tfstate> to kubeone"),
+    ssh_timeout: int = typer.Option(300, "--ssh-timeout", help="Max seconds to wait for SSH readiness, per host"),
+    api_timeout: float = typer.Option(600, "--api-timeout", help="Max seconds to wait for the API server after KubeOne"),
+    node_timeout: float = typer.Option(600, "--node-timeout", help="Max seconds releases wait for their nodes to turn Ready"),
+    ready_timeout: float = typer.Option(600, "--ready-timeout", help="Max seconds each wave waits for its workloads to pass readiness probes"),
+    chart_dir: Optional[List[Path]] = typer.Option(None, "--chart-dir", help="Extra local chart source; repeatable"),
+    offline: bool = typer.Option(False, "--offline", help="Never touch the network: charts must come from the cache or local sources"),
+    qnode_mode: str = typer.Option("release", "--qnode-mode", help="'release' or 'set' (see quditto deploy)"),
+    set_group: str = typer.Option("cluster", "--qnode-set-group", help="(set mode) one qnode-set release per 'cluster' or per 'namespace'"),
+    concurrency: int = typer.Option(4, "--concurrency", min=1, help="Initial parallel helm operations (adapted with AIMD)"),
+    max_concurrency: int = typer.Option(16, "--max-concurrency", min=1, help="Upper bound for parallel helm operations"),
+    progress: bool = typer.Option(False, "--progress/--no-progress", help="Live progress view for the Helm waves"),
+    logs_dir: Path = typer.Option(Path("./quditto-logs"), "--logs-dir", help="(--progress) per-release log directory"),
+):
+    """
+    Provision, bootstrap and deploy Quditto in one go, overlapping stages.
+
+    While Terraform and KubeOne run, the release plan is built, L2SM
+    addresses are allocated and charts are fetched into the cache. As soon as
+    the API server answers, releases whose nodek8s nodes are Ready are
+    installed (the orchestrator once the controller and every qnode are out,
+    each wave gated on readiness probes); the rest follow in waves as their
+    nodes turn Ready. The run
+    ends with a critical-path report: which chain of stages bounded the
+    total time, and how much slack the others had.
+
+    Exit codes: 0 = deployed, 2 = invalid spec or plan, 3 = SSH, API, nodes or workloads
+    not ready in time, other = the failing tool's exit code.
+    """
+    with api_errors():
+        cluster = api.load_spec(cluster_file, ClusterSpec)
+        quditto = api.load_spec(quditto_file, QudittoDeploySpec)
+        infra = api.load_spec(infra_file, InfraSpec) if infra_file else None
+        result = api.up(
+            cluster, quditto, infra=infra, spec_file=quditto_file, namespace=namespace,
+            kubeconfig_outdir=kubeconfig_outdir, use_infra_tfstate=use_infra_tfstate,
+            ssh_timeout=ssh_timeout, api_timeout=api_timeout, node_timeout=node_timeout,
+            chart_dir=chart_dir, offline=offline, qnode_mode=qnode_mode, set_group=set_group,
+            concurrency=concurrency, max_concurrency=max_concurrency, progress=progress, logs_dir=logs_dir,
+            ready_timeout=ready_timeout,
+        )
+    print_critical_path(result.stages)
+    for release, nodes in sorted(result.pending.items()):
+        rprint(f"  [yellow]{escape(release)}[/] waits for {escape(', '.join(nodes))}")
+    if not result.ok:
+        failed = next((w.failed for w in result.waves if w.failed), None)
+        if failed:
+            rprint(f"[bold red]Release {escape(failed.name)} failed (rc={failed.rc}).[/]")
+        unready = next((w.unready for w in result.waves if w.unready), None)
+        if unready:
+            print_unready(unready)
+        raise typer.Exit(code=result.rc)
+    rprint(f"[green]Up: {len(result.releases)} release(s) deployed in {len(result.waves)} wave(s).[/]")
@@ -0,0 +1,184 @@
+# qd2_bootstrap/commands/validate.py
+from __future__ import annotations
+
+import json
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import typer
+from rich import box
+from rich import print as rprint
+from rich.markup import escape
+from rich.table import Table
+
+from qd2_bootstrap.models.cluster_spec import ClusterSpec
+from qd2_bootstrap.models.infra_spec import InfraSpec
+from qd2_bootstrap.models.quditto_deploy_spec import QudittoDeploySpec
+from qd2_bootstrap.utils.inventory import NodeInventory, shared_inventory
+from qd2_bootstrap.utils.ipam import IpamError, allocate_for_spec
+from qd2_bootstrap.utils.sizing import expand_sizing
+from qd2_bootstrap.utils.spec_loader import shared_spec_cache
+from qd2_bootstrap.utils.validation import (
+    ERROR,
+    WARNING,
+    Grouped,
+    Issue,
+    check_cluster,
+    check_infra_cluster,
+    check_live_placement,
+    check_placement,
+    expected_node_labels,
+    expected_node_names,
+    predicted_nodes,
+)
+
+
+def print_issues(issues: List[Issue], title: str = "Validation issues") -> None:
+    """Table of issues, errors first."""
+    if not issues:
+        rprint("[green]No issues found.[/]")
+        return
+    table = Table(title=title, box=box.SIMPLE, show_header=True, header_style="bold")
+    for col in ("Level", "Scope", "Subject", "Problem"):
+        table.add_column(col)
+    for i in sorted(issues, key=lambda i: (i.level != ERROR, i.scope, i.subject)):
+        style = "red" if i.level == ERROR else "yellow"
+        table.add_row(f"[{style}]{i.level}[/]", escape(i.scope), escape(i.subject), escape(i.message))
+    rprint(table)
+
+
+def _group(
+    spec: QudittoDeploySpec,
+    kubeconfig: Optional[Path],
+    clusters: Dict[str, ClusterSpec],
+) -> Tuple[Grouped, List[Issue]]:
+    """Group components per target cluster like `quditto deploy` does.
+
+    Specs with a `clusters` map are multi-cluster. Otherwise the target is the
+    `--kubeconfig`, or the single ClusterSpec given (its ./clusters/<name>/kubeconfig).
+    """
+    grouped: Grouped = defaultdict(list)
+    issues: List[Issue] = []
+    expand_sizing(spec)
+    if spec.clusters:
+        for release, comp in spec.iter_components():
+            try:
+                target = spec.resolve_target_cluster(comp)
+            except ValueError as e:
+                issues.append(Issue(ERROR, "quditto", release, str(e)))
+                continue
+            grouped[(target, spec.kubeconfig_for(target))].append((release, comp))
+        return grouped, issues
+
+    if kubeconfig is not None:
+        target = ("__single__", kubeconfig.expanduser().resolve())
+    elif len(clusters) == 1:
+        name = next(iter(clusters))
+        target = (name, (Path("./clusters") / name / "kubeconfig").resolve())
+    else:
+        issues.append(Issue(WARNING, "quditto", "--kubeconfig",
+                            "single-cluster spec without --kubeconfig or exactly one cluster spec: placement not checked"))
+        return grouped, issues
+    grouped[target] = spec.components()
+    return grouped, issues
+
+
+def run_validation(
+    paths: List[Path],
+    kubeconfig: Optional[Path] = None,
+    live: bool = True,
+    inventory: Optional[NodeInventory] = None,
+) -> Tuple[List[Issue], bool]:
+    """Validate a set of spec files together. Returns (issues, spec_errors)."""
+    issues: List[Issue] = []
+    infras: Dict[str, InfraSpec] = {}
+    clusters: Dict[str, ClusterSpec] = {}
+    quditto: List[Tuple[Path, QudittoDeploySpec]] = []
+    spec_errors = False
+
+    for f in paths:
+        try:
+            spec = shared_spec_cache().load(f)
+            if isinstance(spec, InfraSpec):
+                infras[spec.infraSetup.clusterName] = spec
+            elif isinstance(spec, ClusterSpec):
+                cspec = spec
+                clusters[cspec.clusterSetup.name] = cspec
+            elif isinstance(spec, QudittoDeploySpec):
+                quditto.append((f, spec))
+            else:
+                issues.append(Issue(WARNING, f.name, "-", "not an infra, cluster or Quditto spec"))
+        except Exception as e:
+            issues.append(Issue(ERROR, f.name, "spec", str(e)))
+            spec_errors = True
+
+    for name, cspec in clusters.items():
+        issues += check_cluster(cspec)
+        if name in infras:
+            issues += check_infra_cluster(infras[name], cspec)
+
+    for f, qspec in quditto:
+        grouped, group_issues = _group(qspec, kubeconfig, clusters)
+        issues += group_issues
+        try:
+            allocate_for_spec(qspec, f, persist=False)
+        except IpamError as e:
+            issues += [Issue(ERROR, f.name, "l2sm", problem) for problem in e.problems]
+        except (OSError, ValueError) as e:
+            issues.append(Issue(ERROR, f.name, "l2sm", f"IPAM state unreadable: {e}"))
+        reachable: Grouped = {}
+        for (cluster_name, kc), comps in grouped.items():
+            if live and kc.exists():
+                reachable[(cluster_name, kc)] = comps
+            elif cluster_name in infras:
+                # Not bootstrapped yet: check against the names Terraform will create
+                infra = infras[cluster_name]
+                nodes = predicted_nodes(expected_node_names(infra), expected_node_labels(infra))
+                issues += check_placement(cluster_name, comps, nodes, live=False)
+                if any(not comp.nodek8s for _, comp in comps):
+                    issues.append(Issue(WARNING, cluster_name, "placement",
+                                        "automatic placement is decided at deploy time (cluster not up yet)"))
+            else:
+                issues.append(Issue(WARNING, cluster_name, str(kc),
+                                    "kubeconfig not available and no infra spec: placement not checked"))
+        issues += check_live_placement(
+            reachable, inventory or shared_inventory(), qspec.placement, (qspec.namespace or "default").strip(),
+        )
+    return issues, spec_errors
+
+
+def validate(
+    paths: List[Path] = typer.Argument(..., exists=True, help="InfraSpec/ClusterSpec/QudittoDeploySpec files and/or directories"),
+    kubeconfig: Optional[Path] = typer.Option(None, "--kubeconfig", help="(single-cluster Quditto spec) kubeconfig of the target cluster"),
+    live: bool = typer.Option(True, "--live/--no-live", help="Check nodek8s references against the live node list"),
+    ttl: Optional[float] = typer.Option(None, "--ttl", help="Node list cache TTL in seconds (default: QD2_INVENTORY_TTL or 30; 0 disables)"),
+    output: str = typer.Option("table", "-o", "--output", help="'table' or 'json'"),
+):
+    """
+    Validate infra, cluster and Quditto specs together, including live placement.
+
+    Every nodek8s must name an existing, Ready, uncordoned node. Node lists are
+    fetched once per cluster and cached for a short TTL, so a following
+    `quditto deploy` reuses them. Before the cluster exists, nodek8s is checked
+    against the node names the paired infra spec will create.
+
+    Exit codes: 0 = valid (warnings allowed), 1 = errors, 2 = unreadable spec.
+    """
+    files: List[Path] = []
+    for p in paths:
+        files += sorted(x for x in p.iterdir() if x.suffix in (".yaml", ".yml")) if p.is_dir() else [p]
+
+    inventory = NodeInventory(ttl_s=ttl) if ttl is not None else None
+    issues, spec_errors = run_validation(files, kubeconfig=kubeconfig, live=live, inventory=inventory)
+
+    if output == "json":
+        print(json.dumps([i.as_dict() for i in issues], indent=2))
+    else:
+        print_issues(issues)
+    errors = sum(1 for i in issues if i.level == ERROR)
+    if output != "json":
+        rprint(f"[bold]{len(files)} spec file(s):[/] {errors} error(s), {len(issues) - errors} warning(s)")
+    if spec_errors:
+        raise typer.Exit(code=2)
+    raise typer.Exit(code=1 if errors else 0)
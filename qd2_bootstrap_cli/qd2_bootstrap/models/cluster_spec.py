@@ -23,6 +23,7 @@ class Networking(BaseModel):
 
 class HostRef(BaseModel):
     privateAddress: str     # publicAddress can be added later if needed
+    labels: Dict[str, str] = Field(default_factory=dict)    # Kubernetes node labels (set by KubeOne)
 
 class ExistingHosts(BaseModel):
     controlPlane: List[HostRef]
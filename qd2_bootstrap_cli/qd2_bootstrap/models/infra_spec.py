@@ -1,8 +1,16 @@
 from pydantic import BaseModel, Field, field_validator, model_validator
-from typing import Optional
+from typing import Dict, List, Optional
 import re
 
 NAME_RE = re.compile(r"^[A-Za-z0-9_-]+$")
+# Pool names end up in VM hostnames, hence Kubernetes node names (DNS labels)
+POOL_RE = re.compile(r"^[a-z0-9]([a-z0-9-]{0,30}[a-z0-9])?$")
+LABEL_KEY_RE = re.compile(r"^([a-z0-9]([a-z0-9.-]{0,251}[a-z0-9])?/)?[A-Za-z0-9]([A-Za-z0-9_.-]{0,61}[A-Za-z0-9])?$")
+LABEL_VALUE_RE = re.compile(r"^([A-Za-z0-9]([A-Za-z0-9_.-]{0,61}[A-Za-z0-9])?)?$")
+# Label every pool node carries, so placement can select a pool by name
+POOL_LABEL = "qd2-bootstrap/pool"
+# Implicit pool built from countWorker/flavorName/imageName when no pools are declared
+LEGACY_POOL = "worker"
 
 def _name(v: str, what: str) -> str:
     if not NAME_RE.match(v):
@@ -17,6 +25,39 @@ class OpenStackAuth(BaseModel):
     tenantId: str
     domainName: str
 
+class WorkerPool(BaseModel):
+    """Named group of identical workers: VMs `<clusterName>-<name>-<i>`.
+
+    `flavorName`/`imageName` default to the ones of `infraSetup`; `labels` are
+    applied to the nodes by KubeOne, next to `qd2-bootstrap/pool: <name>`.
+    """
+    name: str
+    count: int = Field(ge=0, default=1)
+    flavorName: Optional[str] = None
+    imageName: Optional[str] = None
+    labels: Dict[str, str] = Field(default_factory=dict)
+
+    @field_validator("name")
+    @classmethod
+    def _v_name(cls, v: str) -> str:
+        if not POOL_RE.match(v):
+            raise ValueError(f"pool name must be lowercase letters, digits and '-' (max 32): {v!r}")
+        return v
+
+    @field_validator("labels")
+    @classmethod
+    def _v_labels(cls, v: Dict[str, str]) -> Dict[str, str]:
+        for key, value in v.items():
+            if not LABEL_KEY_RE.match(key):
+                raise ValueError(f"invalid label key: {key!r}")
+            if not LABEL_VALUE_RE.match(str(value)):
+                raise ValueError(f"invalid label value for {key}: {value!r}")
+        return {k: str(val) for k, val in v.items()}
+
+    def node_labels(self) -> Dict[str, str]:
+        return {**self.labels, POOL_LABEL: self.name}
+
+
 class InfraSetup(BaseModel):
     workdir: Optional[str] = Field(default=None)
     clusterName: str
@@ -29,12 +70,35 @@ class InfraSetup(BaseModel):
     networkUuid: str
 
     openstack: OpenStackAuth
+    workerPools: List[WorkerPool] = Field(default_factory=list)
 
     @field_validator("clusterName")
     @classmethod
     def _v_cluster(cls, v: str) -> str:
         return _name(v, "clusterName")
 
+    @model_validator(mode="after")
+    def _v_pools(self):
+        if self.workerPools and "countWorker" in self.model_fields_set:
+            raise ValueError("use either countWorker or workerPools, not both")
+        names = [p.name for p in self.workerPools]
+        dupes = sorted({n for n in names if names.count(n) > 1})
+        if dupes:
+            raise ValueError(f"duplicate worker pool name(s): {', '.join(dupes)}")
+        return self
+
+    def worker_pools(self) -> List[WorkerPool]:
+        """Declared pools with flavor/image defaults filled in; without
+        `workerPools`, the implicit `worker` pool of `countWorker` VMs (no labels)."""
+        if not self.workerPools:
+            return [WorkerPool(name=LEGACY_POOL, count=self.countWorker,
+                               flavorName=self.flavorName, imageName=self.imageName)]
+        return [
+            p.model_copy(update={"flavorName": p.flavorName or self.flavorName,
+                                 "imageName": p.imageName or self.imageName})
+            for p in self.workerPools
+        ]
+
     @model_validator(mode="after")
     def _default_workdir(self):
         """If workdir is not given, default to ./.tf-build/<clusterName>"""
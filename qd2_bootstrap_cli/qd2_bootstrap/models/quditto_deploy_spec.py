@@ -1,10 +1,12 @@
 from __future__ import annotations
 
+import ipaddress
 import re
+from itertools import chain, islice
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Dict, Iterator, List, Optional, Tuple
 
-from pydantic import BaseModel, Field, field_validator
+from pydantic import BaseModel, Field, field_validator, model_validator
 
 
 # ---------------------------------------------------------------------------
@@ -31,8 +33,134 @@ def _name(v: str, what: str) -> str:
 # Leaf models
 # ---------------------------------------------------------------------------
 class ChartsConfig(BaseModel):
-    """Global chart source (classic Helm repo URL)."""
+    """Global chart source (classic Helm repo URL).
+
+    `localDir` optionally points at packaged charts (e.g. the repo's `docs/`
+    with `index.yaml` + `*.tgz`) or unpacked chart directories, used by the
+    local chart cache before falling back to `repo`.
+
+    `qnodeSetVersion` pins the `qnode-set-v2` chart used by `--qnode-mode set`
+    (default: the `version` its qnodes pin, else the latest).
+    """
     repo: str  # e.g., "https://borjand.github.io/k8s-qudittov2-deployment/"
+    localDir: Optional[str] = None
+    qnodeSetVersion: Optional[str] = None
+
+
+class ResourceProfile(BaseModel):
+    """CPU/memory a component needs, in Kubernetes quantity syntax (e.g. "250m", "256Mi")."""
+    cpu: str = "100m"
+    memory: str = "128Mi"
+
+
+class ContainerResources(BaseModel):
+    """Kubernetes container `resources` block (requests/limits by resource name)."""
+    requests: Dict[str, str] = Field(default_factory=dict)
+    limits: Dict[str, str] = Field(default_factory=dict)
+
+
+class SizingProfile(BaseModel):
+    """Named container sizing expanded into chart values by the CLI.
+
+    - main: resources of the main container (controller, orchestrator, QKD node)
+    - pqc: resources of each PQC container of a qnode (pqc/hybrid nodes)
+    """
+    main: Optional[ContainerResources] = None
+    pqc: Optional[ContainerResources] = None
+
+
+# Kinds `defaultSizing` can be keyed by: the two singletons and the qnode typeNode values
+SIZING_KINDS = ("qcontroller", "qorchestrator", "qkd", "pqc", "hybrid")
+
+
+PLACEMENT_MODES = ("manual", "auto")
+PLACEMENT_STRATEGIES = ("spread", "binpack")
+
+
+class PlacementConfig(BaseModel):
+    """How components without `nodek8s` get a node.
+
+    - mode: "manual" (every component sets nodek8s) or "auto" (the CLI picks
+      nodes from live allocatable capacity and current pod load)
+    - strategy: "spread" (least-loaded node first) or "binpack" (fill nodes in turn)
+    - defaultRequests: resource profile for components without `resources`
+    - nodeSelector: only nodes with all these labels are candidates
+    - sticky: keep already-running components on their current node
+    - topology: use the RTT matrix measured by `cluster netprobe` to put linked
+      components (`links`, shared L2SM networks) on nearby nodes
+
+    `placement: auto` is accepted as shorthand for `placement: {mode: auto}`.
+    """
+    mode: str = "manual"
+    strategy: str = "spread"
+    defaultRequests: ResourceProfile = Field(default_factory=ResourceProfile)
+    nodeSelector: Dict[str, str] = Field(default_factory=dict)
+    sticky: bool = True
+    topology: bool = False
+
+    @model_validator(mode="before")
+    @classmethod
+    def _shorthand(cls, v):
+        return {"mode": v} if isinstance(v, str) else v
+
+    @field_validator("mode")
+    @classmethod
+    def _v_mode(cls, v: str) -> str:
+        if v not in PLACEMENT_MODES:
+            raise ValueError(f"placement.mode must be one of {PLACEMENT_MODES}: {v!r}")
+        return v
+
+    @field_validator("strategy")
+    @classmethod
+    def _v_strategy(cls, v: str) -> str:
+        if v not in PLACEMENT_STRATEGIES:
+            raise ValueError(f"placement.strategy must be one of {PLACEMENT_STRATEGIES}: {v!r}")
+        return v
+
+
+class L2smNetwork(BaseModel):
+    """An L2SM network whose addresses the CLI allocates.
+
+    - subnet: CIDR the qnode/controller addresses come from (e.g. "10.10.0.0/24")
+    - reserved: addresses never handed out (gateways, static hosts)
+    """
+    subnet: str
+    reserved: List[str] = Field(default_factory=list)
+
+    @field_validator("subnet")
+    @classmethod
+    def _v_subnet(cls, v: str) -> str:
+        try:
+            return str(ipaddress.ip_network(v, strict=True))
+        except ValueError as e:
+            raise ValueError(f"invalid L2SM subnet {v!r}: {e}")
+
+    @model_validator(mode="after")
+    def _reserved_in_subnet(self):
+        net = ipaddress.ip_network(self.subnet)
+        for ip in self.reserved:
+            if ipaddress.ip_address(ip) not in net:
+                raise ValueError(f"reserved address {ip} is outside {self.subnet}")
+        return self
+
+
+class L2smConfig(BaseModel):
+    """L2SM address management.
+
+    - networks: network name -> subnet; components attached to these networks
+      without an explicit `ip` get one allocated by the CLI
+    - stateFile: allocation index (default: `<spec>.ipam.json` next to the spec),
+      keeps addresses stable across deploys
+    """
+    networks: Dict[str, L2smNetwork] = Field(default_factory=dict)
+    stateFile: Optional[str] = None
+
+    @field_validator("networks")
+    @classmethod
+    def _v_networks(cls, v: Dict[str, L2smNetwork]) -> Dict[str, L2smNetwork]:
+        for name in v:
+            _name(name, "l2sm network name")
+        return v
 
 
 class ClusterRef(BaseModel):
@@ -52,22 +180,41 @@ class ComponentRef(BaseModel):
     """One deployable component: placement params + chart reference + optional values.
 
     Fields:
-      - nodek8s: target Kubernetes nodeName (your charts translate this into placement.* values)
+      - nodek8s: target Kubernetes nodeName (your charts translate this into placement.* values);
+        optional with `placement: auto`, where the CLI picks the node
+      - resources: resource profile used by automatic placement
+      - antiAffinity: group name; components sharing it never share a node (auto placement)
+      - sizing: name of a `sizingProfiles` entry expanded into container resources
+      - links: components this one exchanges traffic with (topology-aware placement)
+      - nodeSelector: node labels the chosen node must carry (auto placement), e.g.
+        {"qd2-bootstrap/pool": "gpu"} for a worker pool
       - chart: Helm chart name (e.g., "qcontroller-v2")
       - version: optional chart version
       - values: dict of overrides merged/mapped into your chart values
       - targetCluster: optional logical cluster name; if omitted, defaultCluster is used
+      - namespace: optional per-component namespace; if omitted, the deploy namespace is used
     """
-    nodek8s: str
+    nodek8s: Optional[str] = None
     chart: str
     version: Optional[str] = None
     values: Dict = Field(default_factory=dict)
     targetCluster: Optional[str] = None  # <-- multi-cluster hook
+    namespace: Optional[str] = None
+    resources: Optional[ResourceProfile] = None
+    antiAffinity: Optional[str] = None
+    sizing: Optional[str] = None
+    links: List[str] = Field(default_factory=list)
+    nodeSelector: Dict[str, str] = Field(default_factory=dict)
+
+    @field_validator("namespace")
+    @classmethod
+    def _v_namespace(cls, v: Optional[str]) -> Optional[str]:
+        return _name(v, "namespace") if v else v
 
     @field_validator("nodek8s")
     @classmethod
-    def _v_nodek8s(cls, v: str) -> str:
-        return _name(v, "nodek8s")
+    def _v_nodek8s(cls, v: Optional[str]) -> Optional[str]:
+        return _name(v, "nodek8s") if v else v
 
     @field_validator("chart")
     @classmethod
@@ -88,6 +235,80 @@ class QNodeRef(ComponentRef):
         return _name(v, "qnode.name")
 
 
+SET_ASSIGN = ("round-robin", "block")
+
+
+class QNodeSet(ComponentRef):
+    """Many qnodes written once: a name pattern, a count and shared settings.
+
+    Fields (besides the shared ComponentRef ones):
+      - name: pattern with an `{i}` field, e.g. "qnode-{i:04d}"
+      - count, start: members get i = start .. start + count - 1
+      - nodes: nodek8s values handed out per member, either `round-robin`
+        (member k -> nodes[k % len]) or in `block`s of consecutive members;
+        empty with `placement: auto` (or a shared `nodek8s`)
+
+    The set is validated once; members are built on demand by `members()`
+    without re-validation, so parsing and validating the spec cost the same
+    whatever the `count`. Planning still materializes one component and one
+    values dict per member (O(count) memory). Members share the set's values
+    (treat them as read-only).
+    """
+    name: str
+    count: int = Field(ge=1)
+    start: int = Field(ge=0, default=1)
+    nodes: List[str] = Field(default_factory=list)
+    assign: str = "round-robin"
+
+    @field_validator("name")
+    @classmethod
+    def _v_pattern(cls, v: str) -> str:
+        if "{i" not in v:
+            raise ValueError(f"qnodeSets name must contain an {{i}} field: {v!r}")
+        try:
+            v.format(i=0)
+        except (KeyError, IndexError, ValueError) as e:
+            raise ValueError(f"invalid qnodeSets name pattern {v!r}: {e}")
+        return v
+
+    @field_validator("nodes")
+    @classmethod
+    def _v_nodes(cls, v: List[str]) -> List[str]:
+        return [_name(n, "qnodeSets.nodes[]") for n in v]
+
+    @field_validator("assign")
+    @classmethod
+    def _v_assign(cls, v: str) -> str:
+        if v not in SET_ASSIGN:
+            raise ValueError(f"assign must be one of {SET_ASSIGN}: {v!r}")
+        return v
+
+    @model_validator(mode="after")
+    def _v_set(self):
+        if self.nodes and self.nodek8s:
+            raise ValueError(f"{self.name}: use either nodek8s or nodes, not both")
+        # Widths only grow with i, so the first and last names cover the pattern
+        for i in (self.start, self.start + self.count - 1):
+            _name(self.name.format(i=i), "qnode.name")
+        return self
+
+    def member_name(self, k: int) -> str:
+        return self.name.format(i=self.start + k)
+
+    def member_node(self, k: int) -> Optional[str]:
+        if not self.nodes:
+            return self.nodek8s
+        if self.assign == "block":
+            return self.nodes[k * len(self.nodes) // self.count]
+        return self.nodes[k % len(self.nodes)]
+
+    def members(self) -> Iterator[QNodeRef]:
+        """The qnodes of this set, in order, built lazily."""
+        proto = QNodeRef.model_construct(name=self.member_name(0), **{f: getattr(self, f) for f in ComponentRef.model_fields})
+        for k in range(self.count):
+            yield proto.model_copy(update={"name": self.member_name(k), "nodek8s": self.member_node(k)})
+
+
 # ---------------------------------------------------------------------------
 # Grouping for Quditto components
 # ---------------------------------------------------------------------------
@@ -95,21 +316,32 @@ class QudittoSetup(BaseModel):
     """Top-level grouping for Quditto components.
 
     Each child is optional; the CLI deploys only the ones present in the spec.
+    `qnodeSets` add qnodes after the explicit `qnodes`.
     """
     qcontroller: Optional[ComponentRef] = None
     qorchestrator: Optional[ComponentRef] = None
     qnodes: List[QNodeRef] = Field(default_factory=list)
+    qnodeSets: List[QNodeSet] = Field(default_factory=list)
 
-    @field_validator("qnodes")
-    @classmethod
-    def _unique_qnode_names(cls, items: List[QNodeRef]) -> List[QNodeRef]:
-        """Ensure qnode names are unique within the spec."""
+    def iter_qnodes(self) -> Iterator[QNodeRef]:
+        """Explicit qnodes, then the members of every set (streamed)."""
+        yield from self.qnodes
+        for qs in self.qnodeSets:
+            yield from qs.members()
+
+    @model_validator(mode="after")
+    def _unique_qnode_names(self):
+        """Ensure qnode names are unique within the spec (one name index, no expansion)."""
         seen = set()
-        for it in items:
-            if it.name in seen:
-                raise ValueError(f"duplicated qnode name: {it.name}")
-            seen.add(it.name)
-        return items
+        names = chain(
+            (qn.name for qn in self.qnodes),
+            (qs.member_name(k) for qs in self.qnodeSets for k in range(qs.count)),
+        )
+        for name in names:
+            if name in seen:
+                raise ValueError(f"duplicated qnode name: {name}")
+            seen.add(name)
+        return self
 
 
 # ---------------------------------------------------------------------------
@@ -135,6 +367,16 @@ class QudittoDeploySpec(BaseModel):
     # Default cluster name to use if a component does not set `targetCluster`
     defaultCluster: Optional[str] = None
 
+    # Node selection for components without `nodek8s`
+    placement: PlacementConfig = Field(default_factory=PlacementConfig)
+
+    # Named container sizings, and the profile used per kind when a component sets none
+    sizingProfiles: Dict[str, SizingProfile] = Field(default_factory=dict)
+    defaultSizing: Dict[str, str] = Field(default_factory=dict)
+
+    # L2SM networks with CLI-managed addresses
+    l2sm: L2smConfig = Field(default_factory=L2smConfig)
+
     # --------------------------
     # Validators / sanity checks
     # --------------------------
@@ -155,9 +397,82 @@ class QudittoDeploySpec(BaseModel):
             raise ValueError(f"defaultCluster '{v}' not found in clusters map")
         return v
 
+    @field_validator("defaultSizing")
+    @classmethod
+    def _v_default_sizing(cls, v: Dict[str, str]) -> Dict[str, str]:
+        unknown = sorted(set(v) - set(SIZING_KINDS))
+        if unknown:
+            raise ValueError(f"defaultSizing keys must be among {SIZING_KINDS}: {unknown}")
+        return v
+
+    @model_validator(mode="after")
+    def _sizing_exists(self):
+        """Every referenced sizing profile must be defined under `sizingProfiles`."""
+        refs = [(f"defaultSizing.{k}", v) for k, v in self.defaultSizing.items()]
+        refs += [(name, comp.sizing) for name, comp in self.declared() if comp.sizing]
+        for where, profile in refs:
+            if profile not in self.sizingProfiles:
+                raise ValueError(f"{where}: sizing profile '{profile}' not found in sizingProfiles")
+        return self
+
+    @model_validator(mode="after")
+    def _links_exist(self):
+        """`links` must name components of this spec."""
+        linked = [(name, comp) for name, comp in self.declared() if comp.links]
+        if not linked:
+            return self
+        names = {name for name, _ in self.iter_components()}
+        for name, comp in linked:
+            unknown = [l for l in comp.links if l not in names]
+            if unknown:
+                raise ValueError(f"{name}: links to unknown component(s) {', '.join(unknown)}")
+        return self
+
+    @model_validator(mode="after")
+    def _nodes_or_auto(self):
+        """Without automatic placement every component must name its node."""
+        if self.placement.mode == "auto":
+            return self
+        missing = list(islice((name for name, comp in self.iter_components() if not comp.nodek8s), 6))
+        if missing:
+            raise ValueError(
+                f"nodek8s missing for {', '.join(missing[:5])}{' …' if len(missing) > 5 else ''} "
+                "(set it, or use 'placement: auto')"
+            )
+        return self
+
     # --------------------------
     # Convenience helper methods
     # --------------------------
+    def iter_components(self) -> Iterator[Tuple[str, ComponentRef]]:
+        """All components as (release_name, component), controller and orchestrator
+        first; qnodeSets members are built as they are consumed."""
+        if self.qudittoSetup.qcontroller:
+            yield ("qcontroller", self.qudittoSetup.qcontroller)
+        if self.qudittoSetup.qorchestrator:
+            yield ("qorchestrator", self.qudittoSetup.qorchestrator)
+        for qn in self.qudittoSetup.iter_qnodes():
+            yield (qn.name, qn)
+
+    def components(self) -> List[Tuple[str, ComponentRef]]:
+        """All components as (release_name, component), controller and orchestrator first.
+
+        qnodeSets members are new objects on every call: changes to them
+        (e.g. auto placement) only live in the returned list.
+        """
+        return list(self.iter_components())
+
+    def declared(self) -> Iterator[Tuple[str, ComponentRef]]:
+        """Components as written, as (name, component): each qnode set stands for
+        all its members, under its name pattern."""
+        setup = self.qudittoSetup
+        if setup.qcontroller:
+            yield ("qcontroller", setup.qcontroller)
+        if setup.qorchestrator:
+            yield ("qorchestrator", setup.qorchestrator)
+        for comp in (*setup.qnodes, *setup.qnodeSets):
+            yield (comp.name, comp)
+
     def resolve_target_cluster(self, comp: ComponentRef) -> str:
         """Return the logical cluster name for a component.
 
@@ -0,0 +1,365 @@
+# qd2_bootstrap/reconcile.py
+"""`quditto reconcile`: keep the live Quditto releases equal to the spec.
+
+A pass rebuilds the plan (in memory), reads drift with two bulk calls per
+cluster and re-applies only the releases that have findings. In watch mode,
+passes are triggered by:
+  - spec file changes (mtime polling),
+  - `kubectl --watch-only` streams on the pods and Helm release secrets of
+    every target namespace,
+  - a periodic resync, in case a watch dies unnoticed.
+
+Bursts of triggers are debounced into one pass. A release that was just
+re-applied waits out a cooldown, which doubles while it keeps drifting, so
+a crash-looping chart is not reinstalled every few seconds. A token bucket
+also caps applies per minute across the whole loop. Re-applies do not wait
+for readiness by default, so one crash-looping release never holds up the
+loop; its pods show up as drift on the next pass.
+"""
+from __future__ import annotations
+
+import subprocess
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from rich.markup import escape
+
+from qd2_bootstrap import api
+from qd2_bootstrap.models.quditto_deploy_spec import QudittoDeploySpec
+from qd2_bootstrap.utils.drift import (
+    CHART_MISMATCH,
+    MISSING,
+    NO_POD,
+    NOT_DEPLOYED,
+    ORPHANED,
+    VALUES_DRIFT,
+    WRONG_NODE,
+    DriftFinding,
+)
+from qd2_bootstrap.utils.helm import HelmClient
+from qd2_bootstrap.utils.ipam import IpamError, release_for_spec
+from qd2_bootstrap.utils.kubectl import Kubectl
+from qd2_bootstrap.utils.locks import LockTimeout
+from qd2_bootstrap.utils.output import emit
+
+# Findings fixed by re-applying the release (orphans need --prune)
+HEALABLE = frozenset({MISSING, NOT_DEPLOYED, CHART_MISMATCH, VALUES_DRIFT, WRONG_NODE, NO_POD})
+# How often the spec file's mtime is checked
+SPEC_POLL_S = 0.5
+# A trigger burst is cut off after this many debounce intervals
+DEBOUNCE_MAX_FACTOR = 5
+
+ReleaseKey = Tuple[str, str]            # (cluster, release)
+WatchKey = Tuple[str, Path, str, str]   # (cluster, kubeconfig, namespace, kind)
+
+
+@dataclass
+class ReconcileOptions:
+    kubeconfig: Optional[Path] = None
+    namespace: Optional[str] = None
+    multi_cluster: bool = False
+    qnode_mode: str = "release"
+    set_group: str = "cluster"
+    dry_run: bool = False
+    prune: bool = False
+    chart_dir: Optional[List[Path]] = None
+    offline: bool = False
+    concurrency: int = 4
+    max_concurrency: int = 16
+    validate: bool = True
+    debounce_s: float = 2.0
+    resync_s: float = 60.0
+    cooldown_s: float = 10.0
+    max_cooldown_s: float = 600.0
+    applies_per_min: float = 60.0
+    # Seconds each wave of re-applied releases may wait for readiness; 0 does
+    # not wait (the next pass reports unready pods as NO_POD findings anyway)
+    ready_timeout_s: float = 0.0
+
+
+@dataclass
+class PassResult:
+    """One reconcile pass; `rc` follows `quditto drift`/`deploy` exit codes."""
+    reason: str
+    rc: int = 0
+    findings: List[DriftFinding] = field(default_factory=list)
+    applied: List[str] = field(default_factory=list)
+    deferred: List[str] = field(default_factory=list)
+    pruned: List[str] = field(default_factory=list)
+    errors: List[str] = field(default_factory=list)
+    seconds: float = 0.0
+
+
+class _TokenBucket:
+    """`per_min` tokens per minute, bursting up to the same amount."""
+
+    def __init__(self, per_min: float) -> None:
+        self.capacity = max(1.0, per_min)
+        self.rate = per_min / 60.0
+        self.tokens = self.capacity
+        self._t = time.monotonic()
+
+    def take(self, n: int) -> int:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._t) * self.rate)
+        self._t = now
+        k = min(n, int(self.tokens))
+        self.tokens -= k
+        return k
+
+    def next_token_s(self) -> float:
+        return max(0.0, (1.0 - self.tokens) / self.rate) if self.rate > 0 else float("inf")
+
+
+class Reconciler:
+    """Spec -> live convergence loop for one spec file."""
+
+    def __init__(self, spec_file: Path, opts: ReconcileOptions) -> None:
+        self.spec_file = spec_file
+        self.opts = opts
+        self._spec: Optional[QudittoDeploySpec] = None
+        self._spec_stamp: Optional[Tuple[int, int]] = None
+        self._cooldown: Dict[ReleaseKey, Tuple[float, int]] = {}  # -> (not before, streak)
+        self._bucket = _TokenBucket(opts.applies_per_min)
+        self._retry_at: Optional[float] = None
+        self._targets: Dict[WatchKey, Optional[str]] = {}  # -> label selector
+        self._watchers: Dict[WatchKey, Optional[subprocess.Popen]] = {}
+        self._reasons: Set[str] = set()
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+
+    # ---------- spec ----------
+    def _stamp(self) -> Optional[Tuple[int, int]]:
+        try:
+            st = self.spec_file.stat()
+        except OSError:
+            return None
+        return st.st_mtime_ns, st.st_size
+
+    def _current_spec(self) -> QudittoDeploySpec:
+        """Fresh copy of the spec; a broken edit keeps the last good one."""
+        stamp = self._stamp()
+        if self._spec is None or stamp != self._spec_stamp:
+            self._spec_stamp = stamp
+            try:
+                self._spec = api.load_spec(self.spec_file, QudittoDeploySpec)
+            except api.ApiError as e:
+                if self._spec is None:
+                    raise
+                emit(f"[yellow]{escape(str(e))}; keeping the previous spec.[/]")
+                for detail in e.details:
+                    emit(f"  - {escape(detail)}")
+        return self._spec.model_copy(deep=True)
+
+    # ---------- one pass ----------
+    def run_pass(self, reason: str = "manual") -> PassResult:
+        o = self.opts
+        t0 = time.monotonic()
+        result = PassResult(reason)
+        try:
+            spec = self._current_spec()
+            plan = api.plan_deploy(
+                spec, o.kubeconfig, o.namespace, o.multi_cluster, o.qnode_mode, o.set_group,
+                spec_file=self.spec_file,
+            )
+            self._targets = {
+                (cluster_name, kc_path, ns, kind): selector
+                for (cluster_name, kc_path), items in plan.units.items()
+                for ns in sorted({u.namespace for u in items})
+                for kind, selector in (("pods", None), ("secrets", "owner=helm"))
+            }
+            drift = api.plan_drift(plan)
+        except api.ApiError as e:
+            result.rc = e.code
+            result.errors += [str(e), *e.details]
+            result.seconds = time.monotonic() - t0
+            return result
+        result.findings = drift.findings
+        result.errors += drift.errors
+        if drift.errors:
+            result.rc = 3
+
+        heal: Dict[ReleaseKey, List[DriftFinding]] = {}
+        for f in drift.findings:
+            if f.kind in HEALABLE:
+                heal.setdefault((f.cluster, f.release), []).append(f)
+        orphans = [f for f in drift.findings if f.kind == ORPHANED]
+
+        # Releases seen in sync start over with the base cooldown
+        read_ok = {c for c, _, _, _ in self._targets} - {e.split(":", 1)[0] for e in drift.errors}
+        for key in list(self._cooldown):
+            if key not in heal and key[0] in read_ok:
+                del self._cooldown[key]
+
+        now = time.monotonic()
+        ready = [k for k in heal if self._cooldown.get(k, (0.0, 0))[0] <= now]
+        waiting = [k for k in heal if k not in ready]
+        allowed = self._bucket.take(len(ready))
+        waiting += ready[allowed:]
+        ready = ready[:allowed]
+        result.deferred = [f"{c}/{r}" for c, r in waiting]
+        self._retry_at = None
+        if waiting:
+            due = [self._cooldown[k][0] for k in waiting if k in self._cooldown and self._cooldown[k][0] > now]
+            if len(due) < len(waiting):
+                due.append(now + self._bucket.next_token_s())
+            self._retry_at = min(due)
+
+        if ready:
+            for key in ready:
+                what = "; ".join(f"{f.kind} ({f.detail})" if f.detail else f.kind for f in heal[key])
+                emit(f"  [cyan]↻[/] {escape(key[0])}/[magenta]{escape(key[1])}[/]: {escape(what)}")
+            self._apply(spec, plan, ready, result)
+            for key in ready:
+                streak = self._cooldown.get(key, (0.0, 0))[1] + 1
+                delay = min(o.max_cooldown_s, o.cooldown_s * 2 ** (streak - 1))
+                self._cooldown[key] = (time.monotonic() + delay, streak)
+
+        if orphans and o.prune:
+            self._prune(spec, orphans, result)
+        elif orphans:
+            emit(f"[dim]{len(orphans)} orphaned release(s) left in place (use --prune to uninstall).[/]")
+        result.seconds = time.monotonic() - t0
+        return result
+
+    def _apply(self, spec: QudittoDeploySpec, plan: api.DeployPlan, keys: List[ReleaseKey], result: PassResult) -> None:
+        o = self.opts
+        try:
+            # The plan was built without recording; deploy records its addresses before installing
+            rollout = api.deploy(
+                spec, spec_file=self.spec_file, plan=api.subset_plan(plan, keys), dry_run=o.dry_run,
+                chart_dir=o.chart_dir, offline=o.offline, concurrency=o.concurrency,
+                max_concurrency=o.max_concurrency, validate=o.validate,
+                wait_ready=o.ready_timeout_s > 0, ready_timeout=o.ready_timeout_s,
+            )
+        except api.ApiError as e:
+            result.rc = e.code
+            result.errors += [str(e), *e.details, *(f"{i.scope}/{i.subject}: {i.message}" for i in e.issues)]
+            return
+        result.applied = [f"{r.cluster}/{r.name}" for r in rollout.releases if r.rc == 0]
+        if rollout.failed:
+            result.rc = rollout.rc
+            result.errors.append(f"{rollout.failed.cluster}/{rollout.failed.name}: helm failed (rc {rollout.rc})")
+
+    def _prune(self, spec: QudittoDeploySpec, orphans: List[DriftFinding], result: PassResult) -> None:
+        kubeconfigs = {cluster_name: kc_path for cluster_name, kc_path, _, _ in self._targets}
+        for f in orphans:
+            emit(f"  [red]✗[/] {escape(f.cluster)}/[magenta]{escape(f.release)}[/]: uninstalling orphan")
+            rc = HelmClient(kubeconfig=kubeconfigs[f.cluster]).uninstall(
+                release=f.release, namespace=f.namespace, dry_run=self.opts.dry_run,
+            )
+            if rc == 0:
+                result.pruned.append(f"{f.cluster}/{f.release}")
+            else:
+                result.rc = result.rc or rc
+                result.errors.append(f"{f.cluster}/{f.release}: helm uninstall failed (rc {rc})")
+        if result.pruned and not self.opts.dry_run:
+            try:
+                release_for_spec(spec, self.spec_file, [p.split("/", 1)[1] for p in result.pruned])
+            except (IpamError, OSError, ValueError, LockTimeout) as e:
+                emit(f"[yellow]L2SM addresses not released:[/] {e}")
+
+    # ---------- watch loop ----------
+    def trigger(self, reason: str) -> None:
+        with self._lock:
+            self._reasons.add(reason)
+        self._wake.set()
+
+    def _take_reasons(self) -> str:
+        with self._lock:
+            reasons, self._reasons = self._reasons, set()
+            self._wake.clear()
+        return ", ".join(sorted(reasons)) or "manual"
+
+    def _debounce(self) -> None:
+        """Wait until triggers have been quiet for `debounce_s` (bounded)."""
+        deadline = time.monotonic() + self.opts.debounce_s * DEBOUNCE_MAX_FACTOR
+        while not self._stop.is_set() and time.monotonic() < deadline:
+            self._wake.clear()
+            if not self._wake.wait(self.opts.debounce_s):
+                return
+        # Keep the wake flag set for the reasons collected meanwhile
+        self._wake.set()
+
+    def watch(self, on_pass: Optional[Callable[[PassResult], None]] = None) -> None:
+        """Run passes on spec/cluster changes until `stop()` (or Ctrl-C)."""
+        next_resync = time.monotonic() + self.opts.resync_s
+        self.trigger("start")
+        try:
+            while not self._stop.is_set():
+                self._wake.wait(SPEC_POLL_S)
+                now = time.monotonic()
+                if self._spec_stamp is not None and self._stamp() != self._spec_stamp:
+                    self.trigger("spec")
+                if now >= next_resync:
+                    self.trigger("resync")
+                if self._retry_at is not None and now >= self._retry_at:
+                    self.trigger("retry")
+                if not self._wake.is_set() or self._stop.is_set():
+                    continue
+                self._debounce()
+                if self._stop.is_set():
+                    break
+                result = self.run_pass(self._take_reasons())
+                if on_pass:
+                    on_pass(result)
+                self._sync_watchers()
+                next_resync = time.monotonic() + self.opts.resync_s
+        finally:
+            self._stop_watchers()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._wake.set()
+
+    # ---------- cluster watches ----------
+    def _sync_watchers(self) -> None:
+        with self._lock:
+            stale = [k for k in self._watchers if k not in self._targets]
+            fresh = [k for k in self._targets if k not in self._watchers]
+            procs = [self._watchers.pop(k) for k in stale]
+            for key in fresh:
+                self._watchers[key] = None
+        for proc in procs:
+            if proc:
+                proc.terminate()
+        for key in fresh:
+            threading.Thread(target=self._watch_one, args=(key,), daemon=True, name=f"watch-{key[3]}").start()
+
+    def _watch_one(self, key: WatchKey) -> None:
+        """Turn every line of a `kubectl --watch-only` stream into a trigger; restart with backoff."""
+        cluster_name, kc_path, ns, kind = key
+        backoff = 1.0
+        while not self._stop.is_set():
+            started = time.monotonic()
+            try:
+                proc = Kubectl(kubeconfig=kc_path).watch(kind, ns, self._targets.get(key))
+            except OSError as e:
+                emit(f"[yellow]Cannot watch {kind} on {cluster_name}: {e}; relying on resync.[/]")
+                return
+            with self._lock:
+                if key not in self._watchers:
+                    proc.terminate()
+                    return
+                self._watchers[key] = proc
+            assert proc.stdout is not None
+            for _ in proc.stdout:
+                self.trigger(f"{kind}@{cluster_name}")
+            proc.wait()
+            with self._lock:
+                if key not in self._watchers:
+                    return
+            backoff = 1.0 if time.monotonic() - started > 60 else min(backoff * 2, 60.0)
+            self._stop.wait(backoff)
+
+    def _stop_watchers(self) -> None:
+        with self._lock:
+            procs = list(self._watchers.values())
+            self._watchers.clear()
+        for proc in procs:
+            if proc:
+                proc.terminate()
@@ -0,0 +1,582 @@
+# qd2_bootstrap/server.py
+"""Long-running `serve` daemon: `api` operations over HTTP with warm state.
+
+A one-shot CLI run pays for interpreter start-up, spec parsing, chart index
+fetches, source scans and node listings every time. The daemon keeps them
+across requests:
+
+  - parsed specs, keyed by path + mtime + size (jobs get a deep copy),
+  - chart caches per source set (`api.chart_cache_for`): repo indexes and
+    the local source catalog stay in memory,
+  - the process-wide node inventory (`shared_inventory`), with its TTL.
+
+Jobs (`deploy`, `status`, `drift`) wait in per-cluster FIFO queues
+(`ClusterQueue`) and only take a pool worker once their clusters are free:
+jobs that touch the same cluster (same kubeconfig) run one at a time in
+submission order, and jobs on disjoint clusters run in parallel. Everything a job prints through
+`utils.output` becomes a `log` event, streamed as NDJSON.
+
+Endpoints (JSON bodies and responses):
+  GET  /v1/health                     uptime, job counts, cache stats
+  GET  /v1/jobs                       every retained job (no results)
+  POST /v1/jobs[?stream=1]            {"op": ..., "args": {...}} -> 202 job,
+                                      or 200 and the event stream
+  GET  /v1/jobs/<id>                  job state and result
+  GET  /v1/jobs/<id>/events[?from=N]  NDJSON events until the job finishes
+"""
+from __future__ import annotations
+
+import itertools
+import json
+import logging
+import os
+import socket
+import socketserver
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, List, Optional, Set, Tuple, Type
+from urllib.parse import parse_qs, urlparse
+
+from pydantic import BaseModel
+
+from qd2_bootstrap import api
+from qd2_bootstrap.models.quditto_deploy_spec import QudittoDeploySpec
+from qd2_bootstrap.utils.inventory import shared_inventory
+from qd2_bootstrap.utils.output import log_to
+
+log = logging.getLogger(__name__)
+
+# Finished jobs kept for GET /v1/jobs/<id>; older ones are forgotten
+MAX_FINISHED_JOBS = 256
+# Seconds between checks of a client connection while a job is quiet
+STREAM_POLL_S = 15.0
+
+QUEUED, RUNNING, SUCCEEDED, FAILED = "queued", "running", "succeeded", "failed"
+
+
+class RequestError(ValueError):
+    """Malformed job request (HTTP 400)."""
+
+
+# -----------------------------------------------------------------------------
+# Warm state
+# -----------------------------------------------------------------------------
+class SpecCache:
+    """Parsed spec models keyed by path, reparsed when mtime or size change."""
+
+    def __init__(self) -> None:
+        self._mem: Dict[Path, Tuple[Tuple[int, int], BaseModel]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, path: Path, model: Type[api.M]) -> api.M:
+        """A private (deep) copy: deploy mutates components during placement."""
+        path = path.expanduser().resolve()
+        try:
+            st = path.stat()
+        except OSError as e:
+            raise api.ApiError(f"Spec not readable: {path}: {e}", code=2)
+        stamp = (st.st_mtime_ns, st.st_size)
+        with self._lock:
+            hit = self._mem.get(path)
+            if hit and hit[0] == stamp and isinstance(hit[1], model):
+                self.hits += 1
+                return hit[1].model_copy(deep=True)
+        parsed = api.load_spec(path, model)
+        with self._lock:
+            self.misses += 1
+            self._mem[path] = (stamp, parsed)
+        return parsed.model_copy(deep=True)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"entries": len(self._mem), "hits": self.hits, "misses": self.misses}
+
+
+@dataclass(eq=False)
+class _Queued:
+    keys: List[str]
+    run: Callable[[], None]
+
+
+class ClusterQueue:
+    """Per-cluster FIFO queues in front of the worker pool.
+
+    A job is handed to `start` (the pool) only once it is at the head of the
+    queue of every cluster it touches and none of them is busy, so waiting
+    jobs never hold a worker and jobs for other clusters are not starved.
+    Jobs on one cluster start in submission order; a multi-cluster job is
+    queued on all its clusters at once, so no job can overtake it.
+    """
+
+    def __init__(self, start: Callable[[Callable[[], None]], Any]) -> None:
+        self._start = start
+        self._queues: Dict[str, Deque[_Queued]] = {}
+        self._busy: Set[str] = set()
+        self._cond = threading.Condition()
+
+    def submit(self, keys: List[str], run: Callable[[], None]) -> None:
+        """Queue `run`; it must call `release(keys)` when it is done."""
+        item = _Queued(sorted(set(keys)), run)
+        with self._cond:
+            for k in item.keys:
+                self._queues.setdefault(k, deque()).append(item)
+            ready = self._ready()
+        for item in ready:
+            self._start(item.run)
+
+    def release(self, keys: List[str]) -> None:
+        with self._cond:
+            self._busy.difference_update(keys)
+            ready = self._ready()
+            self._cond.notify_all()
+        for item in ready:
+            self._start(item.run)
+
+    def _ready(self) -> List[_Queued]:
+        """Pop every job that can start now and mark its clusters busy (under the lock)."""
+        out: List[_Queued] = []
+        for k in list(self._queues):
+            q = self._queues.get(k)
+            if not q or k in self._busy:
+                continue
+            head = q[0]
+            if any(c in self._busy or self._queues[c][0] is not head for c in head.keys):
+                continue
+            for c in head.keys:
+                self._queues[c].popleft()
+                if not self._queues[c]:
+                    del self._queues[c]
+            self._busy.update(head.keys)
+            out.append(head)
+        return out
+
+    def queued(self) -> Dict[str, int]:
+        """Jobs waiting per cluster key."""
+        with self._cond:
+            return {k: len(q) for k, q in self._queues.items()}
+
+    def wait_idle(self) -> None:
+        """Block until no job is queued or running."""
+        with self._cond:
+            self._cond.wait_for(lambda: not self._queues and not self._busy)
+
+
+# -----------------------------------------------------------------------------
+# Jobs
+# -----------------------------------------------------------------------------
+@dataclass
+class Job:
+    id: str
+    op: str
+    clusters: List[str]
+    state: str = QUEUED
+    created: float = field(default_factory=time.time)
+    started: Optional[float] = None
+    finished: Optional[float] = None
+    rc: Optional[int] = None
+    result: Optional[Dict[str, Any]] = None
+    events: List[Dict[str, Any]] = field(default_factory=list)
+    _cond: threading.Condition = field(default_factory=threading.Condition, repr=False)
+
+    @property
+    def done(self) -> bool:
+        return self.state in (SUCCEEDED, FAILED)
+
+    def add_event(self, event: str, **data: Any) -> None:
+        with self._cond:
+            self.events.append({"seq": len(self.events), "event": event, "time": round(time.time(), 3), **data})
+            self._cond.notify_all()
+
+    def set_state(self, state: str) -> None:
+        self.state = state
+        self.add_event("state", state=state)
+
+    def finish(self, rc: int, result: Dict[str, Any]) -> None:
+        with self._cond:
+            self.rc, self.result, self.finished = rc, result, time.time()
+            self.state = SUCCEEDED if rc == 0 else FAILED
+            self.add_event("result", state=self.state, rc=rc, result=result)
+
+    def wait_events(self, seq: int, timeout: float) -> Tuple[List[Dict[str, Any]], bool]:
+        """Events from `seq` on (blocking up to `timeout` for new ones) and whether the job is done."""
+        with self._cond:
+            if len(self.events) <= seq and not self.done:
+                self._cond.wait(timeout)
+            return self.events[seq:], self.done
+
+    def summary(self, with_result: bool = False) -> Dict[str, Any]:
+        out = {
+            "id": self.id, "op": self.op, "state": self.state, "clusters": self.clusters,
+            "created": self.created, "started": self.started, "finished": self.finished, "rc": self.rc,
+        }
+        if with_result:
+            out["result"] = self.result
+        return out
+
+
+class _JobLog:
+    """File-like sink for `log_to`: each written line becomes a `log` event."""
+
+    def __init__(self, job: Job) -> None:
+        self.job = job
+
+    def write(self, text: str) -> int:
+        for line in text.splitlines():
+            self.job.add_event("log", line=line)
+        return len(text)
+
+    def flush(self) -> None:
+        pass
+
+
+# -----------------------------------------------------------------------------
+# Operations: JSON args -> api call -> (rc, JSON result)
+# -----------------------------------------------------------------------------
+def _path(v: Any) -> Path:
+    if not isinstance(v, str) or not v:
+        raise RequestError("expected a path string")
+    return Path(v).expanduser()
+
+
+def _paths(v: Any) -> List[Path]:
+    if not isinstance(v, list):
+        raise RequestError("expected a list of path strings")
+    return [_path(x) for x in v]
+
+
+def _str(v: Any) -> str:
+    if not isinstance(v, str):
+        raise RequestError("expected a string")
+    return v
+
+
+def _bool(v: Any) -> bool:
+    if not isinstance(v, bool):
+        raise RequestError("expected true or false")
+    return v
+
+
+def _int(v: Any) -> int:
+    if isinstance(v, bool) or not isinstance(v, int) or v < 1:
+        raise RequestError("expected a positive integer")
+    return v
+
+
+_SPEC_ARGS: Dict[str, Callable[[Any], Any]] = {
+    "file": _path, "kubeconfig": _path, "namespace": _str, "multi_cluster": _bool,
+    "qnode_mode": _str, "set_group": _str,
+}
+ARGS: Dict[str, Dict[str, Callable[[Any], Any]]] = {
+    "deploy": {
+        **_SPEC_ARGS, "dry_run": _bool, "chart_cache": _bool, "chart_dir": _paths, "offline": _bool,
+        "concurrency": _int, "max_concurrency": _int, "validate": _bool,
+        "wait_ready": _bool, "ready_timeout": _int,
+    },
+    "drift": dict(_SPEC_ARGS),
+    "status": {"kubeconfig": _path, "system_pods": _bool},
+}
+
+
+def parse_args(op: str, raw: Any) -> Dict[str, Any]:
+    """Validate and convert the `args` object of a job request."""
+    if op not in ARGS:
+        raise RequestError(f"unknown op {op!r}; expected one of: {', '.join(ARGS)}")
+    if not isinstance(raw, dict):
+        raise RequestError("'args' must be an object")
+    args: Dict[str, Any] = {}
+    for name, value in raw.items():
+        conv = ARGS[op].get(name)
+        if conv is None:
+            raise RequestError(f"{op}: unknown argument {name!r}")
+        try:
+            args[name] = conv(value)
+        except RequestError as e:
+            raise RequestError(f"{op}: {name}: {e}")
+    required = ("kubeconfig",) if op == "status" else ("file",)
+    missing = [r for r in required if r not in args]
+    if missing:
+        raise RequestError(f"{op}: missing argument(s): {', '.join(missing)}")
+    return args
+
+
+def _spec_clusters(spec: QudittoDeploySpec, args: Dict[str, Any]) -> List[str]:
+    """Kubeconfigs a spec job will touch (its serialization keys)."""
+    if not args.get("multi_cluster"):
+        if "kubeconfig" not in args:
+            raise api.ApiError("--kubeconfig is required in single-cluster mode", code=2)
+        return [str(args["kubeconfig"].resolve())]
+    try:
+        return sorted({
+            str(spec.kubeconfig_for(spec.resolve_target_cluster(comp))) for _, comp in spec.declared()
+        })
+    except ValueError as e:
+        raise api.ApiError(f"Invalid cluster targets: {e}", code=2)
+
+
+def _steps(steps: List[api.StepTiming]) -> List[Dict[str, Any]]:
+    return [{"name": s.name, "seconds": round(s.seconds, 3)} for s in steps]
+
+
+def _release(r: api.ReleaseResult) -> Dict[str, Any]:
+    out = asdict(r)
+    out["log"] = str(r.log) if r.log else None
+    return out
+
+
+def _run_deploy(spec: QudittoDeploySpec, args: Dict[str, Any]) -> Tuple[int, Dict[str, Any]]:
+    result = api.deploy(spec, spec_file=args.pop("file"), **args)
+    return result.rc, {
+        "ok": result.ok,
+        "releases": [_release(r) for r in result.releases],
+        "failed": _release(result.failed) if result.failed else None,
+        "unready": result.unready,
+        "issues": [i.as_dict() for i in result.issues],
+        "warnings": result.plan.warnings,
+        "steps": _steps(result.plan.steps + result.steps),
+    }
+
+
+def _run_drift(spec: QudittoDeploySpec, args: Dict[str, Any]) -> Tuple[int, Dict[str, Any]]:
+    result = api.drift(spec, spec_file=args.pop("file"), **args)
+    rc = 3 if result.errors else (1 if result.drift else 0)
+    return rc, {
+        "drift": result.drift,
+        "errors": result.errors,
+        "findings": [f.as_dict() for f in result.findings],
+        "steps": _steps(result.steps),
+    }
+
+
+def _run_status(_: None, args: Dict[str, Any]) -> Tuple[int, Dict[str, Any]]:
+    result = api.status(**args)
+    return 0, {
+        "ready": result.ready,
+        "nodes": [asdict(n) for n in result.nodes],
+        "system_pods": [asdict(p) for p in result.system_pods],
+        "steps": _steps(result.steps),
+    }
+
+
+RUNNERS: Dict[str, Callable[[Any, Dict[str, Any]], Tuple[int, Dict[str, Any]]]] = {
+    "deploy": _run_deploy,
+    "drift": _run_drift,
+    "status": _run_status,
+}
+
+
+# -----------------------------------------------------------------------------
+# Daemon
+# -----------------------------------------------------------------------------
+class Daemon:
+    """Job queue plus warm state; transport-agnostic (see `make_server`)."""
+
+    def __init__(self, workers: int = 8) -> None:
+        self.workers = workers
+        self.specs = SpecCache()
+        self.started = time.time()
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="qd2-job")
+        self.queue = ClusterQueue(self._pool.submit)
+        self._jobs: Dict[str, Job] = {}
+        self._jobs_lock = threading.Lock()
+        self._ids = itertools.count(1)
+
+    def submit(self, op: str, raw_args: Any) -> Job:
+        """Validate, parse the spec (warm) and queue; raises RequestError / ApiError."""
+        args = parse_args(op, raw_args)
+        if op == "status":
+            spec = None
+            clusters = [str(args["kubeconfig"].resolve())]
+        else:
+            spec = self.specs.get(args["file"], QudittoDeploySpec)
+            clusters = _spec_clusters(spec, args)
+        job = Job(id=f"{next(self._ids):06d}", op=op, clusters=clusters)
+        job.add_event("state", state=QUEUED)
+        with self._jobs_lock:
+            self._jobs[job.id] = job
+            self._prune()
+        self.queue.submit(job.clusters, lambda: self._run(job, spec, args))
+        return job
+
+    def _run(self, job: Job, spec: Any, args: Dict[str, Any]) -> None:
+        try:
+            job.started = time.time()
+            job.set_state(RUNNING)
+            rc, result = 1, {}
+            with log_to(_JobLog(job)):
+                try:
+                    rc, result = RUNNERS[job.op](spec, args)
+                except api.ApiError as e:
+                    rc = e.code
+                    result = {"error": str(e), "details": e.details, "issues": [i.as_dict() for i in e.issues]}
+                except Exception as e:  # noqa: BLE001 - a failed job must not kill its worker
+                    log.exception("job %s (%s) crashed", job.id, job.op)
+                    result = {"error": f"{type(e).__name__}: {e}"}
+            job.finish(rc, result)
+        finally:
+            self.queue.release(job.clusters)
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._jobs_lock:
+            return self._jobs.get(job_id)
+
+    def jobs(self) -> List[Job]:
+        with self._jobs_lock:
+            return list(self._jobs.values())
+
+    def _prune(self) -> None:
+        finished = sorted((j for j in self._jobs.values() if j.done), key=lambda j: j.finished or 0)
+        for job in finished[:max(0, len(finished) - MAX_FINISHED_JOBS)]:
+            del self._jobs[job.id]
+
+    def health(self) -> Dict[str, Any]:
+        counts: Dict[str, int] = {QUEUED: 0, RUNNING: 0, SUCCEEDED: 0, FAILED: 0}
+        for job in self.jobs():
+            counts[job.state] += 1
+        return {
+            "ok": True,
+            "pid": os.getpid(),
+            "uptime_s": round(time.time() - self.started, 1),
+            "workers": self.workers,
+            "jobs": counts,
+            "queued": self.queue.queued(),
+            "caches": {
+                "specs": self.specs.stats(),
+                "charts": api.chart_cache_stats(),
+                "inventory": shared_inventory().stats(),
+            },
+        }
+
+    def close(self) -> None:
+        """Wait for the queued and running jobs, then stop the pool."""
+        self.queue.wait_idle()
+        self._pool.shutdown(wait=True)
+
+
+# -----------------------------------------------------------------------------
+# HTTP transport
+# -----------------------------------------------------------------------------
+class _Handler(BaseHTTPRequestHandler):
+    server_version = "qd2-bootstrap"
+
+    @property
+    def daemon(self) -> Daemon:
+        return self.server.daemon  # type: ignore[attr-defined]
+
+    def address_string(self) -> str:
+        # Unix socket peers have no (host, port)
+        return self.client_address[0] if isinstance(self.client_address, tuple) else "unix"
+
+    def log_message(self, format: str, *args: Any) -> None:
+        log.info("%s %s", self.address_string(), format % args)
+
+    # ---------- responses ----------
+    def _json(self, status: int, body: Any) -> None:
+        data = json.dumps(body, default=str).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _error(self, status: int, message: str, **extra: Any) -> None:
+        self._json(status, {"error": message, **extra})
+
+    def _stream(self, job: Job, seq: int = 0) -> None:
+        """NDJSON events until the job's `result` event (or the client goes away)."""
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        try:
+            while True:
+                events, done = job.wait_events(seq, STREAM_POLL_S)
+                for ev in events:
+                    self.wfile.write(json.dumps(ev, default=str).encode() + b"\n")
+                seq += len(events)
+                self.wfile.flush()
+                if done and not events:
+                    return
+        except (BrokenPipeError, ConnectionResetError):
+            log.info("job %s: event stream closed by client", job.id)
+
+    # ---------- routes ----------
+    def do_GET(self) -> None:
+        url = urlparse(self.path)
+        parts = [p for p in url.path.split("/") if p]
+        if parts == ["v1", "health"]:
+            return self._json(200, self.daemon.health())
+        if parts == ["v1", "jobs"]:
+            return self._json(200, {"jobs": [j.summary() for j in self.daemon.jobs()]})
+        if len(parts) in (3, 4) and parts[:2] == ["v1", "jobs"]:
+            job = self.daemon.get(parts[2])
+            if job is None:
+                return self._error(404, f"no such job: {parts[2]}")
+            if len(parts) == 3:
+                return self._json(200, job.summary(with_result=True))
+            if parts[3] == "events":
+                try:
+                    seq = int(parse_qs(url.query).get("from", ["0"])[0])
+                except ValueError:
+                    return self._error(400, "'from' must be an integer")
+                return self._stream(job, max(0, seq))
+        self._error(404, f"no route for GET {url.path}")
+
+    def do_POST(self) -> None:
+        url = urlparse(self.path)
+        if url.path.rstrip("/") != "/v1/jobs":
+            return self._error(404, f"no route for POST {url.path}")
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+            body = json.loads(self.rfile.read(length) or b"{}")
+            if not isinstance(body, dict):
+                raise RequestError("request body must be a JSON object")
+            job = self.daemon.submit(str(body.get("op", "")), body.get("args", {}))
+        except (ValueError, RequestError) as e:
+            return self._error(400, str(e))
+        except api.ApiError as e:
+            return self._error(400, str(e), details=e.details, issues=[i.as_dict() for i in e.issues])
+        if parse_qs(url.query).get("stream", ["0"])[0] in ("1", "true"):
+            return self._stream(job)
+        self._json(202, job.summary())
+
+
+class _UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def _remove_stale_socket(path: Path) -> None:
+    """Remove a socket file left by a dead daemon; refuse if one is listening."""
+    if not path.exists():
+        return
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(str(path))
+    except OSError:
+        path.unlink()
+    else:
+        raise OSError(f"another daemon is listening on {path}")
+    finally:
+        probe.close()
+
+
+def make_server(daemon: Daemon, socket_path: Optional[Path] = None,
+                host: str = "127.0.0.1", port: int = 8742) -> socketserver.BaseServer:
+    """HTTP server for `daemon` on a Unix socket (mode 0600) or host:port."""
+    server: socketserver.BaseServer
+    if socket_path is not None:
+        socket_path = socket_path.expanduser().resolve()
+        socket_path.parent.mkdir(parents=True, exist_ok=True)
+        _remove_stale_socket(socket_path)
+        server = _UnixHTTPServer(str(socket_path), _Handler)
+        os.chmod(socket_path, 0o600)
+    else:
+        server = ThreadingHTTPServer((host, port), _Handler)
+    server.daemon = daemon  # type: ignore[attr-defined]
+    return server
@@ -0,0 +1,281 @@
+# qd2_bootstrap/utils/capacity.py
+from __future__ import annotations
+
+import math
+import re
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import yaml
+
+from qd2_bootstrap.models.quditto_deploy_spec import ComponentRef, PlacementConfig, ResourceProfile
+from qd2_bootstrap.utils.placement import (
+    NodeSlot,
+    PlacementRequest,
+    component_request,
+    cpu_millis,
+    mem_bytes,
+    place,
+)
+from qd2_bootstrap.utils.sizing import sizing_kind
+
+# Nodes of the best single flavor that a cheaper flavor may replace in a mix
+MIX_TAIL = 3
+
+
+# -----------------------------------------------------------------------------
+# Inputs: flavor catalog and per-kind profiles
+# -----------------------------------------------------------------------------
+@dataclass
+class Flavor:
+    name: str
+    vcpus: int
+    ram_mb: int
+    cost: Optional[float] = None  # relative price per VM; defaults to vcpus
+
+    @property
+    def price(self) -> float:
+        return self.cost if self.cost is not None else float(self.vcpus)
+
+
+def _flavor(d: Dict[str, Any]) -> Flavor:
+    # Our own keys, or the ones of `openstack flavor list -f json`
+    name = d.get("name", d.get("Name"))
+    vcpus = d.get("vcpus", d.get("VCPUs"))
+    ram = d.get("ram", d.get("RAM"))
+    if not name or vcpus is None or ram is None:
+        raise ValueError(f"flavor entries need name, vcpus and ram (MiB): {d!r}")
+    cost = d.get("cost")
+    return Flavor(str(name), int(vcpus), int(ram), float(cost) if cost is not None else None)
+
+
+def load_flavors(path: Path) -> List[Flavor]:
+    """Flavor catalog from YAML/JSON: a list (or `flavors:` list) of {name, vcpus, ram, cost?}.
+
+    The output of `openstack flavor list -f json` is accepted as is.
+    """
+    data = yaml.safe_load(Path(path).read_text())
+    if isinstance(data, dict):
+        data = data.get("flavors")
+    if not isinstance(data, list) or not data:
+        raise ValueError(f"{path}: expected a non-empty list of flavors")
+    flavors = [_flavor(d) for d in data]
+    names = [f.name for f in flavors]
+    dupes = sorted({n for n in names if names.count(n) > 1})
+    if dupes:
+        raise ValueError(f"{path}: duplicate flavor(s): {', '.join(dupes)}")
+    return flavors
+
+
+def load_profiles(path: Path) -> Dict[str, ResourceProfile]:
+    """Per-kind requests from YAML/JSON: {hybrid|pqc|...|qcontroller|qorchestrator: {cpu, memory}}."""
+    data = yaml.safe_load(Path(path).read_text()) or {}
+    if not isinstance(data, dict):
+        raise ValueError(f"{path}: expected a mapping of typeNode to {{cpu, memory}}")
+    out = {str(k): ResourceProfile.model_validate(v) for k, v in data.items()}
+    for p in out.values():
+        cpu_millis(p.cpu), mem_bytes(p.memory)  # fail early on bad quantities
+    return out
+
+
+# -----------------------------------------------------------------------------
+# Demand
+# -----------------------------------------------------------------------------
+def worker_demand(
+    components: Iterable[Tuple[str, ComponentRef]],
+    config: PlacementConfig,
+    profiles: Optional[Dict[str, ResourceProfile]] = None,
+    headroom: float = 1.0,
+) -> List[PlacementRequest]:
+    """Placement requests for sizing new nodes, scaled by `headroom`.
+
+    Size precedence: a component's `resources`, then the profile of its kind
+    (typeNode, qcontroller, qorchestrator), then its sized values, then
+    `config.defaultRequests`. Pins (`nodek8s`) are dropped: the nodes do not
+    exist yet. Anti-affinity groups are kept.
+    """
+    out = []
+    for release, comp in components:
+        profile = None if comp.resources else (profiles or {}).get(sizing_kind(comp.chart, comp.values))
+        req = component_request(release, comp.model_copy(update={"resources": profile}) if profile else comp, config)
+        out.append(PlacementRequest(
+            name=req.name,
+            cpu_m=int(math.ceil(req.cpu_m * headroom)),
+            mem_b=int(math.ceil(req.mem_b * headroom)),
+            anti_affinity=req.anti_affinity,
+        ))
+    return out
+
+
+# -----------------------------------------------------------------------------
+# Sizing
+# -----------------------------------------------------------------------------
+@dataclass
+class NodeShape:
+    """Allocatable capacity of one worker of a flavor (after the system reservation)."""
+    flavor: Flavor
+    cpu_m: int
+    mem_b: int
+
+
+def node_shape(flavor: Flavor, reserved_cpu_m: int, reserved_mem_b: int) -> NodeShape:
+    return NodeShape(flavor, flavor.vcpus * 1000 - reserved_cpu_m, flavor.ram_mb * 2**20 - reserved_mem_b)
+
+
+@dataclass
+class PoolCount:
+    flavor: str
+    count: int
+
+
+@dataclass
+class CapacityOption:
+    pools: List[PoolCount]
+    cost: float
+    cpu_util: float   # requested (with headroom) / allocatable
+    mem_util: float
+
+    @property
+    def workers(self) -> int:
+        return sum(p.count for p in self.pools)
+
+    def label(self) -> str:
+        return " + ".join(f"{p.count} x {p.flavor}" for p in self.pools)
+
+
+def _min_count(requests: List[PlacementRequest], shape: NodeShape, base: Optional[Tuple[NodeShape, int]] = None) -> int:
+    """Fewest nodes of `shape` that, after the `base` nodes, hold every request
+    under first-fit decreasing (the `binpack` strategy, anti-affinity included).
+
+    First fit scans nodes in a fixed order, so empty nodes at the end never
+    change where requests land: one run with a spare node per request gives
+    the count.
+    """
+    slots = [NodeSlot(f"0-{n:06d}", base[0].cpu_m, base[0].mem_b) for n in range(base[1])] if base else []
+    slots += [NodeSlot(f"1-{n:06d}", shape.cpu_m, shape.mem_b) for n in range(len(requests))]
+    assignment = place(requests, slots, strategy="binpack")
+    used = [int(node[2:]) for node in assignment.values() if node.startswith("1-")]
+    return max(used) + 1 if used else 0
+
+
+def _option(requests: List[PlacementRequest], counts: List[Tuple[NodeShape, int]]) -> CapacityOption:
+    counts = [(s, n) for s, n in counts if n]
+    cpu = sum(s.cpu_m * n for s, n in counts) or 1
+    mem = sum(s.mem_b * n for s, n in counts) or 1
+    return CapacityOption(
+        pools=[PoolCount(s.flavor.name, n) for s, n in counts],
+        cost=sum(s.flavor.price * n for s, n in counts),
+        cpu_util=sum(r.cpu_m for r in requests) / cpu,
+        mem_util=sum(r.mem_b for r in requests) / mem,
+    )
+
+
+@dataclass
+class CapacityPlan:
+    components: int
+    cpu_m: int                                   # requested, with headroom
+    mem_b: int
+    single: List[CapacityOption] = field(default_factory=list)  # one per usable flavor, cheapest first
+    best: Optional[CapacityOption] = None
+    unusable: Dict[str, str] = field(default_factory=dict)      # flavor -> why
+
+
+def size_workers(
+    requests: List[PlacementRequest],
+    flavors: List[Flavor],
+    reserved_cpu_m: int,
+    reserved_mem_b: int,
+    min_workers: int = 1,
+    mix: bool = True,
+) -> CapacityPlan:
+    """Fewest-cost worker sets that hold every request.
+
+    Each flavor is sized alone: from the capacity lower bound, the smallest
+    node count where first-fit-decreasing placement succeeds (see `_min_count`). With `mix`, up to MIX_TAIL nodes of
+    the cheapest single-flavor answer are swapped for another flavor, so a
+    small remainder does not cost a whole large VM. Cost is the flavors'
+    `cost`, or their vCPUs.
+    """
+    plan = CapacityPlan(len(requests), sum(r.cpu_m for r in requests), sum(r.mem_b for r in requests))
+    shapes: List[NodeShape] = []
+    for f in flavors:
+        s = node_shape(f, reserved_cpu_m, reserved_mem_b)
+        if s.cpu_m <= 0 or s.mem_b <= 0:
+            plan.unusable[f.name] = "smaller than the per-node reservation"
+            continue
+        too_big = [r.name for r in requests if r.cpu_m > s.cpu_m or r.mem_b > s.mem_b]
+        if too_big:
+            plan.unusable[f.name] = f"{len(too_big)} component(s) do not fit one node (e.g. {too_big[0]})"
+            continue
+        shapes.append(s)
+
+    groups: Dict[str, int] = {}
+    for r in requests:
+        if r.anti_affinity:
+            groups[r.anti_affinity] = groups.get(r.anti_affinity, 0) + 1
+    floor = max([min_workers, *groups.values()])
+
+    best_count: Dict[str, int] = {}
+    for s in shapes:
+        n = max(floor, _min_count(requests, s))
+        best_count[s.flavor.name] = n
+        plan.single.append(_option(requests, [(s, n)]))
+    plan.single.sort(key=lambda o: (o.cost, o.workers, o.label()))
+    if not plan.single:
+        return plan
+    plan.best = plan.single[0]
+
+    if mix and len(shapes) > 1:
+        by_name = {s.flavor.name: s for s in shapes}
+        main = by_name[plan.best.pools[0].flavor]
+        n_main = best_count[main.flavor.name]
+        for k in range(n_main - 1, max(-1, n_main - 1 - MIX_TAIL), -1):
+            for s in shapes:
+                if s is main or s.flavor.price >= main.flavor.price:
+                    continue
+                m = max(floor - k, _min_count(requests, s, (main, k)))
+                opt = _option(requests, [(main, k), (s, m)])
+                if (opt.cost, opt.workers) < (plan.best.cost, plan.best.workers):
+                    plan.best = opt
+    return plan
+
+
+# -----------------------------------------------------------------------------
+# InfraSpec output
+# -----------------------------------------------------------------------------
+def pool_name(flavor: str) -> str:
+    """Worker pool name derived from a flavor name (lowercase DNS label, max 32)."""
+    name = re.sub(r"[^a-z0-9-]+", "-", flavor.lower()).strip("-")[:32].strip("-")
+    return name or "pool"
+
+
+def infra_setup_update(option: CapacityOption, infra_setup: Dict[str, Any]) -> Dict[str, Any]:
+    """`infraSetup` mapping sized by `option`: `workerPools` with one pool per
+    flavor, even for a single flavor.
+
+    `flavorName` is left alone: it also sizes the control-plane VM.
+    """
+    out = {k: v for k, v in infra_setup.items() if k not in ("countWorker", "workerPools")}
+    pools, seen = [], set()
+    for i, p in enumerate(option.pools):
+        name = pool_name(p.flavor)
+        if name in seen:
+            name = f"{name[:29]}-{i}"
+        seen.add(name)
+        pools.append({"name": name, "count": p.count, "flavorName": p.flavor})
+    out["workerPools"] = pools
+    return out
+
+
+def option_dict(o: Optional[CapacityOption]) -> Optional[Dict[str, Any]]:
+    if o is None:
+        return None
+    return {
+        "pools": [{"flavor": p.flavor, "count": p.count} for p in o.pools],
+        "workers": o.workers,
+        "cost": o.cost,
+        "cpuUtil": round(o.cpu_util, 4),
+        "memUtil": round(o.mem_util, 4),
+    }
+
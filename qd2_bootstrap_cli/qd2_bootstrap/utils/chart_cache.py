@@ -0,0 +1,389 @@
+# qd2_bootstrap/utils/chart_cache.py
+from __future__ import annotations
+
+import fnmatch
+import gzip
+import hashlib
+import io
+import json
+import os
+import re
+import tarfile
+import tempfile
+import threading
+import time
+import urllib.request
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urljoin
+
+import yaml
+from qd2_bootstrap.utils.locks import file_lock
+from qd2_bootstrap.utils.output import emit
+
+
+def default_cache_root() -> Path:
+    """Base directory for every local qd2_bootstrap cache.
+
+    Honours QD2_CACHE_DIR, then XDG_CACHE_HOME, then ~/.cache.
+    """
+    env = os.environ.get("QD2_CACHE_DIR")
+    if env:
+        return Path(env).expanduser()
+    xdg = os.environ.get("XDG_CACHE_HOME")
+    base = Path(xdg).expanduser() if xdg else Path("~/.cache").expanduser()
+    return base / "qd2_bootstrap"
+
+
+class ChartCacheError(RuntimeError):
+    """Raised when a chart cannot be resolved from the cache, local sources or the repo."""
+
+
+def _sha256_file(path: Path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _source_stamp(path: Path) -> List:
+    """Identity of a local archive as last seen: path, size and mtime."""
+    st = path.stat()
+    return [str(path), st.st_size, st.st_mtime_ns]
+
+
+def _version_key(v: str) -> Tuple:
+    """Loose semver ordering key ("v0.10.1" > "0.9.0"); pre-releases sort first."""
+    core, _, pre = v.lstrip("v").partition("-")
+    nums = tuple(int(p) if p.isdigit() else 0 for p in re.split(r"[.+]", core))
+    return nums + ((1,) if not pre else (0, pre))
+
+
+def _chart_meta_from_tgz(path: Path) -> Optional[Tuple[str, str]]:
+    """Return (name, version) read from '<chart>/Chart.yaml' inside a packaged chart."""
+    try:
+        with tarfile.open(path, "r:gz") as tar:
+            for member in tar:
+                parts = member.name.split("/")
+                if len(parts) == 2 and parts[1] == "Chart.yaml":
+                    f = tar.extractfile(member)
+                    if f is None:
+                        return None
+                    meta = yaml.safe_load(f.read()) or {}
+                    return str(meta.get("name")), str(meta.get("version"))
+    except (tarfile.TarError, OSError, yaml.YAMLError):
+        return None
+    return None
+
+
+def _helmignore_patterns(chart_dir: Path) -> List[str]:
+    hi = chart_dir / ".helmignore"
+    if not hi.exists():
+        return []
+    pats = []
+    for line in hi.read_text().splitlines():
+        line = line.strip()
+        if line and not line.startswith("#"):
+            pats.append(line)
+    return pats
+
+
+def _ignored(rel: str, patterns: List[str]) -> bool:
+    base = rel.rsplit("/", 1)[-1]
+    for p in patterns:
+        p = p.rstrip("/")
+        if fnmatch.fnmatch(rel, p) or fnmatch.fnmatch(base, p):
+            return True
+    return False
+
+
+def package_chart_dir(chart_dir: Path, out_dir: Path) -> Path:
+    """Package an unpacked chart directory into a reproducible '<name>-<version>.tgz'.
+
+    Members are sorted and timestamps/owners zeroed, so the same sources always
+    produce the same digest (the cache key). `.helmignore` patterns are honoured.
+    """
+    chart_dir = Path(chart_dir)
+    meta = yaml.safe_load((chart_dir / "Chart.yaml").read_text()) or {}
+    name, version = str(meta["name"]), str(meta["version"])
+    patterns = _helmignore_patterns(chart_dir)
+
+    buf = io.BytesIO()
+    with tarfile.open(fileobj=buf, mode="w", format=tarfile.PAX_FORMAT) as tar:
+        for path in sorted(p for p in chart_dir.rglob("*") if p.is_file()):
+            rel = path.relative_to(chart_dir).as_posix()
+            if _ignored(rel, patterns):
+                continue
+            data = path.read_bytes()
+            info = tarfile.TarInfo(f"{name}/{rel}")
+            info.size = len(data)
+            info.mode = 0o644
+            info.mtime = 0
+            info.uid = info.gid = 0
+            info.uname = info.gname = ""
+            tar.addfile(info, io.BytesIO(data))
+
+    out_dir.mkdir(parents=True, exist_ok=True)
+    dst = out_dir / f"{name}-{version}.tgz"
+    with open(dst, "wb") as raw, gzip.GzipFile(fileobj=raw, mode="wb", mtime=0) as gz:
+        gz.write(buf.getvalue())
+    return dst
+
+
+class ChartCache:
+    """Content-addressed store of packaged charts with LRU eviction.
+
+    Layout under `root`:
+      blobs/sha256/<digest>.tgz   one file per distinct archive
+      index.json                  {"<name>@<version>": {digest, size, lastUsed}}
+
+    Resolution order for (name, version):
+      1) cache index hit (digest verified to exist on disk); unpacked chart
+         directories are always re-packaged, and local archives re-read when
+         their size or mtime changed, so local rebuilds without a version
+         bump are picked up,
+      2) local sources: directories with `index.yaml` + `*.tgz` (like `docs/`),
+         loose `*.tgz` files, or unpacked chart directories (`<name>/Chart.yaml`),
+      3) the classic Helm repo (`<repo>/index.yaml`), unless `offline`.
+
+    Without a version, the newest one wins across all three (the repo only
+    when online), so an unpinned chart follows new repo releases.
+
+    Remote archives are verified against the digest published in the repo index.
+    Repo indexes are kept in memory for `index_ttl_s`; the local source catalog
+    is rescanned when a source's mtime changes, so a long-lived instance stays
+    current.
+    """
+
+    def __init__(
+        self,
+        root: Optional[Path] = None,
+        sources: Iterable[Path] = (),
+        offline: bool = False,
+        max_entries: int = 64,
+        max_bytes: int = 512 * 1024 * 1024,
+        index_ttl_s: float = 300.0,
+    ):
+        self.root = Path(root or (default_cache_root() / "charts")).expanduser().resolve()
+        self.sources = [Path(s).expanduser().resolve() for s in sources]
+        self.offline = offline
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.index_ttl_s = index_ttl_s
+        self._blobs = self.root / "blobs" / "sha256"
+        self._index_path = self.root / "index.json"
+        self._lock = threading.Lock()
+        self._repo_indexes: Dict[str, Tuple[float, dict]] = {}
+        self._local_catalog: Optional[Dict[Tuple[str, str], Path]] = None
+        self._catalog_sig: Tuple = ()
+        self._blobs.mkdir(parents=True, exist_ok=True)
+
+    # ---------- index persistence ----------
+    def _load_index(self) -> Dict[str, dict]:
+        if not self._index_path.exists():
+            return {}
+        try:
+            return json.loads(self._index_path.read_text())
+        except (OSError, ValueError):
+            return {}
+
+    def _save_index(self, index: Dict[str, dict]) -> None:
+        fd, tmp = tempfile.mkstemp(dir=self.root, prefix=".index-", suffix=".json")
+        with os.fdopen(fd, "w") as f:
+            json.dump(index, f, indent=1, sort_keys=True)
+        os.replace(tmp, self._index_path)
+
+    def blob_path(self, digest: str) -> Path:
+        return self._blobs / f"{digest}.tgz"
+
+    # ---------- public API ----------
+    def resolve(self, name: str, version: Optional[str] = None, repo_url: Optional[str] = None) -> Path:
+        """Return a local archive path for `name`/`version`, fetching at most once."""
+        # Thread lock for this process, file lock for other processes sharing the cache
+        with self._lock, file_lock(self.root / ".lock", "chart cache"):
+            index = self._load_index()
+            if not version:
+                version = self._latest_version(name, repo_url, index)
+            key = f"{name}@{version}"
+            hit = index.get(key)
+            src = self._scan_sources().get((name, version))
+            # Local sources may change without a version bump (the dev loop):
+            # unpacked chart dirs are re-packaged every time, and a local
+            # archive is only trusted while its size and mtime match what was
+            # stored. The digest then tells whether the content really changed.
+            fresh = src is None or (src.is_file() and hit is not None and hit.get("source") == _source_stamp(src))
+            if hit and self.blob_path(hit["digest"]).exists() and fresh:
+                hit["lastUsed"] = time.time()
+                self._save_index(index)
+                return self.blob_path(hit["digest"])
+
+            if src is not None:
+                stamp = _source_stamp(src) if src.is_file() else None
+                if src.is_dir():
+                    src = package_chart_dir(src, self.root / "build")
+                path = self._store(index, name, version, src)
+                if stamp:
+                    index[key]["source"] = stamp
+                self._evict(index, keep=key)
+                self._save_index(index)
+                return path
+
+            if self.offline or not repo_url:
+                raise ChartCacheError(
+                    f"chart {key} not found in cache {self.root} or local sources"
+                    + (" (offline mode)" if self.offline else "")
+                )
+            path = self._fetch_remote(index, name, version, repo_url)
+            self._evict(index, keep=key)
+            self._save_index(index)
+            return path
+
+    def entries(self) -> Dict[str, dict]:
+        with self._lock:
+            return self._load_index()
+
+    def stats(self) -> Dict[str, object]:
+        """In-memory state: sources, repo indexes held and charts found locally."""
+        with self._lock:
+            return {
+                "sources": [str(s) for s in self.sources],
+                "offline": self.offline,
+                "repo_indexes": len(self._repo_indexes),
+                "local_charts": len(self._local_catalog or {}),
+            }
+
+    # ---------- internals ----------
+    def _store(self, index: Dict[str, dict], name: str, version: str, src: Path,
+               expected_digest: Optional[str] = None) -> Path:
+        digest = _sha256_file(src)
+        if expected_digest and digest != expected_digest:
+            raise ChartCacheError(
+                f"digest mismatch for {name}@{version}: expected {expected_digest}, got {digest}"
+            )
+        dst = self.blob_path(digest)
+        if not dst.exists():
+            fd, tmp = tempfile.mkstemp(dir=self._blobs, prefix=".blob-")
+            with os.fdopen(fd, "wb") as out, open(src, "rb") as inp:
+                for chunk in iter(lambda: inp.read(1 << 20), b""):
+                    out.write(chunk)
+            os.replace(tmp, dst)
+        index[f"{name}@{version}"] = {
+            "digest": digest,
+            "size": dst.stat().st_size,
+            "lastUsed": time.time(),
+        }
+        return dst
+
+    def _evict(self, index: Dict[str, dict], keep: str) -> None:
+        """Drop least-recently-used entries until both limits hold."""
+        def total() -> int:
+            return sum(e.get("size", 0) for e in index.values())
+
+        for key in sorted(index, key=lambda k: index[k].get("lastUsed", 0)):
+            if len(index) <= self.max_entries and total() <= self.max_bytes:
+                break
+            if key == keep:
+                continue
+            digest = index.pop(key)["digest"]
+            # Blobs are shared between keys with identical content
+            if not any(e["digest"] == digest for e in index.values()):
+                self.blob_path(digest).unlink(missing_ok=True)
+
+    def _scan_sources(self) -> Dict[Tuple[str, str], Path]:
+        """Catalog (name, version) -> archive or chart dir across local sources."""
+        sig = self._sources_signature()
+        if self._local_catalog is not None and sig == self._catalog_sig:
+            return self._local_catalog
+        catalog: Dict[Tuple[str, str], Path] = {}
+        for src in self.sources:
+            if src.is_file() and src.suffix == ".tgz":
+                meta = _chart_meta_from_tgz(src)
+                if meta:
+                    catalog.setdefault(meta, src)
+                continue
+            if not src.is_dir():
+                emit(f"[yellow]Chart source not found, ignored:[/] {src}")
+                continue
+            if (src / "Chart.yaml").exists():
+                meta = yaml.safe_load((src / "Chart.yaml").read_text()) or {}
+                catalog.setdefault((str(meta.get("name")), str(meta.get("version"))), src)
+                continue
+            repo_index = src / "index.yaml"
+            if repo_index.exists():
+                entries = (yaml.safe_load(repo_index.read_text()) or {}).get("entries", {})
+                for cname, versions in entries.items():
+                    for e in versions:
+                        for url in e.get("urls", []):
+                            f = src / url.rsplit("/", 1)[-1]
+                            if f.exists():
+                                catalog.setdefault((cname, str(e.get("version"))), f)
+            for f in sorted(src.glob("*.tgz")):
+                meta = _chart_meta_from_tgz(f)
+                if meta:
+                    catalog.setdefault(meta, f)
+            for chart_yaml in sorted(src.glob("*/Chart.yaml")):
+                meta = yaml.safe_load(chart_yaml.read_text()) or {}
+                catalog.setdefault((str(meta.get("name")), str(meta.get("version"))), chart_yaml.parent)
+        self._local_catalog, self._catalog_sig = catalog, sig
+        return catalog
+
+    def _sources_signature(self) -> Tuple:
+        """mtimes of the sources (a directory's changes when entries are added or replaced)."""
+        sig = []
+        for src in self.sources:
+            try:
+                st = src.stat()
+                extra = (src / "index.yaml").stat().st_mtime_ns if (src / "index.yaml").exists() else 0
+                sig.append((st.st_mtime_ns, extra))
+            except OSError:
+                sig.append(None)
+        return tuple(sig)
+
+    def _repo_index(self, repo_url: str) -> dict:
+        cached = self._repo_indexes.get(repo_url)
+        if cached is None or time.monotonic() - cached[0] > self.index_ttl_s:
+            url = urljoin(repo_url.rstrip("/") + "/", "index.yaml")
+            emit(f"[dim]Fetching chart index {url}[/]")
+            with urllib.request.urlopen(url, timeout=30) as resp:
+                cached = (time.monotonic(), yaml.safe_load(resp.read()) or {})
+            self._repo_indexes[repo_url] = cached
+        return cached[1]
+
+    def _latest_version(self, name: str, repo_url: Optional[str], index: Dict[str, dict]) -> str:
+        """Newest version across local sources, the cache and (online) the repo index.
+
+        The cache only saves re-downloading a version; it never decides what
+        "latest" is while the repo can be asked, so new chart releases are
+        picked up. An unreachable repo falls back to what is known locally.
+        """
+        candidates = {v for (n, v) in self._scan_sources() if n == name}
+        candidates |= {k.split("@", 1)[1] for k in index if k.split("@", 1)[0] == name}
+        if repo_url and not self.offline:
+            try:
+                entries = self._repo_index(repo_url).get("entries", {}).get(name, [])
+            except OSError as e:
+                if not candidates:
+                    raise ChartCacheError(f"cannot read chart index of {repo_url}: {e}") from e
+                emit(f"[yellow]Chart repo unreachable ({e}); using the newest local {name}[/]")
+                entries = []
+            candidates |= {str(e.get("version")) for e in entries}
+        if not candidates:
+            raise ChartCacheError(f"no version of chart {name!r} available")
+        return max(candidates, key=_version_key)
+
+    def _fetch_remote(self, index: Dict[str, dict], name: str, version: str, repo_url: str) -> Path:
+        entries = self._repo_index(repo_url).get("entries", {}).get(name, [])
+        match = next((e for e in entries if str(e.get("version")) == version), None)
+        if not match or not match.get("urls"):
+            raise ChartCacheError(f"chart {name}@{version} not found in repo {repo_url}")
+        url = urljoin(repo_url.rstrip("/") + "/", match["urls"][0])
+        emit(f"[dim]Downloading chart {url}[/]")
+        fd, tmp = tempfile.mkstemp(dir=self._blobs, prefix=".dl-", suffix=".tgz")
+        try:
+            with os.fdopen(fd, "wb") as out, urllib.request.urlopen(url, timeout=60) as resp:
+                for chunk in iter(lambda: resp.read(1 << 20), b""):
+                    out.write(chunk)
+            return self._store(index, name, version, Path(tmp), expected_digest=match.get("digest"))
+        finally:
+            Path(tmp).unlink(missing_ok=True)
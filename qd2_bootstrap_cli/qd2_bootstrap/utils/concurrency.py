@@ -0,0 +1,216 @@
+# qd2_bootstrap/utils/concurrency.py
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Generic, Iterable, List, Optional, Tuple, TypeVar
+
+from rich.markup import escape
+
+from qd2_bootstrap.utils.output import current_log, emit, log_to
+
+log = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Substrings in helm/kubectl output that mean "the API server is pushing back"
+# (API Priority and Fairness 429s, client-side rate limiting, overload timeouts).
+# Phrases only: a bare status code also matches resource versions, IPs and sizes.
+THROTTLE_MARKERS = (
+    "too many requests",  # "429 Too Many Requests", StatusReasonTooManyRequests
+    "the server has received too many requests",
+    "rate limit",
+    "client rate limiter",
+    "due to client-side throttling",
+    "context deadline exceeded",
+    "tls handshake timeout",
+    "i/o timeout",
+    "the server is currently unable to handle the request",
+    "the server was unable to return a response in the time allotted",
+)
+
+
+def is_throttle_output(text: str) -> bool:
+    """True if CLI output looks like API server throttling or overload."""
+    low = text.lower()
+    return any(m in low for m in THROTTLE_MARKERS)
+
+
+def is_throttle_error(exc: BaseException) -> bool:
+    """True for Kubernetes client errors caused by throttling (429/503/504)."""
+    status = getattr(exc, "status", None)
+    if status in (429, 503, 504):
+        return True
+    return is_throttle_output(str(exc))
+
+
+@dataclass
+class OpOutcome:
+    """What an operation reports back to the limiter."""
+    rc: int
+    throttled: bool = False
+
+
+class AIMDLimiter:
+    """Additive-increase / multiplicative-decrease concurrency limit.
+
+    - Every `limit` consecutive healthy completions raise the limit by `increase`
+      (one step per "round trip" of the current window, as in TCP).
+    - A throttled operation, or a smoothed latency above `latency_factor` x
+      the (slowly drifting) best smoothed latency, multiplies the limit by `decrease`.
+      Only one decrease per window: operations started before the last
+      decrease don't count again, so a burst of 429s doesn't collapse it to 1.
+    """
+
+    def __init__(
+        self,
+        initial: int = 4,
+        min_limit: int = 1,
+        max_limit: int = 16,
+        increase: int = 1,
+        decrease: float = 0.5,
+        latency_factor: float = 3.0,
+        name: str = "",
+        announce: bool = True,
+    ):
+        if not (1 <= min_limit <= max_limit):
+            raise ValueError("concurrency limits must satisfy 1 <= min <= max")
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.limit = max(min_limit, min(initial, max_limit))
+        self.increase = increase
+        self.decrease = decrease
+        self.latency_factor = latency_factor
+        self.name = name
+        self.announce = announce  # print limit changes (they are always logged)
+        self._t0 = time.monotonic()
+        self.history: List[Tuple[float, int]] = [(self._t0, self.limit)]
+        self._cond = threading.Condition()
+        self._inflight = 0
+        self._successes = 0
+        self._ewma: Optional[float] = None
+        self._baseline: Optional[float] = None
+        self._epoch = 0
+
+    @property
+    def inflight(self) -> int:
+        return self._inflight
+
+    def acquire(self) -> int:
+        """Block until a slot is free; return the epoch the operation started in."""
+        with self._cond:
+            while self._inflight >= self.limit:
+                self._cond.wait()
+            self._inflight += 1
+            return self._epoch
+
+    def release(self, epoch: int, latency_s: float, throttled: bool) -> None:
+        with self._cond:
+            self._inflight -= 1
+            self._ewma = latency_s if self._ewma is None else 0.8 * self._ewma + 0.2 * latency_s
+            # Best latency seen, allowed to drift up slowly so a permanently
+            # slower cluster doesn't pin the limit at the minimum forever.
+            self._baseline = self._ewma if self._baseline is None else min(self._baseline * 1.01, self._ewma)
+            slow = self._ewma > self.latency_factor * self._baseline
+            if throttled or slow:
+                if epoch == self._epoch:
+                    reason = "throttled" if throttled else f"latency {self._ewma:.1f}s"
+                    self._set_limit(max(self.min_limit, int(self.limit * self.decrease)), reason)
+                    self._epoch += 1
+                self._successes = 0
+            else:
+                self._successes += 1
+                if self._successes >= self.limit and self.limit < self.max_limit:
+                    self._successes = 0
+                    self._set_limit(min(self.max_limit, self.limit + self.increase), "keeping up")
+            self._cond.notify_all()
+
+    def _set_limit(self, new: int, reason: str) -> None:
+        if new == self.limit:
+            return
+        old, self.limit = self.limit, new
+        self.history.append((time.monotonic(), new))
+        elapsed = time.monotonic() - self._t0
+        msg = f"concurrency{f' [{self.name}]' if self.name else ''}: {old} -> {new} ({reason}, t+{elapsed:.1f}s)"
+        log.info(msg)
+        if self.announce:
+            emit(f"[dim]{escape(msg)}[/]")
+
+    def timeline(self) -> str:
+        """Compact 't+Xs=N' rendering of the chosen limit over time."""
+        return ", ".join(f"t+{t - self._t0:.1f}s={n}" for t, n in self.history)
+
+
+@dataclass
+class AdaptiveResult(Generic[T]):
+    """Outcome of `run_adaptive`: first failure (if any) and per-item return codes."""
+    failed: Optional[T] = None
+    rc: int = 0
+    codes: Dict[int, int] = field(default_factory=dict)
+
+
+def run_adaptive(
+    items: Iterable[T],
+    op: Callable[[T], OpOutcome],
+    limiter: AIMDLimiter,
+    retries: int = 3,
+    backoff_s: float = 2.0,
+    fail_fast: bool = True,
+) -> AdaptiveResult[T]:
+    """Run `op` over `items` with concurrency driven by `limiter`.
+
+    Throttled failures are retried (with exponential backoff) up to `retries`
+    times; any other non-zero rc stops scheduling new work when `fail_fast`.
+    Items are started in order.
+    """
+    items = list(items)
+    result: AdaptiveResult[T] = AdaptiveResult()
+    stop = threading.Event()
+    # Workers write where the caller writes (see utils.output.capture_to)
+    parent_log = current_log()
+
+    def _one(idx: int, item: T) -> int:
+        with log_to(parent_log):
+            return _attempts(item)
+
+    def _attempts(item: T) -> int:
+        attempt = 0
+        while True:
+            epoch = limiter.acquire()
+            t0 = time.monotonic()
+            try:
+                outcome = op(item)
+            except Exception as e:  # treat unexpected errors as failures
+                outcome = OpOutcome(rc=1, throttled=is_throttle_error(e))
+                emit(f"[red]{escape(str(e))}[/]")
+            limiter.release(epoch, time.monotonic() - t0, outcome.throttled)
+            if outcome.rc != 0 and outcome.throttled and attempt < retries and not stop.is_set():
+                attempt += 1
+                time.sleep(backoff_s * (2 ** (attempt - 1)))
+                continue
+            return outcome.rc
+
+    with ThreadPoolExecutor(max_workers=limiter.max_limit) as pool:
+        pending: Dict[Future, Tuple[int, T]] = {}
+        queue = deque(enumerate(items))
+        while queue or pending:
+            # Keep at most `limit` tasks submitted so ordering follows the limiter
+            while queue and len(pending) < max(limiter.limit, 1) and not stop.is_set():
+                idx, item = queue.popleft()
+                pending[pool.submit(_one, idx, item)] = (idx, item)
+            if not pending:
+                break
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for fut in done:
+                idx, item = pending.pop(fut)
+                rc = fut.result()
+                result.codes[idx] = rc
+                if rc != 0 and result.failed is None:
+                    result.failed, result.rc = item, rc
+                    if fail_fast:
+                        stop.set()
+    return result
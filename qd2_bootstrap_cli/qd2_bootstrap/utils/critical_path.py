@@ -0,0 +1,75 @@
+# qd2_bootstrap/utils/critical_path.py
+from __future__ import annotations
+
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Optional
+
+
+@dataclass
+class Stage:
+    """One timed stage of a pipelined run; times are seconds since the run started."""
+    name: str
+    start: float
+    end: float
+    after: List[str] = field(default_factory=list)  # stages it had to wait for
+
+    @property
+    def seconds(self) -> float:
+        return self.end - self.start
+
+
+class StageClock:
+    """Records stages from several threads against one start time."""
+
+    def __init__(self) -> None:
+        self.t0 = time.monotonic()
+        self.stages: List[Stage] = []
+        self._lock = threading.Lock()
+
+    def now(self) -> float:
+        return time.monotonic() - self.t0
+
+    def add(self, name: str, start: float, end: float, after: Optional[List[str]] = None) -> Stage:
+        stage = Stage(name, start, end, list(after or []))
+        with self._lock:
+            self.stages.append(stage)
+        return stage
+
+    @contextmanager
+    def stage(self, name: str, after: Optional[List[str]] = None) -> Iterator[None]:
+        start = self.now()
+        try:
+            yield
+        finally:
+            self.add(name, start, self.now(), after)
+
+
+def critical_path(stages: List[Stage]) -> List[Stage]:
+    """Chain of stages that bounds the total time, first to last.
+
+    From the stage that ends last, repeatedly step to the dependency that
+    finished latest (the one it actually waited for).
+    """
+    if not stages:
+        return []
+    by_name: Dict[str, Stage] = {s.name: s for s in stages}
+    cur: Optional[Stage] = max(stages, key=lambda s: s.end)
+    path: List[Stage] = []
+    while cur is not None:
+        path.append(cur)
+        deps = [by_name[d] for d in cur.after if d in by_name]
+        cur = max(deps, key=lambda s: s.end) if deps else None
+    return path[::-1]
+
+
+def slack(stages: List[Stage]) -> Dict[str, float]:
+    """Seconds each stage could have taken longer without delaying any stage that waited for it."""
+    out: Dict[str, float] = {}
+    total = max((s.end for s in stages), default=0.0)
+    for s in stages:
+        waiting = [d.start for d in stages if s.name in d.after]
+        out[s.name] = max(0.0, (min(waiting) if waiting else total) - s.end)
+    return out
@@ -0,0 +1,167 @@
+# qd2_bootstrap/utils/debug_bundle.py
+from __future__ import annotations
+
+import io
+import json
+import tarfile
+import tempfile
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import IO, Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+# Writes one entry's content; returns an error (the entry is kept, with what was written) or None
+Producer = Callable[[IO[bytes]], Optional[str]]
+
+
+@dataclass
+class BundleEntry:
+    path: str
+    size: int
+    error: Optional[str] = None
+
+
+class BundleWriter:
+    """A .tar.gz written as entries arrive; only the writing thread touches it."""
+
+    def __init__(self, path: Path, root: str):
+        self.path = Path(path)
+        self.root = root
+        self.entries: List[BundleEntry] = []
+        self._tar = tarfile.open(self.path, "w:gz", compresslevel=6)
+
+    def _info(self, name: str, size: int) -> tarfile.TarInfo:
+        info = tarfile.TarInfo(f"{self.root}/{name}")
+        info.size, info.mtime, info.mode = size, int(time.time()), 0o644
+        return info
+
+    def add_file(self, name: str, f: IO[bytes], error: Optional[str] = None) -> None:
+        size = f.seek(0, 2)
+        f.seek(0)
+        self._tar.addfile(self._info(name, size), f)
+        self.entries.append(BundleEntry(name, size, error))
+
+    def add_bytes(self, name: str, data: bytes) -> None:
+        self.add_file(name, io.BytesIO(data))
+
+    def add_json(self, name: str, obj: Any) -> None:
+        self.add_bytes(name, json.dumps(obj, indent=2, sort_keys=True, default=str).encode())
+
+    def close(self) -> None:
+        self._tar.close()
+
+
+def stream_entries(writer: BundleWriter, jobs: Iterable[Tuple[str, Producer]], workers: int = 16) -> None:
+    """Run producers on a bounded pool and add each result to `writer` as it completes.
+
+    Every producer writes into its own temporary file (on disk, not in
+    memory), and at most 2 x `workers` jobs are in flight, so memory stays flat
+    however many logs there are. A producer that fails still leaves an entry
+    (with whatever it wrote) and its error.
+    """
+    def _run(produce: Producer) -> Tuple[IO[bytes], Optional[str]]:
+        f = tempfile.TemporaryFile()
+        try:
+            return f, produce(f)
+        except Exception as e:  # keep going: one bad pod must not lose the bundle
+            return f, str(e)
+
+    pending: Dict[Future, str] = {}
+    it = iter(jobs)
+
+    def _drain(done: Set[Future]) -> None:
+        for fut in done:
+            name = pending.pop(fut)
+            f, error = fut.result()
+            with f:
+                writer.add_file(name, f, error)
+
+    with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="debug-bundle") as pool:
+        for name, produce in it:
+            if len(pending) >= 2 * workers:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                _drain(done)
+            pending[pool.submit(_run, produce)] = name
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            _drain(done)
+
+
+# -----------------------------------------------------------------------------
+# Summaries of bulk reads
+# -----------------------------------------------------------------------------
+def node_conditions(nodes: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Per node: conditions, taints, capacity and allocatable (no images or heavy status)."""
+    out = []
+    for n in nodes:
+        meta, spec, status = n.get("metadata", {}), n.get("spec", {}), n.get("status", {})
+        out.append({
+            "name": meta.get("name"),
+            "labels": meta.get("labels") or {},
+            "unschedulable": bool(spec.get("unschedulable", False)),
+            "taints": spec.get("taints") or [],
+            "conditions": [
+                {k: c.get(k) for k in ("type", "status", "reason", "message", "lastTransitionTime")}
+                for c in status.get("conditions") or []
+            ],
+            "capacity": status.get("capacity") or {},
+            "allocatable": status.get("allocatable") or {},
+            "kubelet": (status.get("nodeInfo") or {}).get("kubeletVersion"),
+        })
+    return out
+
+
+def related_events(events: List[Dict[str, Any]], workloads: Iterable[str]) -> List[Dict[str, Any]]:
+    """Events about the given Deployments and their ReplicaSets/pods (names prefixed by the workload)."""
+    names = tuple(workloads)
+    prefixes = tuple(f"{w}-" for w in names)
+    out = []
+    for ev in events:
+        obj = ev.get("involvedObject") or {}
+        name = obj.get("name", "")
+        if name in names or name.startswith(prefixes):
+            out.append({
+                "object": f"{obj.get('kind')}/{name}",
+                "type": ev.get("type"),
+                "reason": ev.get("reason"),
+                "message": ev.get("message"),
+                "count": ev.get("count"),
+                "first": ev.get("firstTimestamp") or ev.get("eventTime"),
+                "last": ev.get("lastTimestamp") or ev.get("eventTime"),
+            })
+    return sorted(out, key=lambda e: str(e["last"] or ""))
+
+
+def release_record(rel: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """What Helm knows about a release: revision, status, chart and the values it was given."""
+    if rel is None:
+        return {"installed": False}
+    meta = (rel.get("chart") or {}).get("metadata") or {}
+    info = rel.get("info") or {}
+    return {
+        "installed": True,
+        "revision": rel.get("_revision"),
+        "status": info.get("status"),
+        "description": info.get("description"),
+        "lastDeployed": info.get("last_deployed"),
+        "chart": f"{meta.get('name')}-{meta.get('version')}",
+        "values": rel.get("config") or {},
+    }
+
+
+@dataclass
+class PodLogs:
+    """Log jobs for one pod: every init, main and sidecar container, plus previous runs after restarts."""
+    pod: str
+    containers: List[Tuple[str, bool]] = field(default_factory=list)  # (container, restarted)
+
+
+def pod_logs(pod: Dict[str, Any]) -> PodLogs:
+    spec, status = pod.get("spec", {}), pod.get("status", {})
+    restarts = {
+        c.get("name"): int(c.get("restartCount", 0)) > 0
+        for c in (status.get("initContainerStatuses") or []) + (status.get("containerStatuses") or [])
+    }
+    names = [c.get("name") for c in (spec.get("initContainers") or []) + (spec.get("containers") or [])]
+    return PodLogs(pod.get("metadata", {}).get("name", ""), [(n, restarts.get(n, False)) for n in names if n])
@@ -0,0 +1,143 @@
+# qd2_bootstrap/utils/drift.py
+from __future__ import annotations
+
+import base64
+import gzip
+import json
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from qd2_bootstrap.utils.manifest_diff import diff_paths
+from qd2_bootstrap.utils.releases import QNODE_CHART, QNODE_SET_CHART, ReleaseUnit
+
+# Charts whose releases we consider ours when looking for orphans
+QUDITTO_CHARTS = {QNODE_CHART, QNODE_SET_CHART, "qcontroller-v2", "qorchestrator-v2"}
+
+MISSING = "missing"
+ORPHANED = "orphaned"
+NOT_DEPLOYED = "not-deployed"
+CHART_MISMATCH = "chart-mismatch"
+VALUES_DRIFT = "values-drift"
+WRONG_NODE = "wrong-node"
+NO_POD = "no-pod"
+
+ReleaseKey = Tuple[str, str]  # (namespace, release)
+
+
+@dataclass
+class DriftFinding:
+    cluster: str
+    kind: str
+    namespace: str
+    release: str
+    detail: str = ""
+
+    def as_dict(self) -> Dict[str, str]:
+        return asdict(self)
+
+
+def decode_helm_release(secret: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Decode a Helm 3 release secret (`sh.helm.release.v1.<name>.v<rev>`).
+
+    The `release` data key is base64 (Kubernetes) of base64 of gzipped JSON.
+    """
+    raw = (secret.get("data") or {}).get("release")
+    if not raw:
+        return None
+    try:
+        data = base64.b64decode(base64.b64decode(raw))
+        if data[:2] == b"\x1f\x8b":
+            data = gzip.decompress(data)
+        return json.loads(data)
+    except (ValueError, OSError):
+        return None
+
+
+def latest_releases(secrets: Iterable[Dict[str, Any]]) -> Dict[ReleaseKey, Dict[str, Any]]:
+    """Keep the highest revision of each release from a bulk secret listing."""
+    out: Dict[ReleaseKey, Dict[str, Any]] = {}
+    for sec in secrets:
+        labels = sec.get("metadata", {}).get("labels") or {}
+        name = labels.get("name")
+        ns = sec.get("metadata", {}).get("namespace", "")
+        try:
+            rev = int(labels.get("version", "0"))
+        except ValueError:
+            rev = 0
+        if not name:
+            continue
+        cur = out.get((ns, name))
+        if cur is not None and cur["_revision"] >= rev:
+            continue
+        rel = decode_helm_release(sec)
+        if rel is None:
+            continue
+        rel["_revision"] = rev
+        out[(ns, name)] = rel
+    return out
+
+
+def detect_drift(
+    cluster: str,
+    units: List[ReleaseUnit],
+    releases: Dict[ReleaseKey, Dict[str, Any]],
+    pods: Iterable[Dict[str, Any]],
+) -> List[DriftFinding]:
+    """Compare desired releases against live Helm releases and pod placement."""
+    findings: List[DriftFinding] = []
+    desired_keys = {(u.namespace, u.name) for u in units}
+    namespaces = {u.namespace for u in units}
+
+    # Running pods by (namespace, app label)
+    pod_nodes: Dict[Tuple[str, str], List[str]] = {}
+    for pod in pods:
+        meta = pod.get("metadata", {})
+        app = (meta.get("labels") or {}).get("app")
+        if not app or pod.get("status", {}).get("phase") in ("Succeeded", "Failed"):
+            continue
+        pod_nodes.setdefault((meta.get("namespace", ""), app), []).append(
+            pod.get("spec", {}).get("nodeName") or "<unscheduled>"
+        )
+
+    for unit in units:
+        rel = releases.get((unit.namespace, unit.name))
+        if rel is None:
+            findings.append(DriftFinding(cluster, MISSING, unit.namespace, unit.name, f"chart {unit.chart}"))
+            continue
+
+        status = (rel.get("info") or {}).get("status", "")
+        if status != "deployed":
+            findings.append(DriftFinding(cluster, NOT_DEPLOYED, unit.namespace, unit.name, f"status {status}"))
+
+        meta = (rel.get("chart") or {}).get("metadata") or {}
+        live_chart, live_version = meta.get("name", ""), str(meta.get("version", ""))
+        if live_chart != unit.chart or (unit.version and live_version != unit.version):
+            findings.append(DriftFinding(
+                cluster, CHART_MISMATCH, unit.namespace, unit.name,
+                f"want {unit.chart}@{unit.version or '*'}, have {live_chart}@{live_version}",
+            ))
+
+        config = rel.get("config") or {}
+        paths = diff_paths(unit.values, config) + [p for p in diff_paths(config, unit.values) if p]
+        if paths:
+            uniq = sorted(set(paths))
+            findings.append(DriftFinding(
+                cluster, VALUES_DRIFT, unit.namespace, unit.name,
+                ", ".join(uniq[:5]) + (" …" if len(uniq) > 5 else ""),
+            ))
+
+        for app, node in unit.workloads.items():
+            nodes = pod_nodes.get((unit.namespace, app))
+            if not nodes:
+                findings.append(DriftFinding(cluster, NO_POD, unit.namespace, unit.name, f"no running pod for {app}"))
+            elif any(n != node for n in nodes):
+                findings.append(DriftFinding(
+                    cluster, WRONG_NODE, unit.namespace, unit.name,
+                    f"{app} on {', '.join(sorted(set(nodes)))}, want {node}",
+                ))
+
+    for (ns, name), rel in sorted(releases.items()):
+        chart = ((rel.get("chart") or {}).get("metadata") or {}).get("name", "")
+        if ns in namespaces and (ns, name) not in desired_keys and chart in QUDITTO_CHARTS:
+            findings.append(DriftFinding(cluster, ORPHANED, ns, name, f"chart {chart} not in spec"))
+    return findings
@@ -4,15 +4,24 @@ from __future__ import annotations
 import subprocess
 from pathlib import Path
 from typing import Iterable, List, Optional
-from rich import print as rprint
+from rich.markup import escape
 
-def _run(cmd: List[str]) -> int:
-    """Run a command and stream stdout/stderr; return exit code."""
-    rprint(f"$ {' '.join(cmd)}")
+from qd2_bootstrap.utils.output import emit, emit_line
+
+def _run(cmd: List[str], sink: Optional[List[str]] = None, label: Optional[str] = None) -> int:
+    """Run a command and stream stdout/stderr; return exit code.
+
+    `sink` collects the output lines (e.g. to detect API throttling) and
+    `label` prefixes echoed lines so concurrent runs stay readable.
+    """
+    prefix = f"[{label}] " if label else ""
+    emit(escape(f"{prefix}$ {' '.join(cmd)}"))
     proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
     assert proc.stdout is not None
     for line in proc.stdout:
-        print(line, end="")
+        if sink is not None:
+            sink.append(line)
+        emit_line(f"{prefix}{line}")
     proc.wait()
     return proc.returncode
 
@@ -45,6 +54,7 @@ class HelmClient:
         atomic: bool = False,
         wait: bool = False,
         timeout: Optional[str] = None,  # e.g., "10m"
+        output: Optional[List[str]] = None,
     ) -> int:
         """
         Run: helm upgrade --install <release> <chart> --namespace <ns> ...
@@ -77,7 +87,7 @@ class HelmClient:
         if dry_run:
             cmd.append("--dry-run")
 
-        return _run(cmd)
+        return _run(cmd, sink=output, label=release if output is not None else None)
 
     # ---------- uninstalls ----------
     def uninstall(
@@ -86,6 +96,7 @@ class HelmClient:
         namespace: str,
         keep_history: bool = False,
         dry_run: bool = False,
+        output: Optional[List[str]] = None,
     ) -> int:
         cmd = ["helm", "--kubeconfig", str(self.kubeconfig),
                "uninstall", release, "--namespace", namespace]
@@ -93,7 +104,7 @@ class HelmClient:
             cmd.append("--keep-history")
         if dry_run:
             cmd.append("--dry-run")
-        return _run(cmd)
+        return _run(cmd, sink=output, label=release if output is not None else None)
 
     # ---------- listing ----------
     def list_releases(self, namespace: Optional[str] = None) -> int:
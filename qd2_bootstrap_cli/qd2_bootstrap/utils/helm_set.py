@@ -8,37 +8,45 @@ def _to_scalar(val: Any) -> str:
     Convert a Python value into a Helm-friendly scalar for --set.
     Notes:
       - bool -> "true"/"false"
-      - None -> ""
+      - None -> "null" (Helm then drops the key, default included)
       - numbers -> str(number)
       - str -> as-is (no quoting needed because we pass args list, not a shell string)
       - list[scalars] -> {a,b,c}  (Helm list literal)
-      - dict -> not supported here (must be flattened by caller)
+      - dict, or a list holding dicts/lists -> ValueError (flatten them with _flatten)
     """
     if isinstance(val, bool):
         return "true" if val else "false"
     if val is None:
-        return ""
+        return "null"
     if isinstance(val, (int, float)):
         return str(val)
     if isinstance(val, str):
         return val
     if isinstance(val, (list, tuple)):
-        # Only scalar lists are supported here
+        if any(isinstance(x, (dict, list, tuple)) for x in val):
+            raise ValueError("nested lists and lists of maps have no --set literal")
         items = ",".join(_to_scalar(x) for x in val)
         return "{" + items + "}"
+    if isinstance(val, dict):
+        raise ValueError("maps have no --set literal")
     # Fallback: stringify
     return str(val)
 
 def _flatten(prefix: str, obj: Any, out: List[str]) -> None:
     """
     Recursively flatten a nested dict into helm --set key=value pairs.
+    Lists holding maps or lists are indexed, as Helm expects.
     Example:
       {"a": {"b": 1}, "c": "x"} -> ["a.b=1", "c=x"]
+      {"n": [{"name": "x"}]} -> ["n[0].name=x"]
     """
     if isinstance(obj, dict):
         for k, v in obj.items():
             key = f"{prefix}.{k}" if prefix else k
             _flatten(key, v, out)
+    elif isinstance(obj, (list, tuple)) and any(isinstance(x, (dict, list, tuple)) for x in obj):
+        for i, v in enumerate(obj):
+            _flatten(f"{prefix}[{i}]", v, out)
     else:
         out.append(f"{prefix}={_to_scalar(obj)}")
 
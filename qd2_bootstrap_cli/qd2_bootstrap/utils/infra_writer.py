@@ -1,8 +1,10 @@
+import json
 from pathlib import Path
 from typing import Dict
-from rich import print as rprint
+from qd2_bootstrap.utils.output import emit
 from qd2_bootstrap.models.infra_spec import InfraSpec
 from qd2_bootstrap.utils.tf_templates import MAIN_TF
+from qd2_bootstrap.utils.locks import atomic_write_text
 
 def ensure_workdir(path: Path):
     path.mkdir(parents=True, exist_ok=True)
@@ -10,14 +12,31 @@ def ensure_workdir(path: Path):
 def write_if_missing(path: Path, content: str, force: bool = False):
     if path.exists() and not force:
         return
-    path.write_text(content)
+    atomic_write_text(path, content)
+
+def _hcl_map(d: Dict[str, str]) -> str:
+    return "{ " + ", ".join(f"{json.dumps(k)} = {json.dumps(v)}" for k, v in sorted(d.items())) + " }"
+
+def _pools_tfvar(spec: InfraSpec) -> str:
+    """`worker_pools` map for MAIN_TF (empty without workerPools: the legacy `worker` resource is used)."""
+    s = spec.infraSetup
+    if not s.workerPools:
+        return "worker_pools = {}\n"
+    lines = ["worker_pools = {"]
+    for p in s.worker_pools():
+        lines.append(
+            f"  {json.dumps(p.name)} = {{ count = {p.count}, flavor_name = {json.dumps(p.flavorName)}, "
+            f"image_name = {json.dumps(p.imageName)}, labels = {_hcl_map(p.node_labels())} }}"
+        )
+    lines.append("}")
+    return "\n".join(lines) + "\n"
 
 def write_tfvars(path: Path, spec: InfraSpec):
     s = spec.infraSetup
     tfvars = f"""\
 cluster_name = "{s.clusterName}"
 count_cp     = {s.countCp}
-count_worker = {s.countWorker}
+count_worker = {0 if s.workerPools else s.countWorker}
 image_name   = "{s.imageName}"
 flavor_name  = "{s.flavorName}"
 keypair_name = "{s.keypairName}"
@@ -29,8 +48,9 @@ user_name    = "{s.openstack.userName}"
 tenant_id    = "{s.openstack.tenantId}"
 domain_name  = "{s.openstack.domainName}"
 # password via ENV: TF_VAR_password
-"""
-    path.write_text(tfvars)
+
+{_pools_tfvar(spec)}"""
+    atomic_write_text(path, tfvars)
 
 def env_for_openstack(spec: InfraSpec) -> Dict[str, str]:
     import os
@@ -49,10 +69,16 @@ def env_for_openstack(spec: InfraSpec) -> Dict[str, str]:
     return env
 
 def prepare_tf_workdir(spec: InfraSpec, force_main: bool = False) -> Path:
-    """Create workdir and write main.tf + terraform.tfvars; return workdir."""
+    """Create workdir and write main.tf + terraform.tfvars; return workdir.
+
+    Callers that go on to run Terraform should hold `workdir_lock(workdir)`.
+    """
     workdir = Path(spec.infraSetup.workdir).expanduser().resolve()
     ensure_workdir(workdir)
     write_if_missing(workdir / "main.tf", MAIN_TF, force=force_main)
+    # An older main.tf would ignore the pools (and count_worker is 0 with pools)
+    if spec.infraSetup.workerPools and 'variable "worker_pools"' not in (workdir / "main.tf").read_text():
+        raise ValueError(f"{workdir / 'main.tf'} predates worker pools; re-run with --force-main to regenerate it")
     write_tfvars(workdir / "terraform.tfvars", spec)
-    rprint(f"[cyan]Terraform workdir:[/] {workdir}")
+    emit(f"[cyan]Terraform workdir:[/] {workdir}")
     return workdir
@@ -0,0 +1,125 @@
+# qd2_bootstrap/utils/inventory.py
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from qd2_bootstrap.utils.chart_cache import default_cache_root
+from qd2_bootstrap.utils.kubectl import Kubectl
+from qd2_bootstrap.utils.locks import atomic_write_text
+
+# Node lists are cheap to refetch but slow enough (1-2 s per cluster) to matter
+# when validate, deploy and plan run back to back.
+DEFAULT_TTL_S = float(os.environ.get("QD2_INVENTORY_TTL", "30"))
+
+
+@dataclass
+class NodeInfo:
+    """What placement checks need to know about one Kubernetes node."""
+    name: str
+    ready: bool
+    unschedulable: bool = False
+    taints: List[str] = field(default_factory=list)  # "key=value:Effect"
+    labels: Dict[str, str] = field(default_factory=dict)
+    allocatable: Dict[str, str] = field(default_factory=dict)
+
+    def taints_with(self, effect: str) -> List[str]:
+        return [t for t in self.taints if t.endswith(f":{effect}")]
+
+
+def node_from_json(obj: Dict[str, Any]) -> NodeInfo:
+    """Reduce a `kubectl get nodes -o json` item to a NodeInfo."""
+    meta = obj.get("metadata", {})
+    spec = obj.get("spec", {})
+    status = obj.get("status", {})
+    ready = any(
+        c.get("type") == "Ready" and c.get("status") == "True"
+        for c in status.get("conditions") or []
+    )
+    taints = [
+        f"{t.get('key')}{'=' + t['value'] if t.get('value') else ''}:{t.get('effect')}"
+        for t in spec.get("taints") or []
+    ]
+    return NodeInfo(
+        name=meta.get("name", ""),
+        ready=ready,
+        unschedulable=bool(spec.get("unschedulable", False)),
+        taints=taints,
+        labels=dict(meta.get("labels") or {}),
+        allocatable=dict(status.get("allocatable") or {}),
+    )
+
+
+def kubeconfig_key(kubeconfig: Path) -> str:
+    """Cache key for per-cluster data: kubeconfig path + contents, so a
+    regenerated kubeconfig never reuses stale entries."""
+    kc = Path(kubeconfig).expanduser().resolve()
+    h = hashlib.sha256(str(kc).encode())
+    h.update(b"\0")
+    h.update(kc.read_bytes())
+    return h.hexdigest()
+
+
+class NodeInventory:
+    """Per-cluster node lists with a short TTL, shared in-process and on disk.
+
+    The disk entry (under `~/.cache/qd2_bootstrap/inventory`) is keyed by the
+    kubeconfig path and contents, so a regenerated kubeconfig never reuses a
+    stale list. `ttl_s=0` disables caching.
+    """
+
+    def __init__(self, ttl_s: float = DEFAULT_TTL_S, root: Optional[Path] = None):
+        self.ttl_s = ttl_s
+        self.root = Path(root or (default_cache_root() / "inventory")).expanduser().resolve()
+        self._mem: Dict[str, Tuple[float, Dict[str, NodeInfo]]] = {}
+        self._lock = threading.Lock()
+
+    def nodes(self, kubeconfig: Path, refresh: bool = False) -> Dict[str, NodeInfo]:
+        """Node name -> NodeInfo for the cluster behind `kubeconfig`."""
+        key = kubeconfig_key(kubeconfig)
+        now = time.time()
+        if not refresh and self.ttl_s > 0:
+            with self._lock:
+                hit = self._mem.get(key) or self._load(key)
+                if hit and now - hit[0] < self.ttl_s:
+                    self._mem[key] = hit
+                    return hit[1]
+
+        # Fetch outside the lock: clusters are queried in parallel
+        items = Kubectl(kubeconfig=kubeconfig).get_json(["nodes"]).get("items", [])
+        nodes = {n.name: n for n in map(node_from_json, items)}
+        with self._lock:
+            self._mem[key] = (now, nodes)
+            if self.ttl_s > 0:
+                payload = {"fetchedAt": now, "nodes": [asdict(n) for n in nodes.values()]}
+                atomic_write_text(self.root / f"{key}.json", json.dumps(payload))
+        return nodes
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            return {"ttl_s": self.ttl_s, "clusters": len(self._mem)}
+
+    def _load(self, key: str) -> Optional[Tuple[float, Dict[str, NodeInfo]]]:
+        try:
+            payload = json.loads((self.root / f"{key}.json").read_text())
+            nodes = {n["name"]: NodeInfo(**n) for n in payload["nodes"]}
+            return float(payload["fetchedAt"]), nodes
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+
+
+_shared: Optional[NodeInventory] = None
+
+
+def shared_inventory() -> NodeInventory:
+    """Process-wide inventory, so every command in one run hits the API once."""
+    global _shared
+    if _shared is None:
+        _shared = NodeInventory()
+    return _shared
@@ -0,0 +1,272 @@
+# qd2_bootstrap/utils/ipam.py
+from __future__ import annotations
+
+import ipaddress
+import json
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from qd2_bootstrap.models.quditto_deploy_spec import ComponentRef, L2smNetwork, QudittoDeploySpec
+from qd2_bootstrap.utils.locks import atomic_write_text, file_lock
+from qd2_bootstrap.utils.releases import chart_name
+
+STATE_VERSION = 1
+
+# {release: {network: ip}}
+Addresses = Dict[str, Dict[str, str]]
+
+
+class IpamError(ValueError):
+    """Address conflicts or exhausted subnets; `problems` lists every one found."""
+
+    def __init__(self, problems: List[str]):
+        super().__init__("; ".join(problems))
+        self.problems = problems
+
+
+# -----------------------------------------------------------------------------
+# Allocation index (pure: no files)
+# -----------------------------------------------------------------------------
+class _Pool:
+    """Host addresses of one subnet, handed out lowest-first."""
+
+    def __init__(self, net: L2smNetwork):
+        self.net = ipaddress.ip_network(net.subnet)
+        first, last = int(self.net.network_address), int(self.net.broadcast_address)
+        if self.net.prefixlen < self.net.max_prefixlen - 1:
+            first, last = first + 1, last - 1  # skip network and broadcast addresses
+        self.first, self.last = first, last
+        self.reserved: Set[int] = {int(ipaddress.ip_address(ip)) for ip in net.reserved}
+        self.cursor = first
+
+    def usable(self, ip: int) -> bool:
+        return self.first <= ip <= self.last and ip not in self.reserved
+
+
+class IpamIndex:
+    """Per-network address <-> owner maps (O(1) lookups both ways).
+
+    Owners are release names. `static` entries come from an explicit `ip` in
+    the component values; the others were allocated and stay stable for as
+    long as the entry exists.
+    """
+
+    def __init__(self, networks: Dict[str, L2smNetwork]):
+        self.pools = {name: _Pool(net) for name, net in networks.items()}
+        self.by_owner: Dict[str, Dict[str, Tuple[int, bool]]] = {name: {} for name in networks}
+        self.by_ip: Dict[str, Dict[int, str]] = {name: {} for name in networks}
+
+    @classmethod
+    def from_dict(cls, networks: Dict[str, L2smNetwork], data: Dict[str, Any]) -> "IpamIndex":
+        """Load persisted allocations, dropping networks that are gone and
+        addresses that no longer fit their subnet (they get re-allocated)."""
+        index = cls(networks)
+        problems = []
+        for name, entry in (data.get("networks") or {}).items():
+            pool = index.pools.get(name)
+            if pool is None:
+                continue
+            for owner, alloc in (entry.get("allocations") or {}).items():
+                ip = int(ipaddress.ip_address(alloc["ip"]))
+                if not pool.usable(ip):
+                    continue
+                if ip in index.by_ip[name]:
+                    problems.append(f"{name}: {alloc['ip']} recorded for both "
+                                    f"{index.by_ip[name][ip]} and {owner} in the IPAM state")
+                    continue
+                index._set(name, owner, ip, bool(alloc.get("static")))
+        if problems:
+            raise IpamError(problems)
+        return index
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "version": STATE_VERSION,
+            "networks": {
+                name: {
+                    "subnet": str(self.pools[name].net),
+                    "allocations": {
+                        owner: {"ip": str(ipaddress.ip_address(ip)), "static": static}
+                        for owner, (ip, static) in sorted(owners.items())
+                    },
+                }
+                for name, owners in self.by_owner.items()
+            },
+        }
+
+    def _set(self, network: str, owner: str, ip: int, static: bool) -> None:
+        old = self.by_owner[network].get(owner)
+        if old is not None:
+            self.by_ip[network].pop(old[0], None)
+        self.by_owner[network][owner] = (ip, static)
+        self.by_ip[network][ip] = owner
+
+    def lookup(self, network: str, owner: str) -> Optional[str]:
+        hit = self.by_owner[network].get(owner)
+        return str(ipaddress.ip_address(hit[0])) if hit else None
+
+    def owner_of(self, network: str, ip: str) -> Optional[str]:
+        return self.by_ip[network].get(int(ipaddress.ip_address(ip)))
+
+    def claim(self, network: str, owner: str, ip: str) -> None:
+        """Record an explicit address, evicting whoever held it before (see `assign_addresses` for the checks)."""
+        addr = int(ipaddress.ip_address(ip))
+        holder = self.by_ip[network].get(addr)
+        if holder is not None and holder != owner:
+            self.by_owner[network].pop(holder, None)
+        self._set(network, owner, addr, static=True)
+
+    def allocate(self, network: str, owner: str) -> str:
+        """Existing address of `owner` on `network`, or the lowest free one."""
+        hit = self.by_owner[network].get(owner)
+        if hit is not None:
+            if hit[1]:
+                self._set(network, owner, hit[0], static=False)
+            return str(ipaddress.ip_address(hit[0]))
+        pool = self.pools[network]
+        used = self.by_ip[network]
+        # The cursor only moves forward within a run: amortised O(1) per allocation
+        while pool.cursor <= pool.last and (pool.cursor in used or pool.cursor in pool.reserved):
+            pool.cursor += 1
+        if pool.cursor > pool.last:
+            raise IpamError([f"{network}: subnet {pool.net} is exhausted ({len(used)} addresses allocated)"])
+        self._set(network, owner, pool.cursor, static=False)
+        return str(ipaddress.ip_address(pool.cursor))
+
+    def release(self, owners: Iterable[str]) -> int:
+        """Forget every address of `owners`; returns how many were freed."""
+        owners = list(owners)
+        freed = 0
+        for network, by_owner in self.by_owner.items():
+            for owner in owners:
+                hit = by_owner.pop(owner, None)
+                if hit is not None:
+                    self.by_ip[network].pop(hit[0], None)
+                    freed += 1
+        return freed
+
+
+# -----------------------------------------------------------------------------
+# Spec glue
+# -----------------------------------------------------------------------------
+def requested_addresses(comp: ComponentRef) -> List[Tuple[str, Optional[str]]]:
+    """(network, explicit ip or None) pairs a component asks for in its `l2sm` values.
+
+    qnodes use `l2sm.networks[]`; the controller and orchestrator charts use
+    `l2sm.networkName`/`l2sm.ip` and have L2SM enabled by default.
+    """
+    l2sm = comp.values.get("l2sm") or {}
+    if not l2sm.get("enabled", chart_name(comp.chart) in ("qcontroller-v2", "qorchestrator-v2")):
+        return []
+    out = [(n["name"], n.get("ip") or None) for n in l2sm.get("networks") or [] if n.get("name")]
+    if l2sm.get("networkName"):
+        out.append((l2sm["networkName"], l2sm.get("ip") or None))
+    return out
+
+
+def assign_addresses(spec: QudittoDeploySpec, index: IpamIndex) -> Addresses:
+    """Give every component an address on each declared network it joins.
+
+    Explicit addresses are claimed first. Two components claiming the same
+    one is a conflict, and so is claiming the recorded allocation of another
+    component still on that network (it would be moved silently on the next
+    deploy); stale holders (gone from the spec, or a former explicit claim)
+    are evicted. Then the rest keep their recorded address or get the next
+    free one. Networks not declared under `l2sm.networks` are left untouched.
+    """
+    networks = spec.l2sm.networks
+    wanted = [(release, net, ip) for release, comp in spec.iter_components() for net, ip in requested_addresses(comp)]
+    members: Dict[str, Set[str]] = {}
+    for release, net, _ in wanted:
+        members.setdefault(net, set()).add(release)
+    problems: List[str] = []
+    claimed: Dict[Tuple[str, int], str] = {}
+    out: Addresses = {}
+
+    for release, net, ip in wanted:
+        if ip is None or net not in networks:
+            continue
+        try:
+            addr = ipaddress.ip_interface(ip).ip
+        except ValueError:
+            problems.append(f"{release}: invalid address {ip!r} on {net}")
+            continue
+        if not index.pools[net].usable(int(addr)):
+            problems.append(f"{release}: {addr} is outside {networks[net].subnet} or reserved ({net})")
+            continue
+        other = claimed.setdefault((net, int(addr)), release)
+        if other != release:
+            problems.append(f"{net}: {addr} is set for both {other} and {release}")
+            continue
+        holder = index.owner_of(net, str(addr))
+        if holder is not None and holder != release and holder in members[net] \
+                and not index.by_owner[net][holder][1]:
+            problems.append(
+                f"{net}: {addr} is set for {release} but allocated to {holder}; "
+                f"pick another address, or give {holder} an explicit one"
+            )
+            continue
+        index.claim(net, release, str(addr))
+
+    for release, net, ip in wanted:
+        if ip is not None:
+            continue
+        if net not in networks:
+            problems.append(f"{release}: L2SM network {net!r} has no ip and no subnet under l2sm.networks")
+            continue
+        try:
+            out.setdefault(release, {})[net] = index.allocate(net, release)
+        except IpamError as e:
+            problems += e.problems
+    if problems:
+        raise IpamError(list(dict.fromkeys(problems)))
+    return out
+
+
+def state_path(spec: QudittoDeploySpec, spec_file: Path) -> Path:
+    """`l2sm.stateFile` (relative to the spec) or `<spec stem>.ipam.json` next to it."""
+    if spec.l2sm.stateFile:
+        p = Path(spec.l2sm.stateFile).expanduser()
+        return p if p.is_absolute() else spec_file.parent / p
+    return spec_file.with_name(f"{spec_file.stem}.ipam.json")
+
+
+def _load(path: Path, spec: QudittoDeploySpec) -> IpamIndex:
+    data = json.loads(path.read_text()) if path.exists() else {}
+    return IpamIndex.from_dict(spec.l2sm.networks, data)
+
+
+def allocate_for_spec(
+    spec: QudittoDeploySpec, spec_file: Path, persist: bool, expect: Optional[Addresses] = None,
+) -> Addresses:
+    """Assign addresses using the spec's state file; write it back if `persist`.
+
+    With `expect` (the addresses a plan was built with), nothing is written
+    when the state file now yields different ones (another deploy got there
+    first) and an IpamError is raised.
+    """
+    if not spec.l2sm.networks:
+        return {}
+    path = state_path(spec, spec_file)
+    with file_lock(path.with_name(path.name + ".lock"), "IPAM state"):
+        index = _load(path, spec)
+        addresses = assign_addresses(spec, index)
+        if expect is not None and addresses != expect:
+            changed = sorted(r for r in set(addresses) | set(expect) if addresses.get(r) != expect.get(r))
+            raise IpamError([f"the IPAM state changed since the plan was made ({', '.join(changed)}); plan again"])
+        if persist:
+            atomic_write_text(path, json.dumps(index.to_dict(), indent=2) + "\n")
+    return addresses
+
+
+def release_for_spec(spec: QudittoDeploySpec, spec_file: Path, releases: Iterable[str]) -> int:
+    """Free the addresses of torn-down releases; returns how many were freed."""
+    path = state_path(spec, spec_file)
+    if not spec.l2sm.networks or not path.exists():
+        return 0
+    with file_lock(path.with_name(path.name + ".lock"), "IPAM state"):
+        index = _load(path, spec)
+        freed = index.release(releases)
+        if freed:
+            atomic_write_text(path, json.dumps(index.to_dict(), indent=2) + "\n")
+    return freed
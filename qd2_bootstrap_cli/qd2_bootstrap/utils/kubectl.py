@@ -1,8 +1,10 @@
+import json
 import shlex
 import subprocess
 from pathlib import Path
-from typing import List
-from rich import print as rprint
+from typing import BinaryIO, Iterable, List, Optional
+
+from qd2_bootstrap.utils.output import emit, emit_line
 
 class Kubectl:
     """Thin wrapper around kubectl to run simple queries with a given kubeconfig."""
@@ -12,11 +14,11 @@ class Kubectl:
 
     def _run(self, args: List[str]) -> int:
         cmd = ["kubectl", "--kubeconfig", str(self.kubeconfig), *args]
-        rprint(f"[dim]$ {' '.join(shlex.quote(c) for c in cmd)}[/]")
+        emit(f"[dim]$ {' '.join(shlex.quote(c) for c in cmd)}[/]")
         proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
         assert proc.stdout is not None
         for line in proc.stdout:
-            print(line, end="")
+            emit_line(line)
         return proc.wait()
 
     def get_nodes(self) -> int:
@@ -24,3 +26,61 @@ class Kubectl:
 
     def get_core_health(self) -> int:
         return self._run(["get", "pods", "-n", "kube-system", "-o", "wide"])
+
+    def get_json(
+        self,
+        kinds: Iterable[str],
+        namespace: Optional[str] = None,
+        selector: Optional[str] = None,
+    ) -> dict:
+        """Fetch several kinds in one `kubectl get -o json` call (quiet, parsed List)."""
+        args = ["get", ",".join(sorted(set(kinds))), "-o", "json"]
+        args += ["-n", namespace] if namespace else ["--all-namespaces"]
+        if selector:
+            args += ["-l", selector]
+        cmd = ["kubectl", "--kubeconfig", str(self.kubeconfig), *args]
+        proc = subprocess.run(cmd, capture_output=True, text=True)
+        if proc.returncode != 0:
+            raise RuntimeError(f"kubectl {' '.join(args)} failed: {proc.stderr.strip()}")
+        return json.loads(proc.stdout or "{}")
+
+    def capture(self, args: List[str], stdin: Optional[str] = None, timeout: Optional[float] = None) -> str:
+        """Run kubectl quietly and return stdout; raise RuntimeError on failure."""
+        cmd = ["kubectl", "--kubeconfig", str(self.kubeconfig), *args]
+        try:
+            proc = subprocess.run(cmd, input=stdin, capture_output=True, text=True, timeout=timeout)
+        except subprocess.TimeoutExpired:
+            raise RuntimeError(f"kubectl {' '.join(args[:3])} timed out after {timeout:.0f}s")
+        if proc.returncode != 0:
+            raise RuntimeError(f"kubectl {' '.join(args[:3])} failed: {proc.stderr.strip()}")
+        return proc.stdout
+
+    def run_to(self, args: List[str], out: BinaryIO, timeout: Optional[float] = None) -> Optional[str]:
+        """Run kubectl with stdout written straight to `out` (never held in memory).
+
+        Returns None on success, else the error (stderr, or the timeout).
+        """
+        cmd = ["kubectl", "--kubeconfig", str(self.kubeconfig), *args]
+        try:
+            proc = subprocess.run(cmd, stdout=out, stderr=subprocess.PIPE, timeout=timeout)
+        except subprocess.TimeoutExpired:
+            return f"kubectl {' '.join(args[:3])} timed out after {timeout:.0f}s"
+        if proc.returncode != 0:
+            return proc.stderr.decode(errors="replace").strip() or f"exit code {proc.returncode}"
+        return None
+
+    def apply_manifest(self, manifest: str) -> str:
+        return self.capture(["apply", "-f", "-"], stdin=manifest)
+
+    def delete(self, kind: str, name: str, namespace: str, wait: bool = False) -> str:
+        return self.capture(["delete", kind, name, "-n", namespace, "--ignore-not-found", f"--wait={str(wait).lower()}"])
+
+    def exec(self, pod: str, namespace: str, command: List[str], timeout: Optional[float] = None) -> str:
+        return self.capture(["exec", "-n", namespace, pod, "--", *command], timeout=timeout)
+
+    def watch(self, kind: str, namespace: str, selector: Optional[str] = None) -> subprocess.Popen:
+        """Start `kubectl get <kind> --watch-only -o name`: one stdout line per change, until killed."""
+        cmd = ["kubectl", "--kubeconfig", str(self.kubeconfig), "get", kind, "-n", namespace, "--watch-only", "-o", "name"]
+        if selector:
+            cmd += ["-l", selector]
+        return subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
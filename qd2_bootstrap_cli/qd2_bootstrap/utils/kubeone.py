@@ -3,14 +3,15 @@ import shlex
 import subprocess
 from pathlib import Path
 from typing import List, Optional
-from rich import print as rprint
+
+from qd2_bootstrap.utils.output import emit, emit_line
 
 class KubeOneClient:
     def __init__(self, workdir: Path | None = None):
         self.workdir = workdir
 
     def _run(self, cmd: List[str], env: Optional[dict] = None) -> int:
-        rprint(f"[dim]{(str(self.workdir) if self.workdir else '.')}$ {' '.join(shlex.quote(c) for c in cmd)}[/]")
+        emit(f"[dim]{(str(self.workdir) if self.workdir else '.')}$ {' '.join(shlex.quote(c) for c in cmd)}[/]")
         proc = subprocess.Popen(
             cmd,
             cwd=(self.workdir or None),
@@ -21,7 +22,7 @@ class KubeOneClient:
         )
         assert proc.stdout is not None
         for line in proc.stdout:
-            print(line, end="")
+            emit_line(line)
         return proc.wait()
 
     def apply(
@@ -1,3 +1,6 @@
+import json
+
+
 def render_manifest(
     name: str,
     k8s_version: str,
@@ -11,9 +14,11 @@ def render_manifest(
     svc_subnet: str,
     external_cni: bool,
     helm_releases: list[dict],
+    host_labels: dict[str, dict[str, str]] | None = None,
 ) -> str:
     """
     Render a KubeOneCluster manifest from parameters.
+    `host_labels` maps a private address to the node labels KubeOne applies to that host.
     """
     # KubeOne requires explicit empty objects when using external CNI
     cni_block = "external: {}" if external_cni else "canal: {}"
@@ -25,6 +30,10 @@ def render_manifest(
       privateAddress: {a}
       sshUsername: {ssh_user}
       sshPrivateKeyFile: {ssh_key}""")
+            labels = (host_labels or {}).get(a)
+            if labels:
+                lines.append("      labels:")
+                lines.extend(f"        {json.dumps(k)}: {json.dumps(v)}" for k, v in sorted(labels.items()))
         return "\n".join(lines) if lines else "    []"
 
     # Helm releases block
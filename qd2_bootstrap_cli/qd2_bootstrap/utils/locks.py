@@ -0,0 +1,97 @@
+# qd2_bootstrap/utils/locks.py
+from __future__ import annotations
+
+import fcntl
+import os
+import re
+import shutil
+import tempfile
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, Optional
+
+from rich import print as rprint
+
+
+class LockTimeout(RuntimeError):
+    """Raised when an advisory lock cannot be taken within the timeout."""
+
+
+@contextmanager
+def file_lock(lock_path: Path, what: str, timeout_s: Optional[float] = None, poll_s: float = 1.0) -> Iterator[None]:
+    """Hold an exclusive advisory `flock` on `lock_path` for the duration of the block.
+
+    The holder's PID is written into the lock file so a waiting process can say
+    who it is waiting for. Locks die with the process, so a crash never leaves a
+    stale lock behind. `timeout_s=None` waits forever.
+    """
+    lock_path.parent.mkdir(parents=True, exist_ok=True)
+    fd = os.open(lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        deadline = None if timeout_s is None else time.monotonic() + timeout_s
+        announced = False
+        while True:
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                break
+            except BlockingIOError:
+                if not announced:
+                    holder = os.pread(fd, 64, 0).decode(errors="replace").strip() or "?"
+                    rprint(f"[yellow]Waiting for {what} lock (held by pid {holder}):[/] {lock_path}")
+                    announced = True
+                if deadline is not None and time.monotonic() >= deadline:
+                    raise LockTimeout(f"timed out waiting for {what} lock: {lock_path}")
+                time.sleep(poll_s)
+        os.ftruncate(fd, 0)
+        os.pwrite(fd, str(os.getpid()).encode(), 0)
+        yield
+    finally:
+        os.close(fd)  # closing the descriptor releases the flock
+
+
+def workdir_lock(workdir: Path, timeout_s: Optional[float] = None):
+    """Lock a Terraform workdir (`<workdir>/.qd2.lock`)."""
+    return file_lock(Path(workdir) / ".qd2.lock", f"workdir {workdir}", timeout_s)
+
+
+def cluster_lock(cluster_name: str, timeout_s: Optional[float] = None):
+    """Lock a cluster by name across every qd2_bootstrap process of this user."""
+    from qd2_bootstrap.utils.chart_cache import default_cache_root  # chart_cache imports this module
+
+    safe = re.sub(r"[^A-Za-z0-9_.-]", "_", cluster_name)
+    return file_lock(default_cache_root() / "locks" / f"cluster-{safe}.lock", f"cluster {cluster_name}", timeout_s)
+
+
+def atomic_write_text(path: Path, content: str, mode: Optional[int] = None) -> None:
+    """Write `content` to `path` via a temp file + rename: readers never see partial files."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w") as f:
+            f.write(content)
+            f.flush()
+            os.fsync(f.fileno())
+        if mode is not None:
+            os.chmod(tmp, mode)
+        os.replace(tmp, path)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+
+
+def atomic_copy(src: Path, dst: Path, mode: Optional[int] = None) -> None:
+    """Copy `src` to `dst` atomically (temp file in the destination dir + rename)."""
+    dst = Path(dst)
+    dst.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=dst.parent, prefix=f".{dst.name}.", suffix=".tmp")
+    os.close(fd)
+    try:
+        shutil.copyfile(src, tmp)
+        if mode is not None:
+            os.chmod(tmp, mode)
+        os.replace(tmp, dst)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
@@ -0,0 +1,115 @@
+# qd2_bootstrap/utils/manifest_diff.py
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+ObjKey = Tuple[str, str, str]  # (kind, namespace, name)
+
+ADDED = "added"
+CHANGED = "changed"
+UNCHANGED = "unchanged"
+REMOVED = "removed"
+
+# Metadata the API server or Helm manage on live objects; never part of a diff
+_IGNORED_METADATA = {
+    "annotations", "creationTimestamp", "generation", "managedFields",
+    "resourceVersion", "selfLink", "uid",
+}
+
+
+def obj_key(obj: Dict[str, Any]) -> ObjKey:
+    meta = obj.get("metadata", {})
+    return (obj.get("kind", ""), meta.get("namespace", ""), meta.get("name", ""))
+
+
+def _scalar_eq(a: Any, b: Any) -> bool:
+    if a == b:
+        return True
+    # Helm renders ports/replicas as ints or strings depending on quoting
+    if isinstance(a, (str, int, float, bool)) and isinstance(b, (str, int, float, bool)):
+        return str(a).lower() == str(b).lower()
+    return False
+
+
+def diff_paths(desired: Any, live: Any, path: str = "", out: Optional[List[str]] = None) -> List[str]:
+    """Paths where `desired` is not contained in `live`.
+
+    Live objects carry server-side defaults, so only fields present in the
+    rendered object are compared (dicts as subsets, lists element-wise).
+    """
+    out = [] if out is None else out
+    if isinstance(desired, dict):
+        if not isinstance(live, dict):
+            out.append(path or ".")
+            return out
+        for k, v in desired.items():
+            if path == ".metadata" and k in _IGNORED_METADATA:
+                continue
+            if v in (None, {}, []) and k not in live:
+                continue
+            if k not in live:
+                out.append(f"{path}.{k}")
+                continue
+            diff_paths(v, live[k], f"{path}.{k}", out)
+    elif isinstance(desired, list):
+        if not isinstance(live, list) or len(desired) != len(live):
+            out.append(path)
+            return out
+        for i, (d, l) in enumerate(zip(desired, live)):
+            diff_paths(d, l, f"{path}[{i}]", out)
+    elif not _scalar_eq(desired, live):
+        out.append(path)
+    return out
+
+
+@dataclass
+class ObjectDiff:
+    key: ObjKey
+    status: str
+    paths: List[str] = field(default_factory=list)
+
+
+@dataclass
+class ReleaseDiff:
+    release: str
+    namespace: str
+    objects: List[ObjectDiff] = field(default_factory=list)
+
+    def count(self, status: str) -> int:
+        return sum(1 for o in self.objects if o.status == status)
+
+
+def diff_release(
+    release: str,
+    namespace: str,
+    rendered: Iterable[Dict[str, Any]],
+    live_index: Optional[Dict[ObjKey, Dict[str, Any]]],
+) -> ReleaseDiff:
+    """Classify each rendered object against the live index.
+
+    With `live_index=None` (no cluster access) everything counts as added.
+    Live objects owned by the release (Helm's release-name annotation) that are
+    no longer rendered are reported as removed.
+    """
+    rd = ReleaseDiff(release=release, namespace=namespace)
+    seen = set()
+    for obj in rendered:
+        key = obj_key(obj)
+        seen.add(key)
+        live = live_index.get(key) if live_index is not None else None
+        if live is None:
+            rd.objects.append(ObjectDiff(key, ADDED))
+            continue
+        paths = diff_paths(obj, live)
+        rd.objects.append(ObjectDiff(key, CHANGED if paths else UNCHANGED, paths))
+    if live_index is not None:
+        for key, live in live_index.items():
+            ann = live.get("metadata", {}).get("annotations") or {}
+            if (
+                key not in seen
+                and key[1] == namespace
+                and ann.get("meta.helm.sh/release-name") == release
+            ):
+                rd.objects.append(ObjectDiff(key, REMOVED))
+    return rd
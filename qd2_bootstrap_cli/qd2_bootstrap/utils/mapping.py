@@ -1,15 +1,35 @@
 # qd2_bootstrap/utils/mapping.py
 from __future__ import annotations
 
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 from qd2_bootstrap.utils.merge import deep_merge
 
-def map_component_values(user_values: Dict[str, Any] | None, node_name: str) -> Dict[str, Any]:
+
+def _with_addresses(l2sm: Dict[str, Any], addresses: Dict[str, str]) -> Dict[str, Any]:
+    """Fill `ip` into L2SM network entries that have none (lists are not deep-merged)."""
+    out = dict(l2sm)
+    if out.get("networks"):
+        out["networks"] = [
+            dict(n, ip=addresses[n.get("name")]) if not n.get("ip") and n.get("name") in addresses else n
+            for n in out["networks"]
+        ]
+    if out.get("networkName") in addresses and not out.get("ip"):
+        out["ip"] = addresses[out["networkName"]]
+    return out
+
+
+def map_component_values(
+    user_values: Dict[str, Any] | None,
+    node_name: str,
+    addresses: Optional[Dict[str, str]] = None,
+) -> Dict[str, Any]:
     """
     Build the final Helm values for a component.
 
     - Injects placement knobs derived from the target node (`node_name`).
     - Deep-merges user-provided overrides on top.
+    - Fills CLI-allocated L2SM addresses (`addresses`: network -> ip) into
+      `l2sm.networks[].ip` / `l2sm.ip` where the user left them empty.
 
     Charts convention assumed:
       placement:
@@ -20,6 +40,7 @@ def map_component_values(user_values: Dict[str, Any] | None, node_name: str) ->
     Args:
       user_values: dict with user overrides (can be None).
       node_name: Kubernetes nodeName where we want to pin the workload.
+      addresses: optional L2SM allocations of this component (see utils/ipam.py).
 
     Returns:
       A dict with the merged values, suitable to serialize to --set.
@@ -30,4 +51,7 @@ def map_component_values(user_values: Dict[str, Any] | None, node_name: str) ->
             "nodeName": node_name,
         }
     }
-    return deep_merge(base, user_values or {})
+    values = deep_merge(base, user_values or {})
+    if addresses and isinstance(values.get("l2sm"), dict):
+        values["l2sm"] = _with_addresses(values["l2sm"], addresses)
+    return values
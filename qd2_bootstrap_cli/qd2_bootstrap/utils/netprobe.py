@@ -0,0 +1,197 @@
+# qd2_bootstrap/utils/netprobe.py
+from __future__ import annotations
+
+import json
+import re
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from qd2_bootstrap.utils.chart_cache import default_cache_root
+from qd2_bootstrap.utils.inventory import kubeconfig_key
+from qd2_bootstrap.utils.kubectl import Kubectl
+from qd2_bootstrap.utils.locks import atomic_write_text
+
+PROBE_NAME = "qd2-netprobe"
+DEFAULT_IMAGE = "busybox:1.36"
+
+# busybox: "round-trip min/avg/max = 0.1/0.2/0.3 ms"; iputils: "rtt min/avg/max/mdev = ..."
+_RTT_RE = re.compile(r"=\s*([\d.]+)/([\d.]+)/([\d.]+)")
+
+
+@dataclass
+class RttMatrix:
+    """Average round-trip times in ms between nodes, as measured at `measuredAt`."""
+    measuredAt: float
+    nodes: List[str]
+    rtt_ms: Dict[str, Dict[str, float]] = field(default_factory=dict)
+    unreachable: List[Tuple[str, str]] = field(default_factory=list)
+
+    def get(self, a: str, b: str) -> Optional[float]:
+        """RTT between two nodes (0 on the same node); either direction if only one was measured."""
+        if a == b:
+            return 0.0
+        v = self.rtt_ms.get(a, {}).get(b)
+        return v if v is not None else self.rtt_ms.get(b, {}).get(a)
+
+    def worst(self) -> float:
+        values = [v for row in self.rtt_ms.values() for v in row.values()]
+        return max(values) if values else 0.0
+
+    def age_s(self) -> float:
+        return time.time() - self.measuredAt
+
+    def stats(self) -> Dict[str, float]:
+        values = [v for row in self.rtt_ms.values() for v in row.values()]
+        if not values:
+            return {}
+        return {"min": min(values), "median": statistics.median(values), "max": max(values)}
+
+
+# -----------------------------------------------------------------------------
+# Cache (per kubeconfig, like the node inventory)
+# -----------------------------------------------------------------------------
+def _cache_path(kubeconfig: Path, root: Optional[Path] = None) -> Path:
+    base = Path(root or (default_cache_root() / "netprobe")).expanduser().resolve()
+    return base / f"{kubeconfig_key(kubeconfig)}.json"
+
+
+def save_matrix(kubeconfig: Path, matrix: RttMatrix, root: Optional[Path] = None) -> Path:
+    path = _cache_path(kubeconfig, root)
+    atomic_write_text(path, json.dumps(asdict(matrix)))
+    return path
+
+
+def load_matrix(kubeconfig: Path, root: Optional[Path] = None) -> Optional[RttMatrix]:
+    """Last measured matrix for the cluster, or None if it was never probed."""
+    try:
+        data = json.loads(_cache_path(kubeconfig, root).read_text())
+        data["unreachable"] = [tuple(p) for p in data.get("unreachable") or []]
+        return RttMatrix(**data)
+    except (OSError, ValueError, TypeError):
+        return None
+
+
+# -----------------------------------------------------------------------------
+# Probing
+# -----------------------------------------------------------------------------
+def probe_manifest(namespace: str, image: str = DEFAULT_IMAGE) -> str:
+    """DaemonSet of idle host-network pods (one per node, all taints tolerated)."""
+    labels = {"app": PROBE_NAME}
+    return json.dumps({
+        "apiVersion": "apps/v1",
+        "kind": "DaemonSet",
+        "metadata": {"name": PROBE_NAME, "namespace": namespace, "labels": labels},
+        "spec": {
+            "selector": {"matchLabels": labels},
+            "template": {
+                "metadata": {"labels": labels},
+                "spec": {
+                    "hostNetwork": True,
+                    "tolerations": [{"operator": "Exists"}],
+                    "terminationGracePeriodSeconds": 0,
+                    "containers": [{
+                        "name": "probe",
+                        "image": image,
+                        "command": ["sh", "-c", "sleep infinity"],
+                        "securityContext": {"capabilities": {"add": ["NET_RAW"]}},
+                        "resources": {
+                            "requests": {"cpu": "5m", "memory": "8Mi"},
+                            "limits": {"cpu": "100m", "memory": "32Mi"},
+                        },
+                    }],
+                },
+            },
+        },
+    })
+
+
+def parse_ping_lines(output: str) -> Dict[str, Optional[float]]:
+    """Parse '@@ <ip> <ping summary>' lines into {ip: avg ms or None}."""
+    out: Dict[str, Optional[float]] = {}
+    for line in output.splitlines():
+        if not line.startswith("@@ "):
+            continue
+        parts = line.split(" ", 2)
+        m = _RTT_RE.search(parts[2]) if len(parts) > 2 else None
+        out[parts[1]] = float(m.group(2)) if m else None
+    return out
+
+
+def _wait_ready(kube: Kubectl, namespace: str, timeout_s: float) -> Dict[str, Tuple[str, str]]:
+    """Wait for the probe DaemonSet; returns {node: (pod, ip)} of ready probe pods."""
+    deadline = time.monotonic() + timeout_s
+    while True:
+        ds = kube.get_json(["daemonsets"], namespace=namespace, selector=f"app={PROBE_NAME}").get("items", [])
+        status = ds[0].get("status", {}) if ds else {}
+        desired = status.get("desiredNumberScheduled", -1)
+        if desired >= 0 and status.get("numberReady", 0) >= desired:
+            break
+        if time.monotonic() > deadline:
+            break
+        time.sleep(2)
+    pods = kube.get_json(["pods"], namespace=namespace, selector=f"app={PROBE_NAME}").get("items", [])
+    ready: Dict[str, Tuple[str, str]] = {}
+    for p in pods:
+        st = p.get("status", {})
+        if st.get("phase") == "Running" and st.get("podIP") and all(
+            c.get("ready") for c in st.get("containerStatuses") or [{}]
+        ):
+            ready[p["spec"]["nodeName"]] = (p["metadata"]["name"], st["podIP"])
+    return ready
+
+
+def measure(
+    kubeconfig: Path,
+    namespace: str = "default",
+    count: int = 3,
+    image: str = DEFAULT_IMAGE,
+    timeout_s: float = 120.0,
+    keep: bool = False,
+    parallel: int = 32,
+) -> RttMatrix:
+    """Deploy the probe DaemonSet, ping every node from every node, clean up.
+
+    Each probe pod pings all other nodes concurrently (`count` pings each),
+    and the pods are exec'ed in parallel, so a run takes a few seconds plus
+    the DaemonSet rollout regardless of the node count.
+    """
+    kube = Kubectl(kubeconfig=kubeconfig)
+    kube.apply_manifest(probe_manifest(namespace, image))
+    try:
+        ready = _wait_ready(kube, namespace, timeout_s)
+        if len(ready) < 2:
+            raise RuntimeError(f"only {len(ready)} probe pod(s) became ready; need at least 2 nodes")
+        ip_to_node = {ip: node for node, (_, ip) in ready.items()}
+
+        def _from(src: str) -> Tuple[str, Dict[str, Optional[float]]]:
+            pod, own_ip = ready[src]
+            targets = " ".join(ip for ip in ip_to_node if ip != own_ip)
+            script = (
+                f"for t in {targets}; do "
+                f"(r=$(ping -c {count} -W 1 -q $t 2>&1 | tail -1); echo \"@@ $t $r\") & "
+                "done; wait"
+            )
+            out = kube.exec(pod, namespace, ["sh", "-c", script], timeout=30 + 2 * count)
+            return src, parse_ping_lines(out)
+
+        rtt: Dict[str, Dict[str, float]] = {}
+        unreachable: List[Tuple[str, str]] = []
+        with ThreadPoolExecutor(max_workers=max(1, min(parallel, len(ready)))) as pool:
+            for src, results in pool.map(_from, sorted(ready)):
+                row = rtt.setdefault(src, {})
+                for ip, avg in results.items():
+                    dst = ip_to_node.get(ip)
+                    if dst is None:
+                        continue
+                    if avg is None:
+                        unreachable.append((src, dst))
+                    else:
+                        row[dst] = avg
+        return RttMatrix(time.time(), sorted(ready), rtt, sorted(unreachable))
+    finally:
+        if not keep:
+            kube.delete("daemonset", PROBE_NAME, namespace)
@@ -0,0 +1,60 @@
+# qd2_bootstrap/utils/output.py
+from __future__ import annotations
+
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import IO, Iterator, Optional
+
+from rich import print as rprint
+from rich.text import Text
+
+# Per-thread log file: while set, wrapper output goes there instead of the terminal
+_local = threading.local()
+
+
+def current_log() -> Optional[IO[str]]:
+    return getattr(_local, "log", None)
+
+
+@contextmanager
+def capture_to(path: Path) -> Iterator[Path]:
+    """Send everything this thread prints through `emit`/`emit_line` to `path` (appended)."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    prev = current_log()
+    with open(path, "a") as fh:
+        _local.log = fh
+        try:
+            yield path
+        finally:
+            _local.log = prev
+
+
+@contextmanager
+def log_to(log: Optional[IO[str]]) -> Iterator[None]:
+    """Make this thread write to `log`, typically a parent thread's `current_log()`."""
+    prev = current_log()
+    _local.log = log
+    try:
+        yield
+    finally:
+        _local.log = prev
+
+
+def emit(markup: str) -> None:
+    """Rich-markup message: printed, or written as plain text to the thread's log."""
+    log = current_log()
+    if log is None:
+        rprint(markup)
+    else:
+        log.write(Text.from_markup(markup).plain + "\n")
+        log.flush()
+
+
+def emit_line(line: str) -> None:
+    """One raw line of subprocess output (keeps its own newline)."""
+    log = current_log()
+    if log is None:
+        print(line, end="")
+    else:
+        log.write(line)
@@ -0,0 +1,464 @@
+# qd2_bootstrap/utils/placement.py
+from __future__ import annotations
+
+import heapq
+import re
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from qd2_bootstrap.models.quditto_deploy_spec import ComponentRef, PlacementConfig
+from qd2_bootstrap.utils.inventory import NodeInfo
+from qd2_bootstrap.utils.ipam import requested_addresses
+from qd2_bootstrap.utils.netprobe import RttMatrix
+from qd2_bootstrap.utils.releases import chart_name, workload_name
+from qd2_bootstrap.utils.sizing import PQC_CONTAINERS, sizing_kind
+
+
+class PlacementError(ValueError):
+    """Raised when components cannot be placed on the available nodes."""
+
+
+# -----------------------------------------------------------------------------
+# Kubernetes quantities
+# -----------------------------------------------------------------------------
+_QUANTITY_RE = re.compile(r"^([0-9.]+)([A-Za-z]*)$")
+_SUFFIX = {
+    "": 1, "m": 1e-3, "k": 1e3, "M": 1e6, "G": 1e9, "T": 1e12, "P": 1e15, "E": 1e18,
+    "Ki": 2**10, "Mi": 2**20, "Gi": 2**30, "Ti": 2**40, "Pi": 2**50, "Ei": 2**60,
+}
+
+
+def parse_quantity(q: Any) -> float:
+    """Parse a Kubernetes quantity ("250m", "2", "512Mi", "1G") into base units."""
+    m = _QUANTITY_RE.match(str(q).strip())
+    if not m or m.group(2) not in _SUFFIX:
+        raise ValueError(f"invalid resource quantity: {q!r}")
+    return float(m.group(1)) * _SUFFIX[m.group(2)]
+
+
+def cpu_millis(q: Any) -> int:
+    return int(round(parse_quantity(q) * 1000))
+
+
+def mem_bytes(q: Any) -> int:
+    return int(parse_quantity(q))
+
+
+def pod_requests(pod: Dict[str, Any]) -> Tuple[int, int]:
+    """Summed container requests of a pod as (cpu millicores, memory bytes)."""
+    cpu = mem = 0
+    for c in pod.get("spec", {}).get("containers") or []:
+        req = (c.get("resources") or {}).get("requests") or {}
+        if "cpu" in req:
+            cpu += cpu_millis(req["cpu"])
+        if "memory" in req:
+            mem += mem_bytes(req["memory"])
+    return cpu, mem
+
+
+def values_footprint(chart: str, values: Dict[str, Any]) -> Optional[Tuple[Optional[int], Optional[int]]]:
+    """Summed container requests set in `values` as (cpu millicores, memory bytes).
+
+    Only containers the chart renders for the values' typeNode count; chart
+    defaults are not included. A resource no container requests is None, and
+    None is returned when no request is set at all.
+    """
+    kind = sizing_kind(chart, values)
+    blocks = []
+    if kind != "pqc":
+        blocks.append(values.get("resources"))
+    if kind in ("pqc", "hybrid"):
+        pqc = values.get("pqc") or {}
+        blocks += [(pqc.get(c) or {}).get("resources") for c in PQC_CONTAINERS]
+
+    cpu: Optional[int] = None
+    mem: Optional[int] = None
+    for block in blocks:
+        req = (block or {}).get("requests") or {}
+        if "cpu" in req:
+            cpu = (cpu or 0) + cpu_millis(req["cpu"])
+        if "memory" in req:
+            mem = (mem or 0) + mem_bytes(req["memory"])
+    return None if cpu is None and mem is None else (cpu, mem)
+
+
+# -----------------------------------------------------------------------------
+# Core algorithm (pure: no cluster access, usable with synthetic inventories)
+# -----------------------------------------------------------------------------
+@dataclass
+class NodeSlot:
+    name: str
+    cpu_m: int
+    mem_b: int
+    used_cpu_m: int = 0
+    used_mem_b: int = 0
+    placed: List[str] = field(default_factory=list)
+
+    def fits(self, cpu_m: int, mem_b: int) -> bool:
+        return self.used_cpu_m + cpu_m <= self.cpu_m and self.used_mem_b + mem_b <= self.mem_b
+
+    def load(self) -> float:
+        """Dominant-resource utilisation in [0, 1+]."""
+        return max(
+            self.used_cpu_m / self.cpu_m if self.cpu_m else 1.0,
+            self.used_mem_b / self.mem_b if self.mem_b else 1.0,
+        )
+
+    def take(self, name: str, cpu_m: int, mem_b: int) -> None:
+        self.used_cpu_m += cpu_m
+        self.used_mem_b += mem_b
+        self.placed.append(name)
+
+
+@dataclass
+class PlacementRequest:
+    name: str
+    cpu_m: int
+    mem_b: int
+    anti_affinity: Optional[str] = None
+    node: Optional[str] = None  # pinned (manual nodek8s or sticky)
+    peers: List[str] = field(default_factory=list)   # linked requests (topology)
+    groups: List[str] = field(default_factory=list)  # shared networks (topology)
+    allowed: Optional[Set[str]] = None  # nodes matching the component's nodeSelector (None: any)
+
+
+def _place_linked(
+    pinned: List[PlacementRequest],
+    linked: List[PlacementRequest],
+    by_name: Dict[str, NodeSlot],
+    assignment: Dict[str, str],
+    rtt: RttMatrix,
+    strategy: str,
+    conflict: Callable[[PlacementRequest, str], bool],
+) -> Iterator[PlacementRequest]:
+    """Greedy latency-aware placement; yields each request after trying it.
+
+    A node's cost for a request is the RTT to each placed peer plus, per
+    group, the mean RTT to the placed members. Per-group RTT sums are kept
+    per node and updated in O(nodes) per placement, so large groups (one
+    shared L2SM network) don't make the cost quadratic. Unmeasured pairs
+    count as the worst measured RTT. Ties go to the least loaded node
+    (busiest with binpack).
+    """
+    names = list(by_name)
+    penalty = rtt.worst() or 1.0
+    # Symmetric rows over the candidate nodes, so the hot loops are plain dict reads
+    rows: Dict[str, Dict[str, float]] = {}
+
+    def row(node: str) -> Dict[str, float]:
+        r = rows.get(node)
+        if r is None:
+            r = rows[node] = {}
+            for n in names:
+                v = rtt.get(node, n)
+                r[n] = penalty if v is None else v
+        return r
+
+    peers_of: Dict[str, Set[str]] = defaultdict(set)
+    for r in pinned + linked:
+        for p in r.peers:
+            peers_of[r.name].add(p)
+            peers_of[p].add(r.name)
+    gsum: Dict[str, Dict[str, float]] = {}
+    gcount: Dict[str, int] = defaultdict(int)
+
+    def _joined(r: PlacementRequest, node: str) -> None:
+        for g in r.groups:
+            vec = gsum.setdefault(g, dict.fromkeys(names, 0.0))
+            r_node = row(node)
+            for n in names:
+                vec[n] += r_node[n]
+            gcount[g] += 1
+
+    for r in pinned:
+        _joined(r, r.node)
+
+    sign = -1 if strategy == "binpack" else 1
+    # Keep group members together in the order so each one sees the previous ones
+    for r in sorted(linked, key=lambda r: (min(r.groups, default=""), -r.cpu_m, -r.mem_b, r.name)):
+        best: Optional[Tuple[float, float, str]] = None
+        peer_rows = [row(assignment[p]) for p in peers_of[r.name] if p in assignment]
+        group_vecs = [(gsum[g], gcount[g]) for g in r.groups if gcount[g]]
+        for slot in by_name.values():
+            if not slot.fits(r.cpu_m, r.mem_b) or conflict(r, slot.name):
+                continue
+            n = slot.name
+            cost = sum(pr[n] for pr in peer_rows) + sum(vec[n] / cnt for vec, cnt in group_vecs)
+            key = (round(cost, 3), sign * slot.load(), n)
+            if best is None or key < best:
+                best = key
+        if best is not None:
+            by_name[best[2]].take(r.name, r.cpu_m, r.mem_b)
+            assignment[r.name] = best[2]
+            _joined(r, best[2])
+        yield r
+
+
+def place(
+    requests: Iterable[PlacementRequest],
+    slots: Iterable[NodeSlot],
+    strategy: str = "spread",
+    rtt: Optional[RttMatrix] = None,
+) -> Dict[str, str]:
+    """Assign every unpinned request to a node; returns {request name: node}.
+
+    Pinned requests are accounted first. With an `rtt` matrix, requests that
+    have peers or groups go next, each to the fitting node with the lowest
+    latency to its placed peers plus the mean latency to its placed group
+    members (see `_place_linked`). The rest go largest-first:
+      - spread: least-loaded fitting node (min-heap on dominant utilisation),
+      - binpack: first fitting node in a fixed order (first-fit decreasing);
+        a per-shape cursor skips nodes that can no longer fit that shape, so
+        thousands of identical qnodes cost O(nodes + qnodes).
+    Anti-affinity groups and per-request `allowed` nodes are hard constraints.
+    The result is deterministic for a given input. `slots` are updated in place.
+    """
+    by_name = {s.name: s for s in slots}
+    groups: Dict[str, Set[str]] = defaultdict(set)
+    assignment: Dict[str, str] = {}
+
+    todo: List[PlacementRequest] = []
+    pinned: List[PlacementRequest] = []
+    for r in requests:
+        if r.node:
+            pinned.append(r)
+            assignment[r.name] = r.node
+            if r.node in by_name:
+                by_name[r.node].take(r.name, r.cpu_m, r.mem_b)
+            if r.anti_affinity:
+                groups[r.anti_affinity].add(r.node)
+        else:
+            todo.append(r)
+    todo.sort(key=lambda r: (-r.cpu_m, -r.mem_b, r.name))
+
+    def _conflict(r: PlacementRequest, node: str) -> bool:
+        if r.allowed is not None and node not in r.allowed:
+            return True
+        return bool(r.anti_affinity) and node in groups[r.anti_affinity]
+
+    def _fail(r: PlacementRequest) -> PlacementError:
+        why = f" (anti-affinity group {r.anti_affinity!r})" if r.anti_affinity else ""
+        if r.allowed is not None:
+            why += f" ({len(r.allowed)} node(s) match its nodeSelector)"
+        return PlacementError(
+            f"no node can fit {r.name} (cpu {r.cpu_m}m, memory {r.mem_b // 2**20}Mi){why}"
+        )
+
+    if rtt is not None:
+        linked = [r for r in todo if r.peers or r.groups]
+        todo = [r for r in todo if not (r.peers or r.groups)]
+        for r in _place_linked(pinned, linked, by_name, assignment, rtt, strategy, _conflict):
+            if r.name not in assignment:
+                raise _fail(r)
+            if r.anti_affinity:
+                groups[r.anti_affinity].add(assignment[r.name])
+
+    # Busiest nodes first: binpack fills them before opening emptier ones
+    order = sorted(by_name.values(), key=lambda s: (-s.load(), s.name))
+
+    if strategy == "spread":
+        heap = [(s.load(), s.name) for s in order]
+        heapq.heapify(heap)
+        for r in todo:
+            skipped = []
+            chosen = None
+            while heap:
+                item = heapq.heappop(heap)
+                slot = by_name[item[1]]
+                if slot.fits(r.cpu_m, r.mem_b) and not _conflict(r, slot.name):
+                    chosen = slot
+                    break
+                skipped.append(item)
+            for item in skipped:
+                heapq.heappush(heap, item)
+            if chosen is None:
+                raise _fail(r)
+            chosen.take(r.name, r.cpu_m, r.mem_b)
+            heapq.heappush(heap, (chosen.load(), chosen.name))
+            assignment[r.name] = chosen.name
+            if r.anti_affinity:
+                groups[r.anti_affinity].add(chosen.name)
+    elif strategy == "binpack":
+        cursor: Dict[Tuple[int, int], int] = {}
+        for r in todo:
+            shape = (r.cpu_m, r.mem_b)
+            i = cursor.get(shape, 0)
+            # Capacity only shrinks, so a node that can't fit this shape never will
+            while i < len(order) and not order[i].fits(*shape):
+                i += 1
+            cursor[shape] = i
+            chosen = None
+            for j in range(i, len(order)):  # no slice: it would copy the tail per request
+                slot = order[j]
+                if slot.fits(*shape) and not _conflict(r, slot.name):
+                    chosen = slot
+                    break
+            if chosen is None:
+                raise _fail(r)
+            chosen.take(r.name, r.cpu_m, r.mem_b)
+            assignment[r.name] = chosen.name
+            if r.anti_affinity:
+                groups[r.anti_affinity].add(chosen.name)
+    else:
+        raise ValueError(f"unknown placement strategy: {strategy!r}")
+    return assignment
+
+
+# -----------------------------------------------------------------------------
+# Glue: live inventory + spec components -> assignment
+# -----------------------------------------------------------------------------
+def matches(labels: Dict[str, str], selector: Dict[str, str]) -> bool:
+    return all(labels.get(k) == v for k, v in selector.items())
+
+
+def _eligible(node: NodeInfo, selector: Dict[str, str]) -> bool:
+    if not node.ready or node.unschedulable:
+        return False
+    if node.taints_with("NoSchedule") or node.taints_with("NoExecute"):
+        return False
+    return matches(node.labels, selector)
+
+
+def component_request(release: str, comp: ComponentRef, config: PlacementConfig) -> PlacementRequest:
+    """Placement size of a component.
+
+    Precedence: `resources`, then the container requests in its (sized)
+    values, then `config.defaultRequests` for whatever is still unknown.
+    """
+    default = config.defaultRequests
+    if comp.resources:
+        cpu, mem = cpu_millis(comp.resources.cpu), mem_bytes(comp.resources.memory)
+    else:
+        cpu, mem = values_footprint(comp.chart, comp.values) or (None, None)
+    return PlacementRequest(
+        name=release,
+        cpu_m=cpu if cpu is not None else cpu_millis(default.cpu),
+        mem_b=mem if mem is not None else mem_bytes(default.memory),
+        anti_affinity=comp.antiAffinity,
+        node=comp.nodek8s,
+        peers=list(comp.links),
+        groups=sorted({net for net, _ in requested_addresses(comp)}),
+    )
+
+
+def auto_place(
+    components: List[Tuple[str, ComponentRef]],
+    namespace: str,
+    config: PlacementConfig,
+    nodes: Dict[str, NodeInfo],
+    pods: Iterable[Dict[str, Any]],
+    rtt: Optional[RttMatrix] = None,
+) -> Tuple[Dict[str, str], List[NodeSlot]]:
+    """Pick nodes for components without `nodek8s` on one cluster.
+
+    Candidate nodes are Ready, uncordoned, untainted and match
+    `config.nodeSelector`; a component's own `nodeSelector` narrows them
+    further (e.g. to one worker pool). Their load is the sum of running pod requests.
+    Pods of the components being placed are not counted as load: with
+    `config.sticky` they pin the component to the node it already runs on,
+    so re-deploys do not reshuffle qnodes. With `rtt` (and `config.topology`),
+    linked components are kept on nearby nodes.
+
+    Returns ({release: node} for the auto-placed components, node slots).
+    """
+    workload_of = {
+        ((comp.namespace or namespace).strip(), workload_name(chart_name(comp.chart), release, comp.values)): release
+        for release, comp in components
+    }
+    slots = {
+        n.name: NodeSlot(n.name, cpu_millis(n.allocatable.get("cpu", 0)), mem_bytes(n.allocatable.get("memory", 0)))
+        for n in nodes.values() if _eligible(n, config.nodeSelector)
+    }
+    if not slots:
+        raise PlacementError("no eligible nodes (Ready, schedulable, untainted, matching nodeSelector)")
+
+    current: Dict[str, str] = {}
+    for pod in pods:
+        node = pod.get("spec", {}).get("nodeName")
+        if not node or pod.get("status", {}).get("phase") in ("Succeeded", "Failed"):
+            continue
+        meta = pod.get("metadata", {})
+        own = workload_of.get((meta.get("namespace", ""), (meta.get("labels") or {}).get("app")))
+        if own is not None:
+            current[own] = node
+            continue
+        if node in slots:
+            cpu, mem = pod_requests(pod)
+            slots[node].used_cpu_m += cpu
+            slots[node].used_mem_b += mem
+
+    requests = []
+    auto = set()
+    for release, comp in components:
+        req = component_request(release, comp, config)
+        if req.node is None:
+            auto.add(release)
+            if comp.nodeSelector:
+                req.allowed = {n for n in slots if matches(nodes[n].labels, comp.nodeSelector)}
+            if config.sticky and current.get(release) in (req.allowed if req.allowed is not None else slots):
+                req.node = current[release]
+        requests.append(req)
+
+    assignment = place(requests, slots.values(), strategy=config.strategy, rtt=rtt if config.topology else None)
+    return {r: n for r, n in assignment.items() if r in auto}, sorted(slots.values(), key=lambda s: s.name)
+
+
+@dataclass
+class LinkLatency:
+    """Expected RTT between the nodes of linked components."""
+    link: str          # "a <-> b" or "network <name>"
+    members: int
+    nodes: int
+    avg_ms: Optional[float]
+    max_ms: Optional[float]
+
+
+def link_latencies(components: List[Tuple[str, ComponentRef]], rtt: RttMatrix) -> List[LinkLatency]:
+    """Per explicit link and per shared L2SM network, the RTT between members' nodes.
+
+    Members on the same node count as 0 ms. Network figures are over all
+    member pairs, computed from per-node member counts.
+    """
+    node_of = {name: comp.nodek8s for name, comp in components if comp.nodek8s}
+    out: List[LinkLatency] = []
+    seen: Set[Tuple[str, str]] = set()
+    for name, comp in components:
+        for peer in comp.links:
+            pair = tuple(sorted((name, peer)))
+            if pair in seen or name not in node_of or peer not in node_of:
+                continue
+            seen.add(pair)
+            v = rtt.get(node_of[name], node_of[peer])
+            out.append(LinkLatency(f"{pair[0]} <-> {pair[1]}", 2, len({node_of[name], node_of[peer]}), v, v))
+
+    per_net: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+    for name, comp in components:
+        for net in {n for n, _ in requested_addresses(comp)}:
+            if name in node_of:
+                per_net[net][node_of[name]] += 1
+    for net, counts in sorted(per_net.items()):
+        members = sum(counts.values())
+        if members < 2:
+            continue
+        nodes = sorted(counts)
+        total = pairs = 0.0
+        worst: Optional[float] = 0.0
+        for i, a in enumerate(nodes):
+            pairs += counts[a] * (counts[a] - 1) / 2  # same node: 0 ms
+            for b in nodes[i + 1:]:
+                v = rtt.get(a, b)
+                if v is None:
+                    worst = None
+                    break
+                n = counts[a] * counts[b]
+                total += n * v
+                pairs += n
+                worst = max(worst, v)
+            if worst is None:
+                break
+        out.append(LinkLatency(
+            f"network {net}", members, len(nodes),
+            total / pairs if worst is not None and pairs else None, worst,
+        ))
+    return out
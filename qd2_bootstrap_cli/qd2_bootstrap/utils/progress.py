@@ -0,0 +1,132 @@
+# qd2_bootstrap/utils/progress.py
+from __future__ import annotations
+
+import re
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Tuple, TypeVar
+
+from rich import box
+from rich.console import Group
+from rich.live import Live
+from rich.table import Table
+from rich.text import Text
+
+from qd2_bootstrap.utils.concurrency import OpOutcome
+from qd2_bootstrap.utils.output import capture_to
+
+T = TypeVar("T")
+
+PENDING, RUNNING, DONE, FAILED = "pending", "running", "done", "failed"
+
+
+def _slug(name: str) -> str:
+    return re.sub(r"[^A-Za-z0-9_.-]+", "_", name) or "_"
+
+
+def _fmt_s(s: float) -> str:
+    s = int(s)
+    return f"{s // 60}m{s % 60:02d}s" if s >= 60 else f"{s}s"
+
+
+@dataclass
+class _Item:
+    cluster: str
+    name: str
+    status: str = PENDING
+    started: Optional[float] = None
+    finished: Optional[float] = None
+    attempts: int = 0
+    log: Optional[Path] = None
+
+
+class RolloutProgress:
+    """Live counts, throughput, ETA and slowest releases for a many-release run.
+
+    Each operation's output (helm/kubectl lines and per-release messages) goes
+    to `<log_dir>/<cluster>/<release>.log` instead of the terminal.
+    """
+
+    def __init__(self, title: str, releases: Dict[str, List[str]], log_dir: Path, slowest: int = 5):
+        self.title = title
+        self.log_dir = log_dir
+        self.slowest = slowest
+        self.items: Dict[Tuple[str, str], _Item] = {
+            (cluster, name): _Item(cluster, name)
+            for cluster, names in releases.items() for name in names
+        }
+        self._lock = threading.Lock()
+        self._t0 = time.monotonic()
+
+    def log_path(self, cluster: str, name: str) -> Path:
+        return self.log_dir / _slug(cluster) / f"{_slug(name)}.log"
+
+    def wrap(self, cluster: str, name_of: Callable[[T], str], op: Callable[[T], OpOutcome]) -> Callable[[T], OpOutcome]:
+        """Wrap `op` so it is tracked and its output captured to the release log."""
+        def _op(unit: T) -> OpOutcome:
+            item = self.items[(cluster, name_of(unit))]
+            item.log = self.log_path(cluster, item.name)
+            with self._lock:
+                item.status, item.started, item.finished = RUNNING, time.monotonic(), None
+                item.attempts += 1
+            rc = 1
+            try:
+                with capture_to(item.log):
+                    outcome = op(unit)
+                rc = outcome.rc
+                return outcome
+            finally:
+                with self._lock:
+                    item.status, item.finished = (DONE if rc == 0 else FAILED), time.monotonic()
+        return _op
+
+    def counts(self) -> Dict[str, int]:
+        out = {PENDING: 0, RUNNING: 0, DONE: 0, FAILED: 0}
+        with self._lock:
+            for it in self.items.values():
+                out[it.status] += 1
+        return out
+
+    def failed(self) -> List[_Item]:
+        with self._lock:
+            return [it for it in self.items.values() if it.status == FAILED]
+
+    def render(self) -> Group:
+        now = time.monotonic()
+        elapsed = now - self._t0
+        c = self.counts()
+        finished = c[DONE] + c[FAILED]
+        rate = finished / elapsed if elapsed > 0 else 0.0
+        left = c[PENDING] + c[RUNNING]
+        eta = _fmt_s(left / rate) if rate > 0 and left else ("-" if left else "0s")
+
+        head = Text.assemble(
+            (f"{self.title}  ", "bold"),
+            (f"{finished}/{len(self.items)}", "bold"),
+            f"  done {c[DONE]}  running {c[RUNNING]}  ",
+            (f"failed {c[FAILED]}", "red" if c[FAILED] else ""),
+            f"  pending {c[PENDING]}  |  {rate:.1f}/s  elapsed {_fmt_s(elapsed)}  ETA {eta}",
+        )
+        with self._lock:
+            timed = [
+                (((it.finished or now) - it.started), it)
+                for it in self.items.values() if it.started is not None
+            ]
+        timed.sort(key=lambda x: -x[0])
+        table = Table(box=box.SIMPLE, show_header=True, header_style="dim", pad_edge=False)
+        for col in ("Slowest", "Cluster", "Status", "Time"):
+            table.add_column(col)
+        for dur, it in timed[: self.slowest]:
+            style = {RUNNING: "yellow", FAILED: "red", DONE: "green"}[it.status]
+            retry = f" (try {it.attempts})" if it.attempts > 1 else ""
+            table.add_row(it.name, it.cluster, f"[{style}]{it.status}[/]{retry}", f"{dur:.1f}s")
+        return Group(head, table) if timed else Group(head)
+
+    @contextmanager
+    def live(self) -> Iterator["RolloutProgress"]:
+        """Refresh the view in place while the block runs; leave the final frame on screen."""
+        with Live(get_renderable=self.render, refresh_per_second=4):
+            yield self
@@ -0,0 +1,130 @@
+# qd2_bootstrap/utils/readiness.py
+from __future__ import annotations
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from qd2_bootstrap.utils.kubectl import Kubectl
+from qd2_bootstrap.utils.output import current_log, emit, log_to
+from qd2_bootstrap.utils.releases import ReleaseUnit, TargetKey
+
+Units = Dict[TargetKey, List[ReleaseUnit]]
+
+# Rollout order: the orchestrator drives the controller and the qnodes over
+# SSH, so it goes after them. Unknown charts go first.
+CHART_TIER = {
+    "qcontroller-v2": 0,
+    "qnode-v2": 0,
+    "qnode-set-v2": 0,
+    "qorchestrator-v2": 1,
+}
+
+
+def chart_tier(chart: str) -> int:
+    return CHART_TIER.get(chart, 0)
+
+
+def rollout_tiers(units: Units) -> List[Units]:
+    """Split releases into waves by CHART_TIER, keeping per-cluster order; empty waves are dropped."""
+    tiers: Dict[int, Units] = {}
+    for target, items in units.items():
+        for unit in items:
+            tiers.setdefault(chart_tier(unit.chart), {}).setdefault(target, []).append(unit)
+    return [tiers[t] for t in sorted(tiers)]
+
+
+def deployment_ready(obj: Dict[str, Any]) -> bool:
+    """Every replica of the current rollout passes its readiness probe."""
+    meta, spec, status = obj.get("metadata", {}), obj.get("spec", {}), obj.get("status", {})
+    want = int(spec.get("replicas", 1))
+    return (
+        int(status.get("observedGeneration", 0)) >= int(meta.get("generation", 0))
+        and int(status.get("updatedReplicas", 0)) >= want
+        and int(status.get("readyReplicas", 0)) >= want
+    )
+
+
+def pod_problem(pod: Dict[str, Any]) -> str:
+    """Short reason a pod is not ready (waiting reason, restarts, phase)."""
+    status = pod.get("status", {})
+    for c in status.get("containerStatuses") or []:
+        waiting = (c.get("state") or {}).get("waiting")
+        if waiting and waiting.get("reason"):
+            return f"{c.get('name')}: {waiting['reason']}"
+        if not c.get("ready"):
+            restarts = int(c.get("restartCount", 0))
+            probe = "startup" if not c.get("started") else "readiness"
+            return f"{c.get('name')}: {probe} probe not passing" + (f" ({restarts} restarts)" if restarts else "")
+    for cond in status.get("conditions") or []:
+        if cond.get("type") == "PodScheduled" and cond.get("status") == "False":
+            return f"unschedulable: {cond.get('message') or cond.get('reason')}"
+    return status.get("phase") or "no pod"
+
+
+def _wait_cluster(
+    kc_path: Path,
+    wanted: Dict[Tuple[str, str], str],
+    deadline: float,
+    every_s: float,
+) -> Dict[str, str]:
+    """Poll Deployments per namespace until all `wanted` (ns, app) are ready; returns the rest with a reason."""
+    kube = Kubectl(kubeconfig=kc_path)
+    pending = dict(wanted)
+    error: Optional[str] = None
+    while True:
+        for ns in sorted({ns for ns, _ in pending}):
+            try:
+                items = kube.get_json(["deployments"], namespace=ns).get("items", [])
+                error = None
+            except (RuntimeError, ValueError) as e:
+                error = str(e)
+                continue
+            for obj in items:
+                key = (ns, obj.get("metadata", {}).get("name", ""))
+                if key in pending and deployment_ready(obj):
+                    del pending[key]
+        if not pending or time.monotonic() + every_s > deadline:
+            break
+        time.sleep(every_s)
+    if not pending:
+        return {}
+
+    # One pod listing per namespace to say why
+    reasons: Dict[str, str] = {}
+    for ns in sorted({ns for ns, _ in pending}):
+        try:
+            pods = kube.get_json(["pods"], namespace=ns).get("items", [])
+        except (RuntimeError, ValueError) as e:
+            pods, error = [], str(e)
+        by_app = {(p.get("metadata", {}).get("labels") or {}).get("app"): p for p in pods}
+        for (pns, app), release in pending.items():
+            if pns == ns:
+                pod = by_app.get(app)
+                reasons[f"{release}/{app}"] = pod_problem(pod) if pod else (error or "no pod")
+    return reasons
+
+
+def wait_ready(units: Units, timeout_s: float = 600, every_s: float = 3) -> Dict[str, str]:
+    """Wait until every Deployment rendered by `units` is Ready (readiness probes passing).
+
+    Clusters are polled in parallel, one `kubectl get deployments` per
+    namespace per round. Returns {"<cluster>/<release>/<workload>": reason}
+    for whatever is still not ready at the deadline (empty: all ready).
+    """
+    deadline = time.monotonic() + timeout_s
+    parent_log = current_log()
+
+    def _cluster(target: TargetKey, items: List[ReleaseUnit]) -> Dict[str, str]:
+        with log_to(parent_log):
+            wanted = {(u.namespace, app): u.name for u in items for app in u.workloads}
+            emit(f"  [dim]waiting for {len(wanted)} workload(s) on {target[0]} to pass readiness[/]")
+            left = _wait_cluster(target[1], wanted, deadline, every_s)
+            return {f"{target[0]}/{k}": v for k, v in left.items()}
+
+    out: Dict[str, str] = {}
+    with ThreadPoolExecutor(max_workers=max(1, len(units))) as pool:
+        for f in [pool.submit(_cluster, target, items) for target, items in units.items()]:
+            out.update(f.result())
+    return out
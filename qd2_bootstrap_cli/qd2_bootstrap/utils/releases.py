@@ -0,0 +1,165 @@
+# qd2_bootstrap/utils/releases.py
+from __future__ import annotations
+
+import os
+import tempfile
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import yaml
+
+from qd2_bootstrap.models.quditto_deploy_spec import ComponentRef, QNodeRef
+from qd2_bootstrap.utils.mapping import map_component_values
+from qd2_bootstrap.utils.merge import deep_merge
+
+# Chart used for single-qnode releases and its multi-qnode counterpart
+QNODE_CHART = "qnode-v2"
+QNODE_SET_CHART = "qnode-set-v2"
+
+QNODE_MODES = ("release", "set")
+SET_GROUPS = ("cluster", "namespace")
+
+TargetKey = Tuple[str, Path]
+
+
+def chart_name(chart: str) -> str:
+    """Strip an optional 'quditto/' repo prefix from a chart reference."""
+    return chart.split("/", 1)[1] if chart.startswith("quditto/") else chart
+
+
+@dataclass
+class ReleaseUnit:
+    """One Helm release to install: a single component or a set of qnodes.
+
+    `members` lists the logical component names rendered by the release
+    (just the release itself for single-component releases); `workloads`
+    maps each rendered Deployment's `app` label to its target `nodek8s`.
+    """
+    name: str
+    chart: str
+    version: Optional[str]
+    namespace: str
+    values: Dict[str, Any]
+    nodes: List[str] = field(default_factory=list)
+    members: List[str] = field(default_factory=list)
+    workloads: Dict[str, str] = field(default_factory=dict)
+
+    @property
+    def chart_ref(self) -> str:
+        return f"quditto/{self.chart}"
+
+
+def workload_name(chart: str, release: str, values: Dict[str, Any]) -> str:
+    """Deployment name (and `app` label) a Quditto chart renders for a release."""
+    if chart == "qorchestrator-v2":
+        name = values.get("nameOverride") or chart
+    elif chart == "qcontroller-v2":
+        name = values.get("qcontrollerName") or release
+    else:
+        name = values.get("qnodeName") or release
+    return name[:63].rstrip("-")
+
+
+def _component_namespace(comp: ComponentRef, default_ns: str) -> str:
+    return (comp.namespace or default_ns).strip()
+
+
+def build_release_units(
+    grouped: Dict[TargetKey, List[Tuple[str, ComponentRef]]],
+    namespace: str,
+    qnode_mode: str = "release",
+    set_group: str = "cluster",
+    set_release: str = "qnode-set",
+    set_version: Optional[str] = None,
+    addresses: Optional[Dict[str, Dict[str, str]]] = None,
+) -> Dict[TargetKey, List[ReleaseUnit]]:
+    """Turn grouped components into Helm releases per target cluster.
+
+    In `set` mode every qnode using the `qnode-v2` chart is folded into one
+    `qnode-set-v2` release per cluster (`set_group="cluster"`) or per
+    cluster+namespace (`set_group="namespace"`). Per-qnode values are built
+    exactly as for single releases (placement from `nodek8s` + `values`).
+    `addresses` ({release: {network: ip}}) are the L2SM allocations to inject.
+
+    A set release uses `set_version`, else the `version` its qnodes pin
+    (`qnode-set-v2` is released in step with `qnode-v2`), else the latest;
+    qnodes of one set pinning different versions are a ValueError.
+    """
+    if qnode_mode not in QNODE_MODES:
+        raise ValueError(f"qnode mode must be one of {QNODE_MODES}: {qnode_mode!r}")
+    if set_group not in SET_GROUPS:
+        raise ValueError(f"qnode-set grouping must be one of {SET_GROUPS}: {set_group!r}")
+
+    out: Dict[TargetKey, List[ReleaseUnit]] = {}
+    for target, items in grouped.items():
+        units: List[ReleaseUnit] = []
+        sets: Dict[str, ReleaseUnit] = {}
+        for release_name, comp in items:
+            comp_ns = _component_namespace(comp, namespace)
+            values = map_component_values(
+                comp.values, node_name=comp.nodek8s, addresses=(addresses or {}).get(release_name),
+            )
+            in_set = (
+                qnode_mode == "set"
+                and isinstance(comp, QNodeRef)
+                and chart_name(comp.chart) == QNODE_CHART
+            )
+            if not in_set:
+                units.append(ReleaseUnit(
+                    name=release_name,
+                    chart=chart_name(comp.chart),
+                    version=comp.version,
+                    namespace=comp_ns,
+                    values=values,
+                    nodes=[comp.nodek8s],
+                    members=[release_name],
+                    workloads={workload_name(chart_name(comp.chart), release_name, values): comp.nodek8s},
+                ))
+                continue
+
+            if set_group == "cluster" and comp_ns != namespace:
+                raise ValueError(
+                    f"qnode {release_name!r} sets namespace {comp_ns!r}; "
+                    "use per-namespace grouping for qnodes outside the deploy namespace"
+                )
+            unit = sets.get(comp_ns)
+            if unit is None:
+                unit = ReleaseUnit(
+                    name=set_release,
+                    chart=QNODE_SET_CHART,
+                    version=set_version,
+                    namespace=comp_ns,
+                    values={"qnodes": []},
+                )
+                sets[comp_ns] = unit
+                units.append(unit)
+            # Same object name as the single-release chart (qnodeName override or release)
+            qnode_name = workload_name(QNODE_CHART, release_name, values)
+            if comp.version and not set_version:
+                if unit.version and unit.version != comp.version:
+                    raise ValueError(
+                        f"qnodes of release {set_release!r} pin different chart versions "
+                        f"({unit.version}, {comp.version}); one qnode-set release has one version: "
+                        "align them or set charts.qnodeSetVersion"
+                    )
+                unit.version = comp.version
+            unit.values["qnodes"].append(deep_merge(values, {"name": qnode_name}))
+            unit.nodes.append(comp.nodek8s)
+            unit.members.append(release_name)
+            unit.workloads[qnode_name] = comp.nodek8s
+        out[target] = units
+    return out
+
+
+def release_value_args(unit: ReleaseUnit) -> Tuple[List[str], List[Path]]:
+    """Helm value arguments for a release: (--set expressions, -f files).
+
+    Values always go through a temporary values file: lists of maps (qnode
+    sets, `l2sm.networks`) and nulls (dropping a chart default) have no
+    faithful `--set` form. The caller must delete returned files.
+    """
+    fd, path = tempfile.mkstemp(prefix="qd2-values-", suffix=".yaml")
+    with os.fdopen(fd, "w") as f:
+        yaml.safe_dump(unit.values, f, sort_keys=False)
+    return [], [Path(path)]
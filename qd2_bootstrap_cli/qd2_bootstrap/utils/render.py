@@ -0,0 +1,148 @@
+# qd2_bootstrap/utils/render.py
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import subprocess
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set
+
+import yaml
+
+from qd2_bootstrap.utils.chart_cache import default_cache_root
+
+
+class RenderError(RuntimeError):
+    """Raised when `helm template` fails for a release."""
+
+
+def values_hash(values: Dict[str, Any]) -> str:
+    """Stable hash of a values dict (key order independent)."""
+    blob = json.dumps(values, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(blob.encode()).hexdigest()
+
+
+class RenderCache:
+    """On-disk cache of `helm template` output.
+
+    Keyed by chart digest + values hash + release name + namespace, so a render
+    is reused until the chart archive or the values actually change. Bounded
+    by `max_entries` and `max_bytes`: `prune` drops the least recently used
+    renders (file mtime, refreshed on every hit) but never one used by this
+    instance.
+    """
+
+    def __init__(
+        self,
+        root: Optional[Path] = None,
+        max_entries: int = 20000,
+        max_bytes: int = 256 * 1024 * 1024,
+    ):
+        self.root = Path(root or (default_cache_root() / "renders")).expanduser().resolve()
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._used: Set[str] = set()
+
+    def key(self, chart_digest: str, values: Dict[str, Any], release: str, namespace: str) -> str:
+        h = hashlib.sha256()
+        for part in (chart_digest, values_hash(values), release, namespace):
+            h.update(part.encode())
+            h.update(b"\0")
+        return h.hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        path = self.root / f"{key}.yaml"
+        try:
+            text = path.read_text()
+        except OSError:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._used.add(key)
+        try:
+            os.utime(path)  # LRU: recently used renders stay fresh
+        except OSError:
+            pass
+        return text
+
+    def put(self, key: str, manifest: str) -> None:
+        fd, tmp = tempfile.mkstemp(dir=self.root, prefix=".render-", suffix=".yaml")
+        with os.fdopen(fd, "w") as f:
+            f.write(manifest)
+        os.replace(tmp, self.root / f"{key}.yaml")
+        self._used.add(key)
+
+    def prune(self) -> int:
+        """Drop least recently used renders until both limits hold; returns how many were removed."""
+        entries = []
+        for path in self.root.glob("*.yaml"):
+            try:
+                st = path.stat()
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, path))
+        count, total = len(entries), sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, path in sorted(entries, key=lambda e: e[0]):
+            if count <= self.max_entries and total <= self.max_bytes:
+                break
+            if path.stem in self._used:
+                continue
+            path.unlink(missing_ok=True)
+            count, total, removed = count - 1, total - size, removed + 1
+        return removed
+
+
+def helm_template(
+    release: str,
+    chart_path: Path,
+    namespace: str,
+    values: Dict[str, Any],
+) -> str:
+    """Render a chart archive locally with `helm template` (no cluster access)."""
+    fd, vf = tempfile.mkstemp(prefix="qd2-values-", suffix=".yaml")
+    try:
+        with os.fdopen(fd, "w") as f:
+            yaml.safe_dump(values, f, sort_keys=False)
+        cmd = ["helm", "template", release, str(chart_path), "--namespace", namespace, "-f", vf]
+        proc = subprocess.run(cmd, capture_output=True, text=True)
+    finally:
+        os.unlink(vf)
+    if proc.returncode != 0:
+        raise RenderError(f"helm template {release} failed: {proc.stderr.strip()}")
+    return proc.stdout
+
+
+def render_release(
+    cache: RenderCache,
+    release: str,
+    chart_path: Path,
+    chart_digest: str,
+    namespace: str,
+    values: Dict[str, Any],
+) -> str:
+    """Return the rendered manifest for a release, from cache when possible."""
+    key = cache.key(chart_digest, values, release, namespace)
+    text = cache.get(key)
+    if text is None:
+        text = helm_template(release, chart_path, namespace, values)
+        cache.put(key, text)
+    return text
+
+
+def split_manifest(text: str, namespace: str) -> List[Dict[str, Any]]:
+    """Parse a multi-document manifest into objects, defaulting their namespace."""
+    objs = []
+    # libyaml loader when available: cached renders are parsed on every plan
+    loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+    for doc in yaml.load_all(text, Loader=loader):
+        if not isinstance(doc, dict) or not doc.get("kind"):
+            continue
+        doc.setdefault("metadata", {}).setdefault("namespace", namespace)
+        objs.append(doc)
+    return objs
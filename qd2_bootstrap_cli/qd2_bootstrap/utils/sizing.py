@@ -0,0 +1,56 @@
+# qd2_bootstrap/utils/sizing.py
+from __future__ import annotations
+
+from typing import Any, Dict, Optional
+
+from qd2_bootstrap.models.quditto_deploy_spec import ComponentRef, ContainerResources, QudittoDeploySpec
+from qd2_bootstrap.utils.merge import deep_merge
+from qd2_bootstrap.utils.releases import chart_name
+
+# PQC containers of a qnode, as keyed under `pqc.*` in the qnode charts
+PQC_CONTAINERS = ("httpReceiver", "vault", "server", "client")
+
+
+def sizing_kind(chart: str, values: Dict[str, Any]) -> str:
+    """`defaultSizing` key for a component: qcontroller, qorchestrator or the qnode typeNode."""
+    chart = chart_name(chart)
+    if chart == "qcontroller-v2":
+        return "qcontroller"
+    if chart == "qorchestrator-v2":
+        return "qorchestrator"
+    return str(values.get("typeNode") or "hybrid")
+
+
+def _resources(r: Optional[ContainerResources]) -> Dict[str, Any]:
+    return {k: v for k, v in r.model_dump().items() if v} if r else {}
+
+
+def sizing_values(spec: QudittoDeploySpec, comp: ComponentRef) -> Dict[str, Any]:
+    """Chart values for the component's sizing profile ({} when it has none)."""
+    kind = sizing_kind(comp.chart, comp.values)
+    name = comp.sizing or spec.defaultSizing.get(kind)
+    if not name:
+        return {}
+    profile = spec.sizingProfiles[name]
+    out: Dict[str, Any] = {}
+    main = _resources(profile.main)
+    if main:
+        out["resources"] = main
+    pqc = _resources(profile.pqc)
+    if pqc and kind not in ("qcontroller", "qorchestrator"):
+        out["pqc"] = {c: {"resources": pqc} for c in PQC_CONTAINERS}
+    return out
+
+
+def expand_sizing(spec: QudittoDeploySpec) -> QudittoDeploySpec:
+    """Merge each component's sizing profile under its `values` (explicit values win).
+
+    Idempotent: expanding twice gives the same values. Returns `spec` (updated in place).
+    qnodeSets are sized once, as templates: their members inherit the values.
+    """
+    for _, comp in spec.declared():
+        sized = sizing_values(spec, comp)
+        if sized:
+            comp.values = deep_merge(sized, comp.values)
+    return spec
+
@@ -0,0 +1,146 @@
+# qd2_bootstrap/utils/spec_loader.py
+from __future__ import annotations
+
+import hashlib
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, Optional, Type, TypeVar
+
+import yaml
+from pydantic import BaseModel, ValidationError
+
+from qd2_bootstrap.models.cluster_spec import ClusterSpec
+from qd2_bootstrap.models.infra_spec import InfraSpec
+from qd2_bootstrap.models.quditto_deploy_spec import QudittoDeploySpec
+from qd2_bootstrap.utils.chart_cache import default_cache_root
+from qd2_bootstrap.utils.locks import atomic_write_text
+
+M = TypeVar("M", bound=BaseModel)
+
+# libyaml is ~5x faster than the pure-Python loader on large specs
+YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+# Top-level key -> spec model, for files whose kind is not known up front
+SPEC_KINDS: Dict[str, Type[BaseModel]] = {
+    "infraSetup": InfraSpec,
+    "clusterSetup": ClusterSpec,
+    "qudittoSetup": QudittoDeploySpec,
+}
+
+# Entries kept on disk; the least recently used go first
+MAX_ENTRIES = 128
+
+
+def parse_yaml(text: str) -> Any:
+    return yaml.load(text, Loader=YAML_LOADER)
+
+
+def spec_kind(data: Any) -> Optional[Type[BaseModel]]:
+    """Model for a parsed spec document, from its top-level key (None if unknown)."""
+    if isinstance(data, dict):
+        for key, model in SPEC_KINDS.items():
+            if key in data:
+                return model
+    return None
+
+
+class SpecCache:
+    """Validated specs on disk, keyed by the file's content hash.
+
+    An entry is the model's JSON dump (`exclude_unset`, field order), so a
+    repeat load is one JSON validation instead of a YAML parse. Validators
+    still run on load: an entry written by an older model that no longer
+    validates is dropped and the file re-parsed. Models that do not survive
+    a JSON round trip (e.g. non-string keys in `values`) are not cached.
+    Set QD2_SPEC_CACHE=0 to disable.
+    """
+
+    def __init__(self, root: Optional[Path] = None):
+        self.root = Path(root or (default_cache_root() / "specs")).expanduser()
+        self.enabled = os.environ.get("QD2_SPEC_CACHE", "1") != "0"
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def _entry(self, digest: str, model: Type[BaseModel]) -> Path:
+        return self.root / f"{digest}-{model.__name__}.json"
+
+    def get(self, digest: str, model: Type[M]) -> Optional[M]:
+        path = self._entry(digest, model)
+        try:
+            text = path.read_text()
+        except OSError:
+            return None
+        try:
+            spec = model.model_validate_json(text)
+        except ValidationError:
+            path.unlink(missing_ok=True)
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return spec
+
+    def put(self, digest: str, spec: BaseModel) -> None:
+        blob = spec.model_dump_json(exclude_unset=True)
+        try:
+            if type(spec).model_validate_json(blob) != spec:
+                return
+            atomic_write_text(self._entry(digest, type(spec)), blob)
+            self._prune()
+        except (OSError, ValidationError):
+            pass  # a cache we cannot write (or round-trip) is just a miss next time
+
+    def _prune(self) -> None:
+        entries = list(self.root.glob("*.json"))
+        if len(entries) <= MAX_ENTRIES:
+            return
+        def _mtime(p: Path) -> float:
+            try:
+                return p.stat().st_mtime
+            except OSError:
+                return 0.0
+        for p in sorted(entries, key=_mtime)[: len(entries) - MAX_ENTRIES]:
+            p.unlink(missing_ok=True)
+
+    def load(self, path: Path, model: Optional[Type[M]] = None) -> Optional[M]:
+        """Validated spec from `path`, from the cache when its content was seen before.
+
+        Without `model`, the kind is taken from the document's top-level key
+        (see SPEC_KINDS); None if it is not a known spec. Parse and validation
+        errors propagate.
+        """
+        raw = Path(path).read_bytes()
+        digest = hashlib.sha256(raw).hexdigest()
+        if self.enabled:
+            for m in [model] if model else SPEC_KINDS.values():
+                spec = self.get(digest, m)
+                if spec is not None:
+                    with self._lock:
+                        self.hits += 1
+                    return spec
+        data = parse_yaml(raw.decode())
+        kind = model or spec_kind(data)
+        if kind is None:
+            return None
+        spec = kind.model_validate(data)
+        with self._lock:
+            self.misses += 1
+        if self.enabled:
+            self.put(digest, spec)
+        return spec
+
+
+_SHARED: Optional[SpecCache] = None
+_SHARED_LOCK = threading.Lock()
+
+
+def shared_spec_cache() -> SpecCache:
+    """Process-wide SpecCache."""
+    global _SHARED
+    with _SHARED_LOCK:
+        if _SHARED is None:
+            _SHARED = SpecCache()
+        return _SHARED
@@ -0,0 +1,247 @@
+# qd2_bootstrap/utils/startup.py
+from __future__ import annotations
+
+import math
+import re
+from calendar import timegm
+from collections import defaultdict
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from qd2_bootstrap.utils.readiness import pod_problem
+
+# Time-to-ready, split at: helm install/upgrade -> pod created -> scheduled ->
+# images pulled -> containers started -> Ready
+PHASES = ("submit", "scheduling", "image-pull", "container-start", "readiness")
+
+# What a phase dominating the fleet usually points at
+PHASE_HINTS = {
+    "submit": "Helm/API server: slow installs, or the controller-manager creating pods late",
+    "scheduling": "node capacity or pressure: pods wait for room (or a nodeName that is full)",
+    "image-pull": "registry pulls: pre-pull images or use a closer registry/mirror",
+    "container-start": "the runtime or volumes: sandbox creation, mounts, init containers",
+    "readiness": "the charts: entrypoints slow to start sshd, or probes too slow or too strict",
+}
+
+# Node conditions that mean trouble when True (Ready when False)
+PRESSURE = ("MemoryPressure", "DiskPressure", "PIDPressure", "NetworkUnavailable")
+
+_TS_RE = re.compile(r"^(\d{4})-(\d\d)-(\d\d)[T ](\d\d):(\d\d):(\d\d)(?:\.(\d+))?(Z|[+-]\d\d:?\d\d)?$")
+
+
+def parse_time(value: Any) -> Optional[float]:
+    """Epoch seconds from a Kubernetes/Helm (RFC 3339, up to nanoseconds) timestamp."""
+    m = _TS_RE.match(str(value or "").strip())
+    if not m:
+        return None
+    y, mo, d, h, mi, s, frac, tz = m.groups()
+    t = timegm((int(y), int(mo), int(d), int(h), int(mi), int(s))) + (float(f"0.{frac}") if frac else 0.0)
+    if tz and tz != "Z":
+        sign = -1 if tz[0] == "+" else 1
+        tz = tz[1:].replace(":", "")
+        t += sign * (int(tz[:2]) * 3600 + int(tz[2:]) * 60)
+    return t
+
+
+def event_time(ev: Dict[str, Any]) -> Optional[float]:
+    """When an event first happened (old-style firstTimestamp or events.k8s.io eventTime)."""
+    return parse_time(ev.get("firstTimestamp") or ev.get("eventTime") or ev.get("lastTimestamp"))
+
+
+def percentile(values: List[float], q: float) -> float:
+    """Nearest-rank percentile (q in 0..100) of a non-empty list."""
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(q / 100 * len(ordered)) - 1)]
+
+
+# -----------------------------------------------------------------------------
+# Per pod
+# -----------------------------------------------------------------------------
+@dataclass
+class PodStartup:
+    cluster: str
+    namespace: str
+    release: str
+    workload: str
+    pod: str
+    node: str
+    phases: Dict[str, Optional[float]] = field(default_factory=dict)
+    total: Optional[float] = None  # None: not Ready yet
+    restarts: int = 0
+    pulled: int = 0  # images actually pulled
+    cached: int = 0  # images already present on the node
+    problem: str = ""
+
+    @property
+    def dominant(self) -> Optional[Tuple[str, float]]:
+        known = [(p, s) for p, s in self.phases.items() if s is not None]
+        return max(known, key=lambda x: x[1]) if known else None
+
+    def as_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+def pod_events(events: Iterable[Dict[str, Any]]) -> Dict[str, List[Dict[str, Any]]]:
+    """Events grouped by the pod they are about."""
+    out: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+    for ev in events:
+        obj = ev.get("involvedObject") or {}
+        if obj.get("kind") == "Pod":
+            out[obj.get("name", "")].append(ev)
+    return out
+
+
+def _condition(pod: Dict[str, Any], kind: str) -> Optional[float]:
+    for c in (pod.get("status") or {}).get("conditions") or []:
+        if c.get("type") == kind and c.get("status") == "True":
+            return parse_time(c.get("lastTransitionTime"))
+    return None
+
+
+def pod_startup(
+    cluster: str,
+    release: str,
+    workload: str,
+    pod: Dict[str, Any],
+    events: List[Dict[str, Any]],
+    submitted: Optional[float],
+) -> PodStartup:
+    """Split one pod's time-to-ready into PHASES.
+
+    Boundaries come from the pod (creation, PodScheduled and Ready
+    conditions) and its events (first Pulled and Started per container; the
+    running containers' startedAt when events have expired). `submitted` is
+    the Helm revision's deploy time; it is ignored when the pod predates that
+    revision (an upgrade that did not touch it). A missing boundary leaves
+    its phase None and the next phase measured from the last known one.
+    Event timestamps have one-second resolution.
+    """
+    meta, spec, status = pod.get("metadata", {}), pod.get("spec", {}), pod.get("status", {})
+    row = PodStartup(cluster, meta.get("namespace", ""), release, workload, meta.get("name", ""), spec.get("nodeName") or "")
+    statuses = (status.get("initContainerStatuses") or []) + (status.get("containerStatuses") or [])
+    row.restarts = sum(int(c.get("restartCount", 0)) for c in statuses)
+
+    # First Pulled / Started per container (later ones are restarts)
+    pulled: Dict[str, float] = {}
+    started: Dict[str, float] = {}
+    for ev in events:
+        t = event_time(ev)
+        if t is None:
+            continue
+        where = (ev.get("involvedObject") or {}).get("fieldPath", "")
+        if ev.get("reason") == "Pulled":
+            if "already present" in (ev.get("message") or ""):
+                row.cached += 1
+            else:
+                row.pulled += 1
+            pulled[where] = min(t, pulled.get(where, t))
+        elif ev.get("reason") == "Started":
+            started[where] = min(t, started.get(where, t))
+    if not started:
+        for c in statuses:
+            running = (c.get("state") or {}).get("running") or {}
+            t = parse_time(running.get("startedAt"))
+            if t is not None:
+                started[c.get("name", "")] = t
+
+    created = parse_time(meta.get("creationTimestamp"))
+    if submitted is not None and created is not None and submitted > created:
+        submitted = None
+    boundaries = [
+        (None, submitted),
+        ("submit", created),
+        ("scheduling", _condition(pod, "PodScheduled")),
+        ("image-pull", max(pulled.values()) if pulled else None),
+        ("container-start", max(started.values()) if started else None),
+        ("readiness", _condition(pod, "Ready")),
+    ]
+    first = prev = None
+    for phase, t in boundaries:
+        if phase is not None:
+            row.phases[phase] = None if t is None or prev is None else max(0.0, t - prev)
+        if t is not None:
+            prev = t if prev is None else max(prev, t)
+            first = t if first is None else first
+    ready = boundaries[-1][1]
+    if ready is not None and first is not None:
+        row.total = max(0.0, ready - first)
+    else:
+        row.problem = pod_problem(pod)
+    return row
+
+
+# -----------------------------------------------------------------------------
+# Fleet summaries
+# -----------------------------------------------------------------------------
+@dataclass
+class PhaseStat:
+    phase: str
+    count: int
+    p50: float
+    p90: float
+    p99: float
+    max: float
+    share: float  # of all measured phase time across the fleet
+
+
+def phase_stats(rows: List[PodStartup]) -> List[PhaseStat]:
+    per_phase = {p: [r.phases[p] for r in rows if r.phases.get(p) is not None] for p in PHASES}
+    grand = sum(sum(v) for v in per_phase.values()) or 1.0
+    return [
+        PhaseStat(p, len(v), percentile(v, 50), percentile(v, 90), percentile(v, 99), max(v), sum(v) / grand)
+        for p, v in per_phase.items() if v
+    ]
+
+
+def node_pressure(nodes: List[Dict[str, Any]]) -> Dict[str, List[str]]:
+    """Node name -> conditions currently signalling trouble (e.g. DiskPressure, NotReady)."""
+    out: Dict[str, List[str]] = {}
+    for n in nodes:
+        bad = []
+        for c in (n.get("status") or {}).get("conditions") or []:
+            if c.get("type") in PRESSURE and c.get("status") == "True":
+                bad.append(c["type"])
+            elif c.get("type") == "Ready" and c.get("status") != "True":
+                bad.append("NotReady")
+        out[n.get("metadata", {}).get("name", "")] = bad
+    return out
+
+
+@dataclass
+class NodeStat:
+    cluster: str
+    node: str
+    pods: int
+    not_ready: int
+    p50: Optional[float]
+    p90: Optional[float]
+    worst_phase: str  # phase with the largest summed time on this node
+    pressure: List[str] = field(default_factory=list)
+
+
+def node_stats(rows: List[PodStartup], pressure: Dict[Tuple[str, str], List[str]]) -> List[NodeStat]:
+    """Per node, slowest first (not-Ready pods count as slowest)."""
+    by_node: Dict[Tuple[str, str], List[PodStartup]] = defaultdict(list)
+    for r in rows:
+        by_node[(r.cluster, r.node)].append(r)
+    out = []
+    for (cluster, node), items in by_node.items():
+        totals = [r.total for r in items if r.total is not None]
+        sums = {p: sum(r.phases.get(p) or 0.0 for r in items) for p in PHASES}
+        out.append(NodeStat(
+            cluster, node, len(items), len(items) - len(totals),
+            percentile(totals, 50) if totals else None,
+            percentile(totals, 90) if totals else None,
+            max(sums, key=sums.get) if any(sums.values()) else "-",
+            pressure.get((cluster, node), []),
+        ))
+    return sorted(out, key=lambda s: (-s.not_ready, -(s.p90 or 0.0), s.cluster, s.node))
+
+
+def worst(rows: List[PodStartup], limit: int) -> List[PodStartup]:
+    """Slowest pods: not Ready first, then by total time-to-ready."""
+    return sorted(rows, key=lambda r: (r.total is not None, -(r.total or 0.0), r.pod))[:limit]
+
+
+def bottleneck(stats: List[PhaseStat]) -> Optional[PhaseStat]:
+    return max(stats, key=lambda s: s.share) if stats else None
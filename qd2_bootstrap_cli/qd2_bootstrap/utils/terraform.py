@@ -1,9 +1,11 @@
 import subprocess
 import os
 import json
+import threading
 from pathlib import Path
-from typing import Optional, Dict
-from rich import print as rprint
+from typing import Callable, Dict, Optional
+
+from qd2_bootstrap.utils.output import emit, emit_line
 
 
 class TerraformClient:
@@ -19,7 +21,7 @@ class TerraformClient:
 
     def _run(self, args, capture_output=True) -> int:
         cmd = ["terraform"] + args
-        rprint(f"{self.workdir}$ {' '.join(cmd)}")
+        emit(f"{self.workdir}$ {' '.join(cmd)}")
         proc = subprocess.Popen(
             cmd,
             cwd=self.workdir,
@@ -29,15 +31,19 @@ class TerraformClient:
         )
         out, err = proc.communicate()
         if capture_output and out:
-            print(out.decode())
+            emit_line(out.decode() + "\n")
         if capture_output and err:
-            print(err.decode())
+            emit_line(err.decode() + "\n")
         return proc.returncode
 
     def init(self) -> int:
         """Ejecuta terraform init"""
         return self._run(["init", "-input=false"])
 
+    def plan(self) -> int:
+        """Ejecuta terraform plan"""
+        return self._run(["plan", "-input=false"])
+
     def apply(self, auto_approve: bool = False) -> int:
         """Ejecuta terraform apply"""
         args = ["apply", "-input=false"]
@@ -45,6 +51,38 @@ class TerraformClient:
             args.append("-auto-approve")
         return self._run(args)
 
+    def apply_stream(self, on_event: Callable[[dict], None], auto_approve: bool = False) -> int:
+        """Ejecuta terraform apply -json, pasando cada evento a `on_event` mientras llega.
+
+        Cada evento se muestra por su `@message`; stderr se vuelca al terminar.
+        """
+        cmd = ["terraform", "apply", "-input=false", "-json"]
+        if auto_approve:
+            cmd.append("-auto-approve")
+        emit(f"{self.workdir}$ {' '.join(cmd)}")
+        proc = subprocess.Popen(
+            cmd, cwd=self.workdir, env=self.env, text=True, bufsize=1,
+            stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+        )
+        # stderr in the background, so a chatty provider cannot block stdout
+        err_chunks = []
+        err_reader = threading.Thread(target=lambda: err_chunks.append(proc.stderr.read()), daemon=True)
+        err_reader.start()
+        for line in proc.stdout:
+            try:
+                event = json.loads(line)
+            except ValueError:
+                emit_line(line)
+                continue
+            if event.get("@message"):
+                emit_line(event["@message"] + "\n")
+            on_event(event)
+        rc = proc.wait()
+        err_reader.join()
+        if err_chunks and err_chunks[0]:
+            emit_line(err_chunks[0] + "\n")
+        return rc
+
     def destroy(self, auto_approve: bool = False) -> int:
         """Ejecuta terraform destroy"""
         args = ["destroy", "-input=false"]
@@ -63,3 +101,43 @@ class TerraformClient:
         if proc.returncode != 0:
             raise RuntimeError(f"terraform output failed: {err.decode()}")
         return json.loads(out.decode())
+
+
+INSTANCE_TYPE = "openstack_compute_instance_v2"
+
+
+def created_instance(event: dict) -> Optional[str]:
+    """Address of the compute instance an `apply -json` event reports as created, if any."""
+    if event.get("type") != "apply_complete":
+        return None
+    hook = event.get("hook") or {}
+    res = hook.get("resource") or {}
+    if res.get("resource_type") != INSTANCE_TYPE or hook.get("action") not in ("create", "replace"):
+        return None
+    return res.get("addr")
+
+
+def _index(key) -> str:
+    return "" if key is None else f"[{json.dumps(key)}]"
+
+
+def state_instance_ips(workdir: Path) -> Dict[str, str]:
+    """{resource address: access_ip_v4} of the compute instances in the local state.
+
+    Terraform rewrites terraform.tfstate as resources complete during an apply,
+    so this can be read while it runs; a half-written file reads as empty.
+    """
+    try:
+        state = json.loads((Path(workdir) / "terraform.tfstate").read_text())
+    except (OSError, ValueError):
+        return {}
+    out: Dict[str, str] = {}
+    for res in state.get("resources", []):
+        if res.get("type") != INSTANCE_TYPE or res.get("mode") != "managed":
+            continue
+        prefix = f"{res['module']}." if res.get("module") else ""
+        for inst in res.get("instances", []):
+            ip = (inst.get("attributes") or {}).get("access_ip_v4")
+            if ip:
+                out[f"{prefix}{INSTANCE_TYPE}.{res['name']}{_index(inst.get('index_key'))}"] = ip
+    return out
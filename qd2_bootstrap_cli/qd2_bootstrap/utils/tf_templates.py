@@ -25,6 +25,18 @@ variable "flavor_name"    { type = string }
 variable "keypair_name"   { type = string }
 variable "network_uuid"   { type = string }
 
+# Named worker pools: <cluster>-<pool>-<i>, each with its own flavor and image.
+# Labels are not used here; they are passed through to the outputs for KubeOne.
+variable "worker_pools" {
+  type = map(object({
+    count       = number
+    flavor_name = string
+    image_name  = string
+    labels      = map(string)
+  }))
+  default = {}
+}
+
 # Provider variables
 variable "auth_url"       { type = string }
 variable "region"         { type = string }
@@ -82,12 +94,54 @@ resource "openstack_compute_instance_v2" "worker" {
   security_groups = [openstack_networking_secgroup_v2.k8s_allow_all.name]
 }
 
+# --- Worker pool instances ---
+locals {
+  pool_workers = merge({}, [
+    for pool, p in var.worker_pools : {
+      for i in range(p.count) : "${pool}-${i + 1}" => {
+        pool        = pool
+        flavor_name = p.flavor_name
+        image_name  = p.image_name
+      }
+    }
+  ]...)
+}
+
+resource "openstack_compute_instance_v2" "pool_worker" {
+  for_each    = local.pool_workers
+  name        = "${var.cluster_name}-${each.key}"
+  image_name  = each.value.image_name
+  flavor_name = each.value.flavor_name
+  key_pair    = var.keypair_name
+
+  network {
+    uuid = var.network_uuid
+  }
+
+  security_groups = [openstack_networking_secgroup_v2.k8s_allow_all.name]
+}
+
 # --- Outputs ---
 output "control_plane_ip" {
   value = openstack_compute_instance_v2.cp.access_ip_v4
 }
 
 output "worker_ips" {
-  value = [for w in openstack_compute_instance_v2.worker : w.access_ip_v4]
+  value = concat(
+    [for w in openstack_compute_instance_v2.worker : w.access_ip_v4],
+    [for w in openstack_compute_instance_v2.pool_worker : w.access_ip_v4],
+  )
+}
+
+output "worker_pools" {
+  value = {
+    for pool, p in var.worker_pools : pool => {
+      labels = p.labels
+      hosts = [
+        for key, w in openstack_compute_instance_v2.pool_worker :
+        { name = w.name, ip = w.access_ip_v4 } if local.pool_workers[key].pool == pool
+      ]
+    }
+  }
 }
 """
@@ -0,0 +1,171 @@
+# qd2_bootstrap/utils/validation.py
+from __future__ import annotations
+
+import difflib
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from qd2_bootstrap.models.cluster_spec import ClusterSpec
+from qd2_bootstrap.models.infra_spec import InfraSpec
+from qd2_bootstrap.models.quditto_deploy_spec import ComponentRef, PlacementConfig
+from qd2_bootstrap.utils.inventory import NodeInfo, NodeInventory
+from qd2_bootstrap.utils.kubectl import Kubectl
+from qd2_bootstrap.utils.placement import PlacementError, auto_place, matches
+
+ERROR = "error"
+WARNING = "warning"
+
+# (cluster_name, kubeconfig) -> [(release, component)], as built by `quditto deploy`
+Grouped = Dict[Tuple[str, Path], List[Tuple[str, ComponentRef]]]
+
+
+@dataclass
+class Issue:
+    level: str
+    scope: str      # cluster or spec the issue belongs to
+    subject: str    # release, node or field at fault
+    message: str
+
+    def as_dict(self) -> Dict[str, str]:
+        return asdict(self)
+
+
+def has_errors(issues: Iterable[Issue]) -> bool:
+    return any(i.level == ERROR for i in issues)
+
+
+def expected_node_names(infra: InfraSpec) -> Set[str]:
+    """Node names the Terraform template gives VMs (hostnames become node names)."""
+    s = infra.infraSetup
+    names = {f"{s.clusterName}-cp"}
+    for p in s.worker_pools():
+        names.update(f"{s.clusterName}-{p.name}-{i}" for i in range(1, p.count + 1))
+    return names
+
+
+def expected_node_labels(infra: InfraSpec) -> Dict[str, Dict[str, str]]:
+    """Node labels KubeOne will set on worker pool nodes ({} without `workerPools`)."""
+    s = infra.infraSetup
+    return {
+        f"{s.clusterName}-{p.name}-{i}": p.node_labels()
+        for p in s.workerPools for i in range(1, p.count + 1)
+    }
+
+
+def check_infra_cluster(infra: InfraSpec, cluster: ClusterSpec) -> List[Issue]:
+    """Consistency between an InfraSpec and the ClusterSpec built on top of it."""
+    issues: List[Issue] = []
+    i, c = infra.infraSetup, cluster.clusterSetup
+    if i.clusterName != c.name:
+        issues.append(Issue(ERROR, c.name, "clusterSetup.name",
+                            f"does not match infraSetup.clusterName {i.clusterName!r}"))
+    if c.fromInfra is None:
+        issues.append(Issue(WARNING, c.name, "clusterSetup.existingHosts",
+                            "an infra spec is paired with this cluster but it does not use fromInfra"))
+    else:
+        want = Path(i.workdir or "").expanduser().resolve()
+        have = Path(c.fromInfra.workdir).expanduser().resolve()
+        if want != have:
+            issues.append(Issue(ERROR, c.name, "clusterSetup.fromInfra.workdir",
+                                f"{have} is not the infra workdir {want}"))
+    return issues
+
+
+def check_cluster(cluster: ClusterSpec) -> List[Issue]:
+    """Local checks on a ClusterSpec that pydantic cannot express."""
+    issues: List[Issue] = []
+    c = cluster.clusterSetup
+    key = Path(c.ssh.privateKeyFile).expanduser()
+    if not key.exists():
+        issues.append(Issue(WARNING, c.name, "ssh.privateKeyFile", f"{key} does not exist on this machine"))
+    if c.existingHosts and not c.existingHosts.workers:
+        issues.append(Issue(WARNING, c.name, "existingHosts.workers",
+                            "no workers: Quditto pods will have to run on the control plane"))
+    return issues
+
+
+def _suggest(name: str, known: Iterable[str]) -> str:
+    close = difflib.get_close_matches(name, list(known), n=1, cutoff=0.5)
+    return f" (did you mean {close[0]!r}?)" if close else ""
+
+
+def check_placement(
+    cluster_name: str,
+    components: List[Tuple[str, ComponentRef]],
+    nodes: Dict[str, NodeInfo],
+    live: bool = True,
+) -> List[Issue]:
+    """Check every `nodek8s` against a node inventory.
+
+    With `live=False` the inventory is a prediction (node names, and labels
+    when worker pools declare them), so node state is not checked.
+    """
+    issues: List[Issue] = []
+    labels_known = live or any(n.labels for n in nodes.values())
+    for release, comp in components:
+        if not comp.nodek8s:
+            continue  # automatic placement; see check_live_placement
+        node = nodes.get(comp.nodek8s)
+        if node is None:
+            issues.append(Issue(ERROR, cluster_name, release,
+                                f"node {comp.nodek8s!r} does not exist{_suggest(comp.nodek8s, nodes)}"))
+            continue
+        if comp.nodeSelector and labels_known and not matches(node.labels, comp.nodeSelector):
+            want = ", ".join(f"{k}={v}" for k, v in sorted(comp.nodeSelector.items()))
+            issues.append(Issue(ERROR, cluster_name, release,
+                                f"node {node.name!r} does not match its nodeSelector ({want})"))
+        if not live:
+            continue
+        if not node.ready:
+            issues.append(Issue(ERROR, cluster_name, release, f"node {node.name!r} is NotReady"))
+        if node.unschedulable:
+            issues.append(Issue(ERROR, cluster_name, release, f"node {node.name!r} is cordoned"))
+        # nodeName skips the scheduler, so only NoExecute taints still matter
+        for taint in node.taints_with("NoExecute"):
+            issues.append(Issue(WARNING, cluster_name, release,
+                                f"node {node.name!r} has taint {taint}: pods may be evicted"))
+    return issues
+
+
+def predicted_nodes(names: Iterable[str], labels: Optional[Dict[str, Dict[str, str]]] = None) -> Dict[str, NodeInfo]:
+    """Inventory stand-in built from predicted node names and labels
+    (see `expected_node_names`, `expected_node_labels`)."""
+    labels = labels or {}
+    return {n: NodeInfo(name=n, ready=True, labels=dict(labels.get(n, {}))) for n in names}
+
+
+def check_live_placement(
+    grouped: Grouped,
+    inventory: NodeInventory,
+    placement: Optional[PlacementConfig] = None,
+    namespace: str = "default",
+) -> List[Issue]:
+    """Fetch each target cluster's nodes (in parallel, TTL-cached) and check placement.
+
+    Components without `nodek8s` are dry-run through automatic placement
+    (`placement` config) to prove they fit.
+    """
+    def _one(target: Tuple[str, Path], components: List[Tuple[str, ComponentRef]]) -> List[Issue]:
+        cluster_name, kc = target
+        if not Path(kc).exists():
+            return [Issue(ERROR, cluster_name, str(kc), "kubeconfig not found")]
+        try:
+            nodes = inventory.nodes(kc)
+        except (RuntimeError, OSError, ValueError) as e:
+            return [Issue(ERROR, cluster_name, str(kc), f"cannot list nodes: {e}")]
+        issues = check_placement(cluster_name, components, nodes)
+        if placement is not None and any(not comp.nodek8s for _, comp in components):
+            try:
+                pods = Kubectl(kubeconfig=kc).get_json(["pods"]).get("items", [])
+                auto_place(components, namespace, placement, nodes, pods)
+            except (PlacementError, RuntimeError) as e:
+                issues.append(Issue(ERROR, cluster_name, "placement", str(e)))
+        return issues
+
+    if not grouped:
+        return []
+    with ThreadPoolExecutor(max_workers=min(8, len(grouped))) as pool:
+        futures = [pool.submit(_one, t, comps) for t, comps in grouped.items()]
+        return [i for f in futures for i in f.result()]
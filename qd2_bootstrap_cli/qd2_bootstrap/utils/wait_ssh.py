@@ -1,39 +1,126 @@
 import subprocess, time, shlex
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
 from pathlib import Path
-from typing import Iterable
-from rich import print as rprint
+from typing import Dict, Iterable, List, Optional
 
-def ssh_ready(host: str, user: str, key: Path, timeout_s: int = 10) -> bool:
-    cmd = [
+from qd2_bootstrap.utils.output import current_log, emit, log_to
+
+# Run on each host once SSH answers: KubeOne needs passwordless sudo, and
+# package installs race with a cloud-init that is still running.
+PREFLIGHT = (
+    "sudo -n true 2>/dev/null || { echo 'passwordless sudo is not available'; exit 3; }; "
+    "if command -v cloud-init >/dev/null 2>&1; then cloud-init status --wait >/dev/null 2>&1 || true; fi"
+)
+
+def _ssh_cmd(host: str, user: str, key: Path, command: str, connect_timeout_s: int = 10) -> List[str]:
+    return [
         "ssh",
         "-o", "BatchMode=yes",
         "-o", "StrictHostKeyChecking=no",
         "-o", "UserKnownHostsFile=/dev/null",
+        "-o", f"ConnectTimeout={connect_timeout_s}",
         "-i", str(key),
         f"{user}@{host}",
-        "true",
+        command,
     ]
+
+def ssh_ready(host: str, user: str, key: Path, timeout_s: int = 10) -> bool:
+    cmd = _ssh_cmd(host, user, key, "true", connect_timeout_s=timeout_s)
     try:
         proc = subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, timeout=timeout_s, check=False)
         return proc.returncode == 0
     except Exception:
         return False
 
+def preflight(host: str, user: str, key: Path, timeout_s: float = 300) -> Optional[str]:
+    """Run PREFLIGHT on a reachable host; returns a problem description, or None if fine."""
+    cmd = _ssh_cmd(host, user, key, PREFLIGHT)
+    try:
+        proc = subprocess.run(cmd, capture_output=True, text=True, timeout=max(1.0, timeout_s), check=False)
+    except subprocess.TimeoutExpired:
+        return "preflight timed out (cloud-init still running?)"
+    except OSError as e:
+        return str(e)
+    if proc.returncode != 0:
+        return (proc.stdout.strip() or proc.stderr.strip() or f"exit code {proc.returncode}").splitlines()[-1]
+    return None
+
+
+class SshWaiter:
+    """Probe hosts in the background as they become known.
+
+    Each `add(host)` starts polling that host right away (SSH, then
+    `preflight`), with its own `timeout_s` budget, so hosts that boot early
+    are ready before the last one even exists. `wait()` blocks until every
+    added host is done. Leaving a `with` block cancels whatever still polls.
+    """
+
+    def __init__(self, user: str, key: Path, timeout_s: float = 300, every_s: float = 5, max_workers: int = 32):
+        self.user = user
+        self.key = key
+        self.timeout_s = timeout_s
+        self.every_s = every_s
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="ssh-wait")
+        self._futures: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self.ready_at: Dict[str, float] = {}   # host -> seconds after the waiter started
+        self.errors: Dict[str, str] = {}
+        self._t0 = time.monotonic()
+        self._stop = threading.Event()
+
+    def add(self, host: str) -> None:
+        with self._lock:
+            if host not in self._futures:
+                self._futures[host] = self._pool.submit(self._probe, host, current_log())
+
+    def added(self) -> List[str]:
+        with self._lock:
+            return list(self._futures)
+
+    def _probe(self, host: str, log) -> None:
+        with log_to(log):
+            deadline = time.monotonic() + self.timeout_s
+            while not ssh_ready(host, self.user, self.key, timeout_s=10):
+                if time.monotonic() + self.every_s >= deadline:
+                    self.errors[host] = "SSH timed out"
+                    return
+                if self._stop.wait(self.every_s):
+                    self.errors[host] = "cancelled"
+                    return
+            problem = preflight(host, self.user, self.key, timeout_s=deadline - time.monotonic())
+            if problem:
+                self.errors[host] = f"preflight: {problem}"
+                emit(f"[red]Preflight failed on {host}:[/] {problem}")
+                return
+            self.ready_at[host] = time.monotonic() - self._t0
+            emit(f"[green]SSH ready:[/] {host} [dim](+{self.ready_at[host]:.0f}s)[/]")
+
+    def wait(self) -> bool:
+        """Wait for every added host; True if all are reachable and passed preflight."""
+        for f in list(self._futures.values()):
+            f.result()
+        self._pool.shutdown(wait=True)
+        timed_out = sorted(h for h, e in self.errors.items() if e == "SSH timed out")
+        if timed_out:
+            emit(f"[red]Timed out waiting SSH on:[/] {', '.join(timed_out)}")
+        return not self.errors
+
+    def cancel(self) -> None:
+        """Stop polling (e.g. the apply that creates the hosts failed)."""
+        self._stop.set()
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+    def __enter__(self) -> "SshWaiter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.cancel()
+
+
 def wait_ssh_all(hosts: Iterable[str], user: str, key: Path, timeout_total_s: int = 300, every_s: int = 5) -> bool:
-    """Poll all hosts until SSH success or timeout. Returns True if all became ready."""
-    deadline = time.time() + timeout_total_s
-    pending = set(hosts)
-    while time.time() < deadline and pending:
-        ready = []
-        for h in list(pending):
-            if ssh_ready(h, user, key, timeout_s=10):
-                ready.append(h)
-        for h in ready:
-            pending.remove(h)
-            rprint(f"[green]SSH ready:[/] {h}")
-        if pending:
-            time.sleep(every_s)
-    if pending:
-        rprint(f"[red]Timed out waiting SSH on:[/] {', '.join(sorted(pending))}")
-        return False
-    return True
+    """Poll all hosts (in parallel) until SSH and preflight succeed or timeout. Returns True if all became ready."""
+    waiter = SshWaiter(user, key, timeout_s=timeout_total_s, every_s=every_s)
+    for h in hosts:
+        waiter.add(h)
+    return waiter.wait()
@@ -0,0 +1,50 @@
+import yaml
+
+from qd2_bootstrap import api
+from qd2_bootstrap.models.infra_spec import InfraSpec
+from qd2_bootstrap.utils.capacity import CapacityOption, Flavor, PoolCount, size_workers
+from qd2_bootstrap.utils.infra_writer import write_tfvars
+from qd2_bootstrap.utils.placement import PlacementRequest
+
+BASE = {
+    "infraSetup": {
+        "clusterName": "demo",
+        "countCp": 1,
+        "countWorker": 2,
+        "imageName": "ubuntu22.04",
+        "flavorName": "C2_R4_D30",
+        "keypairName": "kp",
+        "networkUuid": "net",
+        "openstack": {"authUrl": "http://x:5000/v3", "region": "r", "userName": "u",
+                      "tenantId": "t", "domainName": "d"},
+    },
+}
+
+
+def _write(tmp_path, option):
+    base = tmp_path / "infra.yaml"
+    base.write_text(yaml.safe_dump(BASE))
+    out = api.write_capacity_infra(option, tmp_path / "sized.yaml", base=base)
+    spec = InfraSpec.model_validate(yaml.safe_load(out.read_text()))
+    write_tfvars(tmp_path / "terraform.tfvars", spec)
+    return spec, (tmp_path / "terraform.tfvars").read_text()
+
+
+def test_single_flavor_keeps_the_control_plane_flavor(tmp_path):
+    spec, tfvars = _write(tmp_path, CapacityOption([PoolCount("G4_R16", 5)], 20.0, 0.5, 0.5))
+    assert spec.infraSetup.flavorName == "C2_R4_D30"
+    assert [(p.name, p.count, p.flavorName) for p in spec.infraSetup.worker_pools()] == [("g4-r16", 5, "G4_R16")]
+    assert 'flavor_name  = "C2_R4_D30"' in tfvars
+    assert "count_worker = 0" in tfvars
+
+
+def test_mix_gets_one_pool_per_flavor(tmp_path):
+    spec, _ = _write(tmp_path, CapacityOption([PoolCount("G4_R16", 2), PoolCount("C2_R4", 1)], 10.0, 0.5, 0.5))
+    assert spec.infraSetup.flavorName == "C2_R4_D30"
+    assert [(p.name, p.count) for p in spec.infraSetup.workerPools] == [("g4-r16", 2), ("c2-r4", 1)]
+
+
+def test_size_workers_honours_anti_affinity():
+    requests = [PlacementRequest(f"q{i}", 500, 2**28, anti_affinity="g") for i in range(3)]
+    plan = size_workers(requests, [Flavor("small", 2, 4096), Flavor("big", 16, 65536)], 0, 0)
+    assert plan.best.label() == "3 x small"
@@ -0,0 +1,85 @@
+import hashlib
+import os
+from pathlib import Path
+
+import pytest
+import yaml
+
+from qd2_bootstrap.utils.chart_cache import ChartCache, ChartCacheError, package_chart_dir
+
+
+def _chart(root: Path, marker: str, version: str = "0.1.0") -> Path:
+    chart = root / "src" / "demo"
+    (chart / "templates").mkdir(parents=True, exist_ok=True)
+    (chart / "Chart.yaml").write_text(f"apiVersion: v2\nname: demo\nversion: {version}\n")
+    (chart / "templates" / "cm.yaml").write_text(f"kind: ConfigMap\ndata: {{marker: {marker}}}\n")
+    return chart
+
+
+def _archive(tmp_path: Path, marker: str) -> Path:
+    out = tmp_path / "charts"
+    out.mkdir(exist_ok=True)
+    tgz = package_chart_dir(_chart(tmp_path, marker), out)
+    return tgz
+
+
+def test_local_archive_is_cached_once(tmp_path):
+    tgz = _archive(tmp_path, "one")
+    cache = ChartCache(tmp_path / "cache", sources=[tgz.parent], offline=True)
+    first = cache.resolve("demo", "0.1.0")
+    assert cache.resolve("demo", "0.1.0") == first
+    assert first.read_bytes() == tgz.read_bytes()
+
+
+def test_rebuilt_archive_with_the_same_version_is_not_shadowed(tmp_path):
+    tgz = _archive(tmp_path, "one")
+    cache = ChartCache(tmp_path / "cache", sources=[tgz.parent], offline=True)
+    stale = cache.resolve("demo", "0.1.0")
+
+    rebuilt = _archive(tmp_path, "two")
+    assert rebuilt == tgz
+    st = tgz.stat()
+    os.utime(tgz, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+    fresh = ChartCache(tmp_path / "cache", sources=[tgz.parent], offline=True).resolve("demo", "0.1.0")
+    assert fresh != stale
+    assert fresh.read_bytes() == tgz.read_bytes()
+
+
+def test_unpacked_chart_dirs_are_repackaged(tmp_path):
+    chart = _chart(tmp_path, "one")
+    cache = ChartCache(tmp_path / "cache", sources=[chart.parent], offline=True)
+    first = cache.resolve("demo", "0.1.0")
+    _chart(tmp_path, "two")
+    assert cache.resolve("demo", "0.1.0") != first
+
+
+def test_offline_miss_is_an_error(tmp_path):
+    cache = ChartCache(tmp_path / "cache", offline=True)
+    with pytest.raises(ChartCacheError, match="offline"):
+        cache.resolve("demo", "0.1.0")
+
+
+def _repo(tmp_path: Path, version: str) -> Path:
+    repo = tmp_path / "repo"
+    repo.mkdir(exist_ok=True)
+    tgz = package_chart_dir(_chart(tmp_path, "repo", version), repo)
+    entry = {"version": version, "urls": [tgz.name], "digest": _sha256(tgz)}
+    (repo / "index.yaml").write_text(yaml.safe_dump({"apiVersion": "v1", "entries": {"demo": [entry]}}))
+    return repo
+
+
+def _sha256(path: Path) -> str:
+    return hashlib.sha256(path.read_bytes()).hexdigest()
+
+
+def test_unpinned_chart_follows_a_newer_repo_release(tmp_path):
+    old = _archive(tmp_path, "old")
+    ChartCache(tmp_path / "cache", sources=[old.parent], offline=True).resolve("demo")
+    repo = _repo(tmp_path, "0.2.0")
+
+    cache = ChartCache(tmp_path / "cache")
+    got = cache.resolve("demo", repo_url=repo.as_uri())
+    assert got.read_bytes() == (repo / "demo-0.2.0.tgz").read_bytes()
+    assert set(cache.entries()) == {"demo@0.1.0", "demo@0.2.0"}
+    # Offline, the newest cached version is used without asking the repo
+    assert ChartCache(tmp_path / "cache", offline=True).resolve("demo", repo_url=repo.as_uri()) == got
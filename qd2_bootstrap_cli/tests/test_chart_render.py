@@ -0,0 +1,55 @@
+"""Render the repo's charts with the values the CLI passes (needs the helm binary)."""
+import shutil
+import subprocess
+from pathlib import Path
+
+import pytest
+import yaml
+
+from qd2_bootstrap.utils.releases import QNODE_CHART, QNODE_SET_CHART, ReleaseUnit, release_value_args
+
+CHARTS = Path(__file__).resolve().parents[2] / "helm-charts"
+
+pytestmark = pytest.mark.skipif(shutil.which("helm") is None, reason="helm not installed")
+
+PROBES = {"readiness": {"tcpSocket": None, "exec": {"command": ["true"]}}, "startup": None}
+NETWORKS = {"enabled": True, "networks": [{"name": "x", "ip": "10.10.0.7"}]}
+
+
+def _render(unit: ReleaseUnit):
+    _, files = release_value_args(unit)
+    try:
+        cmd = ["helm", "template", unit.name, str(CHARTS / unit.chart), "-n", unit.namespace]
+        for f in files:
+            cmd += ["-f", str(f)]
+        out = subprocess.run(cmd, capture_output=True, text=True, check=True).stdout
+    finally:
+        for f in files:
+            f.unlink()
+    return [d for d in yaml.safe_load_all(out) if d and d.get("kind") == "Deployment"]
+
+
+def _check(deployment):
+    pod = deployment["spec"]["template"]
+    main = pod["spec"]["containers"][0]
+    assert "startupProbe" not in main
+    assert main["readinessProbe"]["exec"] == {"command": ["true"]}
+    assert "tcpSocket" not in main["readinessProbe"]
+    assert '"10.10.0.7"' in pod["metadata"]["annotations"]["l2sm/networks"]
+
+
+def test_qnode_release_mode():
+    values = {"placement": {"useNodeName": True, "nodeName": "w1"}, "l2sm": NETWORKS, "probes": PROBES}
+    (dep,) = _render(ReleaseUnit("qn-1", QNODE_CHART, None, "quditto", values))
+    _check(dep)
+
+
+def test_qnode_set_mode():
+    entry = {"name": "qn-1", "placement": {"useNodeName": True, "nodeName": "w1"}, "l2sm": NETWORKS, "probes": PROBES}
+    plain = {"name": "qn-2", "placement": {"useNodeName": True, "nodeName": "w1"}}
+    deps = {d["metadata"]["name"]: d for d in _render(
+        ReleaseUnit("qnode-set", QNODE_SET_CHART, None, "quditto", {"qnodes": [entry, plain]})
+    )}
+    _check(deps["qn-1"])
+    # Nulls in one entry leave the defaults of the others alone
+    assert "tcpSocket" in deps["qn-2"]["spec"]["template"]["spec"]["containers"][0]["readinessProbe"]
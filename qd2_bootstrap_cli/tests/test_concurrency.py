@@ -0,0 +1,103 @@
+import pytest
+
+from qd2_bootstrap.utils.concurrency import (
+    AIMDLimiter,
+    OpOutcome,
+    is_throttle_error,
+    is_throttle_output,
+    run_adaptive,
+)
+
+
+def _limiter(**kw):
+    return AIMDLimiter(announce=False, **kw)
+
+
+def _ok(limiter, n, latency=1.0):
+    for _ in range(n):
+        limiter.release(limiter.acquire(), latency, throttled=False)
+
+
+@pytest.mark.parametrize("text", [
+    'Error: UPGRADE FAILED: 429 Too Many Requests',
+    "the server has received too many requests and has asked us to try again later",
+    "I0101 request.go:697] Waited for 1.2s due to client-side throttling, not priority and fairness",
+    "client rate limiter Wait returned an error: context deadline exceeded",
+])
+def test_throttle_phrases_are_detected(text):
+    assert is_throttle_output(text)
+
+
+@pytest.mark.parametrize("text", [
+    'Release "qn-429" has been upgraded. Happy Helming!',
+    "resourceVersion: 14290012",
+    "pod ip 10.0.4.29 port 4290",
+    "wrote 4294 bytes",
+])
+def test_numbers_containing_429_are_not_throttling(text):
+    assert not is_throttle_output(text)
+
+
+def test_structured_status_is_throttling():
+    err = RuntimeError("boom")
+    err.status = 429
+    assert is_throttle_error(err)
+    err.status = 404
+    assert not is_throttle_error(err)
+
+
+def test_additive_increase_after_a_full_window_of_successes():
+    limiter = _limiter(initial=2, max_limit=4)
+    _ok(limiter, 2)
+    assert limiter.limit == 3
+    _ok(limiter, 3)
+    assert limiter.limit == 4
+    _ok(limiter, 20)
+    assert limiter.limit == 4
+
+
+def test_multiplicative_decrease_once_per_window():
+    limiter = _limiter(initial=8, max_limit=8)
+    epochs = [limiter.acquire() for _ in range(4)]
+    for epoch in epochs:  # a burst of 429s from the same window
+        limiter.release(epoch, 1.0, throttled=True)
+    assert limiter.limit == 4
+    limiter.release(limiter.acquire(), 1.0, throttled=True)
+    assert limiter.limit == 2
+
+
+def test_decrease_stops_at_the_minimum():
+    limiter = _limiter(initial=2, min_limit=2)
+    limiter.release(limiter.acquire(), 1.0, throttled=True)
+    assert limiter.limit == 2
+
+
+def test_latency_spike_decreases_the_limit():
+    limiter = _limiter(initial=4, latency_factor=3.0)
+    _ok(limiter, 3, latency=1.0)
+    for _ in range(10):
+        limiter.release(limiter.acquire(), 50.0, throttled=False)
+    assert limiter.limit < 4
+
+
+def test_invalid_limits():
+    with pytest.raises(ValueError):
+        AIMDLimiter(min_limit=4, max_limit=2)
+
+
+def test_run_adaptive_retries_throttled_items_then_succeeds():
+    calls = {}
+
+    def op(item):
+        calls[item] = calls.get(item, 0) + 1
+        return OpOutcome(rc=0) if item != "b" or calls[item] > 1 else OpOutcome(rc=1, throttled=True)
+
+    result = run_adaptive(["a", "b", "c"], op, _limiter(initial=2), backoff_s=0)
+    assert result.rc == 0 and result.failed is None
+    assert calls == {"a": 1, "b": 2, "c": 1}
+
+
+def test_run_adaptive_fail_fast_reports_the_first_failure():
+    result = run_adaptive(range(10), lambda i: OpOutcome(rc=2 if i == 0 else 0), _limiter(initial=1, max_limit=1))
+    assert result.failed == 0 and result.rc == 2
+    assert result.codes == {0: 2}
@@ -0,0 +1,56 @@
+import pytest
+import yaml
+
+from qd2_bootstrap import api
+from qd2_bootstrap.api import rollout
+from qd2_bootstrap.models.quditto_deploy_spec import QudittoDeploySpec
+from qd2_bootstrap.utils.ipam import state_path
+from qd2_bootstrap.utils.validation import ERROR, Issue
+
+
+@pytest.fixture
+def spec_file(tmp_path):
+    (tmp_path / "kubeconfig").write_text("")
+    path = tmp_path / "quditto.yaml"
+    path.write_text(yaml.safe_dump({
+        "charts": {"repo": "https://example.invalid/"},
+        "kubeconfig": str(tmp_path / "kubeconfig"),
+        "l2sm": {"networks": {"x": {"subnet": "10.10.0.0/24"}}},
+        "qudittoSetup": {"qnodes": [{
+            "name": "qn-1", "chart": "qnode-v2", "nodek8s": "w1",
+            "values": {"l2sm": {"enabled": True, "networks": [{"name": "x"}]}},
+        }]},
+    }))
+    return path
+
+
+def _deploy(spec_file, monkeypatch, issues, seen=None):
+    spec = api.load_spec(spec_file, QudittoDeploySpec)
+    monkeypatch.setattr(rollout, "shared_inventory", lambda: None)
+    monkeypatch.setattr(rollout, "check_live_placement", lambda grouped, inventory: issues)
+    monkeypatch.setattr(rollout, "_rollout", lambda *a, **kw: seen.append(state_path(spec, spec_file).exists()))
+    return api.deploy(spec, kubeconfig=spec_file.parent / "kubeconfig", spec_file=spec_file, chart_cache=False)
+
+
+def test_failed_validation_records_no_addresses(spec_file, monkeypatch):
+    spec = api.load_spec(spec_file, QudittoDeploySpec)
+    with pytest.raises(api.ApiError, match="nothing was installed"):
+        _deploy(spec_file, monkeypatch, [Issue(ERROR, "c1", "qn-1", "node w1 not found")])
+    assert not state_path(spec, spec_file).exists()
+
+
+def test_addresses_are_recorded_before_the_first_install(spec_file, monkeypatch):
+    seen = []
+    _deploy(spec_file, monkeypatch, [], seen)
+    assert seen == [True]
+    spec = api.load_spec(spec_file, QudittoDeploySpec)
+    state = yaml.safe_load(state_path(spec, spec_file).read_text())
+    assert state["networks"]["x"]["allocations"]["qn-1"]["ip"] == "10.10.0.1"
+
+
+def test_a_plan_is_not_recorded_over_changed_state(spec_file, monkeypatch):
+    spec = api.load_spec(spec_file, QudittoDeploySpec)
+    with pytest.raises(api.ApiError, match="L2SM address allocation failed") as err:
+        api.assign_l2sm(spec, spec_file, persist=True, expect={"qn-1": {"x": "10.10.0.9"}})
+    assert "changed since the plan" in err.value.details[0]
+    assert not state_path(spec, spec_file).exists()
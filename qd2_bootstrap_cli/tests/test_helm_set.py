@@ -0,0 +1,36 @@
+import pytest
+
+from qd2_bootstrap.utils.helm_set import _to_scalar, dict_to_set_list
+
+
+def test_nested_maps_flatten_to_dotted_keys():
+    values = {"placement": {"useNodeName": True, "nodeName": "w1"}, "l2sm": {"enabled": False}}
+    assert dict_to_set_list(values) == [
+        "placement.useNodeName=true",
+        "placement.nodeName=w1",
+        "l2sm.enabled=false",
+    ]
+
+
+def test_scalar_lists_use_the_list_literal():
+    assert dict_to_set_list({"args": ["a", 1, True]}) == ["args={a,1,true}"]
+
+
+def test_lists_of_maps_are_indexed():
+    values = {"l2sm": {"networks": [{"name": "net1", "ip": "10.0.0.5"}, {"name": "net2"}]}}
+    assert dict_to_set_list(values) == [
+        "l2sm.networks[0].name=net1",
+        "l2sm.networks[0].ip=10.0.0.5",
+        "l2sm.networks[1].name=net2",
+    ]
+
+
+def test_maps_never_become_python_reprs():
+    with pytest.raises(ValueError):
+        _to_scalar({"name": "net1"})
+    with pytest.raises(ValueError):
+        _to_scalar([{"name": "net1"}])
+
+
+def test_null_deletes_the_key_instead_of_setting_an_empty_string():
+    assert dict_to_set_list({"probes": {"startup": None}}) == ["probes.startup=null"]
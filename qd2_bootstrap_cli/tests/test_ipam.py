@@ -0,0 +1,78 @@
+import pytest
+
+from qd2_bootstrap.models.quditto_deploy_spec import QudittoDeploySpec
+from qd2_bootstrap.utils.ipam import IpamError, IpamIndex, assign_addresses
+
+
+def _qnode(name, ip=None, net="x"):
+    entry = {"name": net, **({"ip": ip} if ip else {})}
+    return {"name": name, "chart": "qnode-v2", "nodek8s": "w1",
+            "values": {"l2sm": {"enabled": True, "networks": [entry]}}}
+
+
+def _spec(qnodes, subnet="10.10.0.0/29", reserved=()):
+    return QudittoDeploySpec.model_validate({
+        "charts": {"repo": "https://example.invalid/"},
+        "l2sm": {"networks": {"x": {"subnet": subnet, "reserved": list(reserved)}}},
+        "qudittoSetup": {"qnodes": qnodes},
+    })
+
+
+def _assign(spec, state=None):
+    index = IpamIndex.from_dict(spec.l2sm.networks, state or {})
+    return assign_addresses(spec, index), index
+
+
+def test_lowest_free_address_skips_reserved():
+    addresses, _ = _assign(_spec([_qnode("a"), _qnode("b")], reserved=["10.10.0.1"]))
+    assert addresses == {"a": {"x": "10.10.0.2"}, "b": {"x": "10.10.0.3"}}
+
+
+def test_addresses_are_stable_across_spec_reordering():
+    _, index = _assign(_spec([_qnode("a"), _qnode("b")]))
+    addresses, _ = _assign(_spec([_qnode("c"), _qnode("b"), _qnode("a")]), index.to_dict())
+    assert addresses["a"] == {"x": "10.10.0.1"}
+    assert addresses["b"] == {"x": "10.10.0.2"}
+    assert addresses["c"] == {"x": "10.10.0.3"}
+
+
+def test_explicit_address_is_claimed_before_allocation():
+    addresses, index = _assign(_spec([_qnode("a"), _qnode("b", ip="10.10.0.1")]))
+    assert addresses == {"a": {"x": "10.10.0.2"}}
+    assert index.owner_of("x", "10.10.0.1") == "b"
+
+
+def test_explicit_address_held_by_an_allocated_member_is_a_conflict():
+    _, index = _assign(_spec([_qnode("a"), _qnode("b")]))
+    with pytest.raises(IpamError, match="10.10.0.1 is set for b but allocated to a"):
+        _assign(_spec([_qnode("a"), _qnode("b", ip="10.10.0.1")]), index.to_dict())
+    # Once the holder is gone from the spec its address can be claimed
+    addresses, claimed = _assign(_spec([_qnode("b", ip="10.10.0.1")]), index.to_dict())
+    assert claimed.owner_of("x", "10.10.0.1") == "b"
+
+
+def test_former_explicit_claim_can_be_taken_over():
+    _, index = _assign(_spec([_qnode("a", ip="10.10.0.3")]))
+    addresses, index = _assign(_spec([_qnode("a"), _qnode("b", ip="10.10.0.3")]), index.to_dict())
+    assert index.owner_of("x", "10.10.0.3") == "b"
+    assert addresses == {"a": {"x": "10.10.0.1"}}
+
+
+def test_conflicts_and_out_of_subnet_addresses_are_reported_together():
+    spec = _spec([_qnode("a", ip="10.10.0.2"), _qnode("b", ip="10.10.0.2"), _qnode("c", ip="10.99.0.1")])
+    with pytest.raises(IpamError) as err:
+        _assign(spec)
+    assert len(err.value.problems) == 2
+
+
+def test_exhausted_subnet():
+    # /29: six usable host addresses
+    with pytest.raises(IpamError, match="exhausted"):
+        _assign(_spec([_qnode(f"q{i}") for i in range(7)]))
+
+
+def test_release_frees_addresses_for_reuse():
+    _, index = _assign(_spec([_qnode("a"), _qnode("b")]))
+    assert index.release(["a"]) == 1
+    addresses, _ = _assign(_spec([_qnode("b"), _qnode("c")]), index.to_dict())
+    assert addresses["c"] == {"x": "10.10.0.1"}
@@ -0,0 +1,167 @@
+import pytest
+
+from qd2_bootstrap.models.quditto_deploy_spec import ComponentRef, PlacementConfig
+from qd2_bootstrap.utils.inventory import NodeInfo
+from qd2_bootstrap.utils.netprobe import RttMatrix
+from qd2_bootstrap.utils.placement import (
+    NodeSlot,
+    PlacementError,
+    PlacementRequest,
+    auto_place,
+    cpu_millis,
+    link_latencies,
+    mem_bytes,
+    place,
+)
+
+
+def _node(name, cpu="4", memory="8Gi", labels=None, **kw):
+    return NodeInfo(name, ready=kw.pop("ready", True), labels=labels or {},
+                    allocatable={"cpu": cpu, "memory": memory}, **kw)
+
+
+def _comp(cpu="1", memory="1Gi", **kw):
+    return ComponentRef(chart="qnode-v2", resources={"cpu": cpu, "memory": memory}, **kw)
+
+
+def _pod(name, node, app, cpu="0", memory="0", ns="default"):
+    return {
+        "metadata": {"name": name, "namespace": ns, "labels": {"app": app}},
+        "spec": {"nodeName": node, "containers": [{"resources": {"requests": {"cpu": cpu, "memory": memory}}}]},
+        "status": {"phase": "Running"},
+    }
+
+
+def _rtt(pairs):
+    rows = {}
+    for (a, b), v in pairs.items():
+        rows.setdefault(a, {})[b] = v
+    return RttMatrix(0.0, sorted({n for p in pairs for n in p}), rows)
+
+
+@pytest.mark.parametrize("q,cpu,mem", [
+    ("250m", 250, 0), ("2", 2000, 2), ("1.5", 1500, 1), ("512Mi", 512 * 2**20 * 1000, 512 * 2**20), ("1G", 10**12, 10**9),
+])
+def test_quantities(q, cpu, mem):
+    assert cpu_millis(q) == cpu
+    if mem:
+        assert mem_bytes(q) == mem
+
+
+def test_invalid_quantity():
+    with pytest.raises(ValueError, match="invalid resource quantity"):
+        cpu_millis("1Xi")
+
+
+def test_node_slot_fit_and_load():
+    slot = NodeSlot("w1", cpu_m=1000, mem_b=1000)
+    assert slot.fits(1000, 1000) and not slot.fits(1001, 0)
+    slot.take("a", 250, 500)
+    assert slot.load() == 0.5 and slot.placed == ["a"]
+    assert not slot.fits(0, 501)
+    assert NodeSlot("empty", 0, 0).load() == 1.0
+
+
+def test_spread_and_binpack():
+    reqs = [PlacementRequest(f"q{i}", 100, 100) for i in range(4)]
+    spread = place(reqs, [NodeSlot("w1", 1000, 1000), NodeSlot("w2", 1000, 1000)], "spread")
+    assert sorted(spread.values()) == ["w1", "w1", "w2", "w2"]
+    binpack = place(reqs, [NodeSlot("w1", 1000, 1000), NodeSlot("w2", 1000, 1000)], "binpack")
+    assert set(binpack.values()) == {"w1"}
+
+
+def test_binpack_moves_on_when_full():
+    reqs = [PlacementRequest(f"q{i}", 400, 100) for i in range(3)]
+    assignment = place(reqs, [NodeSlot("w1", 1000, 1000), NodeSlot("w2", 1000, 1000)], "binpack")
+    assert [assignment[f"q{i}"] for i in range(3)] == ["w1", "w1", "w2"]
+
+
+def test_anti_affinity_and_allowed_are_hard():
+    reqs = [PlacementRequest(f"q{i}", 1, 1, anti_affinity="g") for i in range(2)]
+    assignment = place(reqs, [NodeSlot("w1", 1000, 1000), NodeSlot("w2", 1000, 1000)], "binpack")
+    assert set(assignment.values()) == {"w1", "w2"}
+    with pytest.raises(PlacementError, match="anti-affinity group 'g'"):
+        place(reqs + [PlacementRequest("q2", 1, 1, anti_affinity="g")],
+              [NodeSlot("w1", 1000, 1000), NodeSlot("w2", 1000, 1000)])
+    only = PlacementRequest("q", 1, 1, allowed={"w2"})
+    assert place([only], [NodeSlot("w1", 1000, 1000), NodeSlot("w2", 10, 10)])["q"] == "w2"
+
+
+def test_pinned_requests_count_as_load():
+    slots = [NodeSlot("w1", 1000, 1000), NodeSlot("w2", 1000, 1000)]
+    assignment = place([PlacementRequest("big", 900, 0, node="w1"), PlacementRequest("q", 200, 0)], slots)
+    assert assignment == {"big": "w1", "q": "w2"}
+
+
+def test_unknown_strategy():
+    with pytest.raises(ValueError, match="unknown placement strategy"):
+        place([PlacementRequest("q", 1, 1)], [NodeSlot("w1", 10, 10)], "random")
+
+
+def test_topology_keeps_peers_close():
+    rtt = _rtt({("w1", "w2"): 5.0, ("w1", "w3"): 0.2, ("w2", "w3"): 5.0})
+    reqs = [PlacementRequest("a", 1, 1, node="w1"), PlacementRequest("b", 1, 1, peers=["a"], anti_affinity="g"),
+            PlacementRequest("c", 1, 1, anti_affinity="g")]
+    slots = [NodeSlot(n, 1000, 1000) for n in ("w1", "w2", "w3")]
+    assignment = place([reqs[0], reqs[1]], slots, rtt=rtt)
+    assert assignment["b"] == "w1"  # same node: 0 ms
+    slots = [NodeSlot("w1", 1, 1), NodeSlot("w2", 1000, 1000), NodeSlot("w3", 1000, 1000)]
+    assert place([reqs[0], reqs[1]], slots, rtt=rtt)["b"] == "w3"
+
+
+def test_auto_place_filters_nodes_and_counts_load():
+    nodes = {
+        "w1": _node("w1"),
+        "w2": _node("w2"),
+        "down": _node("down", ready=False),
+        "tainted": _node("tainted", taints=["dedicated=x:NoSchedule"]),
+        "cordoned": _node("cordoned", unschedulable=True),
+    }
+    pods = [_pod("other", "w1", "something-else", cpu="3")]
+    assignment, slots = auto_place([("qn-1", _comp())], "default", PlacementConfig(mode="auto"), nodes, pods)
+    assert assignment == {"qn-1": "w2"}
+    assert [s.name for s in slots] == ["w1", "w2"]
+    assert slots[0].used_cpu_m == 3000
+
+
+def test_auto_place_sticky_and_manual():
+    nodes = {"w1": _node("w1"), "w2": _node("w2")}
+    pods = [_pod("qn-1-abc", "w1", "qn-1", cpu="3")]  # its own pod: a pin, not load
+    comps = [("qn-1", _comp()), ("qn-2", _comp(nodek8s="w2"))]
+    assignment, slots = auto_place(comps, "default", PlacementConfig(mode="auto"), nodes, pods)
+    assert assignment == {"qn-1": "w1"}  # manual components are not reported
+    assert slots[0].used_cpu_m == 1000
+    assignment, _ = auto_place(comps, "default", PlacementConfig(mode="auto", sticky=False, strategy="binpack"),
+                               nodes, pods)
+    assert assignment == {"qn-1": "w2"}  # w2 is busier (qn-2 is pinned there)
+
+
+def test_auto_place_node_selectors():
+    nodes = {"w1": _node("w1", labels={"pool": "cpu"}), "g1": _node("g1", labels={"pool": "gpu"}),
+             "x1": _node("x1")}
+    config = PlacementConfig(mode="auto", nodeSelector={"pool": "cpu"})
+    with pytest.raises(PlacementError, match="no node can fit"):
+        auto_place([("qn-1", _comp(nodeSelector={"pool": "gpu"}))], "default", config, nodes, [])
+    config = PlacementConfig(mode="auto")
+    assignment, _ = auto_place([("qn-1", _comp(nodeSelector={"pool": "gpu"}))], "default", config, nodes, [])
+    assert assignment == {"qn-1": "g1"}
+    with pytest.raises(PlacementError, match="no eligible nodes"):
+        auto_place([("qn-1", _comp())], "default", PlacementConfig(mode="auto", nodeSelector={"pool": "none"}),
+                   nodes, [])
+
+
+def test_link_latencies():
+    rtt = _rtt({("w1", "w2"): 2.0})
+    net = {"l2sm": {"enabled": True, "networks": [{"name": "x"}]}}
+    comps = [
+        ("a", _comp(nodek8s="w1", links=["b"], values=net)),
+        ("b", _comp(nodek8s="w2", links=["a"], values=net)),
+        ("c", _comp(nodek8s="w2", values=net)),
+    ]
+    out = {l.link: l for l in link_latencies(comps, rtt)}
+    assert set(out) == {"a <-> b", "network x"}
+    assert (out["a <-> b"].nodes, out["a <-> b"].avg_ms) == (2, 2.0)
+    # pairs: a-b 2 ms, a-c 2 ms, b-c 0 ms (same node)
+    assert out["network x"].members == 3
+    assert out["network x"].avg_ms == pytest.approx(4.0 / 3)
+    assert out["network x"].max_ms == 2.0
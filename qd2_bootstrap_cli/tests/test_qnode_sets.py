@@ -0,0 +1,46 @@
+import pytest
+from pydantic import ValidationError
+
+from qd2_bootstrap.models.quditto_deploy_spec import QudittoDeploySpec
+
+
+def _spec(*sets, qnodes=()):
+    return QudittoDeploySpec.model_validate({
+        "charts": {"repo": "https://example.invalid/"},
+        "qudittoSetup": {"qnodes": list(qnodes), "qnodeSets": list(sets)},
+    })
+
+
+def _members(spec):
+    return [(q.name, q.nodek8s) for q in spec.qudittoSetup.iter_qnodes()]
+
+
+def test_round_robin_assignment():
+    spec = _spec({"name": "qn-{i}", "count": 4, "chart": "qnode-v2", "nodes": ["w1", "w2"]})
+    assert _members(spec) == [("qn-1", "w1"), ("qn-2", "w2"), ("qn-3", "w1"), ("qn-4", "w2")]
+
+
+def test_block_assignment_and_start():
+    spec = _spec({"name": "qn-{i:02d}", "count": 4, "start": 0, "chart": "qnode-v2",
+                  "nodes": ["w1", "w2"], "assign": "block"})
+    assert _members(spec) == [("qn-00", "w1"), ("qn-01", "w1"), ("qn-02", "w2"), ("qn-03", "w2")]
+
+
+def test_explicit_qnodes_come_first_and_names_must_be_unique():
+    spec = _spec({"name": "qn-{i}", "count": 2, "start": 2, "chart": "qnode-v2", "nodek8s": "w1"},
+                 qnodes=[{"name": "qn-1", "chart": "qnode-v2", "nodek8s": "w9"}])
+    assert _members(spec) == [("qn-1", "w9"), ("qn-2", "w1"), ("qn-3", "w1")]
+    with pytest.raises(ValidationError, match="duplicated qnode name: qn-2"):
+        _spec({"name": "qn-{i}", "count": 3, "chart": "qnode-v2", "nodek8s": "w1"},
+              qnodes=[{"name": "qn-2", "chart": "qnode-v2", "nodek8s": "w9"}])
+
+
+@pytest.mark.parametrize("bad", [
+    {"name": "qn", "count": 2},                                    # no {i} field
+    {"name": "QN-{i}", "count": 2},                                # invalid member names
+    {"name": "qn-{i}", "count": 2, "nodek8s": "w1", "nodes": ["w2"]},
+    {"name": "qn-{i}", "count": 2, "assign": "random"},
+])
+def test_invalid_sets(bad):
+    with pytest.raises(ValidationError):
+        _spec({"chart": "qnode-v2", **bad})
@@ -0,0 +1,61 @@
+from pathlib import Path
+
+from qd2_bootstrap.utils.readiness import deployment_ready, pod_problem, rollout_tiers
+from qd2_bootstrap.utils.releases import ReleaseUnit
+
+
+def _deployment(replicas=1, generation=2, observed=2, updated=1, ready=1):
+    return {
+        "metadata": {"generation": generation},
+        "spec": {"replicas": replicas},
+        "status": {"observedGeneration": observed, "updatedReplicas": updated, "readyReplicas": ready},
+    }
+
+
+def test_ready_when_the_current_rollout_is_fully_ready():
+    assert deployment_ready(_deployment())
+
+
+def test_not_ready_before_the_controller_observed_the_new_generation():
+    assert not deployment_ready(_deployment(observed=1))
+
+
+def test_not_ready_while_old_replicas_serve():
+    assert not deployment_ready(_deployment(replicas=2, updated=1, ready=2))
+    assert not deployment_ready(_deployment(replicas=2, updated=2, ready=1))
+
+
+def test_empty_status_is_not_ready():
+    assert not deployment_ready({"metadata": {"generation": 1}, "spec": {}, "status": {}})
+
+
+def _unit(name, chart):
+    return ReleaseUnit(name, chart, None, "quditto", {})
+
+
+def test_orchestrator_goes_in_a_later_wave_and_cluster_order_is_kept():
+    a, b = ("a", Path("a")), ("b", Path("b"))
+    units = {
+        a: [_unit("orch", "qorchestrator-v2"), _unit("ctrl", "qcontroller-v2"), _unit("qn-1", "qnode-v2")],
+        b: [_unit("qn-2", "qnode-v2"), _unit("extra", "some-other-chart")],
+    }
+    first, second = rollout_tiers(units)
+    assert {t: [u.name for u in items] for t, items in first.items()} == {a: ["ctrl", "qn-1"], b: ["qn-2", "extra"]}
+    assert {t: [u.name for u in items] for t, items in second.items()} == {a: ["orch"]}
+
+
+def test_no_empty_waves():
+    only_qnodes = {("a", Path("a")): [_unit("qn-1", "qnode-v2")]}
+    assert len(rollout_tiers(only_qnodes)) == 1
+
+
+def test_pod_problem_prefers_the_waiting_reason():
+    pod = {"status": {"containerStatuses": [
+        {"name": "qnode", "ready": False, "state": {"waiting": {"reason": "ImagePullBackOff"}}},
+    ]}}
+    assert pod_problem(pod) == "qnode: ImagePullBackOff"
+
+
+def test_pod_problem_names_the_failing_probe():
+    pod = {"status": {"containerStatuses": [{"name": "qnode", "ready": False, "started": False, "restartCount": 2}]}}
+    assert pod_problem(pod) == "qnode: startup probe not passing (2 restarts)"
@@ -0,0 +1,33 @@
+from pathlib import Path
+
+import pytest
+
+from qd2_bootstrap import api
+from qd2_bootstrap.reconcile import PassResult, ReconcileOptions, Reconciler
+
+
+@pytest.fixture
+def deploy_calls(monkeypatch):
+    calls = []
+
+    def fake_deploy(spec, **kw):
+        calls.append(kw)
+        return api.RolloutResult(plan=kw["plan"])
+
+    monkeypatch.setattr(api, "subset_plan", lambda plan, keys: plan)
+    monkeypatch.setattr(api, "deploy", fake_deploy)
+    return calls
+
+
+def _apply(opts):
+    Reconciler(Path("spec.yaml"), opts)._apply(None, object(), [("c1", "qn-1")], PassResult("test"))
+
+
+def test_reapply_does_not_wait_for_readiness_by_default(deploy_calls):
+    _apply(ReconcileOptions(dry_run=True))
+    assert deploy_calls[0]["wait_ready"] is False
+
+
+def test_ready_timeout_bounds_the_wait(deploy_calls):
+    _apply(ReconcileOptions(dry_run=True, ready_timeout_s=30))
+    assert (deploy_calls[0]["wait_ready"], deploy_calls[0]["ready_timeout"]) == (True, 30)
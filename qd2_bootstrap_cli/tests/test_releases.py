@@ -0,0 +1,95 @@
+from pathlib import Path
+
+import pytest
+import yaml
+
+from qd2_bootstrap.models.quditto_deploy_spec import QudittoDeploySpec
+from qd2_bootstrap.utils.ipam import IpamIndex, assign_addresses
+from qd2_bootstrap.utils.releases import QNODE_SET_CHART, build_release_units, release_value_args
+
+TARGET = ("c1", Path("kubeconfig"))
+
+
+def _spec(**setup) -> QudittoDeploySpec:
+    return QudittoDeploySpec.model_validate({
+        "charts": {"repo": "https://example.invalid/"},
+        "namespace": "quditto",
+        "l2sm": {"networks": {"x": {"subnet": "10.10.0.0/24"}}},
+        "qudittoSetup": setup,
+    })
+
+
+def _units(spec: QudittoDeploySpec, **kw):
+    addresses = assign_addresses(spec, IpamIndex.from_dict(spec.l2sm.networks, {}))
+    grouped = {TARGET: list(spec.iter_components())}
+    return build_release_units(grouped, "quditto", addresses=addresses, **kw)[TARGET]
+
+
+def _values_file(unit):
+    set_inline, files = release_value_args(unit)
+    try:
+        assert set_inline == []
+        assert len(files) == 1
+        return yaml.safe_load(files[0].read_text())
+    finally:
+        for f in files:
+            f.unlink()
+
+
+def test_allocated_network_ip_reaches_the_values_file():
+    spec = _spec(qnodes=[{
+        "name": "qn-1", "chart": "qnode-v2", "nodek8s": "w1",
+        "values": {"l2sm": {"enabled": True, "networks": [{"name": "x"}]}},
+    }])
+    (unit,) = _units(spec)
+    values = _values_file(unit)
+    assert values["l2sm"]["networks"] == [{"name": "x", "ip": "10.10.0.1"}]
+    assert values["placement"] == {"useNodeName": True, "nodeName": "w1"}
+
+
+def test_qnode_set_carries_every_member_with_its_address():
+    spec = _spec(qnodes=[
+        {"name": f"qn-{i}", "chart": "qnode-v2", "nodek8s": "w1",
+         "values": {"l2sm": {"enabled": True, "networks": [{"name": "x"}]}}}
+        for i in (1, 2)
+    ])
+    (unit,) = _units(spec, qnode_mode="set")
+    assert unit.chart == QNODE_SET_CHART
+    qnodes = _values_file(unit)["qnodes"]
+    assert [(q["name"], q["l2sm"]["networks"][0]["ip"]) for q in qnodes] == [
+        ("qn-1", "10.10.0.1"),
+        ("qn-2", "10.10.0.2"),
+    ]
+
+
+PROBE_OVERRIDE = {"probes": {"readiness": {"tcpSocket": None, "exec": {"command": ["true"]}}, "startup": None}}
+
+
+def test_nulls_survive_into_the_values_file_in_both_modes():
+    spec = _spec(qnodes=[{"name": "qn-1", "chart": "qnode-v2", "nodek8s": "w1", "values": PROBE_OVERRIDE}])
+    (single,) = _units(spec)
+    assert _values_file(single)["probes"] == PROBE_OVERRIDE["probes"]
+    (qset,) = _units(spec, qnode_mode="set")
+    assert _values_file(qset)["qnodes"][0]["probes"] == PROBE_OVERRIDE["probes"]
+
+
+def _pinned(*versions):
+    return [{"name": f"qn-{i}", "chart": "qnode-v2", "nodek8s": "w1", **({"version": v} if v else {})}
+            for i, v in enumerate(versions)]
+
+
+def test_qnode_set_version_follows_member_pins():
+    (unit,) = _units(_spec(qnodes=_pinned("0.2.0", None, "0.2.0")), qnode_mode="set")
+    assert unit.version == "0.2.0"
+    (unit,) = _units(_spec(qnodes=_pinned(None, None)), qnode_mode="set")
+    assert unit.version is None
+    (unit,) = _units(_spec(qnodes=_pinned("0.2.0")), qnode_mode="set", set_version="0.3.1")
+    assert unit.version == "0.3.1"
+
+
+def test_qnode_set_rejects_conflicting_member_pins():
+    with pytest.raises(ValueError, match="pin different chart versions"):
+        _units(_spec(qnodes=_pinned("0.2.0", "0.3.0")), qnode_mode="set")
+    # An explicit set version settles it
+    (unit,) = _units(_spec(qnodes=_pinned("0.2.0", "0.3.0")), qnode_mode="set", set_version="0.3.1")
+    assert unit.version == "0.3.1"
@@ -0,0 +1,30 @@
+import os
+
+from qd2_bootstrap.utils.render import RenderCache
+
+
+def _fill(cache, keys):
+    for i, key in enumerate(keys):
+        cache.put(key, "x" * 10)
+        os.utime(cache.root / f"{key}.yaml", (1000 + i, 1000 + i))
+
+
+def test_prune_drops_least_recently_used_first(tmp_path):
+    _fill(RenderCache(tmp_path), ["a", "b", "c", "d"])
+    cache = RenderCache(tmp_path, max_entries=2)
+    cache.get("a")  # a hit refreshes the entry
+    assert cache.prune() == 2
+    assert sorted(p.stem for p in tmp_path.glob("*.yaml")) == ["a", "d"]
+
+
+def test_prune_honours_the_byte_limit(tmp_path):
+    _fill(RenderCache(tmp_path), ["a", "b", "c"])
+    assert RenderCache(tmp_path, max_bytes=25).prune() == 1
+    assert sorted(p.stem for p in tmp_path.glob("*.yaml")) == ["b", "c"]
+
+
+def test_prune_keeps_renders_used_by_this_run(tmp_path):
+    cache = RenderCache(tmp_path, max_entries=1)
+    _fill(cache, ["a", "b", "c"])
+    assert cache.prune() == 0
+    assert len(list(tmp_path.glob("*.yaml"))) == 3
@@ -0,0 +1,55 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from qd2_bootstrap.server import ClusterQueue
+
+
+def _recorder():
+    started = []
+    return started, ClusterQueue(lambda run: started.append(run()))
+
+
+def test_same_cluster_jobs_start_in_submission_order():
+    started, q = _recorder()
+    for name, keys in (("a", ["c1"]), ("b", ["c1"]), ("c", ["c2"])):
+        q.submit(keys, lambda name=name: name)
+    assert started == ["a", "c"]
+    assert q.queued() == {"c1": 1}
+    q.release(["c1"])
+    assert started == ["a", "c", "b"]
+
+
+def test_multi_cluster_job_is_not_overtaken():
+    started, q = _recorder()
+    q.submit(["c1"], lambda: "a")
+    q.submit(["c2", "c1"], lambda: "b")
+    q.submit(["c2"], lambda: "c")  # behind b on c2, though c2 is free
+    assert started == ["a"]
+    q.release(["c1"])
+    assert started == ["a", "b"]
+    q.release(["c1", "c2"])
+    assert started == ["a", "b", "c"]
+
+
+def test_backlog_on_one_cluster_does_not_take_every_worker():
+    pool = ThreadPoolExecutor(max_workers=2)
+    q = ClusterQueue(pool.submit)
+    gate, other = threading.Event(), threading.Event()
+
+    def busy():
+        gate.wait(5)
+        q.release(["c1"])
+
+    def free():
+        other.set()
+        q.release(["c2"])
+
+    for _ in range(4):
+        q.submit(["c1"], busy)
+    q.submit(["c2"], free)
+    try:
+        assert other.wait(5), "job on an idle cluster starved behind the c1 backlog"
+    finally:
+        gate.set()
+        q.wait_idle()
+        pool.shutdown()